@@ -200,6 +200,57 @@ def relaunch_in_terminal(original_args: List[str], debug: bool = False) -> None:
         sys.exit(1)
 
 
+def run_dump(args: argparse.Namespace) -> int:
+    """
+    Run the headless --dump export.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        Process exit code
+    """
+    from speakub.core.text_export import dump_book
+    from speakub.utils.config import get_epub_config
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.debug else logging.WARNING,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+
+    epub_path = Path(args.epub)
+    if not epub_path.exists():
+        print(f"Error: EPUB file not found: {epub_path}", file=sys.stderr)
+        return 1
+
+    epub_config = get_epub_config()
+    # Chapters are read with the same limits as in the reader
+    limits = {
+        "max_entry_bytes": epub_config["max_entry_bytes"],
+        "use_mmap": epub_config["use_mmap"],
+    }
+    try:
+        if args.output:
+            with open(
+                Path(args.output).expanduser(), "w", encoding="utf-8"
+            ) as out:
+                dump_book(str(epub_path), out, cols=args.cols,
+                          jobs=args.jobs, **limits)
+        else:
+            dump_book(str(epub_path), sys.stdout, cols=args.cols,
+                      jobs=args.jobs, **limits)
+            sys.stdout.flush()
+    except BrokenPipeError:
+        # Output piped into e.g. `head`; stop quietly
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 0
+    except Exception as e:
+        print(f"Error: Failed to dump {epub_path}: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
 def main(argv: Optional[List[str]] = None) -> None:
     """Main entry point for SpeakUB."""
 
@@ -209,8 +260,34 @@ def main(argv: Optional[List[str]] = None) -> None:
     parser.add_argument("--debug", action="store_true",
                         help="Enable debug logging")
     parser.add_argument("--log-file", help="Path to log file")
+    parser.add_argument(
+        "--rebuild-index",
+        action="store_true",
+        help="Ignore the cached book index and rebuild it",
+    )
+    parser.add_argument(
+        "--dump",
+        action="store_true",
+        help="Render the whole book as plain text instead of opening the reader",
+    )
+    parser.add_argument(
+        "--cols", type=int, default=80, help="Wrap width for --dump (default: 80)"
+    )
+    parser.add_argument(
+        "-o", "--output", help="Write --dump output to a file instead of stdout"
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="Worker processes for --dump (default: number of CPUs)",
+    )
     args = parser.parse_args(argv)
 
+    # ===== Headless export: no desktop entry, no terminal required =====
+    if args.dump:
+        sys.exit(run_dump(args))
+
     # ===== Auto-install desktop entry on first run =====
     from speakub.desktop import check_desktop_installed, install_desktop_entry
 
@@ -260,8 +337,12 @@ def main(argv: Optional[List[str]] = None) -> None:
         print(f"Error: EPUB file not found: {epub_path}", file=sys.stderr)
         sys.exit(1)
 
-    app = EPUBReaderApp(str(epub_path), debug=args.debug,
-                        log_file=args.log_file)
+    app = EPUBReaderApp(
+        str(epub_path),
+        debug=args.debug,
+        log_file=args.log_file,
+        rebuild_index=args.rebuild_index,
+    )
     app.run()
 
 
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Per-book reading statistics index.
+
+Time-left estimates need the amount of text in every chapter, including the
+ones not opened yet. The index is built once per book, in the background,
+from the chapter HTML (with the streaming renderer, so nothing is wrapped or
+displayed). For each spine item it stores characters, CJK-aware word counts
+and the estimated TTS duration at normal speed. Suffix sums over the spine
+make "time left in chapter" and "time left in book" O(1) lookups.
+
+The index is persisted by ProgressTracker next to the reading progress and
+is reused as long as the book file is unchanged.
+"""
+
+import logging
+import re
+from array import array
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from speakub.core.stream_renderer import iter_stream_lines
+
+logger = logging.getLogger(__name__)
+
+# Bump when the stored counts change meaning
+BOOK_STATS_VERSION = 2
+
+# Speaking rates of the TTS voices at +0% speed
+TTS_WORDS_PER_MINUTE = 160
+TTS_CJK_CHARS_PER_MINUTE = 270
+
+# Scripts read one syllable per character: kana, CJK ideographs, hangul
+_CJK_RANGES = (
+    r"\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af"
+    r"\uf900-\ufaff\U00020000-\U0002fa1f"
+)
+_CJK_PATTERN = re.compile(f"[{_CJK_RANGES}]")
+# Runs of letters or digits in other scripts
+_WORD_PATTERN = re.compile(rf"[^\W_{_CJK_RANGES}]+")
+_NON_SPACE_PATTERN = re.compile(r"\S")
+# Image placeholders of the streaming renderer, which are not spoken
+_IMAGE_PATTERN = re.compile(r'\[Image(?:: .*?)? src="[^"]*"\]')
+
+
+def count_text(text: str) -> Tuple[int, int, int]:
+    """
+    Count text the way it is read aloud.
+
+    Every CJK character counts as a word, as do runs of letters and digits
+    in other scripts.
+
+    Args:
+        text: Plain text
+
+    Returns:
+        (non-whitespace characters, CJK characters, other words)
+    """
+    chars = len(_NON_SPACE_PATTERN.findall(text))
+    cjk = len(_CJK_PATTERN.findall(text))
+    words = len(_WORD_PATTERN.findall(text))
+    return chars, cjk, words
+
+
+def tts_seconds(cjk_chars: int, words: int) -> float:
+    """
+    Estimated TTS duration at +0% speed.
+
+    Args:
+        cjk_chars: CJK characters
+        words: Words in other scripts
+
+    Returns:
+        Seconds
+    """
+    return (
+        cjk_chars * 60.0 / TTS_CJK_CHARS_PER_MINUTE
+        + words * 60.0 / TTS_WORDS_PER_MINUTE
+    )
+
+
+def speed_factor(tts_rate: int) -> float:
+    """
+    Playback speed of a TTS rate adjustment.
+
+    Args:
+        tts_rate: Rate in percent (e.g. +20 for 20% faster)
+
+    Returns:
+        Multiple of normal speed
+    """
+    return max(0.1, 1.0 + tts_rate / 100.0)
+
+
+def chapter_counts(html: str) -> Tuple[int, int, int]:
+    """
+    Count the readable text of a chapter.
+
+    Args:
+        html: Chapter HTML
+
+    Returns:
+        (characters, CJK characters, other words)
+    """
+    chars = cjk = words = 0
+    for line in iter_stream_lines(html):
+        if "[Image" in line:
+            line = _IMAGE_PATTERN.sub("", line)
+        if line:
+            line_chars, line_cjk, line_words = count_text(line)
+            chars += line_chars
+            cjk += line_cjk
+            words += line_words
+    return chars, cjk, words
+
+
+class BookStats:
+    """Reading statistics of every spine item, with O(1) time-left queries."""
+
+    def __init__(self, chapters: Iterable[Tuple[str, int, int, int]]):
+        """
+        Build the index.
+
+        Args:
+            chapters: (src, characters, CJK characters, other words) in
+                spine order
+        """
+        self.srcs: List[str] = []
+        self.chars = array("q")
+        self.cjk_chars = array("q")
+        self.words = array("q")
+        self._index: Dict[str, int] = {}
+        seconds: List[float] = []
+        for src, chars, cjk, words in chapters:
+            self._index.setdefault(src, len(self.srcs))
+            self.srcs.append(src)
+            self.chars.append(chars)
+            self.cjk_chars.append(cjk)
+            self.words.append(words)
+            seconds.append(tts_seconds(cjk, words))
+        self.seconds = array("d", seconds)
+        # _after[i]: seconds of every chapter following chapter i
+        self._after = array("d", [0.0]) * len(seconds)
+        total = 0.0
+        for i in range(len(seconds) - 1, -1, -1):
+            self._after[i] = total
+            total += seconds[i]
+        self.total_seconds = total
+
+    def __len__(self) -> int:
+        return len(self.srcs)
+
+    def __contains__(self, src: str) -> bool:
+        return src in self._index
+
+    def chapter_seconds_left(
+        self, src: str, fraction_read: float = 0.0, tts_rate: int = 0
+    ) -> Optional[float]:
+        """
+        Estimated TTS time left in a chapter.
+
+        Args:
+            src: Chapter source path
+            fraction_read: Part of the chapter already read (0.0-1.0)
+            tts_rate: TTS rate adjustment in percent
+
+        Returns:
+            Seconds, or None if the chapter is not indexed
+        """
+        index = self._index.get(src)
+        if index is None:
+            return None
+        fraction_left = 1.0 - min(1.0, max(0.0, fraction_read))
+        return self.seconds[index] * fraction_left / speed_factor(tts_rate)
+
+    def book_seconds_left(
+        self, src: str, fraction_read: float = 0.0, tts_rate: int = 0
+    ) -> Optional[float]:
+        """
+        Estimated TTS time left in the book from a chapter position.
+
+        Args:
+            src: Current chapter source path
+            fraction_read: Part of the current chapter already read (0.0-1.0)
+            tts_rate: TTS rate adjustment in percent
+
+        Returns:
+            Seconds, or None if the chapter is not indexed
+        """
+        chapter_left = self.chapter_seconds_left(src, fraction_read, tts_rate)
+        if chapter_left is None:
+            return None
+        return chapter_left + self._after[self._index[src]] / speed_factor(tts_rate)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable form (see from_dict)."""
+        return {
+            "version": BOOK_STATS_VERSION,
+            "chapters": [
+                [src, self.chars[i], self.cjk_chars[i], self.words[i]]
+                for i, src in enumerate(self.srcs)
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> Optional["BookStats"]:
+        """
+        Restore an index saved with to_dict().
+
+        Returns:
+            The index, or None if the data is from another version or invalid
+        """
+        try:
+            if data.get("version") != BOOK_STATS_VERSION:
+                return None
+            return cls(
+                (str(src), int(chars), int(cjk), int(words))
+                for src, chars, cjk, words in data["chapters"]
+            )
+        except (AttributeError, KeyError, TypeError, ValueError):
+            return None
+
+    @classmethod
+    def build(
+        cls,
+        spine: Iterable[str],
+        read_chapter: Callable[[str], str],
+        should_stop: Optional[Callable[[], bool]] = None,
+    ) -> Optional["BookStats"]:
+        """
+        Count every spine item.
+
+        Args:
+            spine: Chapter source paths in reading order
+            read_chapter: Returns the HTML of a chapter
+            should_stop: Checked between chapters; abandons the build when True
+
+        Returns:
+            The index (unreadable chapters count as empty), or None if stopped
+        """
+        chapters = []
+        for src in spine:
+            if should_stop is not None and should_stop():
+                return None
+            try:
+                counts = chapter_counts(read_chapter(src))
+            except Exception as e:
+                logger.debug(f"Skipping statistics of chapter {src}: {e}")
+                counts = (0, 0, 0)
+            chapters.append((src, *counts))
+        return cls(chapters)
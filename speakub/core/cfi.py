@@ -6,10 +6,9 @@ Source: Ported from epub_cfi.py for Python EPUB reader
 """
 
 import re
-import threading
-import time
+import warnings
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Tuple, Union
-from weakref import WeakKeyDictionary
 
 from bs4 import NavigableString, Tag
 
@@ -76,7 +75,53 @@ class CFI:
 
     @classmethod
     def tokenize(cls, cfi_str: str) -> List[Tuple[str, Any]]:
-        """Tokenize CFI string into components"""
+        """
+        Tokenize CFI string into components.
+
+        Plain CFIs (steps, offsets, indirections, ranges, ids, text
+        assertions and parameters without escapes) are split by a single
+        regular expression; anything else goes through the character state
+        machine of _tokenize_chars(), which produces the same tokens.
+        Results are memoized.
+        """
+        return list(_tokenize_cached(cfi_str.strip()))
+
+    @classmethod
+    def _tokenize_fast(cls, cfi_str: str) -> Optional[List[Tuple[str, Any]]]:
+        """Tokenize a plain CFI with _TOKEN_PATTERN, or return None."""
+        tokens: List[Tuple[str, Any]] = []
+        pos = 0
+        end = len(cfi_str)
+        match = _TOKEN_PATTERN.match
+        while pos < end:
+            m = match(cfi_str, pos)
+            if m is None:
+                return None
+            pos = m.end()
+            kind = m.lastgroup
+            if kind == "step":
+                tokens.append(("/", int(m.group("step"))))
+            elif kind == "offset":
+                tokens.append((":", int(m.group("offset"))))
+            elif kind == "temporal":
+                tokens.append(("~", float(m.group("temporal"))))
+            elif kind == "spatial":
+                tokens.extend(("@", float(v)) for v in m.group("spatial").split(":"))
+            elif kind == "bracket":
+                text, *params = m.group("bracket").split(";")
+                tokens.extend(("[", value) for value in text.split(","))
+                for param in params:
+                    name, value = param.split("=")
+                    tokens.append((f";{name}", value))
+            elif kind == "indirection":
+                tokens.append(("!", None))
+            else:
+                tokens.append((",", None))
+        return tokens
+
+    @classmethod
+    def _tokenize_chars(cls, cfi_str: str) -> List[Tuple[str, Any]]:
+        """Tokenize CFI string character by character (handles escapes)"""
         tokens = []
         state = None
         escape = False
@@ -212,8 +257,29 @@ class CFI:
     def parse(
         cls, cfi: str
     ) -> Union[List[List[CFIPart]], Dict[str, List[List[CFIPart]]]]:
-        """Parse CFI string into structured format"""
-        tokens = cls.tokenize(cls.unwrap(cfi))
+        """
+        Parse CFI string into structured format.
+
+        Results are memoized in a compact immutable form, and every call
+        returns freshly built parts that the caller may modify.
+        """
+        frozen = _parse_cached(cls.unwrap(cfi))
+        if frozen[0] == "range":
+            _, parent, start, end = frozen
+            start_parts = _thaw(start)
+            return {
+                "parent": _thaw(parent),
+                "start": start_parts,
+                "end": start_parts if end is None else _thaw(end),
+            }
+        return _thaw(frozen[1])
+
+    @classmethod
+    def _parse_inner(
+        cls, inner: str
+    ) -> Union[List[List[CFIPart]], Dict[str, List[List[CFIPart]]]]:
+        """Parse an unwrapped CFI string (uncached)"""
+        tokens = cls.tokenize(inner)
 
         # Find comma positions for range CFIs
         comma_positions = [
@@ -305,62 +371,224 @@ class CFI:
 
         return parsed
 
+    @classmethod
+    def sort_key(cls, cfi: Union[str, List, Dict]) -> Tuple:
+        """
+        Compact key of a CFI for sorting and comparison.
+
+        Keys order like compare(): for each indirection group, the step
+        indices, and the offset of the last step when the steps are equal.
+        Range CFIs compare by their start and then by their end point.
+        Keys of CFI strings are memoized.
+
+        Args:
+            cfi: CFI string, or the result of parse()
+
+        Returns:
+            Tuple key
+        """
+        if isinstance(cfi, str):
+            return _sort_key_cached(cfi)
+        start = _point_key(cls.collapse(cfi))
+        end = _point_key(cls.collapse(cfi, True)) if isinstance(cfi, dict) else start
+        return start, end
+
+    @classmethod
+    def sort(cls, cfis: List[str]) -> List[str]:
+        """Sort CFI strings in document order."""
+        return sorted(cfis, key=cls.sort_key)
+
     @classmethod
     def compare(cls, a: Union[str, List, Dict], b: Union[str, List, Dict]) -> int:
         """Compare two CFIs. Returns -1, 0, or 1"""
-        if isinstance(a, str):
-            a = cls.parse(a)
-        if isinstance(b, str):
-            b = cls.parse(b)
-
-        # Handle range CFIs
-        if isinstance(a, dict) or isinstance(b, dict):
-            start_cmp = cls.compare(cls.collapse(a), cls.collapse(b))
-            if start_cmp != 0:
-                return start_cmp
-            return cls.compare(cls.collapse(a, True), cls.collapse(b, True))
-
-        # Compare simple CFIs
-        for i in range(max(len(a), len(b))):
-            parts_a = a[i] if i < len(a) else []
-            parts_b = b[i] if i < len(b) else []
-
-            max_index = max(len(parts_a), len(parts_b)) - 1
-            for j in range(max_index + 1):
-                part_a = parts_a[j] if j < len(parts_a) else None
-                part_b = parts_b[j] if j < len(parts_b) else None
-
-                if not part_a:
-                    return -1
-                if not part_b:
-                    return 1
-
-                if part_a.index > part_b.index:
-                    return 1
-                if part_a.index < part_b.index:
-                    return -1
-
-                if j == max_index:
-                    # Compare offsets for final part
-                    offset_a = part_a.offset or 0
-                    offset_b = part_b.offset or 0
-                    if offset_a > offset_b:
-                        return 1
-                    if offset_a < offset_b:
-                        return -1
-
-        return 0
+        key_a = cls.sort_key(a)
+        key_b = cls.sort_key(b)
+        return (key_a > key_b) - (key_a < key_b)
+
+
+# Tokens of plain CFIs; bracket contents without escapes or separators in
+# parameter values
+_NUMBER = r"\d+(?:\.\d+)?"
+_BRACKET_TEXT = r"[^\^\[\];,=]*"
+_BRACKET_VALUE = r"[^\^\[\];,=]+"
+_TOKEN_PATTERN = re.compile(
+    rf"/(?P<step>\d+)"
+    rf"|:(?P<offset>\d+)"
+    rf"|~(?P<temporal>{_NUMBER})"
+    rf"|@(?P<spatial>{_NUMBER}(?::{_NUMBER})*)"
+    rf"|\[(?P<bracket>{_BRACKET_TEXT}(?:,{_BRACKET_TEXT})*"
+    rf"(?:;{_BRACKET_VALUE}={_BRACKET_TEXT})*)\]"
+    rf"|(?P<indirection>!)"
+    rf"|(?P<range>,)"
+)
+
+# Parsed CFIs are small; bookmark and highlight lists repeat them often
+CFI_CACHE_SIZE = 8192
+
+
+FrozenGroups = Tuple[Tuple[Tuple[Any, ...], ...], ...]
+
+
+def _freeze(groups: List[List[CFIPart]]) -> FrozenGroups:
+    """Immutable form of parsed CFI groups."""
+    return tuple(
+        tuple(
+            (
+                part.index,
+                part.id,
+                part.offset,
+                part.temporal,
+                tuple(part.spatial),
+                tuple(part.text),
+                part.side,
+            )
+            for part in group
+        )
+        for group in groups
+    )
+
+
+def _thaw(frozen: FrozenGroups) -> List[List[CFIPart]]:
+    """Fresh CFI parts from the form made by _freeze()."""
+    return [
+        [
+            CFIPart(index, part_id, offset, temporal, list(spatial), list(text), side)
+            for index, part_id, offset, temporal, spatial, text, side in group
+        ]
+        for group in frozen
+    ]
+
+
+@lru_cache(maxsize=CFI_CACHE_SIZE)
+def _parse_cached(inner: str) -> Tuple[Any, ...]:
+    """Parse result of an unwrapped CFI in immutable form."""
+    parsed = CFI._parse_inner(inner)
+    if isinstance(parsed, dict):
+        end = parsed["end"]
+        return (
+            "range",
+            _freeze(parsed["parent"]),
+            _freeze(parsed["start"]),
+            None if end is parsed["start"] else _freeze(end),
+        )
+    return "simple", _freeze(parsed)
+
+
+@lru_cache(maxsize=CFI_CACHE_SIZE)
+def _tokenize_cached(cfi_str: str) -> Tuple[Tuple[str, Any], ...]:
+    """Tokens of a stripped CFI string."""
+    tokens = CFI._tokenize_fast(cfi_str)
+    if tokens is None:
+        tokens = CFI._tokenize_chars(cfi_str)
+    return tuple(tokens)
+
+
+def _point_key(groups: List[List[CFIPart]]) -> Tuple:
+    """Key of a collapsed CFI (see CFI.sort_key())."""
+    return _frozen_point_key(_freeze(groups))
+
+
+def _frozen_point_key(groups: FrozenGroups) -> Tuple:
+    """
+    Key of a collapsed CFI in frozen form.
+
+    Each group contributes its step indices and the offset of its last
+    step; trailing empty groups compare as missing ones.
+    """
+    keys = [
+        (tuple(part[0] for part in group), group[-1][2] or 0) if group else ((), 0)
+        for group in groups
+    ]
+    while keys and keys[-1] == ((), 0):
+        keys.pop()
+    return tuple(keys)
+
+
+@lru_cache(maxsize=CFI_CACHE_SIZE)
+def _sort_key_cached(cfi: str) -> Tuple:
+    """sort_key() of a CFI string."""
+    frozen = _parse_cached(CFI.unwrap(cfi))
+    if frozen[0] == "range":
+        _, parent, start, end = frozen
+        start_key = _frozen_point_key(parent + start)
+        end_key = start_key if end is None else _frozen_point_key(parent + end)
+        return start_key, end_key
+    point_key = _frozen_point_key(frozen[1])
+    return point_key, point_key
+
+
+class CFIIndex:
+    """
+    Node index of one document for CFI generation and resolution.
+
+    Built in one traversal: the CFI child list of every element (the same
+    lists index_child_nodes() computes) and, for every indexed node, its
+    step index and text offset within its parent's list, plus the first
+    element of every id. Nodes are keyed by id(), which is stable because
+    the index keeps the document alive; it is meant to be owned by the
+    document's ParsedChapter and discarded with it.
+    """
+
+    def __init__(self, document: Any):
+        """
+        Index a document.
+
+        Args:
+            document: Parsed document (BeautifulSoup or Tag)
+        """
+        self.document = document
+        root = document
+        if hasattr(document, "find") and callable(document.find):
+            root = document.find("html") or document
+        self.root = root
+        self._children: Dict[int, List[Any]] = {}
+        # id(node) -> (step index, text offset within its text group)
+        self._positions: Dict[int, Tuple[int, int]] = {}
+        self._elements_by_id: Dict[str, Any] = {}
+        tags = [root] if isinstance(root, Tag) else []
+        if hasattr(root, "descendants"):
+            tags.extend(el for el in root.descendants if isinstance(el, Tag))
+        for tag in tags:
+            element_id = tag.get("id") if tag is not root else None
+            if element_id and element_id not in self._elements_by_id:
+                self._elements_by_id[element_id] = tag
+            indexed = CFIGenerator.index_child_nodes(tag)
+            self._children[id(tag)] = indexed
+            for i, entry in enumerate(indexed):
+                if isinstance(entry, list):
+                    combined_offset = 0
+                    for text_node in entry:
+                        self._positions[id(text_node)] = (i, combined_offset)
+                        combined_offset += len(str(text_node))
+                elif isinstance(entry, (Tag, NavigableString)):
+                    self._positions[id(entry)] = (i, 0)
+
+    def children(self, node: Any) -> List[Any]:
+        """CFI child list of a node (see CFIGenerator.index_child_nodes())."""
+        if isinstance(node, Tag):
+            indexed = self._children.get(id(node))
+            if indexed is not None:
+                return indexed
+        return CFIGenerator.index_child_nodes(node)
+
+    def position(self, node: Any) -> Optional[Tuple[int, int]]:
+        """
+        Step index of a node in its parent's child list.
+
+        Returns:
+            (step index, offset of the node within its text group), or None
+            if the node is not below the indexed root
+        """
+        return self._positions.get(id(node))
+
+    def element_by_id(self, element_id: str) -> Optional[Any]:
+        """First element below the root with an id, like root.find(id=...)."""
+        return self._elements_by_id.get(element_id)
 
 
 class CFIGenerator:
     """Generate CFIs from HTML documents"""
 
-    _indexed_cache: "WeakKeyDictionary[Any, Tuple[List[Any], float]]" = WeakKeyDictionary(
-    )
-    _cache_max_size = 100
-    _cache_ttl = 300  # 5 minutes
-    _lock = threading.Lock()
-
     @staticmethod
     def is_text_node(node: Any) -> bool:
         """Check if node is a text node"""
@@ -371,6 +599,22 @@ class CFIGenerator:
         """Check if node is an element node"""
         return isinstance(node, Tag)
 
+    @classmethod
+    def clear_cache(cls) -> None:
+        """
+        Deprecated no-op, kept for callers of the old node cache.
+
+        Node lookups now go through a CFIIndex, which is dropped with its
+        chapter. The memoized CFI parses are keyed by the CFI string alone,
+        so nothing needs clearing when chapters change.
+        """
+        warnings.warn(
+            "CFIGenerator.clear_cache() is deprecated and does nothing; CFI "
+            "indexes are discarded with their chapter",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+
     @classmethod
     def get_child_nodes(cls, node: Any, include_text: bool = True) -> List[Any]:
         """Get filtered child nodes"""
@@ -388,28 +632,12 @@ class CFIGenerator:
 
     @classmethod
     def index_child_nodes(cls, node: Any) -> List[Any]:
-        """Index child nodes according to CFI rules"""
-        node_id = id(node)
-        current_time = time.time()
-
-        with cls._lock:
-            # Check cache validity
-            if node_id in cls._indexed_cache:
-                cached_data, timestamp = cls._indexed_cache[node_id]
-                if current_time - timestamp < cls._cache_ttl:
-                    return cached_data
-
-            # Clean up expired cache entries if cache is too large
-            if len(cls._indexed_cache) > cls._cache_max_size:
-                expired = [
-                    k
-                    for k, (_, ts) in cls._indexed_cache.items()
-                    if current_time - ts > cls._cache_ttl
-                ]
-                # Clean up half of expired entries
-                for k in expired[: len(expired) // 2]:
-                    del cls._indexed_cache[k]
+        """
+        Index child nodes according to CFI rules.
 
+        Walks the children of the node; use a CFIIndex to look lists up
+        without walking.
+        """
         nodes = cls.get_child_nodes(node)
         if not nodes:
             return []
@@ -447,17 +675,35 @@ class CFIGenerator:
             result.append(node)
 
         result.append("after")  # Virtual node at end
-        cls._indexed_cache[node_id] = (result, current_time)
         return result
 
     @classmethod
-    def clear_cache(cls):
-        """Clear the indexed nodes cache. Should be called when changing chapters."""
-        cls._indexed_cache.clear()
+    def _find_position(cls, parent: Any, node: Any) -> Optional[Tuple[int, int]]:
+        """Step index and text-group offset of a node, by walking its parent."""
+        for i, indexed_node in enumerate(cls.index_child_nodes(parent)):
+            if indexed_node is node:
+                return i, 0
+            if isinstance(indexed_node, list):
+                combined_offset = 0
+                for text_node in indexed_node:
+                    if text_node is node:
+                        return i, combined_offset
+                    combined_offset += len(str(text_node))
+        return None
 
     @classmethod
-    def node_to_parts(cls, node: Any, offset: int = 0) -> List[CFIPart]:
-        """Convert DOM node and offset to CFI parts"""
+    def node_to_parts(
+        cls, node: Any, offset: int = 0, index: Optional[CFIIndex] = None
+    ) -> List[CFIPart]:
+        """
+        Convert DOM node and offset to CFI parts.
+
+        Args:
+            node: Node of the document
+            offset: Character offset within a text node
+            index: Index of the node's document; without one, every step
+                walks the children of the node's ancestors
+        """
         if not node or not hasattr(node, "parent"):
             return []
 
@@ -465,30 +711,12 @@ class CFIGenerator:
         if not parent:
             return []
 
-        indexed = cls.index_child_nodes(parent)
-
-        # Find index of node
-        index = -1
-        text_offset = offset
-
-        for i, indexed_node in enumerate(indexed):
-            if indexed_node == node:
-                index = i
-                break
-            elif isinstance(indexed_node, list) and node in indexed_node:
-                # Node is part of a text group
-                index = i
-                # Calculate offset within the combined text
-                combined_offset = 0
-                for text_node in indexed_node:
-                    if text_node == node:
-                        text_offset = combined_offset + offset
-                        break
-                    combined_offset += len(str(text_node))
-                break
-
-        if index == -1:
+        position = index.position(node) if index is not None else None
+        if position is None:
+            position = cls._find_position(parent, node)
+        if position is None:
             return []
+        step, group_offset = position
 
         # Get node ID if it's an element
         node_id = None
@@ -496,27 +724,42 @@ class CFIGenerator:
             node_id = node.get("id")
 
         part = CFIPart(
-            index=index,
+            index=step,
             id=node_id,
-            offset=text_offset if index % 2 else None,  # Only text nodes get offsets
+            # Only text nodes get offsets
+            offset=group_offset + offset if step % 2 else None,
         )
 
         # Recursively get parent parts
         if parent.name != "html":  # Stop at document root
-            parent_parts = cls.node_to_parts(parent)
+            parent_parts = cls.node_to_parts(parent, index=index)
             return parent_parts + [part]
         else:
             return [part]
 
     @classmethod
-    def generate_cfi(cls, spine_index: int, node: Any, offset: int = 0) -> str:
-        """Generate CFI for a node in a specific spine item"""
+    def generate_cfi(
+        cls,
+        spine_index: int,
+        node: Any,
+        offset: int = 0,
+        index: Optional[CFIIndex] = None,
+    ) -> str:
+        """
+        Generate CFI for a node in a specific spine item.
+
+        Args:
+            spine_index: Spine position of the chapter
+            node: Node of the chapter document
+            offset: Character offset within a text node
+            index: Index of the chapter document (avoids walking the tree)
+        """
         # Create spine reference
         spine_part = CFIPart(index=6)  # Package document
         item_part = CFIPart(index=(spine_index + 1) * 2)  # Spine item
 
         # Get parts for the node
-        node_parts = cls.node_to_parts(node, offset)
+        node_parts = cls.node_to_parts(node, offset, index)
 
         # Combine all parts
         all_parts: List[List[CFIPart]] = (
@@ -532,24 +775,39 @@ class CFIResolver:
     """Resolve CFIs to DOM positions"""
 
     @classmethod
-    def parts_to_node(cls, root_node: Any, parts: List[CFIPart]) -> Dict[str, Any]:
-        """Resolve CFI parts to a DOM node and offset"""
+    def parts_to_node(
+        cls, root_node: Any, parts: List[CFIPart], index: Optional[CFIIndex] = None
+    ) -> Dict[str, Any]:
+        """
+        Resolve CFI parts to a DOM node and offset.
+
+        Args:
+            root_node: Node the path starts from
+            parts: Steps of the path
+            index: Index of the document (avoids walking the tree)
+        """
         current: Any = root_node
 
         # Check for ID shortcut in last part
         if parts and parts[-1].id:
             # Try to find element by ID
-            if hasattr(root_node, "find") and callable(root_node.find):
+            element = None
+            if index is not None and root_node is index.root:
+                element = index.element_by_id(parts[-1].id)
+            elif hasattr(root_node, "find") and callable(root_node.find):
                 element = root_node.find(id=parts[-1].id)
-                if element:
-                    return {"node": element, "offset": 0}
+            if element:
+                return {"node": element, "offset": 0}
 
         # Walk the CFI path
         for part in parts:
             if not current:
                 break
 
-            indexed = CFIGenerator.index_child_nodes(current)
+            if index is not None:
+                indexed = index.children(current)
+            else:
+                indexed = CFIGenerator.index_child_nodes(current)
 
             if part.index >= len(indexed):
                 break
@@ -588,9 +846,21 @@ class CFIResolver:
 
     @classmethod
     def resolve_cfi(
-        cls, document: Any, cfi: str, spine_index: Optional[int] = None
+        cls,
+        document: Any,
+        cfi: str,
+        spine_index: Optional[int] = None,
+        index: Optional[CFIIndex] = None,
     ) -> Optional[Dict[str, Any]]:
-        """Resolve CFI to document position"""
+        """
+        Resolve CFI to document position.
+
+        Args:
+            document: Chapter document
+            cfi: CFI to resolve
+            spine_index: Spine position of the chapter, if known
+            index: Index of the document (avoids walking the tree)
+        """
         parsed: Union[List[List[CFIPart]], Dict[str, List[List[CFIPart]]], None] = (
             CFI.parse(cfi)
         )
@@ -602,9 +872,10 @@ class CFIResolver:
         if not parsed or not parsed[0]:
             return None
 
-        # Skip spine parts if we're already in the right document
+        # Skip spine parts if we're already in the right document; steps
+        # before an indirection always address the package document
         parts = parsed[0]
-        if spine_index is not None and len(parts) >= 2:
+        if (spine_index is not None or len(parsed) > 1) and len(parts) >= 2:
             # Skip package and spine item parts
             parts = parts[2:]
 
@@ -613,10 +884,14 @@ class CFIResolver:
             parts = parts + parsed[1]
 
         # Find document root
-        root: Any = document
-        if hasattr(document, "find") and callable(document.find):
-            html_root = document.find("html")
-            if html_root:
-                root = html_root
-
-        return cls.parts_to_node(root, parts)
+        if index is not None and index.document is document:
+            root: Any = index.root
+        else:
+            index = None
+            root = document
+            if hasattr(document, "find") and callable(document.find):
+                html_root = document.find("html")
+                if html_root:
+                    root = html_root
+
+        return cls.parts_to_node(root, parts, index)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Width-independent chapter text and its wrapped layouts.
+
+html2text runs with wrapping disabled, so its output does not depend on the
+terminal width. A PreparedChapter keeps that output as measured paragraphs
+(one per html2text line, inline markdown markers included), and layout()
+re-runs only the cheap wrapping stage for a given width. Every wrapped line
+records the paragraph and character offset it starts at, which lets the
+reader keep the cursor on the same text across a resize.
+"""
+
+import sys
+from array import array
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple
+
+from speakub.utils.display_width import display_width
+from speakub.utils.line_wrap import MeasuredText
+from speakub.utils.profiling import SPAN_MEASURE, SPAN_WRAP, span
+
+# (paragraph index, character offset) of the first character of a line
+Anchor = Tuple[int, int]
+
+# Anchors are packed into one integer per line; a flat array keeps a large
+# layout free of per-line objects
+_OFFSET_BITS = 32
+
+
+def _pack(paragraph: int, offset: int) -> int:
+    """Pack an anchor into an order-preserving integer."""
+    return (paragraph << _OFFSET_BITS) | offset
+
+
+def _unpack(packed: int) -> Anchor:
+    """Inverse of _pack()."""
+    return packed >> _OFFSET_BITS, packed & ((1 << _OFFSET_BITS) - 1)
+
+
+class ChapterLayout:
+    """Chapter lines wrapped at one width, with the origin of every line."""
+
+    __slots__ = ("width", "lines", "_origins")
+
+    def __init__(self, width: int, lines: List[str], origins: array):
+        """
+        Args:
+            width: Width the lines were wrapped at
+            lines: Wrapped lines
+            origins: Packed anchor of every line (see _pack)
+        """
+        self.width = width
+        self.lines = lines
+        self._origins = origins
+
+    def anchor_at(self, line_index: int) -> Anchor:
+        """
+        Get the text position a line starts at.
+
+        Args:
+            line_index: Index into lines (clamped to the valid range)
+
+        Returns:
+            (paragraph index, character offset)
+        """
+        if not self._origins:
+            return 0, 0
+        line_index = max(0, min(line_index, len(self._origins) - 1))
+        return _unpack(self._origins[line_index])
+
+    def line_at(self, anchor: Anchor) -> int:
+        """
+        Get the line containing a text position.
+
+        Args:
+            anchor: (paragraph index, character offset), e.g. from anchor_at()
+                of a layout at another width
+
+        Returns:
+            Index into lines
+        """
+        return max(0, bisect_right(self._origins, _pack(*anchor)) - 1)
+
+
+class PreparedChapter:
+    """Rendered chapter text measured once, ready to wrap at any width."""
+
+    __slots__ = ("paragraphs", "nbytes", "degraded", "_fit_widths")
+
+    def __init__(self, lines: List[str], keep_fitting_markup: bool = True):
+        """
+        Measure the lines of a rendered chapter.
+
+        Args:
+            lines: Unwrapped lines (html2text output or plain paragraphs)
+            keep_fitting_markup: Keep header and emphasis lines ("#", "*")
+                whole when their full display width fits
+        """
+        # None marks a blank line
+        self.paragraphs: List[Optional[MeasuredText]] = []
+        self._fit_widths: Dict[int, int] = {}
+        self.nbytes = sys.getsizeof(self.paragraphs)
+        # Set when html2text timed out or failed and the text comes from a
+        # fallback; such text must not be persisted as the chapter's render
+        self.degraded = False
+        self.extend(lines, keep_fitting_markup)
+
+    def extend(self, lines: List[str], keep_fitting_markup: bool = True) -> int:
+        """
+        Measure more lines of the chapter (used while it is being streamed).
+
+        Args:
+            lines: Unwrapped lines following the ones already measured
+            keep_fitting_markup: See __init__()
+
+        Returns:
+            Index of the first new paragraph
+        """
+        first = len(self.paragraphs)
+        nbytes = 0
+        with span(SPAN_MEASURE):
+            for line in lines:
+                line = line.rstrip()
+                if not line:
+                    self.paragraphs.append(None)
+                    continue
+                if keep_fitting_markup and line.startswith(("#", "**", "*")):
+                    self._fit_widths[len(self.paragraphs)] = display_width(line)
+                paragraph = MeasuredText(line)
+                self.paragraphs.append(paragraph)
+                nbytes += sys.getsizeof(line) + 4 * len(line)
+        self.nbytes += nbytes
+        return first
+
+    def layout(self, width: int, first_paragraph: int = 0) -> ChapterLayout:
+        """
+        Wrap the chapter at a width.
+
+        Args:
+            width: Maximum display width per line
+            first_paragraph: Wrap only the paragraphs from this index on
+                (origins still refer to the whole chapter)
+
+        Returns:
+            The wrapped lines and their origins
+        """
+        with span(SPAN_WRAP):
+            return self._layout(width, first_paragraph)
+
+    def _layout(self, width: int, first_paragraph: int = 0) -> ChapterLayout:
+        """Wrap the chapter at a width (see layout())."""
+        lines: List[str] = []
+        origins = array("Q")
+        add_line = lines.append
+        add_origin = origins.append
+        fit_widths = self._fit_widths
+        paragraphs = self.paragraphs
+        if first_paragraph:
+            paragraphs = paragraphs[first_paragraph:]
+        for index, paragraph in enumerate(paragraphs, first_paragraph):
+            key = index << _OFFSET_BITS
+            if paragraph is None:
+                add_line("")
+                add_origin(key)
+                continue
+            # Paragraphs narrower than the width need no wrapping
+            if (
+                paragraph.display_width <= width
+                or fit_widths.get(index, width + 1) <= width
+            ):
+                add_line(paragraph.text)
+                add_origin(key)
+                continue
+            text = paragraph.text
+            cumulative = paragraph.cumulative
+            if cumulative is None:
+                starts = paragraph.line_starts(width)
+                lines.extend(paragraph.slice(starts))
+                origins.extend([key | start for start in starts])
+                continue
+            # Inlined MeasuredText.line_starts(): this loop runs once per
+            # output line
+            length = len(text)
+            start = 0
+            base = 0
+            while start < length:
+                end = bisect_right(cumulative, base + width, start)
+                if end == start:
+                    end = start + 1
+                add_line(text[start:end])
+                add_origin(key | start)
+                base = cumulative[end - 1]
+                start = end
+        return ChapterLayout(width, lines, origins)
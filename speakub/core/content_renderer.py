@@ -4,16 +4,71 @@
 Content Renderer - Converts HTML content to text for display.
 """
 
-import re
 import time
 from collections import OrderedDict
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import html2text
 import psutil
-from bs4 import BeautifulSoup
 
-from speakub.utils.text_utils import str_display_width, trace_log
+from speakub.core.chapter_layout import ChapterLayout, PreparedChapter
+from speakub.core.parsed_chapter import ParsedChapter
+from speakub.core.render_cache import RenderCache, content_digest
+from speakub.core.stream_renderer import iter_stream_lines, render_stream_lines
+from speakub.utils.cache import ByteBudgetLRU
+from speakub.utils.display_width import display_width, get_width_cache
+from speakub.utils.profiling import SPAN_HTML2TEXT, span
+from speakub.utils.text_utils import trace_log
+
+# Recently prepared chapters kept for reflow (the current one and its
+# preloaded neighbours)
+PREPARED_CACHE_ITEMS = 4
+PREPARED_CACHE_BYTES = 32 * 1024 * 1024
+
+# Chapters at least this large skip html2text for the streaming renderer
+DEFAULT_STREAM_THRESHOLD_BYTES = 2 * 1024 * 1024
+# html2text is abandoned for the streaming renderer after this long
+DEFAULT_HTML2TEXT_TIMEOUT = 3.0
+# Characters fed to html2text between timeout checks
+HTML2TEXT_CHUNK_CHARS = 64 * 1024
+# Unwrapped lines per batch after the first when rendering incrementally
+INCREMENTAL_BATCH_LINES = 1000
+
+
+class _Html2TextTimeout(Exception):
+    """html2text exceeded its time budget."""
+
+
+def _line_batches(
+    lines: Iterable[str], first_batch: int, batch: int
+) -> Iterator[List[str]]:
+    """
+    Group streamed lines into batches that end at a paragraph break.
+
+    A batch is only cut in front of a non-blank line, so the blank lines it
+    ends with are never the chapter's trailing ones. Those are dropped, as
+    render_stream_lines() does.
+
+    Args:
+        lines: Unwrapped lines in order
+        first_batch: Minimum lines in the first batch
+        batch: Minimum lines in later batches
+
+    Yields:
+        Lists of lines
+    """
+    pending: List[str] = []
+    limit = first_batch
+    for line in lines:
+        if line and pending and not pending[-1] and len(pending) >= limit:
+            yield pending
+            pending = []
+            limit = batch
+        pending.append(line)
+    while pending and not pending[-1]:
+        pending.pop()
+    if pending:
+        yield pending
 
 
 class AdaptiveCache:
@@ -136,16 +191,37 @@ class EPUBTextRenderer(html2text.HTML2Text):
 class ContentRenderer:
     """Renders HTML content to formatted text."""
 
-    def __init__(self, content_width: int = 80, trace: bool = False):
+    def __init__(
+        self,
+        content_width: int = 80,
+        trace: bool = False,
+        render_cache: Optional[RenderCache] = None,
+        stream_threshold_bytes: Optional[int] = DEFAULT_STREAM_THRESHOLD_BYTES,
+        html2text_timeout: Optional[float] = DEFAULT_HTML2TEXT_TIMEOUT,
+    ):
         """
         Initialize content renderer.
 
         Args:
             content_width: Target width for text wrapping
             trace: Enable trace logging
+            render_cache: Cache of rendered lines (defaults to a memory-only cache)
+            stream_threshold_bytes: Render chapters of at least this many
+                characters with the streaming renderer (None: never)
+            html2text_timeout: Seconds after which html2text is abandoned for
+                the streaming renderer (None: no limit)
         """
         self.content_width = content_width
         self.trace = trace
+        self.stream_threshold_bytes = stream_threshold_bytes
+        self.html2text_timeout = html2text_timeout
+        self.render_cache = render_cache if render_cache is not None else RenderCache()
+        # Width-independent form of recent chapters, so a resize only re-wraps
+        self._prepared_cache = ByteBudgetLRU(
+            PREPARED_CACHE_BYTES,
+            max_items=PREPARED_CACHE_ITEMS,
+            sizeof=lambda prepared: prepared.nbytes,
+        )
 
         # Use adaptive cache instead of original OrderedDict
         base_size = self._get_adaptive_cache_size()
@@ -153,9 +229,6 @@ class ContentRenderer:
             max_size=base_size, ttl=300  # 5 minutes TTL
         )
 
-        # Add width cache for performance
-        self._width_cache: Dict[str, int] = {}
-
     def _get_adaptive_cache_size(self) -> int:
         """
         Get adaptive cache size based on system memory.
@@ -202,155 +275,244 @@ class ContentRenderer:
         render_width = width or self.content_width
         render_width = max(20, render_width)  # Minimum width
 
-        # Try primary renderer (html2text)
-        try:
-            renderer = self._get_renderer(render_width)
-            processed_text = renderer.handle(html_content)
-
-            # Clean up the text and split into lines
-            processed_text = processed_text.strip()
-            lines = processed_text.split("\n")
-
-            # Apply our CJK-aware wrapping to all lines
-            lines = self._fix_cjk_line_wrapping(lines, render_width)
-
+        cache_key = self.render_cache.make_key(html_content, render_width)
+        cached = self.render_cache.get(cache_key)
+        if cached is not None:
             trace_log(
-                f"[INFO] Rendered {len(lines)} lines with html2text", self.trace)
-            return lines
+                f"[INFO] Rendered {len(cached)} lines from cache", self.trace)
+            return cached
 
-        except Exception as e:
-            trace_log(
-                f"[WARN] html2text failed: {e}. Using fallback.", self.trace)
-            return self._fallback_render(html_content, render_width)
+        lines, degraded = self._render_uncached(
+            html_content, render_width, cache_key[0]
+        )
+        if not degraded:
+            self.render_cache.put(cache_key, lines)
+        return lines
 
-    def _fix_cjk_line_wrapping(self, lines: List[str], width: int) -> List[str]:
+    def renders_incrementally(self, html_content: str) -> bool:
         """
-        Fix line wrapping issues in html2text output for CJK text.
+        Whether iter_render_batches() may produce a chapter in several batches.
 
-        Args:
-            lines: Original lines from html2text
-            width: Target width
-
-        Returns:
-            Fixed lines with proper CJK wrapping
+        Chapters at the streaming threshold whose prepared form is not kept
+        in memory are streamed, unless their rendered lines are cached.
         """
-        fixed_lines = []
-
-        for line in lines:
-            line = line.rstrip()
-
-            # Preserve empty lines
-            if not line:
-                fixed_lines.append("")
-                continue
+        if (
+            self.stream_threshold_bytes is None
+            or len(html_content) < self.stream_threshold_bytes
+        ):
+            return False
+        return content_digest(html_content) not in self._prepared_cache
+
+    def iter_render_batches(
+        self,
+        html_content: str,
+        width: Optional[int] = None,
+        first_batch_lines: int = 25,
+        batch_lines: int = INCREMENTAL_BATCH_LINES,
+    ) -> Iterator[List[str]]:
+        """
+        Render a chapter in batches of wrapped lines.
 
-            # Preserve markdown formatting lines (headers, etc.)
-            if line.startswith("#") or line.startswith("**") or line.startswith("*"):
-                # For headers and formatted text, still apply wrapping but be more careful
-                if self._get_display_width(line) > width:
-                    wrapped_lines = self._split_text_by_width(line, width)
-                    fixed_lines.extend(wrapped_lines)
-                else:
-                    fixed_lines.append(line)
-                continue
+        Large chapters (see renders_incrementally()) are streamed: the first
+        batch covers at least `first_batch_lines` unwrapped lines, so a
+        screenful can be shown before the rest of the chapter is converted.
+        Other chapters come as a single batch. Either way the batches add up
+        to render_chapter()'s lines, and the result is cached once the last
+        batch has been produced.
 
-            # For all other lines, apply CJK-aware wrapping
-            wrapped_lines = self._split_text_by_width(line, width)
-            fixed_lines.extend(wrapped_lines)
+        Args:
+            html_content: Raw HTML content
+            width: Override default content width
+            first_batch_lines: Minimum unwrapped lines in the first batch
+            batch_lines: Minimum unwrapped lines in later batches
 
-        return fixed_lines
+        Yields:
+            Lists of wrapped lines
+        """
+        render_width = max(20, width or self.content_width)
+        if not self.renders_incrementally(html_content):
+            yield self.render_chapter(html_content, render_width)
+            return
+        cache_key = self.render_cache.make_key(html_content, render_width)
+        cached = self.render_cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
 
-    def _get_display_width(self, text: str) -> int:
+        prepared = PreparedChapter([])
+        all_lines: List[str] = []
+        stream = iter_stream_lines(html_content)
+        for batch in _line_batches(stream, first_batch_lines, batch_lines):
+            first = prepared.extend(batch)
+            lines = prepared.layout(render_width, first).lines
+            all_lines.extend(lines)
+            yield lines
+        trace_log(
+            f"[INFO] Rendered {len(all_lines)} lines incrementally", self.trace)
+        self._prepared_cache.put(cache_key[0], prepared)
+        self.render_cache.put(cache_key, all_lines)
+
+    def layout_chapter(
+        self, html_content: str, width: Optional[int] = None
+    ) -> ChapterLayout:
         """
-        Calculate the display width of text using wcwidth library.
-        This provides consistent and reliable Unicode character width handling.
+        Render a chapter and keep the text position of every line.
+
+        Only the wrapping stage runs if the chapter was prepared recently, so
+        this is cheap enough to call on every resize. The result is not added
+        to the render cache, since most widths seen while resizing are
+        transient.
 
         Args:
-            text: Input text
+            html_content: Raw HTML content
+            width: Override default content width
 
         Returns:
-            Display width
+            Wrapped lines (identical to render_chapter()) and their origins
         """
-        if text in self._width_cache:
-            return self._width_cache[text]
-        width = str_display_width(text)
-        self._width_cache[text] = width
-        return width
+        render_width = max(20, width or self.content_width)
+        return self.prepare_chapter(html_content).layout(render_width)
 
-    def _split_text_by_width(self, text: str, width: int) -> List[str]:
+    def prepare_chapter(self, html_content: str) -> PreparedChapter:
         """
-        Split text into lines based on display width, handling wide characters correctly.
+        Get the width-independent form of a chapter.
 
         Args:
-            text: Input text to split
-            width: Maximum display width per line
+            html_content: Raw HTML content
 
         Returns:
-            List of text lines
+            The chapter's measured paragraphs
         """
-        if not text.strip():
-            return [""]
-
-        lines = []
-        current_line = ""
-        current_width = 0
-
-        # Split by characters instead of words for better CJK handling
-        for char in text:
-            char_width = self._get_display_width(char)
-
-            # Check if adding this character would exceed the width
-            if current_width + char_width > width and current_line:
-                lines.append(current_line)
-                current_line = char
-                current_width = char_width
-            else:
-                current_line += char
-                current_width += char_width
+        return self._prepare(content_digest(html_content), html_content)
+
+    def _prepare(self, digest: str, html_content: str) -> PreparedChapter:
+        """Get a prepared chapter by content digest, preparing it on a miss."""
+        prepared = self._prepared_cache.get(digest)
+        if prepared is None:
+            prepared = self._prepare_uncached(html_content)
+            self._prepared_cache.put(digest, prepared)
+        return prepared
+
+    def _render_uncached(
+        self, html_content: str, render_width: int, digest: Optional[str] = None
+    ) -> Tuple[List[str], bool]:
+        """
+        Render HTML and wrap it at a width.
 
-        # Add the last line if it's not empty
-        if current_line:
-            lines.append(current_line)
+        Returns:
+            (lines, whether html2text was replaced by a fallback)
+        """
+        if digest is None:
+            digest = content_digest(html_content)
+        prepared = self._prepare(digest, html_content)
+        lines = prepared.layout(render_width).lines
+        trace_log(f"[INFO] Rendered {len(lines)} lines", self.trace)
+        return lines, prepared.degraded
+
+    def _prepare_uncached(self, html_content: str) -> PreparedChapter:
+        """
+        Convert HTML with html2text, falling back to the streaming renderer.
 
-        return lines if lines else [""]
+        Chapters at the streaming threshold use the streaming renderer by
+        design. When html2text times out or fails instead, the result is
+        marked degraded so render_chapter() keeps it out of the render cache;
+        it stays in the prepared cache for the session, so resizing does not
+        retry html2text.
+        """
+        if (
+            self.stream_threshold_bytes is not None
+            and len(html_content) >= self.stream_threshold_bytes
+        ):
+            trace_log(
+                f"[INFO] Chapter of {len(html_content)} characters uses the "
+                f"streaming renderer", self.trace)
+            return self._fallback_prepare(html_content)
 
-    def _fallback_render(self, html_content: str, width: int) -> List[str]:
-        """Fallback renderer using BeautifulSoup with improved CJK text handling."""
+        # Try primary renderer (html2text)
         try:
-            soup = BeautifulSoup(html_content, "html.parser")
+            # Wrapping is disabled in html2text, so its output is the same
+            # for every width
+            renderer = self._get_renderer(self.content_width)
+            with span(SPAN_HTML2TEXT):
+                processed_text = self._run_html2text(renderer, html_content)
 
-            # Remove unwanted elements
-            for element in soup(["script", "style", "nav", "header", "footer"]):
-                element.decompose()
+            # Clean up the text and split into lines
+            processed_text = processed_text.strip()
+            return PreparedChapter(processed_text.split("\n"))
 
-            text = soup.get_text()
+        except _Html2TextTimeout:
+            # The abandoned parser holds partial state
+            self._renderer_cache.set(self.content_width, EPUBTextRenderer())
+            trace_log(
+                f"[WARN] html2text exceeded {self.html2text_timeout}s. "
+                f"Using fallback.", self.trace)
+        except Exception as e:
+            trace_log(
+                f"[WARN] html2text failed: {e}. Using fallback.", self.trace)
+        prepared = self._fallback_prepare(html_content)
+        prepared.degraded = True
+        return prepared
+
+    def _run_html2text(self, renderer: EPUBTextRenderer, html_content: str) -> str:
+        """
+        Convert HTML like HTML2Text.handle(), within the time budget.
 
-            # Clean up whitespace while preserving structure
-            text = re.sub(r"\s+", " ", text)  # Normalize whitespace
-            text = text.strip()
+        The HTML is fed in chunks so the elapsed time can be checked between
+        them. Chunks end just before a "<", so every run of text reaches
+        html2text whole (its whitespace handling depends on that) and the
+        result is the same as a single feed.
 
-            lines = []
+        Raises:
+            _Html2TextTimeout: If html2text_timeout elapses
+        """
+        if self.html2text_timeout is None:
+            return renderer.handle(html_content)
+        deadline = time.perf_counter() + self.html2text_timeout
+        renderer.start = True
+        start = 0
+        length = len(html_content)
+        while start < length:
+            end = html_content.find("<", start + HTML2TEXT_CHUNK_CHARS)
+            if end < 0:
+                end = length
+            renderer.feed(html_content[start:end])
+            start = end
+            if time.perf_counter() > deadline:
+                raise _Html2TextTimeout()
+        renderer.feed("")
+        markdown = renderer.optwrap(renderer.finish())
+        if renderer.pad_tables:
+            return html2text.pad_tables_in_text(markdown)
+        return markdown
 
-            # Split into paragraphs
-            paragraphs = text.split("\n")
+    def _get_display_width(self, text: str) -> int:
+        """
+        Calculate the display width of text through the shared width cache.
 
-            for paragraph in paragraphs:
-                paragraph = paragraph.strip()
-                if not paragraph:
-                    lines.append("")
-                    continue
+        Args:
+            text: Input text
 
-                # Use the new width-aware splitting method
-                paragraph_lines = self._split_text_by_width(paragraph, width)
-                lines.extend(paragraph_lines)
+        Returns:
+            Display width
+        """
+        return display_width(text)
 
+    def _fallback_prepare(self, html_content: str) -> PreparedChapter:
+        """Fallback renderer: linear-time streaming conversion keeping blocks."""
+        try:
+            lines = render_stream_lines(html_content)
             trace_log(
                 f"[INFO] Fallback rendered {len(lines)} lines", self.trace)
-            return lines
+            return PreparedChapter(lines)
 
         except Exception as e:
             trace_log(f"[ERROR] Fallback renderer failed: {e}", self.trace)
-            return [f"Error: Could not render chapter content. {e}"]
+            prepared = PreparedChapter(
+                [f"Error: Could not render chapter content. {e}"],
+                keep_fitting_markup=False,
+            )
+            prepared.degraded = True
+            return prepared
 
     def extract_images(self, html_content: str) -> List[Tuple[str, str]]:
         """
@@ -362,18 +524,11 @@ class ContentRenderer:
         Returns:
             List of tuples (image_src, alt_text)
         """
-        images = []
         try:
-            soup = BeautifulSoup(html_content, "html.parser")
-            for img in soup.find_all("img"):
-                src = img.get("src", "")
-                alt = img.get("alt", "")
-                if src:
-                    images.append((src, alt))
+            return ParsedChapter(html_content).images
         except Exception as e:
             trace_log(f"[WARN] Failed to extract images: {e}", self.trace)
-
-        return images
+            return []
 
     def extract_text_for_tts(self, html_content: str) -> str:
         """
@@ -386,25 +541,7 @@ class ContentRenderer:
             Clean text suitable for TTS
         """
         try:
-            soup = BeautifulSoup(html_content, "html.parser")
-
-            # Remove unwanted elements
-            for element in soup(
-                ["script", "style", "nav", "header", "footer", "aside"]
-            ):
-                element.decompose()
-
-            # Get clean text
-            text = soup.get_text()
-
-            # Clean up whitespace and formatting
-            text = re.sub(r"\s+", " ", text)  # Normalize whitespace
-            # Normalize paragraph breaks
-            text = re.sub(r"\n\s*\n", "\n\n", text)
-            text = text.strip()
-
-            return text
-
+            return ParsedChapter(html_content).tts_text
         except Exception as e:
             trace_log(f"[ERROR] Failed to extract TTS text: {e}", self.trace)
             return ""
@@ -435,14 +572,26 @@ class ContentRenderer:
             "estimated_reading_minutes": round(estimated_minutes, 1),
         }
 
-    def get_cache_stats(self) -> Dict[str, float]:
-        """Get cache statistics for monitoring."""
-        return self._renderer_cache.get_stats()
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics for monitoring.
+
+        Returns:
+            Renderer cache stats, with the rendered-lines cache stats under
+            "render_cache" and its overall hit rate as "render_hit_rate", and
+            the display-width cache stats under "width_cache"
+        """
+        stats: Dict[str, Any] = dict(self._renderer_cache.get_stats())
+        render_stats = self.render_cache.get_stats()
+        stats["render_cache"] = render_stats
+        stats["render_hit_rate"] = render_stats["hit_rate"]
+        stats["width_cache"] = get_width_cache().get_stats()
+        return stats
 
     def update_width(self, new_width: int) -> None:
         """Update the content width and clear cache."""
         if self.content_width == new_width:
             return
         self.content_width = max(20, new_width)
-        # No need to clear cache explicitly. The next call to render_chapter
-        # will use the new width and _get_renderer will handle it.
+        # No need to clear caches: rendered lines are keyed by width, and
+        # layout_chapter() re-wraps prepared chapters at the new width.
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Persistent book index cache for EPUB files.
+
+Opening an EPUB re-reads container.xml, re-validates every zip entry and
+re-parses the OPF and NAV/NCX documents. For large books this dominates the
+time-to-first-page, although none of it changes between launches. This module
+stores those results in a small versioned JSON file under ~/.cache/speakub,
+keyed by the book's fingerprint (path, size, mtime and a content hash), so that
+a warm open only needs to read one small file.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the layout of a cached entry changes.
+INDEX_VERSION = 1
+
+INDEX_CACHE_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "speakub", "index")
+
+# Bytes hashed from the start and the end of the file. The tail contains the
+# zip central directory (names, sizes and CRCs of every member).
+_HASH_CHUNK_SIZE = 64 * 1024
+
+
+def compute_fingerprint(epub_path: str) -> Dict[str, Any]:
+    """
+    Compute the cache key of an EPUB file.
+
+    Args:
+        epub_path: Path to the EPUB file
+
+    Returns:
+        Dictionary with absolute path, size, mtime and content hash
+    """
+    st = os.stat(epub_path)
+    digest = hashlib.sha256()
+    with open(epub_path, "rb") as f:
+        digest.update(f.read(_HASH_CHUNK_SIZE))
+        if st.st_size > _HASH_CHUNK_SIZE:
+            f.seek(max(_HASH_CHUNK_SIZE, st.st_size - _HASH_CHUNK_SIZE))
+            digest.update(f.read(_HASH_CHUNK_SIZE))
+
+    return {
+        "path": os.path.abspath(epub_path),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "content_hash": digest.hexdigest(),
+    }
+
+
+class BookIndexCache:
+    """On-disk cache of per-book parsing results."""
+
+    def __init__(self, cache_dir: Optional[str] = None, rebuild: bool = False):
+        """
+        Initialize the index cache.
+
+        Args:
+            cache_dir: Directory holding index files (defaults to
+                ~/.cache/speakub/index)
+            rebuild: Ignore existing entries and rebuild them on next open
+        """
+        self.cache_dir = cache_dir or INDEX_CACHE_DIR
+        self.rebuild = bool(rebuild)
+
+    def _entry_path(self, epub_path: str) -> str:
+        """Return the index file path for an EPUB."""
+        key = hashlib.sha1(
+            os.path.abspath(epub_path).encode("utf-8", errors="surrogateescape")
+        ).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def load(
+        self, epub_path: str, fingerprint: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Load the cached index for an EPUB if it is still valid.
+
+        Args:
+            epub_path: Path to the EPUB file
+            fingerprint: Current fingerprint from compute_fingerprint()
+
+        Returns:
+            Cached entry, or None on miss, version mismatch or stale fingerprint
+        """
+        if self.rebuild:
+            return None
+
+        entry_path = self._entry_path(epub_path)
+        try:
+            with open(entry_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (IOError, ValueError) as e:
+            logger.debug(f"Discarding unreadable index file {entry_path}: {e}")
+            self.invalidate(epub_path)
+            return None
+
+        if not isinstance(entry, dict) or entry.get("version") != INDEX_VERSION:
+            logger.debug(f"Index version mismatch for {epub_path}")
+            return None
+        if entry.get("fingerprint") != fingerprint:
+            logger.debug(f"Index for {epub_path} is stale, rebuilding")
+            return None
+
+        return entry
+
+    def save(self, epub_path: str, entry: Dict[str, Any]) -> bool:
+        """
+        Atomically write the index entry for an EPUB.
+
+        Args:
+            epub_path: Path to the EPUB file
+            entry: Entry to store (must contain a "fingerprint")
+
+        Returns:
+            True if the entry was written
+        """
+        entry = dict(entry)
+        entry["version"] = INDEX_VERSION
+        entry_path = self._entry_path(epub_path)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(
+                dir=self.cache_dir, prefix=".index-", suffix=".tmp"
+            )
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(entry, f, ensure_ascii=False,
+                              separators=(",", ":"))
+                os.replace(tmp_path, entry_path)
+            except BaseException:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+        except (IOError, OSError, TypeError, ValueError) as e:
+            logger.debug(f"Failed to write index for {epub_path}: {e}")
+            return False
+
+        # A rebuilt entry is valid again for subsequent loads.
+        self.rebuild = False
+        return True
+
+    def invalidate(self, epub_path: str) -> bool:
+        """
+        Remove the cached index for an EPUB.
+
+        Returns:
+            True if an index file was removed
+        """
+        try:
+            os.unlink(self._entry_path(epub_path))
+            return True
+        except OSError:
+            return False
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Lazy EPUB item provider.
+
+``ebooklib.epub.read_epub`` decompresses every manifest item (images and fonts
+included) when a book is opened. This module offers an EbookLib-compatible
+item map built from the zip central directory only; an item's bytes are
+decompressed when its content is requested and are not retained afterwards.
+"""
+
+import logging
+import mimetypes
+import os
+import zipfile
+from typing import Callable, Dict, Iterator, List, Optional
+from urllib.parse import unquote
+
+from speakub.core.epub.path_resolver import normalize_zip_path
+from speakub.core.epub.zip_guard import read_entry_guarded
+
+logger = logging.getLogger(__name__)
+
+# Item types, using EbookLib's values so callers can compare with either.
+try:
+    from ebooklib import (
+        ITEM_AUDIO,
+        ITEM_DOCUMENT,
+        ITEM_FONT,
+        ITEM_IMAGE,
+        ITEM_NAVIGATION,
+        ITEM_SCRIPT,
+        ITEM_STYLE,
+        ITEM_UNKNOWN,
+        ITEM_VECTOR,
+        ITEM_VIDEO,
+    )
+except ImportError:
+    ITEM_UNKNOWN = 0
+    ITEM_IMAGE = 1
+    ITEM_STYLE = 2
+    ITEM_SCRIPT = 3
+    ITEM_NAVIGATION = 4
+    ITEM_VECTOR = 5
+    ITEM_FONT = 6
+    ITEM_VIDEO = 7
+    ITEM_AUDIO = 8
+    ITEM_DOCUMENT = 9
+
+_DOCUMENT_MEDIA_TYPES = {"application/xhtml+xml", "text/html"}
+
+_EXTENSION_MEDIA_TYPES = {
+    ".xhtml": "application/xhtml+xml",
+    ".html": "application/xhtml+xml",
+    ".htm": "application/xhtml+xml",
+    ".ncx": "application/x-dtbncx+xml",
+    ".opf": "application/oebps-package+xml",
+    ".css": "text/css",
+    ".svg": "image/svg+xml",
+    ".otf": "font/otf",
+    ".ttf": "font/ttf",
+    ".woff": "font/woff",
+    ".woff2": "font/woff2",
+}
+
+
+def guess_media_type(name: str) -> str:
+    """
+    Guess the media type of a zip member from its extension.
+
+    Args:
+        name: Zip member name
+
+    Returns:
+        Media type, or an empty string if unknown
+    """
+    ext = os.path.splitext(name)[1].lower()
+    if ext in _EXTENSION_MEDIA_TYPES:
+        return _EXTENSION_MEDIA_TYPES[ext]
+    return mimetypes.guess_type(name)[0] or ""
+
+
+def item_type_for_media_type(media_type: str) -> int:
+    """Map a media type to an EbookLib item type."""
+    if media_type in _DOCUMENT_MEDIA_TYPES:
+        return ITEM_DOCUMENT
+    if media_type == "application/x-dtbncx+xml":
+        return ITEM_NAVIGATION
+    if media_type == "text/css":
+        return ITEM_STYLE
+    if media_type == "image/svg+xml":
+        return ITEM_VECTOR
+    if media_type in ("application/javascript", "text/javascript"):
+        return ITEM_SCRIPT
+    major = media_type.split("/", 1)[0]
+    if major == "image":
+        return ITEM_IMAGE
+    if major == "font" or "font" in media_type:
+        return ITEM_FONT
+    if major == "audio":
+        return ITEM_AUDIO
+    if major == "video":
+        return ITEM_VIDEO
+    return ITEM_UNKNOWN
+
+
+class LazyEpubItem:
+    """A zip member whose content is decompressed on demand."""
+
+    __slots__ = ("file_name", "file_size", "_media_type", "_provider")
+
+    def __init__(
+        self,
+        provider: "LazyItemProvider",
+        file_name: str,
+        file_size: int,
+        media_type: Optional[str] = None,
+    ):
+        self._provider = provider
+        self.file_name = file_name
+        self.file_size = file_size
+        self._media_type = media_type
+
+    @property
+    def media_type(self) -> str:
+        """Media type from the manifest, else guessed from the extension."""
+        if self._media_type is None:
+            self._media_type = guess_media_type(self.file_name)
+        return self._media_type
+
+    @media_type.setter
+    def media_type(self, value: str) -> None:
+        self._media_type = value
+
+    def get_type(self) -> int:
+        """Return the EbookLib item type."""
+        return item_type_for_media_type(self.media_type)
+
+    def get_content(self) -> bytes:
+        """Decompress and return the item's bytes."""
+        return self._provider.read(self.file_name)
+
+    @property
+    def content(self) -> bytes:
+        """Raw item bytes (same as get_content())."""
+        return self.get_content()
+
+    def __repr__(self) -> str:
+        return f"<LazyEpubItem {self.file_name} ({self.media_type})>"
+
+
+class LazyItemProvider:
+    """EbookLib-style item lookup backed by an open zip file."""
+
+    def __init__(
+        self,
+        zf: zipfile.ZipFile,
+        manifest: Optional[Dict[str, Dict]] = None,
+        max_entry_bytes: Optional[int] = None,
+        reader: Optional[Callable[[str], bytes]] = None,
+    ):
+        """
+        Build the item map from the zip central directory.
+
+        Args:
+            zf: Open EPUB zip file
+            manifest: Optional OPF manifest (see parse_opf) supplying media types
+            max_entry_bytes: Per-entry decompressed size limit (None disables it)
+            reader: Optional function reading an entry by name, used instead of
+                the zip file (e.g. a memory-mapped reader)
+        """
+        self.zf = zf
+        self.max_entry_bytes = max_entry_bytes
+        self._reader = reader
+        self._items: Dict[str, LazyEpubItem] = {
+            info.filename: LazyEpubItem(self, info.filename, info.file_size)
+            for info in zf.infolist()
+            if not info.filename.endswith("/")
+        }
+        # Built on the first basename lookup
+        self._by_basename: Optional[Dict[str, LazyEpubItem]] = None
+        self.stats = {"items_read": 0, "bytes_decompressed": 0}
+
+        if manifest:
+            self.apply_manifest(manifest)
+
+    def apply_manifest(self, manifest: Dict[str, Dict]) -> None:
+        """
+        Take media types from the OPF manifest where it declares them.
+
+        Args:
+            manifest: Mapping of item id to {"href", "media_type", ...}
+        """
+        for entry in manifest.values():
+            href = entry.get("href")
+            media_type = entry.get("media_type")
+            if not href or not media_type:
+                continue
+            item = self._items.get(normalize_zip_path(unquote(href)))
+            if item is not None:
+                item.media_type = media_type
+
+    def get_items(self) -> Iterator[LazyEpubItem]:
+        """Iterate over all items in zip order."""
+        return iter(self._items.values())
+
+    def get_item(self, name: str) -> Optional[LazyEpubItem]:
+        """
+        Look up an item by full zip path, falling back to its basename.
+
+        Args:
+            name: Zip path or bare file name
+
+        Returns:
+            The item, or None if not found
+        """
+        item = self._items.get(name)
+        if item is None:
+            item = self._basename_map().get(name)
+        return item
+
+    def _basename_map(self) -> Dict[str, LazyEpubItem]:
+        """Map basenames to the first item in zip order carrying them."""
+        if self._by_basename is None:
+            self._by_basename = {}
+            for name, item in self._items.items():
+                self._by_basename.setdefault(os.path.basename(name), item)
+        return self._by_basename
+
+    def names(self) -> List[str]:
+        """Return all item paths."""
+        return list(self._items)
+
+    def read(self, name: str) -> bytes:
+        """
+        Decompress a single item.
+
+        Args:
+            name: Full zip path of the item
+
+        Returns:
+            Item bytes
+        """
+        if self._reader is not None:
+            data = self._reader(name)
+        else:
+            data = read_entry_guarded(self.zf, name, self.max_entry_bytes)
+        self.stats["items_read"] += 1
+        self.stats["bytes_decompressed"] += len(data)
+        return data
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._items or name in self._basename_map()
+
+    def __len__(self) -> int:
+        return len(self._items)
@@ -3,6 +3,8 @@ import logging
 import os
 from typing import Any
 
+from speakub.core.epub.xml_backend import HAS_LXML, etree, find_named, text_of
+
 logger = logging.getLogger(__name__)
 
 try:
@@ -15,11 +17,17 @@ except ImportError:
 
 def extract_book_title(opf: Any, epub_path: str) -> str:
     """Extract book title from OPF metadata with proper whitespace handling"""
-    if HAS_BS4:
-        # BeautifulSoup approach
-        book_title_tag = opf.find("dc:title")
-        if book_title_tag and book_title_tag.text:
-            title = book_title_tag.text.strip()
+    is_lxml_tree = HAS_LXML and isinstance(opf, etree._Element)
+    if HAS_BS4 or is_lxml_tree:
+        # BeautifulSoup approach (lookup rules mirrored for lxml trees)
+        if is_lxml_tree:
+            book_title_tag = find_named(opf, "dc:title", include_self=True)
+            title_text = text_of(book_title_tag) if book_title_tag is not None else ""
+        else:
+            book_title_tag = opf.find("dc:title")
+            title_text = book_title_tag.text if book_title_tag else ""
+        if book_title_tag is not None and title_text:
+            title = title_text.strip()
             if title:
                 logger.debug(f"Extracted book title: '{title}'")
                 return title
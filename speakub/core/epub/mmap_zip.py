@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped zip member access for EPUB files.
+
+zipfile.ZipFile.read() seeks, re-reads the local header and allocates fresh
+buffers on every call. MmapZipReader maps the archive once, locates each
+member's data from the central-directory table that ZipFile already parsed,
+and serves stored members as zero-copy memoryviews and deflated members by
+inflating straight out of the mapped region.
+"""
+
+import logging
+import mmap
+import struct
+import zipfile
+import zlib
+from typing import Dict, List, Optional, Tuple, Union
+
+from speakub.core import SecurityError
+
+logger = logging.getLogger(__name__)
+
+_LOCAL_HEADER = struct.Struct("<4sHHHHHIIIHH")
+_LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+_FLAG_ENCRYPTED = 0x1
+
+
+class MmapZipReader:
+    """Read zip members out of a memory-mapped archive."""
+
+    def __init__(self, path: str, infolist: List[zipfile.ZipInfo]):
+        """
+        Map the archive.
+
+        Args:
+            path: Path to the zip file
+            infolist: Central directory entries (ZipFile.infolist())
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        self._view = memoryview(self._map)
+        self._infos: Dict[str, zipfile.ZipInfo] = {
+            info.filename: info for info in infolist}
+        # name -> (data offset, compressed size); filled on first access
+        self._data_offsets: Dict[str, Tuple[int, int]] = {}
+        self.stats = {"reads": 0, "zero_copy_reads": 0, "bytes_read": 0}
+
+    def supports(self, name: str) -> bool:
+        """Whether a member can be read from the map (unencrypted, stored/deflated)."""
+        info = self._infos.get(name)
+        return (
+            info is not None
+            and not info.flag_bits & _FLAG_ENCRYPTED
+            and info.compress_type in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED)
+        )
+
+    def _locate(self, info: zipfile.ZipInfo) -> Tuple[int, int]:
+        """Return the data offset and compressed size of a member."""
+        cached = self._data_offsets.get(info.filename)
+        if cached is not None:
+            return cached
+
+        offset = info.header_offset
+        header = _LOCAL_HEADER.unpack_from(self._map, offset)
+        if header[0] != _LOCAL_HEADER_SIGNATURE:
+            raise zipfile.BadZipFile(
+                f"Bad local header for {info.filename}")
+        name_len, extra_len = header[9], header[10]
+        data_start = offset + _LOCAL_HEADER.size + name_len + extra_len
+        if data_start + info.compress_size > len(self._map):
+            raise zipfile.BadZipFile(f"Truncated member {info.filename}")
+
+        located = (data_start, info.compress_size)
+        self._data_offsets[info.filename] = located
+        return located
+
+    def read_view(
+        self, name: str, max_bytes: Optional[int] = None
+    ) -> Union[memoryview, bytes]:
+        """
+        Read a member without copying when possible.
+
+        Stored members are returned as a memoryview into the mapping; deflated
+        members are inflated into a new bytes object.
+
+        Args:
+            name: Member name
+            max_bytes: Per-member decompressed size limit (None disables it)
+
+        Returns:
+            memoryview (stored) or bytes (deflated)
+
+        Raises:
+            KeyError: If the member does not exist
+            ValueError: If the member is encrypted or compressed with another
+                method than stored or deflated (see supports())
+            SecurityError: If the member exceeds max_bytes
+            zipfile.BadZipFile: On a corrupt header or CRC mismatch
+        """
+        info = self._infos[name]
+        if not self.supports(name):
+            raise ValueError(f"Unsupported member for mmap access: {name}")
+        if max_bytes and info.file_size > max_bytes:
+            raise SecurityError(
+                f"Zip entry too large: {name} "
+                f"({info.file_size} bytes, max: {max_bytes})"
+            )
+
+        start, size = self._locate(info)
+        raw = self._view[start:start + size]
+
+        if info.compress_type == zipfile.ZIP_STORED:
+            data = raw
+            self.stats["zero_copy_reads"] += 1
+        else:
+            limit = max_bytes + 1 if max_bytes else info.file_size + 1
+            inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+            data = inflater.decompress(raw, limit)
+            if len(data) > info.file_size:
+                if max_bytes and len(data) > max_bytes:
+                    raise SecurityError(
+                        f"Zip entry too large: {name} (exceeded {max_bytes} bytes)"
+                    )
+                raise zipfile.BadZipFile(f"Size mismatch for {name}")
+
+        if zlib.crc32(data) != info.CRC:
+            raise zipfile.BadZipFile(f"Bad CRC-32 for file {name!r}")
+
+        self.stats["reads"] += 1
+        self.stats["bytes_read"] += len(data)
+        return data
+
+    def read(self, name: str, max_bytes: Optional[int] = None) -> bytes:
+        """Read a member into a bytes object (see read_view)."""
+        data = self.read_view(name, max_bytes)
+        if isinstance(data, memoryview):
+            with data:
+                return data.tobytes()
+        return data
+
+    def close(self) -> None:
+        """Unmap the archive; views still held by callers keep it alive."""
+        try:
+            self._view.release()
+            self._map.close()
+        except BufferError:
+            logger.debug("Mapped views still in use; leaving unmap to GC")
+        finally:
+            self._file.close()
@@ -9,7 +9,14 @@ which contains metadata, manifest, and spine information for an EPUB book.
 
 import logging
 import xml.etree.ElementTree as ET
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+
+from speakub.core.epub.xml_backend import (
+    HAS_LXML,
+    find_named,
+    iter_named,
+    parse_xml,
+)
 
 # Try to import BeautifulSoup for HTML parsing, fallback if not available
 try:
@@ -22,13 +29,16 @@ except ImportError:
 logger = logging.getLogger(__name__)
 
 
-def parse_opf(opf_bytes: bytes, basedir: str) -> Tuple[Dict, List[str], str, str]:
+def parse_opf(
+    opf_bytes: bytes, basedir: str, root: Optional[Any] = None
+) -> Tuple[Dict, List[str], str, str]:
     """
     Parses the OPF file to extract the manifest, spine, ncx, and navdoc.
 
     Args:
         opf_bytes: The content of the OPF file as bytes.
         basedir: The base directory of the OPF file.
+        root: Optional OPF tree already parsed by xml_backend.parse_xml().
 
     Returns:
         A tuple containing:
@@ -42,6 +52,12 @@ def parse_opf(opf_bytes: bytes, basedir: str) -> Tuple[Dict, List[str], str, str
     ncx: str = ""
     navdoc: str = ""
 
+    if root is None and HAS_LXML:
+        root = parse_xml(opf_bytes)
+
+    if root is not None:
+        return _parse_opf_lxml(root, basedir)
+
     if HAS_BS4:
         opf = BeautifulSoup(opf_bytes, "xml")
         # Extract manifest
@@ -121,3 +137,45 @@ def parse_opf(opf_bytes: bytes, basedir: str) -> Tuple[Dict, List[str], str, str
 
     logger.debug(f"Successfully parsed spine with {len(spine_order)} items.")
     return manifest, spine_order, ncx, navdoc
+
+
+def _parse_opf_lxml(root: Any, basedir: str) -> Tuple[Dict, List[str], str, str]:
+    """parse_opf() on an lxml tree, matching the BeautifulSoup results."""
+    manifest: Dict[str, Dict] = {}
+    spine_order: List[str] = []
+    ncx: str = ""
+    navdoc: str = ""
+
+    manifest_elem = find_named(root, "manifest", include_self=True)
+    if manifest_elem is not None:
+        for item in iter_named(manifest_elem, "item"):
+            href = f"{basedir}{item.get('href', '')}"
+            item_id = item.get("id")
+            media_type = item.get("media-type", "")
+            properties = item.get("properties", "")
+
+            if item_id:
+                manifest[item_id] = {
+                    "href": href,
+                    "media_type": media_type,
+                    "properties": properties,
+                }
+
+            # Look for NCX and nav documents
+            if media_type == "application/x-dtbncx+xml":
+                ncx = href
+                logger.debug(f"Found NCX file reference: {ncx}")
+            elif properties == "nav":
+                navdoc = href
+                logger.debug(f"Found NAV document reference: {navdoc}")
+
+    spine_elem = find_named(root, "spine", include_self=True)
+    if spine_elem is not None:
+        spine_order = [
+            manifest[i.get("idref")]["href"]
+            for i in iter_named(spine_elem, "itemref")
+            if i.get("idref") in manifest
+        ]
+
+    logger.debug(f"Successfully parsed spine with {len(spine_order)} items.")
+    return manifest, spine_order, ncx, navdoc
@@ -3,19 +3,17 @@
 """
 Path resolution helpers for EPUB parsing.
 
-This module provides functions to handle the complexities of file paths inside an EPUB container:
-- Normalizing paths for consistency (e.g., handling backslashes, relative segments).
-- Generating candidate paths to robustly locate content files (e.g., chapters, images).
-- Finding files within the EPUB zip archive using various strategies (e.g., basename matching).
+This module handles the complexities of file paths inside an EPUB container:
+- Normalizing paths for consistency (e.g., backslashes, relative segments).
+- Resolving manifest, spine and TOC hrefs to zip entries in constant time
+  through a per-book index (HrefResolver), with case-insensitive, path-suffix,
+  extension and basename fallbacks.
 """
 
-import logging
 import os
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional
 from urllib.parse import unquote
 
-logger = logging.getLogger(__name__)
-
 
 def normalize_src_for_matching(src: str) -> str:
     """
@@ -52,84 +50,125 @@ def normalize_zip_path(p: Optional[str]) -> str:
     return p
 
 
-def generate_candidates_for_href(
-    href: Optional[str], opf_dir: str, trace: bool = False
-) -> List[str]:
+_EXTENSIONS_FOR_BARE_HREF = (".xhtml", ".html", ".htm", ".xml")
+
+
+class HrefResolver:
     """
-    Given an href from manifest/spine, produce prioritized candidate zip entry names.
+    Per-book index resolving hrefs to zip entry names.
+
+    Built once from the zip namelist, it maps exact, case-folded, basename and
+    path-suffix keys to entries, so that a lookup costs a few dictionary probes
+    instead of generating candidate lists and scanning the namelist. When
+    several entries share a key, the first one in zip order wins, matching the
+    order in which the old linear scans found them. The index is built on the
+    first lookup, so constructing a resolver at open time is cheap.
     """
-    if not href:
-        return []
-    href_raw = href.strip()
-    # unquote percent-encoding
-    href_unq = unquote(href_raw)
-    candidates: List[str] = []
-
-    # raw normalized
-    candidates.append(normalize_zip_path(href_unq))
-    # strip leading slash
-    candidates.append(normalize_zip_path(href_unq.lstrip("/")))
-
-    # relative to OPF dir
-    if opf_dir:
-        candidates.append(normalize_zip_path(os.path.join(opf_dir, href_unq)))
-        candidates.append(
-            normalize_zip_path(os.path.join(opf_dir, href_unq.lstrip("/")))
-        )
-
-    # common prefixes
-    common_prefixes = ("OEBPS", "OPS", "Content", "content", "EPUB", "html")
-    for prefix in common_prefixes:
-        candidates.append(normalize_zip_path(os.path.join(prefix, href_unq)))
-        candidates.append(
-            normalize_zip_path(os.path.join(prefix, href_unq.lstrip("/")))
-        )
-
-    # try with/without extensions if missing
-    base = href_unq
-    base_no_ext, ext = os.path.splitext(base)
-    if not ext:
-        for e in [".xhtml", ".html", ".htm", ".xml"]:
-            candidates.append(normalize_zip_path(base_no_ext + e))
-            if opf_dir:
-                candidates.append(
-                    normalize_zip_path(os.path.join(opf_dir, base_no_ext + e))
-                )
-            for prefix in common_prefixes:
-                candidates.append(
-                    normalize_zip_path(os.path.join(prefix, base_no_ext + e))
-                )
-
-    # basename only fallback
-    basename = os.path.basename(href_unq)
-    if basename:
-        candidates.append(normalize_zip_path(basename))
-
-    # dedupe preserving order
-    seen = set()
-    out = []
-    for c in candidates:
-        if not c:
-            continue
-        if c in seen:
-            continue
-        seen.add(c)
-        out.append(c)
-    if trace:
-        logger.debug("Candidates for href '%s': %s", href, out)
-    return out
-
-
-def find_in_zip_by_basename(basename: str, zip_namelist: List[str]) -> Optional[str]:
-    if not basename:
+
+    def __init__(self, zip_namelist: Iterable[str], opf_dir: str = ""):
+        """
+        Build the index.
+
+        Args:
+            zip_namelist: Names of all zip entries
+            opf_dir: Directory of the OPF file, which manifest hrefs are relative to
+        """
+        self.opf_dir = normalize_zip_path(opf_dir)
+        self._names: List[str] = [n for n in zip_namelist if not n.endswith("/")]
+        self._exact: Dict[str, str] = {}
+        self._folded: Dict[str, str] = {}
+        self._suffix: Dict[str, str] = {}
+        self._basename: Dict[str, str] = {}
+        self._memo: Dict[str, Optional[str]] = {}
+        self._indexed = False
+        self.stats = {"lookups": 0, "hits": 0, "misses": 0, "fallback_scans": 0}
+
+    def _build_index(self) -> None:
+        """Populate the lookup tables from the namelist."""
+        for name in self._names:
+            self._exact.setdefault(name, name)
+            normalized = normalize_zip_path(name)
+            self._exact.setdefault(normalized, name)
+            folded = normalized.casefold()
+            self._folded.setdefault(folded, name)
+            self._basename.setdefault(os.path.basename(normalized), name)
+            # Every trailing run of path segments, e.g. "text/ch1.xhtml" and
+            # "ch1.xhtml" for "OEBPS/Text/ch1.xhtml"
+            parts = folded.split("/")
+            for i in range(len(parts)):
+                self._suffix.setdefault("/".join(parts[i:]), name)
+        self._indexed = True
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def resolve(self, href: Optional[str]) -> Optional[str]:
+        """
+        Resolve an href to a zip entry name.
+
+        Args:
+            href: Href as found in the manifest, spine, TOC or a document
+
+        Returns:
+            The zip entry name, or None if nothing matches
+        """
+        if not href:
+            return None
+        self.stats["lookups"] += 1
+        if href in self._memo:
+            name = self._memo[href]
+        else:
+            name = self._resolve(href)
+            self._memo[href] = name
+        self.stats["hits" if name is not None else "misses"] += 1
+        return name
+
+    def _resolve(self, href: str) -> Optional[str]:
+        """Uncached lookup; see resolve()."""
+        if not self._indexed:
+            self._build_index()
+        raw = href.strip()
+        if raw in self._exact:
+            return self._exact[raw]
+
+        path = unquote(raw.split("#", 1)[0])
+        keys = [normalize_zip_path(path)]
+        if self.opf_dir:
+            keys.append(normalize_zip_path(
+                os.path.join(self.opf_dir, path.lstrip("/"))))
+
+        # Exact, then case-folded, then path-suffix matches
+        for key in keys:
+            if key in self._exact:
+                return self._exact[key]
+        folded_keys = [k.casefold() for k in keys]
+        for key in folded_keys:
+            if key in self._folded:
+                return self._folded[key]
+        for key in folded_keys:
+            if key in self._suffix:
+                return self._suffix[key]
+
+        # Bare hrefs without an extension
+        base_no_ext, ext = os.path.splitext(folded_keys[0])
+        if not ext:
+            for e in _EXTENSIONS_FOR_BARE_HREF:
+                if base_no_ext + e in self._suffix:
+                    return self._suffix[base_no_ext + e]
+
+        # Basename anywhere in the book
+        basename = os.path.basename(keys[0])
+        if basename in self._basename:
+            return self._basename[basename]
+        if basename.casefold() in self._suffix:
+            return self._suffix[basename.casefold()]
+
+        # Last resort: names ending with the href mid-segment. Rare, so the
+        # linear scan is acceptable; the result is memoized by resolve().
+        if basename:
+            self.stats["fallback_scans"] += 1
+            base_folded = basename.casefold()
+            for name in self._names:
+                if name.casefold().endswith(base_folded):
+                    return name
         return None
-    base_lower = basename.lower()
-    # first try exact matches
-    for name in zip_namelist:
-        if name == basename:
-            return name
-    # then try endswith match (case-insensitive)
-    for name in zip_namelist:
-        if name.lower().endswith("/" + base_lower) or name.lower().endswith(base_lower):
-            return name
-    return None
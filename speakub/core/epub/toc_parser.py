@@ -1,9 +1,20 @@
-
 import logging
 import os
 import re
-from typing import Any, Dict, List
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
+from speakub.core.epub.xml_backend import (
+    HAS_LXML,
+    XML_PARSE_ERRORS,
+    find_named,
+    get_prefixed_attr,
+    is_element,
+    iter_named,
+    parse_xml,
+    pull_parser,
+    text_of,
+)
 from speakub.core.epub_parser import normalize_src_for_matching
 
 logger = logging.getLogger(__name__)
@@ -15,193 +26,428 @@ try:
 except ImportError:
     HAS_BS4 = False
 
+# Matches volume titles like "第X卷" or "Volume X"
+VOLUME_PATTERN = re.compile(r"^(第.*卷|volume\s*\d+)", re.IGNORECASE)
 
-def parse_nav_document_robust(parser, nav_href: str) -> List[Dict[str, str]]:
-    """Parse EPUB3 navigation document using the robust logic from epub-tts.py"""
-    if not HAS_BS4:
-        logger.warning(
-            "BeautifulSoup4 not found, cannot parse nav.xhtml. Skipping.")
-        return []
+# Characters fed to the streaming NCX parser per step
+NCX_FEED_CHUNK = 64 * 1024
 
-    try:
-        nav_content = parser.read_chapter(nav_href)
-        nav_basedir = os.path.dirname(nav_href)
-        nav_soup = BeautifulSoup(nav_content, "xml")
 
-        # Look for the TOC navigation
-        nav_toc = nav_soup.find("nav", attrs={"epub:type": "toc"})
-        if not nav_toc:
-            return []
+def _iter_nav_links(
+    nav_content: str,
+) -> Iterator[Tuple[Optional[str], Optional[str], str]]:
+    """
+    Yield (group header text, href, link text) for each <li> of the toc nav.
 
-        raw_chapters = []
-        list_items = nav_toc.find_all("li")
+    The group header text is None unless the item has a <span>; href is None
+    unless it has an <a>.
+    """
+    root = parse_xml(nav_content) if HAS_LXML else None
+    if root is not None:
+        nav_toc = next(
+            (
+                nav
+                for nav in iter_named(root, "nav", include_self=True)
+                if get_prefixed_attr(nav, "epub:type") == "toc"
+            ),
+            None,
+        )
+        if nav_toc is None:
+            return
+        list_items = list(iter_named(nav_toc, "li"))
         if logger.isEnabledFor(logging.DEBUG):
             logger.debug(f"Found {len(list_items)} <li> items in nav.xhtml")
+        for item in list_items:
+            span_tag = find_named(item, "span")
+            a_tag = find_named(item, "a")
+            yield (
+                text_of(span_tag) if span_tag is not None else None,
+                a_tag.get("href") if a_tag is not None else None,
+                text_of(a_tag) if a_tag is not None else "",
+            )
+        return
+
+    nav_soup = BeautifulSoup(nav_content, "xml")
+
+    # Look for the TOC navigation
+    nav_toc = nav_soup.find("nav", attrs={"epub:type": "toc"})
+    if not nav_toc:
+        return
+
+    list_items = nav_toc.find_all("li")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Found {len(list_items)} <li> items in nav.xhtml")
+    for item in list_items:
+        span_tag = item.find("span")
+        a_tag = item.find("a")
+        yield (
+            span_tag.text if span_tag else None,
+            a_tag.get("href") if a_tag else None,
+            a_tag.text if a_tag else "",
+        )
 
-        for i, item in enumerate(list_items):
-            span_tag = item.find("span")
-            a_tag = item.find("a")
 
-            if span_tag:
-                title = " ".join(span_tag.text.strip().split())
+def iter_nav_document(parser, nav_href: str) -> Iterator[Dict[str, str]]:
+    """
+    Yield the entries of an EPUB3 navigation document one at a time.
+
+    Entries are produced in document order, using the robust logic from
+    epub-tts.py (see parse_nav_document_robust).
+    """
+    if not HAS_BS4 and not HAS_LXML:
+        logger.warning(
+            "BeautifulSoup4 not found, cannot parse nav.xhtml. Skipping.")
+        return
+
+    try:
+        nav_content = parser.read_chapter(nav_href)
+        nav_basedir = os.path.dirname(nav_href)
+
+        for i, (span_text, href, link_text) in enumerate(
+            _iter_nav_links(nav_content)
+        ):
+            if span_text is not None:
+                title = " ".join(span_text.strip().split())
                 if logger.isEnabledFor(logging.DEBUG):
                     logger.debug(
                         f"  item {i}: Found group header (<span>): '{title}'")
-                raw_chapters.append({"type": "group_header", "title": title})
-            elif a_tag and a_tag.get("href"):
-                href = a_tag.get("href")
+                yield {"type": "group_header", "title": title}
+            elif href:
                 # Resolve href relative to the nav document
                 full_path = os.path.normpath(os.path.join(nav_basedir, href)).split(
                     "#"
                 )[0]
-                title = " ".join(a_tag.text.strip().split())
+                title = " ".join(link_text.strip().split())
                 if logger.isEnabledFor(logging.DEBUG):
                     logger.debug(
                         f"  item {i}: Found chapter (<a>): '{title}' -> '{full_path}'"
                     )
-                raw_chapters.append(
-                    {
-                        "type": "chapter",
-                        "title": title,
-                        "src": full_path,
-                        "normalized_src": normalize_src_for_matching(full_path),
-                    }
-                )
-
-        return raw_chapters
+                yield {
+                    "type": "chapter",
+                    "title": title,
+                    "src": full_path,
+                    "normalized_src": normalize_src_for_matching(full_path),
+                }
     except Exception as e:
         if parser.trace:
             if logger.isEnabledFor(logging.DEBUG):
                 logger.debug(f"Failed to parse nav document {nav_href}: {e}")
-        return []
 
 
-def parse_ncx_document_robust(
-    parser, ncx_href: str, basedir: str
-) -> List[Dict[str, Any]]:
-    """
-    Parse EPUB2 NCX document with proper hierarchical structure.
-    Return nested node structure with children attributes directly.
+def parse_nav_document_robust(parser, nav_href: str) -> List[Dict[str, str]]:
+    """Parse EPUB3 navigation document using the robust logic from epub-tts.py"""
+    return list(iter_nav_document(parser, nav_href))
+
+
+def iter_grouped_chapters(raw_chapters: Iterable[Dict]) -> Iterator[Dict]:
     """
-    try:
-        ncx_content = parser.read_chapter(ncx_href)
+    Group a flat chapter list into top-level TOC nodes.
+
+    A group starts at a volume title, a nav group header or a "【...】" title
+    and collects the chapters that follow it. Each top-level node is yielded
+    as soon as it is complete: chapters outside a group immediately, a group
+    when the next group starts or the input ends.
 
-        if HAS_BS4:
-            ncx_soup = BeautifulSoup(ncx_content, "xml")
-            # Only find root-level navPoint elements (direct children of navMap)
-            nav_map = ncx_soup.find("navMap")
-            if not nav_map:
-                return []
+    Args:
+        raw_chapters: Entries from a nav document or the spine
 
-            root_nav_points = nav_map.find_all("navPoint", recursive=False)
+    Yields:
+        Top-level TOC nodes
+    """
+    current_group = None
+
+    for chap in raw_chapters:
+        title = chap["title"]
+        if VOLUME_PATTERN.match(title):
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    f"Creating new group from volume pattern: '{title}'")
+            new_group = {
+                "type": "group",
+                "title": title,
+                "expanded": False,
+                "children": [],
+                "src": chap.get("src"),  # Keep the volume's own link
+            }
+        elif chap.get("type") == "group_header":
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    f"Creating new group from 'group_header': '{title}'")
+            new_group = {
+                "type": "group",
+                "title": title,
+                "expanded": False,
+                "children": [],
+            }
+        elif (
+            chap.get("type") == "chapter"
+            and title.startswith("【")
+            and title.endswith("】")
+        ):
             if logger.isEnabledFor(logging.DEBUG):
                 logger.debug(
-                    f"Found {len(root_nav_points)} root <navPoint> items in toc.ncx"
+                    f"Creating new group from fallback pattern '〈...〉': '{title}'"
                 )
+            new_group = {
+                "type": "group",
+                "title": title,
+                "expanded": False,
+                "children": [],
+            }
+        else:
+            node = {"type": "chapter", "title": title, "src": chap.get("src")}
+            if current_group:
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(
+                        f"  Adding chapter '{title}' "
+                        f"to group '{current_group['title']}'"
+                    )
+                current_group["children"].append(node)
+            else:
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(
+                        f"Adding chapter '{title}' as a top-level node.")
+                yield node
+            continue
+
+        if current_group is not None:
+            yield current_group
+        current_group = new_group
+
+    if current_group is not None:
+        yield current_group
+
+
+def _local_name(tag: str) -> str:
+    """Strip the namespace from an ElementTree tag."""
+    return tag.rsplit("}", 1)[-1]
+
 
-            # Define a regex pattern to match volume titles like "第X卷" or "Volume X"
-            volume_pattern = re.compile(r"^(第.*卷|volume\s*\d+)", re.IGNORECASE)
-
-            # Recursive function to process each navPoint and its children, returning nested structure
-            def parse_nav_point_recursive(nav_point, depth=0):
-                """Recursively parse navPoint, returning nested node structure"""
-                content_tag = nav_point.find("content", recursive=False)
-                nav_label = nav_point.find("navLabel", recursive=False)
-
-                if not content_tag or not nav_label:
-                    return None
-
-                full_path = os.path.normpath(
-                    os.path.join(basedir, content_tag.get("src", ""))
-                ).split("#")[0]
-                title = " ".join(nav_label.text.strip().split())
-
-                # Check if there are child nodes
-                child_nav_points = nav_point.find_all(
-                    "navPoint", recursive=False)
-
-                if child_nav_points:
-                    # This is a group node (has children)
-                    if logger.isEnabledFor(logging.DEBUG):
-                        logger.debug(
-                            f"  {'  ' * depth}Group: '{title}' with {len(child_nav_points)} children"
-                        )
-                    children = []
-                    for child in child_nav_points:
-                        child_node = parse_nav_point_recursive(
-                            child, depth + 1)
-                        if child_node:
-                            children.append(child_node)
-
-                    return {
-                        "type": "group",
-                        "title": title,
-                        "src": full_path,
-                        "expanded": False,
-                        "children": children,
-                    }
+def _make_ncx_node(
+    title: str, full_path: str, children: Optional[List[Dict]], depth: int
+) -> Dict[str, Any]:
+    """Build a group (when children is not None) or chapter node."""
+    if children is not None:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                f"  {'  ' * depth}Group: '{title}' with {len(children)} children"
+            )
+        return {
+            "type": "group",
+            "title": title,
+            "src": full_path,
+            "expanded": False,
+            "children": children,
+        }
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"  {'  ' * depth}Chapter: '{title}' -> '{full_path}'")
+    return {"type": "chapter", "title": title, "src": full_path}
+
+
+def _ncx_node_from_tag(nav_point, basedir: str, depth: int = 0):
+    """Recursively convert a BeautifulSoup navPoint into a nested node."""
+    content_tag = nav_point.find("content", recursive=False)
+    nav_label = nav_point.find("navLabel", recursive=False)
+
+    if not content_tag or not nav_label:
+        return None
+
+    full_path = os.path.normpath(
+        os.path.join(basedir, content_tag.get("src", ""))
+    ).split("#")[0]
+    title = " ".join(nav_label.text.strip().split())
+
+    child_nav_points = nav_point.find_all("navPoint", recursive=False)
+    children = None
+    if child_nav_points:
+        children = []
+        for child in child_nav_points:
+            child_node = _ncx_node_from_tag(child, basedir, depth + 1)
+            if child_node:
+                children.append(child_node)
+    return _make_ncx_node(title, full_path, children, depth)
+
+
+def _ncx_node_from_element(nav_point: ET.Element, basedir: str, depth: int = 0):
+    """Recursively convert an ElementTree/lxml navPoint into a nested node."""
+    content_tag = nav_label = None
+    child_nav_points = []
+    for child in nav_point:
+        if not is_element(child):
+            continue
+        name = _local_name(child.tag)
+        if name == "content" and content_tag is None:
+            content_tag = child
+        elif name == "navLabel" and nav_label is None:
+            nav_label = child
+        elif name == "navPoint":
+            child_nav_points.append(child)
+
+    if content_tag is None or nav_label is None:
+        return None
+
+    full_path = os.path.normpath(
+        os.path.join(basedir, content_tag.get("src", ""))
+    ).split("#")[0]
+    title = " ".join("".join(nav_label.itertext()).strip().split())
+
+    children = None
+    if child_nav_points:
+        children = []
+        for child in child_nav_points:
+            child_node = _ncx_node_from_element(child, basedir, depth + 1)
+            if child_node:
+                children.append(child_node)
+    return _make_ncx_node(title, full_path, children, depth)
+
+
+def _iter_ncx_root_elements(ncx_content: str) -> Iterator[ET.Element]:
+    """
+    Stream the root-level navPoints of the first navMap.
+
+    The document is fed to a pull parser in chunks, so each navPoint is
+    available as soon as its closing tag has been read. Parsing stops at the
+    end of the navMap.
+
+    Raises:
+        ET.ParseError or lxml XMLSyntaxError: If the document is not
+        well-formed XML
+    """
+    pull = pull_parser()
+    in_nav_map = False
+    depth = 0
+
+    def handle_events():
+        nonlocal in_nav_map, depth
+        for event, elem in pull.read_events():
+            name = _local_name(elem.tag)
+            if name == "navMap":
+                if event == "start":
+                    in_nav_map = True
                 else:
-                    # This is a leaf node (chapter)
-                    if logger.isEnabledFor(logging.DEBUG):
-                        logger.debug(
-                            f"  {'  ' * depth}Chapter: '{title}' -> '{full_path}'"
-                        )
-                    return {
-                        "type": "chapter",
-                        "title": title,
-                        "src": full_path,
-                    }
-
-            # Start recursive parsing from root level, return nested results
-            nodes = []
-            for nav_point in root_nav_points:
-                node = parse_nav_point_recursive(nav_point, depth=0)
-                if node:
-                    # Check if this is a volume title, if so create a group
-                    if volume_pattern.match(node["title"]):
-                        if logger.isEnabledFor(logging.DEBUG):
-                            logger.debug(
-                                f"Creating group from volume pattern: '{node['title']}'"
-                            )
-                        # Convert volume title to group, set children to empty
-                        # (since original NCX is flat)
-                        group_node = {
-                            "type": "group",
-                            "title": node["title"],
-                            "src": node["src"],
-                            "expanded": False,
-                            "children": [],
-                        }
-                        nodes.append(group_node)
-                    else:
-                        nodes.append(node)
-
-            # Post-processing: assign non-volume chapters to the nearest volume group
-            processed_nodes = []
-            current_group = None
-
-            for node in nodes:
-                if node["type"] == "group":
-                    # This is a volume group
-                    current_group = node
-                    processed_nodes.append(node)
+                    return True
+            elif name == "navPoint" and in_nav_map:
+                if event == "start":
+                    depth += 1
                 else:
-                    # This is a chapter
-                    if current_group:
-                        # Add chapter to current group
-                        current_group["children"].append(node)
-                    else:
-                        # If no current group, add to top level
-                        processed_nodes.append(node)
-
-            return processed_nodes
+                    depth -= 1
+                    if depth == 0:
+                        root_points.append(elem)
+        return False
+
+    root_points: List[ET.Element] = []
+    text = ncx_content.lstrip("\ufeff")
+    for pos in range(0, len(text), NCX_FEED_CHUNK):
+        pull.feed(text[pos:pos + NCX_FEED_CHUNK])
+        finished = handle_events()
+        while root_points:
+            yield root_points.pop(0)
+        if finished:
+            return
+    pull.close()
+    handle_events()
+    yield from root_points
+
+
+def _iter_ncx_root_nodes(ncx_content: str, basedir: str) -> Iterator[Dict]:
+    """
+    Yield a nested node for each root-level navPoint.
+
+    Well-formed documents are streamed; otherwise BeautifulSoup takes over,
+    skipping the navPoints that were already produced.
+    """
+    seen = 0
+    try:
+        for nav_point in _iter_ncx_root_elements(ncx_content):
+            seen += 1
+            node = _ncx_node_from_element(nav_point, basedir)
+            nav_point.clear()
+            if node:
+                yield node
+        return
+    except XML_PARSE_ERRORS as e:
+        logger.debug(
+            f"Streaming NCX parse stopped after {seen} entries ({e}); "
+            "falling back to BeautifulSoup"
+        )
+
+    if not HAS_BS4:
+        logger.warning(
+            "BeautifulSoup4 not available. NCX parsing will be limited.")
+        return
+
+    ncx_soup = BeautifulSoup(ncx_content, "xml")
+    # Only find root-level navPoint elements (direct children of navMap)
+    nav_map = ncx_soup.find("navMap")
+    if not nav_map:
+        return
+
+    root_nav_points = nav_map.find_all("navPoint", recursive=False)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            f"Found {len(root_nav_points)} root <navPoint> items in toc.ncx")
+    for nav_point in root_nav_points[seen:]:
+        node = _ncx_node_from_tag(nav_point, basedir)
+        if node:
+            yield node
+
+
+def _group_volume_nodes(nodes: Iterable[Dict]) -> Iterator[Dict]:
+    """
+    Assign chapters to the nearest preceding group.
+
+    Volume titles become (empty) groups, since the original NCX is flat.
+    Groups are yielded once the next group starts or the input ends.
+    """
+    current_group = None
+    for node in nodes:
+        if VOLUME_PATTERN.match(node["title"]):
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    f"Creating group from volume pattern: '{node['title']}'")
+            node = {
+                "type": "group",
+                "title": node["title"],
+                "src": node["src"],
+                "expanded": False,
+                "children": [],
+            }
+
+        if node["type"] == "group":
+            if current_group is not None:
+                yield current_group
+            current_group = node
+        elif current_group is not None:
+            current_group["children"].append(node)
         else:
-            logger.warning(
-                "BeautifulSoup4 not available. NCX parsing will be limited.")
-            return []
+            yield node
+
+    if current_group is not None:
+        yield current_group
 
+
+def iter_ncx_document(
+    parser, ncx_href: str, basedir: str
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the top-level nodes of an EPUB2 NCX document incrementally.
+
+    Each node carries its nested children; see parse_ncx_document_robust.
+    """
+    try:
+        ncx_content = parser.read_chapter(ncx_href)
+        yield from _group_volume_nodes(_iter_ncx_root_nodes(ncx_content, basedir))
     except Exception as e:
         if parser.trace:
             if logger.isEnabledFor(logging.DEBUG):
                 logger.debug(f"Failed to parse NCX document {ncx_href}: {e}")
-        return []
+
+
+def parse_ncx_document_robust(
+    parser, ncx_href: str, basedir: str
+) -> List[Dict[str, Any]]:
+    """
+    Parse EPUB2 NCX document with proper hierarchical structure.
+    Return nested node structure with children attributes directly.
+    """
+    return list(iter_ncx_document(parser, ncx_href, basedir))
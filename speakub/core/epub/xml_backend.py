@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+lxml fast path for EPUB package documents.
+
+The OPF, NAV and NCX parsers were written against BeautifulSoup's "xml"
+tree, which is itself built by lxml in recovery mode. When lxml is
+importable the same recovering parser is used directly, and the helpers here
+reproduce BeautifulSoup's lookup rules on the resulting tree:
+
+- find("name") matches an element by local name in any namespace, or by its
+  "prefix:name" qualified form
+- .text joins all descendant text, skipping comments and processing
+  instructions
+- namespaced attributes are addressed as "prefix:name"
+
+Callers fall back to BeautifulSoup (or ElementTree) when HAS_LXML is False
+or parse_xml() returns None.
+"""
+
+import logging
+import xml.etree.ElementTree as ET
+from typing import Iterator, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# XML_PARSE_ERRORS: errors raised by the strict parsers from
+# fromstring() and pull_parser()
+try:
+    from lxml import etree
+
+    HAS_LXML = True
+    XML_PARSE_ERRORS = (ET.ParseError, etree.XMLSyntaxError)
+except ImportError:
+    etree = None
+    HAS_LXML = False
+    XML_PARSE_ERRORS = (ET.ParseError,)
+
+
+def parse_xml(data: Union[bytes, str]):
+    """
+    Parse a package document with lxml in recovery mode.
+
+    Args:
+        data: Document bytes (encoding taken from the declaration) or text
+
+    Returns:
+        Root element, or None if lxml is unavailable or nothing was parsed
+    """
+    if not HAS_LXML:
+        return None
+    try:
+        parser = etree.XMLParser(recover=True)
+        parser.feed(data)
+        return parser.close()
+    except Exception as e:
+        logger.debug(f"lxml could not parse document: {e}")
+        return None
+
+
+def fromstring(data: bytes):
+    """Strictly parse a small XML document (lxml if available, else ElementTree)."""
+    if HAS_LXML:
+        return etree.fromstring(data)
+    return ET.fromstring(data)
+
+
+def pull_parser():
+    """Create an XMLPullParser reporting start/end events (lxml if available)."""
+    if HAS_LXML:
+        return etree.XMLPullParser(events=("start", "end"))
+    return ET.XMLPullParser(events=("start", "end"))
+
+
+def is_element(node) -> bool:
+    """Whether a node is an element (not a comment or processing instruction)."""
+    return isinstance(node.tag, str)
+
+
+def local_name(tag: str) -> str:
+    """Strip the namespace from a tag."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def matches_name(element, name: str) -> bool:
+    """Match an element the way BeautifulSoup's find(name) does."""
+    tag = element.tag
+    if not isinstance(tag, str):
+        return False
+    if not tag.startswith("{"):
+        return tag == name
+    local = local_name(tag)
+    if local == name:
+        return True
+    prefix = element.prefix
+    return bool(prefix) and f"{prefix}:{local}" == name
+
+
+def iter_named(element, name: str, include_self: bool = False) -> Iterator:
+    """Iterate over descendants matching name, in document order."""
+    for node in element.iter():
+        if (include_self or node is not element) and matches_name(node, name):
+            yield node
+
+
+def find_named(element, name: str, include_self: bool = False):
+    """Return the first descendant matching name, or None."""
+    return next(iter_named(element, name, include_self), None)
+
+
+def text_of(element) -> str:
+    """All text inside an element, like BeautifulSoup's .text."""
+    return "".join(element.itertext())
+
+
+def get_prefixed_attr(element, name: str) -> Optional[str]:
+    """
+    Get a namespaced attribute by its "prefix:name" form, e.g. "epub:type".
+
+    The prefix is looked up in the element's in-scope namespace map, as
+    BeautifulSoup does; undeclared prefixes never match.
+    """
+    prefix, _, local = name.partition(":")
+    for key, value in element.attrib.items():
+        if not key.startswith("{"):
+            continue
+        namespace, attr = key[1:].split("}", 1)
+        if attr != local:
+            continue
+        if any(p == prefix and uri == namespace for p, uri in element.nsmap.items()):
+            return value
+    return None
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Zip archive validation for EPUB files.
+
+Open-time checks (entry count, path length and traversal, overall compression
+ratio) are done in a single pass over the central directory. Per-entry limits
+are enforced while an entry is decompressed, so a malicious member is caught
+when it is read instead of pre-scanning the whole archive.
+"""
+
+import logging
+import os
+import zipfile
+from typing import Any, Dict, List, Optional, Tuple
+
+from speakub.core import SecurityError
+
+logger = logging.getLogger(__name__)
+
+_READ_CHUNK_SIZE = 64 * 1024
+
+# Archives already validated in this process, keyed by file identity and the
+# limits the verdict was computed against.
+_verdicts: Dict[Tuple, bool] = {}
+_MAX_VERDICTS = 64
+
+
+def _verdict_key(epub_path: str, limits: Dict[str, Any]) -> Optional[Tuple]:
+    try:
+        st = os.stat(epub_path)
+    except OSError:
+        return None
+    return (
+        os.path.abspath(epub_path),
+        st.st_size,
+        st.st_mtime_ns,
+        tuple(sorted(limits.items())),
+    )
+
+
+def has_cached_verdict(epub_path: str, limits: Dict[str, Any]) -> bool:
+    """
+    Check whether an archive already passed validation under the same limits.
+
+    Args:
+        epub_path: Path to the EPUB file
+        limits: Security limits (see EPUBParser._security_limits)
+
+    Returns:
+        True if validation can be skipped
+    """
+    key = _verdict_key(epub_path, limits)
+    return key is not None and _verdicts.get(key, False)
+
+
+def remember_verdict(epub_path: str, limits: Dict[str, Any]) -> None:
+    """Record that an archive passed validation under the given limits."""
+    key = _verdict_key(epub_path, limits)
+    if key is None:
+        return
+    if len(_verdicts) >= _MAX_VERDICTS:
+        _verdicts.pop(next(iter(_verdicts)))
+    _verdicts[key] = True
+
+
+def validate_archive(
+    zf: zipfile.ZipFile,
+    file_size: int,
+    limits: Dict[str, Any],
+    min_compression_ratio: float = 0.0,
+) -> List[str]:
+    """
+    Validate an EPUB archive in one pass over its central directory.
+
+    Args:
+        zf: Open zip file
+        file_size: Size of the EPUB file on disk
+        limits: Dict with max_files_in_zip, max_path_length and
+            max_uncompressed_ratio
+        min_compression_ratio: Ratio below which a warning is logged
+
+    Returns:
+        The archive namelist
+
+    Raises:
+        SecurityError: If any limit is exceeded
+    """
+    infolist = zf.infolist()
+    if len(infolist) > limits["max_files_in_zip"]:
+        raise SecurityError(f"Too many files in EPUB: {len(infolist)}")
+
+    max_path_length = limits["max_path_length"]
+    namelist: List[str] = []
+    total_uncompressed = 0
+    for info in infolist:
+        name = info.filename
+        if len(name) > max_path_length:
+            raise SecurityError(f"Path too long: {name}")
+        if ".." in name or name.startswith("/"):
+            raise SecurityError(f"Suspicious path: {name}")
+        total_uncompressed += info.file_size
+        namelist.append(name)
+
+    if total_uncompressed > 0 and file_size > 0:
+        compression_ratio = total_uncompressed / file_size
+        if compression_ratio > limits["max_uncompressed_ratio"]:
+            raise SecurityError(
+                "Potentially malicious EPUB: compression ratio "
+                f"{compression_ratio:.1f} exceeds limit "
+                f"{limits['max_uncompressed_ratio']}"
+            )
+        if compression_ratio < min_compression_ratio:
+            logger.warning(
+                f"EPUB has unusually high compression ratio: {compression_ratio:.3f}"
+            )
+
+    return namelist
+
+
+def read_entry_guarded(
+    zf: zipfile.ZipFile, name: str, max_bytes: Optional[int] = None
+) -> bytes:
+    """
+    Read a zip entry, aborting once it decompresses past max_bytes.
+
+    Args:
+        zf: Open zip file
+        name: Entry name
+        max_bytes: Per-entry decompressed size limit (None disables the guard)
+
+    Returns:
+        Entry bytes
+
+    Raises:
+        SecurityError: If the entry exceeds the limit
+        KeyError: If the entry does not exist
+    """
+    if not max_bytes:
+        return zf.read(name)
+
+    info = zf.getinfo(name)
+    if info.file_size > max_bytes:
+        raise SecurityError(
+            f"Zip entry too large: {name} ({info.file_size} bytes, max: {max_bytes})"
+        )
+
+    chunks = []
+    total = 0
+    with zf.open(info) as f:
+        while True:
+            chunk = f.read(_READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            total += len(chunk)
+            if total > max_bytes:
+                raise SecurityError(
+                    f"Zip entry too large: {name} (exceeded {max_bytes} bytes)"
+                )
+            chunks.append(chunk)
+    return b"".join(chunks)
@@ -7,26 +7,38 @@ chapter hrefs inside the EPUB zip.
 
 import logging
 import os
-import re
+import time
 import xml.etree.ElementTree as ET
 import zipfile
-from functools import lru_cache
-from typing import Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from urllib.parse import unquote
 
 from speakub.core import FileSizeError, SecurityError
+from speakub.core.epub.index_cache import BookIndexCache, compute_fingerprint
+from speakub.core.epub.lazy_items import LazyItemProvider
 from speakub.core.epub.metadata_parser import extract_book_title
+from speakub.core.epub.mmap_zip import MmapZipReader
 from speakub.core.epub.opf_parser import parse_opf
 from speakub.core.epub.path_resolver import (
-    find_in_zip_by_basename,
-    generate_candidates_for_href,
+    HrefResolver,
     normalize_src_for_matching,
-    normalize_zip_path,
 )
 from speakub.core.epub.toc_parser import (
+    iter_grouped_chapters,
+    iter_ncx_document,
     parse_nav_document_robust,
-    parse_ncx_document_robust,
 )
+from speakub.core.epub.xml_backend import HAS_LXML, parse_xml
+from speakub.core.epub.xml_backend import fromstring as xml_fromstring
+from speakub.core.epub.zip_guard import (
+    has_cached_verdict,
+    read_entry_guarded,
+    remember_verdict,
+    validate_archive,
+)
+from speakub.core.parsed_chapter import ParsedChapter
+from speakub.utils.cache import ByteBudgetLRU
+from speakub.utils.profiling import SPAN_READ_CHAPTER, span
 
 logger = logging.getLogger(__name__)
 
@@ -41,15 +53,8 @@ except ImportError:
         "BeautifulSoup4 not available. Navigation document parsing will be limited."
     )
 
-# Try to import EbookLib for enhanced EPUB parsing, fallback if not available
-try:
-    import ebooklib
-    from ebooklib import epub
-
-    HAS_EBOOKLIB = True
-except ImportError:
-    HAS_EBOOKLIB = False
-    logger.info("EbookLib not available. Using fallback EPUB parsing methods.")
+# Chapter content cache budget when none is configured
+DEFAULT_CHAPTER_CACHE_BYTES = 32 * 1024 * 1024
 
 
 class EPUBParser:
@@ -61,62 +66,87 @@ class EPUBParser:
     # Min compression ratio (highly compressed files)
     MIN_COMPRESSION_RATIO = 0.01
 
-    def __init__(self, epub_path: str, trace: bool = False):
+    def __init__(
+        self,
+        epub_path: str,
+        trace: bool = False,
+        index_cache: Optional[BookIndexCache] = None,
+        max_entry_bytes: Optional[int] = None,
+        chapter_cache_bytes: int = DEFAULT_CHAPTER_CACHE_BYTES,
+        use_mmap: bool = False,
+        chapter_cache_items: Optional[int] = None,
+    ):
         self.epub_path = epub_path
         self.trace = bool(trace)
+        # Per-entry decompressed size limit enforced while reading (None = off)
+        self.max_entry_bytes = max_entry_bytes
+        # Serve entry reads from a memory map of the archive when enabled
+        self.use_mmap = bool(use_mmap)
+        self._mmap_reader: Optional[MmapZipReader] = None
+        self.index_cache = index_cache
+        self._fingerprint: Optional[Dict[str, Any]] = None
         self.zf: Optional[zipfile.ZipFile] = None
         self.opf_path: Optional[str] = None
         self.opf_dir: str = ""
         self.zip_namelist: List[str] = []
+        # Shared href -> zip entry index used by every read path
+        self.href_resolver: Optional[HrefResolver] = None
 
         # Performance optimizations with LRU cache
         self._opf_cache: Optional[Dict] = None  # Cache for OPF parsing results
         self._toc_cache: Optional[Dict] = None  # Cache for TOC data
-        self._chapter_cache: Dict[str, str] = {}  # Cache for chapter content
-        self._chapter_cache_max_size = 20  # Maximum cached chapters
-
-        # EbookLib integration for enhanced performance
-        self.ebooklib_book: Optional[epub.EpubBook] = None
-        self.ebooklib_available = False
-        self._ebooklib_item_map: Dict[str, epub.EpubItem] = {}
+        # Navigation sources of a TOC started by read_spine_toc()
+        self._toc_sources: Optional[Dict[str, Any]] = None
+        # Decoded chapters (with their parsed trees, once built) keyed by
+        # resolved zip entry, LRU within a byte budget
+        self._chapter_cache = ByteBudgetLRU(
+            chapter_cache_bytes,
+            max_items=chapter_cache_items,
+            sizeof=ParsedChapter.estimated_bytes,
+        )
+
+        # EbookLib-style item map, built lazily from the zip central directory
+        # when the book is opened (see _build_lookup_indexes)
+        self.item_provider: Optional[LazyItemProvider] = None
 
-        # Statistics for EbookLib usage
         self.stats = {
             "total_reads": 0,
-            "ebooklib_success": 0,
-            "legacy_fallback": 0,
-            "results_match": 0,
-            "ebooklib_errors": 0,
+            # Chapter HTML parsed into a tree (see ParsedChapter)
+            "dom_parses": 0,
+            "index_cache_hit": False,
+            "security_verdict_cached": False,
+            "xml_backend": "lxml" if HAS_LXML else "bs4",
+            # Cumulative parse time per package document stage
+            "parse_times_ms": {},
         }
 
-        # Initialize EbookLib if available
-        if HAS_EBOOKLIB:
+    def _build_lookup_indexes(self) -> None:
+        """
+        Build the href resolver, the optional memory-mapped reader and the
+        lazy item map for the open zip.
+
+        Only the central directory is consulted; no item is decompressed until
+        read_chapter() or read_resource() asks for it.
+        """
+        self.href_resolver = HrefResolver(self.zip_namelist, self.opf_dir)
+        if self.use_mmap and self.zf:
             try:
-                self.ebooklib_book = epub.read_epub(epub_path)
-                self.ebooklib_available = True
-                self._build_ebooklib_item_map()
-                logger.debug("EbookLib initialized successfully")
-            except Exception as e:
-                logger.debug(f"EbookLib initialization failed: {e}")
-                self.ebooklib_available = False
-
-        # Update stats with final state
-        self.stats["ebooklib_enabled"] = HAS_EBOOKLIB
-        self.stats["ebooklib_available"] = self.ebooklib_available
-
-    def _build_ebooklib_item_map(self):
-        """Build mapping from file paths to EbookLib items for fast lookup."""
-        if not self.ebooklib_book:
+                self._mmap_reader = MmapZipReader(
+                    self.epub_path, self.zf.infolist())
+            except (OSError, ValueError) as e:
+                logger.debug(f"Memory-mapped reads unavailable: {e}")
+                self._mmap_reader = None
+        if not self.zf:
             return
-
-        for item in self.ebooklib_book.get_items():
-            if hasattr(item, "file_name") and item.file_name:
-                # Store by full path
-                self._ebooklib_item_map[item.file_name] = item
-                # Also store by basename for fallback matching
-                basename = os.path.basename(item.file_name)
-                if basename not in self._ebooklib_item_map:
-                    self._ebooklib_item_map[basename] = item
+        try:
+            manifest = (self._opf_cache or {}).get("manifest")
+            self.item_provider = LazyItemProvider(
+                self.zf, manifest, reader=self._read_entry)
+            logger.debug(
+                "Lazy item map built with %d items", len(self.item_provider))
+        except Exception as e:
+            logger.debug(f"Lazy item map initialization failed: {e}")
+            self.item_provider = None
 
     def open(self) -> None:
         """Open the epub (zip) and locate OPF (container.xml -> rootfile)."""
@@ -128,40 +158,31 @@ class EPUBParser:
                     f"EPUB file too large: {file_size} bytes (max: {self.MAX_FILE_SIZE})"
                 )
 
+            cached_entry = self._load_index_entry()
+
             self.zf = zipfile.ZipFile(self.epub_path, "r")
-            self.zip_namelist = self.zf.namelist()
 
-            # Security check: file count limit
-            if len(self.zip_namelist) > self.MAX_FILES_IN_ZIP:
-                raise SecurityError(
-                    f"Too many files in EPUB: {len(self.zip_namelist)}")
+            if cached_entry is not None:
+                self._restore_index_entry(cached_entry)
+                self._build_lookup_indexes()
+                return
+
+            # Security checks: file count, path length and traversal, and
+            # zip bomb ratio, in one pass; skipped if this exact file already
+            # passed under the same limits
+            limits = self._security_limits()
+            if has_cached_verdict(self.epub_path, limits):
+                self.zip_namelist = self.zf.namelist()
+                self.stats["security_verdict_cached"] = True
+            else:
+                self.zip_namelist = validate_archive(
+                    self.zf, file_size, limits, self.MIN_COMPRESSION_RATIO
+                )
+                remember_verdict(self.epub_path, limits)
 
-            # Security check: path length and traversal protection
-            for name in self.zip_namelist:
-                if len(name) > self.MAX_PATH_LENGTH:
-                    raise SecurityError(f"Path too long: {name}")
-                if ".." in name or name.startswith("/"):
-                    raise SecurityError(f"Suspicious path: {name}")
-
-            # Security check: zip bomb protection
-            total_uncompressed = 0
-            for info in self.zf.filelist:
-                total_uncompressed += info.file_size
-
-            if total_uncompressed > 0:
-                compression_ratio = total_uncompressed / file_size
-                if compression_ratio > self.MAX_UNCOMPRESSED_RATIO:
-                    raise SecurityError(
-                        f"Potentially malicious EPUB: compression ratio {compression_ratio:.1f} "
-                        f"exceeds limit {self.MAX_UNCOMPRESSED_RATIO}"
-                    )
-                if compression_ratio < self.MIN_COMPRESSION_RATIO:
-                    logger.warning(
-                        f"EPUB has unusually high compression ratio: {compression_ratio:.3f}"
-                    )
             # Locate container.xml
             try:
-                container_bytes = self.zf.read("META-INF/container.xml")
+                container_bytes = self._read_entry("META-INF/container.xml")
             except KeyError:
                 # Try case-insensitive search for META-INF/container.xml
                 found = None
@@ -170,12 +191,13 @@ class EPUBParser:
                         found = name
                         break
                 if found:
-                    container_bytes = self.zf.read(found)
+                    container_bytes = self._read_entry(found)
                 else:
                     raise
             # parse container.xml
             try:
-                root = ET.fromstring(container_bytes)
+                start_time = time.perf_counter()
+                root = xml_fromstring(container_bytes)
                 # find rootfile element
                 ns = {"cn": "urn:oasis:names:tc:opendocument:xmlns:container"}
                 rf = root.find(".//cn:rootfile", ns)
@@ -189,6 +211,7 @@ class EPUBParser:
                     raise RuntimeError("rootfile missing full-path attribute")
                 self.opf_path = full_path.replace("\\", "/")
                 self.opf_dir = os.path.dirname(self.opf_path)
+                self._record_parse_time("container", start_time)
                 if logger.isEnabledFor(logging.DEBUG):
                     logger.debug(
                         "Found OPF at '%s', opf_dir='%s'", self.opf_path, self.opf_dir
@@ -196,11 +219,96 @@ class EPUBParser:
             except Exception:
                 logger.exception("Failed to parse container.xml to find OPF")
                 raise
+            self._build_lookup_indexes()
+            self._save_index_entry()
         except Exception:
             logger.exception("Failed to open EPUB zip")
             raise
 
+    def _read_entry(self, name: str) -> bytes:
+        """Read a zip entry, enforcing the per-entry size limit if set."""
+        data = self._read_entry_view(name)
+        if isinstance(data, memoryview):
+            with data:
+                return data.tobytes()
+        return data
+
+    def _read_entry_view(self, name: str):
+        """
+        Read a zip entry, as a zero-copy memoryview for stored entries when
+        memory-mapped reads are enabled, otherwise as bytes.
+        """
+        if self._mmap_reader is not None and self._mmap_reader.supports(name):
+            return self._mmap_reader.read_view(name, self.max_entry_bytes)
+        return read_entry_guarded(self.zf, name, self.max_entry_bytes)
+
+    def _security_limits(self) -> Dict[str, float]:
+        """Return the security limits a cached verdict was computed against."""
+        return {
+            "max_file_size": self.MAX_FILE_SIZE,
+            "max_uncompressed_ratio": self.MAX_UNCOMPRESSED_RATIO,
+            "max_files_in_zip": self.MAX_FILES_IN_ZIP,
+            "max_path_length": self.MAX_PATH_LENGTH,
+        }
+
+    def _load_index_entry(self) -> Optional[Dict[str, Any]]:
+        """Look up this book in the persistent index cache."""
+        if self.index_cache is None:
+            return None
+        try:
+            self._fingerprint = compute_fingerprint(self.epub_path)
+        except OSError as e:
+            logger.debug(f"Cannot fingerprint '{self.epub_path}': {e}")
+            self._fingerprint = None
+            return None
+
+        entry = self.index_cache.load(self.epub_path, self._fingerprint)
+        if entry is None:
+            return None
+
+        security = entry.get("security") or {}
+        if not security.get("passed") or (
+            security.get("limits") != self._security_limits()
+        ):
+            return None
+        if not entry.get("opf_path") or not isinstance(entry.get("namelist"), list):
+            return None
+        return entry
+
+    def _restore_index_entry(self, entry: Dict[str, Any]) -> None:
+        """Populate parser state from a cached index entry."""
+        self.zip_namelist = entry["namelist"]
+        self.opf_path = entry["opf_path"]
+        self.opf_dir = entry.get("opf_dir", os.path.dirname(self.opf_path))
+        self._opf_cache = entry.get("opf")
+        self._toc_cache = entry.get("toc")
+        self.stats["index_cache_hit"] = True
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Loaded book index from cache for '%s'", self.epub_path)
+
+    def _save_index_entry(self) -> None:
+        """Write the current parser state to the persistent index cache."""
+        if self.index_cache is None or self._fingerprint is None:
+            return
+        self.index_cache.save(
+            self.epub_path,
+            {
+                "fingerprint": self._fingerprint,
+                "namelist": self.zip_namelist,
+                "security": {"passed": True, "limits": self._security_limits()},
+                "opf_path": self.opf_path,
+                "opf_dir": self.opf_dir,
+                "opf": self._opf_cache,
+                "toc": self._toc_cache,
+            },
+        )
+
     def close(self) -> None:
+        self.href_resolver = None
+        if self._mmap_reader is not None:
+            self._mmap_reader.close()
+            self._mmap_reader = None
+        self.item_provider = None
         if self.zf:
             try:
                 self.zf.close()
@@ -217,21 +325,23 @@ class EPUBParser:
     def __exit__(self, exc_type, exc_val, exc_tb) -> None:
         self.close()
 
-    @lru_cache(maxsize=50)
     def _read_chapter_from_zip(self, src: str, normalized_zip_path: str) -> str:
         """
-        Cached helper method to read chapter content from zip file.
-        Uses normalized zip path as cache key to improve cache hit rate.
+        Read and decode chapter content from the zip file.
+        Caching is done once, by the chapter cache in read_parsed_chapter.
         """
         if not self.zf:
             raise RuntimeError("EPUB zip not opened")
 
         try:
-            raw = self.zf.read(normalized_zip_path)
+            raw = self._read_entry_view(normalized_zip_path)
             try:
-                text = raw.decode("utf-8")
+                text = str(raw, "utf-8")
             except UnicodeDecodeError:
-                text = raw.decode("utf-8", errors="replace")
+                text = str(raw, "utf-8", errors="replace")
+            finally:
+                if isinstance(raw, memoryview):
+                    raw.release()
             if logger.isEnabledFor(logging.DEBUG):
                 logger.debug("Loaded chapter '%s' from '%s'",
                              src, normalized_zip_path)
@@ -252,6 +362,26 @@ class EPUBParser:
         Returns:
             Chapter content as string
 
+        Raises:
+            FileNotFoundError: If chapter file cannot be found
+            RuntimeError: If EPUB is not opened
+        """
+        return self.read_parsed_chapter(src).html
+
+    def read_parsed_chapter(self, src: str) -> ParsedChapter:
+        """
+        Read a chapter as a ParsedChapter.
+
+        The object is kept in the chapter cache, so its HTML is parsed at most
+        once while it stays cached, and the TTS text, images and CFI index
+        derived from it are shared by every caller.
+
+        Args:
+            src: Chapter source path
+
+        Returns:
+            The chapter's parsed document
+
         Raises:
             FileNotFoundError: If chapter file cannot be found
             RuntimeError: If EPUB is not opened
@@ -260,197 +390,190 @@ class EPUBParser:
         if ".." in src or src.startswith("/"):
             raise SecurityError(f"Invalid chapter path: {src}")
 
-        return self._read_chapter_impl(src)
+        # Check cache first
+        cache_key = self._chapter_cache_key(src)
+        cached = self._chapter_cache.get(cache_key)
+        if cached is not None:
+            logger.debug(f"Chapter '{src}' loaded from cache")
+            return cached
+
+        with span(SPAN_READ_CHAPTER):
+            html_content = self._read_chapter_impl(src)
+        parsed = ParsedChapter(
+            html_content,
+            src=src,
+            on_parse=lambda chapter: self._on_chapter_parsed(cache_key, chapter),
+        )
+        self._add_to_cache(cache_key, parsed)
+        return parsed
+
+    def _on_chapter_parsed(self, cache_key: str, chapter: ParsedChapter) -> None:
+        """Count a chapter parse and charge its tree to the cache budget."""
+        self.stats["dom_parses"] += 1
+        if cache_key in self._chapter_cache:
+            self._chapter_cache.put(cache_key, chapter)
 
     def _read_chapter_impl(self, src: str) -> str:
         """
-        Hybrid read with caching: try EbookLib first for performance, fallback to robust legacy method.
-        Includes chapter content caching for improved performance.
+        Read and decode a chapter: resolve src through the href index (exact,
+        percent-decoded, case-folded, suffix and basename keys) and read the
+        zip entry once.
         """
-        # Check cache first
-        if src in self._chapter_cache:
-            logger.debug(f"Chapter '{src}' loaded from cache")
-            return self._chapter_cache[src]
+        if not self.zf:
+            raise RuntimeError("EPUB zip not opened")
 
         self.stats["total_reads"] += 1
+        name = self.href_resolver.resolve(src)
+        if name is not None:
+            return self._read_chapter_from_zip(src, name)
 
-        # Method 1: Try EbookLib for better performance
-        if self.ebooklib_available:
-            try:
-                ebooklib_result = self._read_chapter_ebooklib(src)
-                if ebooklib_result is not None:
-                    self.stats["ebooklib_success"] += 1
-
-                    # Method 2: Verify result with legacy method for consistency
-                    legacy_result = self._read_chapter_legacy(src)
-
-                    # Compare results
-                    if ebooklib_result == legacy_result:
-                        self.stats["results_match"] += 1
-                        logger.debug(
-                            f"EbookLib result matches legacy for '{src}'")
-                        # Cache the result
-                        self._add_to_cache(src, ebooklib_result)
-                        return ebooklib_result
-                    else:
-                        self.stats["results_differ"] += 1
-                        logger.warning(
-                            f"EbookLib result differs from legacy for '{src}', using legacy"
-                        )
-                        # Cache the verified result
-                        self._add_to_cache(src, legacy_result)
-                        return legacy_result
-
-            except Exception as e:
-                self.stats["ebooklib_errors"] += 1
-                logger.debug(f"EbookLib failed for '{src}': {e}")
-
-        # Method 3: Use legacy method as final fallback
-        self.stats["legacy_fallback"] += 1
-        result = self._read_chapter_legacy(src)
-        # Cache the result
-        self._add_to_cache(src, result)
-        return result
-
-    def _add_to_cache(self, src: str, content: str):
-        """Add chapter content to cache with LRU eviction."""
-        if len(self._chapter_cache) >= self._chapter_cache_max_size:
-            # Remove oldest entry (simple FIFO, could be improved to LRU)
-            oldest_key = next(iter(self._chapter_cache))
-            del self._chapter_cache[oldest_key]
-            logger.debug(f"Cache evicted: {oldest_key}")
-
-        self._chapter_cache[src] = content
-        logger.debug(
-            f"Cached chapter: {src} (cache size: {len(self._chapter_cache)})")
+        logger.error("Chapter file not found for src '%s'", src)
+        raise FileNotFoundError(f"Chapter file not found: {src}")
 
-    def _read_chapter_ebooklib(self, src: str) -> Optional[str]:
+    def _chapter_cache_key(self, src: str) -> str:
         """
-        Read chapter using EbookLib for better performance.
-        Uses the same path resolution strategies as legacy method.
+        Key chapters by resolved zip entry, so different hrefs for the same
+        file share one cache entry.
         """
-        if not self.ebooklib_book:
-            return None
+        if self.href_resolver is not None:
+            name = self.href_resolver.resolve(src)
+            if name is not None:
+                return name
+        return src
+
+    def _add_to_cache(self, key: str, chapter: ParsedChapter):
+        """Add a chapter to the byte-budgeted LRU cache."""
+        self._chapter_cache.put(key, chapter)
+        logger.debug(
+            f"Cached chapter: {key} (cache size: {len(self._chapter_cache)}, "
+            f"{self._chapter_cache.current_bytes} bytes)")
 
-        # Use the same candidate generation logic as legacy method
-        candidates = generate_candidates_for_href(
-            src, self.opf_dir, self.trace)
-
-        # Strategy 1: Try all candidates from legacy path resolution
-        for candidate in candidates:
-            if candidate in self._ebooklib_item_map:
-                item = self._ebooklib_item_map[candidate]
-                if item.get_type() == ebooklib.ITEM_DOCUMENT:
-                    content = item.get_content()
-                    if isinstance(content, bytes):
-                        return content.decode("utf-8", errors="replace")
-                    elif isinstance(content, str):
-                        return content
-
-        # Strategy 2: Try basename matching (same as legacy fallback)
-        basename = os.path.basename(unquote(src or ""))
-        if basename and basename in self._ebooklib_item_map:
-            item = self._ebooklib_item_map[basename]
-            if item.get_type() == ebooklib.ITEM_DOCUMENT:
-                content = item.get_content()
-                if isinstance(content, bytes):
-                    return content.decode("utf-8", errors="replace")
-                elif isinstance(content, str):
-                    return content
-
-        # Strategy 3: Case-insensitive suffix matching (same as legacy last resort)
-        src_lower = (src or "").lower()
-        for item in self.ebooklib_book.get_items():
-            if (
-                item.get_type() == ebooklib.ITEM_DOCUMENT
-                and hasattr(item, "file_name")
-                and item.file_name
-            ):
-                item_name_lower = item.file_name.lower()
-                if item_name_lower.endswith(src_lower) or item_name_lower.endswith(
-                    os.path.basename(src_lower)
-                ):
-                    content = item.get_content()
-                    if isinstance(content, bytes):
-                        return content.decode("utf-8", errors="replace")
-                    elif isinstance(content, str):
-                        return content
-
-        return None
-
-    def _read_chapter_legacy(self, src: str) -> str:
-        """
-        Robust read using legacy method: try multiple candidate zip paths derived from src.
+    def read_resource(self, href: str, base_href: Optional[str] = None) -> bytes:
         """
-        if not self.zf:
-            raise RuntimeError("EPUB zip not opened")
+        Read a non-chapter resource such as an image.
 
-        candidates = generate_candidates_for_href(
-            src, self.opf_dir, self.trace)
-        tried = []
-
-        # Try primary candidates
-        for cand in candidates:
-            tried.append(cand)
-            if cand in self.zip_namelist:
-                try:
-                    return self._read_chapter_from_zip(src, normalize_zip_path(cand))
-                except Exception:
-                    logger.exception(
-                        "Failed to read zip entry '%s' for src '%s'", cand, src
-                    )
+        Only the requested item is decompressed.
 
-        # fallback: basename search (case-insensitive)
-        basename = os.path.basename(unquote(src or ""))
-        if basename:
-            found = find_in_zip_by_basename(basename, self.zip_namelist)
-            if found:
-                tried.append(found)
-                try:
-                    return self._read_chapter_from_zip(src, normalize_zip_path(found))
-                except Exception:
-                    logger.exception(
-                        "Failed to read fallback zip entry '%s' for src '%s'",
-                        found,
-                        src,
-                    )
+        Args:
+            href: Resource href as written in the document
+            base_href: Zip path of the referencing document, if href is relative to it
 
-        # last resort: case-insensitive suffix match using src
-        src_lower = (src or "").lower()
-        for name in self.zip_namelist:
-            if name.lower().endswith(src_lower) or name.lower().endswith(
-                os.path.basename(src_lower)
-            ):
-                tried.append(name)
-                try:
-                    return self._read_chapter_from_zip(src, normalize_zip_path(name))
-                except Exception:
-                    logger.exception(
-                        "Failed to read candidate zip entry '%s' for src '%s'",
-                        name,
-                        src,
-                    )
+        Returns:
+            Resource bytes
 
-        logger.error(
-            "Chapter file not found for src '%s'. Tried: %s", src, tried)
-        raise FileNotFoundError(
-            f"Chapter file not found: {src} (tried: {tried})")
+        Raises:
+            FileNotFoundError: If the resource cannot be found
+            RuntimeError: If EPUB is not opened
+        """
+        if not self.zf:
+            raise RuntimeError("EPUB zip not opened")
+        if href.startswith("/") or (".." in href and base_href is None):
+            raise SecurityError(f"Invalid resource path: {href}")
+
+        name = None
+        if base_href:
+            joined = os.path.normpath(
+                os.path.join(os.path.dirname(base_href), unquote(href))
+            ).replace("\\", "/")
+            if joined.startswith(".."):
+                raise SecurityError(f"Invalid resource path: {href}")
+            name = self.href_resolver.resolve(joined)
+        if name is None:
+            name = self.href_resolver.resolve(href)
+
+        if name is not None:
+            if self.item_provider is not None:
+                return self.item_provider.read(name)
+            return self._read_entry(name)
+
+        raise FileNotFoundError(f"Resource not found: {href}")
 
     def parse_toc(self) -> Dict:
         """
         Parse comprehensive TOC with proper EPUB standard support.
         """
+        if self._toc_cache is not None:
+            return self._toc_cache
+
         try:
-            return self.extract_structured_toc()
+            toc = self.extract_structured_toc()
         except Exception as e:
             logger.warning(f"Structured TOC extraction failed: {e}")
             return self._spine_fallback_toc()
 
+        self._toc_cache = toc
+        self._save_index_entry()
+        return toc
+
     def extract_structured_toc(self) -> Dict:
         """
         Extract structured TOC following EPUB standards.
         Priority: nav.xhtml (EPUB3) → toc.ncx (EPUB2) → spine fallback
         """
+        toc, sources = self._begin_toc()
+        for _ in self._build_toc_nodes(toc, sources):
+            pass
+        return toc
+
+    def read_spine_toc(self) -> Dict:
+        """
+        Get TOC data that is usable before the navigation document is parsed.
+
+        Returns the cached TOC when there is one. Otherwise only the OPF is
+        read: the result has the book title and spine order but no nodes,
+        and can be completed in place with iter_toc_nodes().
+
+        Returns:
+            TOC data dictionary (see parse_toc)
+        """
+        if self._toc_cache is not None:
+            return self._toc_cache
+        toc, self._toc_sources = self._begin_toc()
+        return toc
+
+    def iter_toc_nodes(self, toc: Dict) -> Iterator[Dict]:
+        """
+        Complete a TOC from read_spine_toc() incrementally.
+
+        Top-level nodes are appended to toc["nodes"] and yielded as soon as
+        each one is complete; raw_chapters and toc_source are filled in along
+        the way. Once exhausted, toc holds what parse_toc() would return and
+        becomes the cached TOC.
+
+        Args:
+            toc: Dictionary returned by read_spine_toc()
+
+        Yields:
+            Top-level TOC nodes
+        """
+        if toc is self._toc_cache:
+            yield from list(toc["nodes"])
+            return
+
+        sources = self._toc_sources
+        self._toc_sources = None
+        try:
+            if sources is None:
+                fresh, sources = self._begin_toc()
+                toc.update(fresh)
+            yield from self._build_toc_nodes(toc, sources)
+        except Exception as e:
+            logger.warning(f"Structured TOC extraction failed: {e}")
+            if not toc["nodes"]:
+                toc.update(self._spine_fallback_toc())
+                yield from list(toc["nodes"])
+            return
+
+        self._toc_cache = toc
+        self._save_index_entry()
+
+    def _begin_toc(self) -> Tuple[Dict, Dict[str, Any]]:
+        """
+        Read the OPF and set up an empty TOC.
+
+        Returns:
+            (TOC data without nodes, {"navdoc", "ncx", "basedir"})
+        """
         if not self.zf or not self.opf_path:
             raise RuntimeError("EPUB not properly opened")
 
@@ -458,7 +581,7 @@ class EPUBParser:
             logger.debug("--- Starting TOC Build Process ---")
 
         try:
-            opf_bytes = self.zf.read(self.opf_path)
+            opf_bytes = self._read_entry(self.opf_path)
             if logger.isEnabledFor(logging.DEBUG):
                 logger.debug(f"Found OPF file path: {self.opf_path}")
         except KeyError:
@@ -468,13 +591,21 @@ class EPUBParser:
                     found = name
                     break
             if found:
-                opf_bytes = self.zf.read(found)
+                opf_bytes = self._read_entry(found)
                 self.opf_path = found
                 self.opf_dir = os.path.dirname(found)
+                if self.href_resolver is not None:
+                    self.href_resolver = HrefResolver(
+                        self.zip_namelist, self.opf_dir)
             else:
                 raise FileNotFoundError(f"OPF file not found: {self.opf_path}")
 
-        if HAS_BS4:
+        start_time = time.perf_counter()
+        # One lxml tree serves both the title and the manifest/spine
+        lxml_root = parse_xml(opf_bytes) if HAS_LXML else None
+        if lxml_root is not None:
+            opf = lxml_root
+        elif HAS_BS4:
             opf = BeautifulSoup(opf_bytes.decode(
                 "utf-8", errors="replace"), "xml")
         else:
@@ -484,69 +615,69 @@ class EPUBParser:
         basedir = os.path.dirname(self.opf_path)
         basedir = f"{basedir}/" if basedir else ""
 
-        _, spine_order, ncx, navdoc = parse_opf(opf_bytes, basedir)
+        manifest, spine_order, ncx, navdoc = parse_opf(
+            opf_bytes, basedir, root=lxml_root)
+        self._record_parse_time("opf", start_time)
+        self._opf_cache = {
+            "manifest": manifest,
+            "spine_order": spine_order,
+            "ncx": ncx,
+            "navdoc": navdoc,
+        }
+        if self.item_provider is not None:
+            self.item_provider.apply_manifest(manifest)
 
         if logger.isEnabledFor(logging.DEBUG):
             logger.debug(
                 f"Successfully parsed spine with {len(spine_order)} items.")
 
-        raw_chapters = []
-        toc_source = "None"
+        toc = {
+            "book_title": book_title,
+            "nodes": [],
+            "spine_order": spine_order,
+            "toc_source": "None",
+            "raw_chapters": [],
+        }
+        return toc, {"navdoc": navdoc, "ncx": ncx, "basedir": basedir}
+
+    def _build_toc_nodes(
+        self, toc: Dict, sources: Dict[str, Any]
+    ) -> Iterator[Dict]:
+        """Fill in toc from the navigation sources, yielding top-level nodes."""
+        navdoc, ncx, basedir = sources["navdoc"], sources["ncx"], sources["basedir"]
+        raw_chapters: List[Dict] = []
 
         if navdoc:
+            start_time = time.perf_counter()
             raw_chapters = parse_nav_document_robust(self, navdoc)
+            self._record_parse_time("nav", start_time)
             if raw_chapters:
-                toc_source = "nav.xhtml"
+                toc["toc_source"] = "nav.xhtml"
                 if logger.isEnabledFor(logging.DEBUG):
-                    logger.debug(f"--- Parsing TOC from {toc_source} ---")
+                    logger.debug("--- Parsing TOC from nav.xhtml ---")
                 has_groups = any(
                     chap.get("type") == "group_header" for chap in raw_chapters
                 )
                 if not has_groups and ncx:
-                    nodes = parse_ncx_document_robust(self, ncx, basedir)
-                    if nodes:
-                        toc_source = "toc.ncx"
+                    if (yield from self._build_ncx_nodes(toc, ncx, basedir)):
                         if logger.isEnabledFor(logging.DEBUG):
                             logger.debug(
-                                f"--- nav.xhtml is flat, falling back to {toc_source} ---"
-                            )
-                        raw_chapters = self._flatten_toc_nodes_for_raw_list(
-                            nodes)
-                        return {
-                            "book_title": book_title,
-                            "nodes": nodes,
-                            "spine_order": spine_order,
-                            "toc_source": toc_source,
-                            "raw_chapters": raw_chapters,
-                        }
+                                "--- nav.xhtml is flat, fell back to toc.ncx ---")
+                        return
 
         if not raw_chapters and ncx:
-            nodes = parse_ncx_document_robust(self, ncx, basedir)
-            if nodes:
-                toc_source = "toc.ncx"
+            if (yield from self._build_ncx_nodes(toc, ncx, basedir)):
                 if logger.isEnabledFor(logging.DEBUG):
                     logger.debug(
-                        f"--- nav.xhtml parsing failed or empty, trying {toc_source} ---"
+                        "--- TOC Build Process Finished. Final source: toc.ncx ---"
                     )
-                raw_chapters = self._flatten_toc_nodes_for_raw_list(nodes)
-                if logger.isEnabledFor(logging.DEBUG):
-                    logger.debug(
-                        f"--- TOC Build Process Finished. Final source: {toc_source} ---"
-                    )
-                return {
-                    "book_title": book_title,
-                    "nodes": nodes,
-                    "spine_order": spine_order,
-                    "toc_source": toc_source,
-                    "raw_chapters": raw_chapters,
-                }
+                return
 
-        if not raw_chapters and spine_order:
-            toc_source = "spine"
+        if not raw_chapters and toc["spine_order"]:
+            toc["toc_source"] = "spine"
             if logger.isEnabledFor(logging.DEBUG):
-                logger.debug(
-                    f"--- No TOC found, falling back to {toc_source} ---")
-            for s in spine_order:
+                logger.debug("--- No TOC found, falling back to spine ---")
+            for s in toc["spine_order"]:
                 title = os.path.basename(s)
                 title = os.path.splitext(title)[0]
                 title = title.replace("_", " ").replace("-", " ")
@@ -564,84 +695,50 @@ class EPUBParser:
                     }
                 )
 
-        nodes = []
-        current_group = None
+        toc["raw_chapters"] = raw_chapters
         if logger.isEnabledFor(logging.DEBUG):
             logger.debug("--- Finalizing Node Structure (Grouping) ---")
-
-        # 定義一個正規表示式來匹配 "第X卷" 或 "Volume X" 等模式
-        volume_pattern = re.compile(r"^(第.*卷|volume\s*\d+)", re.IGNORECASE)
-
-        for chap in raw_chapters:
-            title = chap["title"]
-            # 使用正規表示式來判斷標題是否為 "卷" 的標題
-            if volume_pattern.match(title):
-                if logger.isEnabledFor(logging.DEBUG):
-                    logger.debug(
-                        f"Creating new group from volume pattern: '{title}'"
-                    )
-                current_group = {
-                    "type": "group",
-                    "title": title,
-                    "expanded": False,
-                    "children": [],
-                    "src": chap.get("src")  # 將卷的連結也儲存起來
-                }
-                nodes.append(current_group)
-            elif chap.get("type") == "group_header":
-                if logger.isEnabledFor(logging.DEBUG):
-                    logger.debug(
-                        f"Creating new group from 'group_header': '{title}'")
-                current_group = {
-                    "type": "group",
-                    "title": title,
-                    "expanded": False,
-                    "children": [],
-                }
-                nodes.append(current_group)
-            elif (
-                chap.get("type") == "chapter"
-                and title.startswith("【")
-                and title.endswith("】")
-            ):
-                if logger.isEnabledFor(logging.DEBUG):
-                    logger.debug(
-                        f"Creating new group from fallback pattern '〈...〉': '{title}'"
-                    )
-                current_group = {
-                    "type": "group",
-                    "title": title,
-                    "expanded": False,
-                    "children": [],
-                }
-                nodes.append(current_group)
-            else:
-                node = {"type": "chapter", "title": title,
-                        "src": chap.get("src")}
-                if current_group:
-                    if logger.isEnabledFor(logging.DEBUG):
-                        logger.debug(
-                            f"  Adding chapter '{title}' to group '{current_group['title']}'"
-                        )
-                    current_group["children"].append(node)
-                else:
-                    if logger.isEnabledFor(logging.DEBUG):
-                        logger.debug(
-                            f"Adding chapter '{title}' as a top-level node.")
-                    nodes.append(node)
+        for node in iter_grouped_chapters(raw_chapters):
+            toc["nodes"].append(node)
+            yield node
 
         if logger.isEnabledFor(logging.DEBUG):
             logger.debug(
-                f"--- TOC Build Process Finished. Final source: {toc_source} ---"
+                f"--- TOC Build Process Finished. Final source: {toc['toc_source']} ---"
             )
 
-        return {
-            "book_title": book_title,
-            "nodes": nodes,
-            "spine_order": spine_order,
-            "toc_source": toc_source,
-            "raw_chapters": raw_chapters,
-        }
+    def _build_ncx_nodes(self, toc: Dict, ncx: str, basedir: str):
+        """
+        Fill in toc from the NCX, yielding top-level nodes.
+
+        Returns (via StopIteration) whether the NCX produced any node; the
+        toc is left untouched when it did not.
+        """
+        found = False
+        nodes = iter_ncx_document(self, ncx, basedir)
+        while True:
+            # Only time spent inside the NCX parser counts, not the consumer
+            start_time = time.perf_counter()
+            node = next(nodes, None)
+            self._record_parse_time("ncx", start_time)
+            if node is None:
+                break
+            if not found:
+                found = True
+                toc["toc_source"] = "toc.ncx"
+                toc["nodes"] = []
+                toc["raw_chapters"] = []
+            toc["nodes"].append(node)
+            toc["raw_chapters"].extend(
+                self._flatten_toc_nodes_for_raw_list([node]))
+            yield node
+        return found
+
+    def _record_parse_time(self, stage: str, start_time: float) -> None:
+        """Add the time since start_time to a parse stage's total."""
+        times = self.stats["parse_times_ms"]
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        times[stage] = round(times.get(stage, 0.0) + elapsed_ms, 3)
 
     def _flatten_toc_nodes_for_raw_list(self, nodes: List[Dict]) -> List[Dict]:
         """Recursively flatten hierarchical nodes into a flat list for raw_chapters."""
@@ -673,7 +770,7 @@ class EPUBParser:
             if not self.zf or not self.opf_path:
                 raise RuntimeError("EPUB not properly opened")
 
-            opf_bytes = self.zf.read(self.opf_path)
+            opf_bytes = self._read_entry(self.opf_path)
             root = ET.fromstring(opf_bytes)
 
             manifest = {}
@@ -729,26 +826,14 @@ class EPUBParser:
 
     def get_statistics(self) -> Dict[str, any]:
         """
-        Get statistics about EbookLib usage and performance.
+        Get statistics about chapter reads, caches and parsing.
         """
         stats = self.stats.copy()
-        stats["ebooklib_enabled"] = HAS_EBOOKLIB
-        stats["ebooklib_available"] = self.ebooklib_available
-
-        # Calculate rates
-        if stats["total_reads"] > 0:
-            stats["ebooklib_success_rate"] = (
-                float(stats["ebooklib_success"]) / stats["total_reads"]
-            )
-            stats["results_match_rate"] = float(stats["results_match"]) / max(
-                stats["ebooklib_success"], 1
-            )
-            stats["legacy_fallback_rate"] = (
-                float(stats["legacy_fallback"]) / stats["total_reads"]
-            )
-        else:
-            stats["ebooklib_success_rate"] = 0.0
-            stats["results_match_rate"] = 0.0
-            stats["legacy_fallback_rate"] = 0.0
-
+        stats["parse_times_ms"] = dict(self.stats["parse_times_ms"])
+        if self.href_resolver is not None:
+            stats["href_resolver"] = dict(self.href_resolver.stats)
+        stats["chapter_cache"] = self._chapter_cache.get_stats()
+        stats["use_mmap"] = self._mmap_reader is not None
+        if self._mmap_reader is not None:
+            stats["mmap"] = dict(self._mmap_reader.stats)
         return stats
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Per-chapter parsed document.
+
+Loading a chapter used to parse its HTML with BeautifulSoup once for CFI
+lookups, again for TTS text and again for the image list. A ParsedChapter
+holds the chapter HTML and builds a single BeautifulSoup tree on first use;
+the TTS text, image list and CFI indexes are derived from that tree, and
+rendered lines come from the ContentRenderer (and its caches).
+
+EPUBParser keeps ParsedChapter objects in its chapter cache, so a chapter's
+tree lives exactly as long as its HTML stays cached. The tree is never
+modified, because CFI positions refer to it.
+"""
+
+import re
+import sys
+from array import array
+from bisect import bisect_right
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+from bs4.element import NavigableString, Tag
+
+from speakub.core.cfi import CFIIndex
+
+if TYPE_CHECKING:
+    from speakub.core.content_renderer import ContentRenderer
+
+# Rough memory held by a BeautifulSoup tree per character of HTML
+SOUP_BYTES_PER_CHAR = 32
+
+# Elements whose text is not read aloud
+TTS_SKIPPED_TAGS = ["script", "style", "nav", "header", "footer", "aside"]
+
+
+def tts_text_from_soup(soup: BeautifulSoup) -> str:
+    """
+    Extract clean text for TTS processing without modifying the tree.
+
+    Args:
+        soup: Parsed chapter
+
+    Returns:
+        Text of the document outside TTS_SKIPPED_TAGS, whitespace-normalized
+    """
+    skipped = set()
+    for element in soup(TTS_SKIPPED_TAGS):
+        if id(element) not in skipped:
+            skipped.update(id(node) for node in element.descendants)
+    text = "".join(s for s in soup.strings if id(s) not in skipped)
+
+    # Clean up whitespace and formatting
+    text = re.sub(r"\s+", " ", text)  # Normalize whitespace
+    # Normalize paragraph breaks
+    text = re.sub(r"\n\s*\n", "\n\n", text)
+    return text.strip()
+
+
+def images_from_soup(soup: BeautifulSoup) -> List[Tuple[str, str]]:
+    """
+    List the images of a parsed chapter.
+
+    Args:
+        soup: Parsed chapter
+
+    Returns:
+        List of tuples (image_src, alt_text)
+    """
+    images = []
+    for img in soup.find_all("img"):
+        src = img.get("src", "")
+        alt = img.get("alt", "")
+        if src:
+            images.append((src, alt))
+    return images
+
+
+class ChapterTextIndex:
+    """
+    Text-bearing nodes of a chapter body in document order.
+
+    Converting between CFIs and line numbers walks the body and measures the
+    stripped text (`el.text.strip()`) of every node. Measuring each element
+    separately re-concatenates its whole subtree, so the index is built in
+    one post-order pass that combines the text measurements of children
+    instead. starts[i] is the character position of nodes[i] in the walk and
+    lengths[i] the length of its stripped text; starts is strictly
+    increasing, so positions are mapped back to nodes by bisection.
+    """
+
+    def __init__(self, soup: BeautifulSoup):
+        """
+        Index a parsed chapter.
+
+        Args:
+            soup: Parsed chapter
+        """
+        body = soup.find("body") or soup
+        self.nodes: List[Any] = []
+        self.starts = array("q")
+        self.lengths = array("q")
+        self._chars_before: Dict[int, int] = {}
+        stripped = _stripped_text_lengths(body)
+        count = 0
+        for el in body.descendants:
+            self._chars_before[id(el)] = count
+            length = stripped.get(id(el), 0)
+            if length:
+                self.nodes.append(el)
+                self.starts.append(count)
+                self.lengths.append(length)
+                count += length + 1
+        self.total_chars = count
+
+    @property
+    def texts(self) -> List[str]:
+        """Stripped text of each node (built on demand, for inspection)."""
+        return [node.text.strip() for node in self.nodes]
+
+    def chars_before(self, node: Any) -> int:
+        """
+        Character position of a node in the body walk.
+
+        Args:
+            node: A node of the indexed tree
+
+        Returns:
+            Characters counted before the node (all of them if it is not in the body)
+        """
+        return self._chars_before.get(id(node), self.total_chars)
+
+    def locate(self, position: int) -> Optional[Tuple[Any, int]]:
+        """
+        Node at a character position of the body walk.
+
+        Args:
+            position: Character position
+
+        Returns:
+            (node, offset in its stripped text) of the node containing the
+            position, or else of the node whose middle is closest to it (at
+            offset 0 if the position precedes the node, at its end otherwise);
+            None if the chapter has no text
+        """
+        if not self.nodes:
+            return None
+        i = bisect_right(self.starts, position) - 1
+        if i >= 0 and position < self.starts[i] + self.lengths[i]:
+            return self.nodes[i], position - self.starts[i]
+        # Between nodes: the earlier one wins ties, like a forward scan
+        candidates = [j for j in (i, i + 1) if 0 <= j < len(self.nodes)]
+        best = min(
+            candidates,
+            key=lambda j: abs(position - (self.starts[j] + self.lengths[j] / 2)),
+        )
+        offset = 0 if position < self.starts[best] else self.lengths[best]
+        return self.nodes[best], offset
+
+
+def _string_types(tag: Any) -> Any:
+    """String classes included in a tag's .text (see Tag._all_strings())."""
+    types = tag.interesting_string_types
+    if types is None:
+        types = Tag.MAIN_CONTENT_STRING_TYPES
+    return types if isinstance(types, type) else frozenset(types)
+
+
+def _includes(types: Any, string: NavigableString) -> bool:
+    """Whether .text with these string classes includes a string."""
+    if isinstance(types, type):
+        return type(string) is types
+    return type(string) in types
+
+
+def _measure(text: str) -> Tuple[int, int, int]:
+    """(length, leading whitespace, trailing whitespace) of a string."""
+    length = len(text)
+    lead = length - len(text.lstrip())
+    if lead == length:
+        return length, length, length
+    return length, lead, length - len(text.rstrip())
+
+
+def _concat(
+    a: Tuple[int, int, int], b: Tuple[int, int, int]
+) -> Tuple[int, int, int]:
+    """Measurement of the concatenation of two measured strings."""
+    a_len, a_lead, a_trail = a
+    b_len, b_lead, b_trail = b
+    lead = a_len + b_lead if a_lead == a_len else a_lead
+    trail = b_len + a_trail if b_trail == b_len else b_trail
+    return a_len + b_len, lead, trail
+
+
+def _stripped_length(measured: Tuple[int, int, int]) -> int:
+    """Length of a measured string after strip()."""
+    length, lead, trail = measured
+    return 0 if lead == length else length - lead - trail
+
+
+_EMPTY = (0, 0, 0)
+
+
+def _stripped_text_lengths(root: Any) -> Dict[int, int]:
+    """
+    len(el.text.strip()) of every node below root, keyed by id().
+
+    A tag's .text only includes strings of its own interesting classes, so
+    subtrees are measured once per distinct set of classes (usually one or
+    two) rather than once per ancestor.
+    """
+    tags: List[Any] = []
+    strings: Dict[int, Tuple[int, int, int]] = {}
+    lengths: Dict[int, int] = {}
+    main_types = Tag.MAIN_CONTENT_STRING_TYPES
+    for el in root.descendants:
+        if isinstance(el, NavigableString):
+            strings[id(el)] = string_measure = _measure(el)
+            if _includes(main_types, el):
+                length = _stripped_length(string_measure)
+                if length:
+                    lengths[id(el)] = length
+        else:
+            tags.append(el)
+
+    by_types: Dict[Any, List[Any]] = {}
+    for tag in tags:
+        by_types.setdefault(_string_types(tag), []).append(tag)
+    for types, wanted in by_types.items():
+        measured: Dict[int, Tuple[int, int, int]] = {}
+        # Descendants come after their ancestors, so walking backwards
+        # measures every child before its parent
+        for tag in reversed(tags):
+            total = _EMPTY
+            for child in tag.contents:
+                if isinstance(child, NavigableString):
+                    if _includes(types, child):
+                        total = _concat(total, strings[id(child)])
+                else:
+                    total = _concat(total, measured[id(child)])
+            measured[id(tag)] = total
+        for tag in wanted:
+            length = _stripped_length(measured[id(tag)])
+            if length:
+                lengths[id(tag)] = length
+    return lengths
+
+
+class ParsedChapter:
+    """A chapter's HTML with views derived lazily from a single parse."""
+
+    __slots__ = (
+        "src",
+        "html",
+        "_soup",
+        "_tts_text",
+        "_images",
+        "_text_index",
+        "_cfi_index",
+        "_on_parse",
+    )
+
+    def __init__(
+        self,
+        html: str,
+        src: Optional[str] = None,
+        on_parse: Optional[Callable[["ParsedChapter"], None]] = None,
+    ):
+        """
+        Wrap chapter HTML.
+
+        Args:
+            html: Chapter HTML
+            src: Chapter source path (informational)
+            on_parse: Called after the tree is built (e.g. to re-account its size)
+        """
+        self.src = src
+        self.html = html
+        self._soup: Optional[BeautifulSoup] = None
+        self._tts_text: Optional[str] = None
+        self._images: Optional[List[Tuple[str, str]]] = None
+        self._text_index: Optional[ChapterTextIndex] = None
+        self._cfi_index: Optional[CFIIndex] = None
+        self._on_parse = on_parse
+
+    @property
+    def is_parsed(self) -> bool:
+        """Whether the tree has been built."""
+        return self._soup is not None
+
+    @property
+    def soup(self) -> BeautifulSoup:
+        """The chapter tree (parsed on first access, then shared)."""
+        if self._soup is None:
+            self._soup = BeautifulSoup(self.html, "html.parser")
+            if self._on_parse:
+                self._on_parse(self)
+        return self._soup
+
+    @property
+    def tts_text(self) -> str:
+        """Clean text for TTS."""
+        if self._tts_text is None:
+            self._tts_text = tts_text_from_soup(self.soup)
+        return self._tts_text
+
+    @property
+    def images(self) -> List[Tuple[str, str]]:
+        """Images as (src, alt) tuples."""
+        if self._images is None:
+            self._images = images_from_soup(self.soup)
+        return list(self._images)
+
+    @property
+    def text_index(self) -> ChapterTextIndex:
+        """Node index used to map CFIs to lines and back."""
+        if self._text_index is None:
+            self._text_index = ChapterTextIndex(self.soup)
+        return self._text_index
+
+    @property
+    def cfi_index(self) -> CFIIndex:
+        """Node index used to generate and resolve CFIs."""
+        if self._cfi_index is None:
+            self._cfi_index = CFIIndex(self.soup)
+        return self._cfi_index
+
+    def prepare(self, tts: bool = False, index: bool = False) -> None:
+        """
+        Build the tree and the requested views now, e.g. off the event loop.
+
+        Args:
+            tts: Also extract the TTS text
+            index: Also build the text and CFI indexes
+        """
+        self.soup
+        if tts:
+            self.tts_text
+        if index:
+            self.text_index
+            self.cfi_index
+
+    def render_lines(
+        self, renderer: "ContentRenderer", width: Optional[int] = None
+    ) -> List[str]:
+        """
+        Rendered text lines (cached by the renderer).
+
+        Args:
+            renderer: ContentRenderer to render with
+            width: Override the renderer's content width
+
+        Returns:
+            List of text lines
+        """
+        return renderer.render_chapter(self.html, width)
+
+    def estimated_bytes(self) -> int:
+        """Estimated memory held, including the tree once it is built."""
+        size = sys.getsizeof(self.html)
+        if self._soup is not None:
+            size += SOUP_BYTES_PER_CHAR * len(self.html)
+        return size
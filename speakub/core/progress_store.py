@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+SQLite store of reading progress.
+
+Progress used to live in one JSON file holding every book ever opened, which
+was read and rewritten in full on every save. Here each book is one row of an
+embedded SQLite database in WAL mode, so a save is a single-row upsert in its
+own transaction: its cost does not grow with the library, and a crash leaves
+either the old or the new position, never a truncated file.
+
+The progress dictionary of a book is stored as JSON text next to the columns
+used for lookups and sorting. Reading statistics (see speakub.core.book_stats)
+live in a second table, one row per book with the fingerprint of the file
+they were built from. On first use the legacy JSON progress file, if any, is
+imported in one transaction; it is left in place as a backup.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bump together with a migration step in ProgressStore._migrate()
+SCHEMA_VERSION = 1
+
+# Seconds to wait for another process holding the write lock
+_BUSY_TIMEOUT = 5.0
+
+
+class ProgressStore:
+    """Thread-safe per-book progress rows in an SQLite database."""
+
+    def __init__(self, db_path: Path, legacy_json: Optional[Path] = None):
+        """
+        Open (and create or migrate) the database.
+
+        Args:
+            db_path: Database file
+            legacy_json: JSON progress file imported when the database is new
+
+        Raises:
+            sqlite3.Error: If the database cannot be opened
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.db_path),
+            timeout=_BUSY_TIMEOUT,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        try:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # With WAL, NORMAL is durable across application crashes
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._migrate(legacy_json)
+        except sqlite3.Error:
+            self._conn.close()
+            raise
+
+    def _migrate(self, legacy_json: Optional[Path]) -> None:
+        """Create the schema and import the legacy JSON file once."""
+        with self._lock, self._transaction():
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version >= SCHEMA_VERSION:
+                return
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS progress ("
+                "epub_path TEXT PRIMARY KEY, "
+                "timestamp TEXT, "
+                "data TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS book_stats ("
+                "epub_path TEXT PRIMARY KEY, "
+                "fingerprint TEXT NOT NULL, "
+                "data TEXT NOT NULL)"
+            )
+            imported = self._import_legacy(legacy_json)
+            self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        if imported:
+            logger.info(f"Imported progress of {imported} books from {legacy_json}")
+
+    def _import_legacy(self, legacy_json: Optional[Path]) -> int:
+        """Copy the rows of the legacy JSON file (transaction held)."""
+        if legacy_json is None or not legacy_json.exists():
+            return 0
+        try:
+            with open(legacy_json, "r", encoding="utf-8") as f:
+                all_progress = json.load(f)
+        except (json.JSONDecodeError, IOError, ValueError) as e:
+            logger.warning(f"Legacy progress file not imported: {e}")
+            return 0
+        if not isinstance(all_progress, dict):
+            return 0
+        return self._upsert(all_progress.items())
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """One write transaction, rolled back on error (lock held)."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _upsert(self, items: Iterable[Tuple[str, Any]]) -> int:
+        """Insert or replace rows (transaction held); returns the row count."""
+        rows = [
+            (
+                str(epub_path),
+                progress.get("timestamp"),
+                json.dumps(progress, ensure_ascii=False),
+            )
+            for epub_path, progress in items
+            if isinstance(progress, dict)
+        ]
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO progress (epub_path, timestamp, data) "
+            "VALUES (?, ?, ?)",
+            rows,
+        )
+        return len(rows)
+
+    def _upsert_stats(self, items: Iterable[Tuple[str, Any, Any]]) -> int:
+        """Insert or replace statistics rows (transaction held)."""
+        rows = [
+            (
+                str(epub_path),
+                json.dumps(fingerprint, sort_keys=True),
+                json.dumps(stats, ensure_ascii=False),
+            )
+            for epub_path, fingerprint, stats in items
+            if isinstance(fingerprint, dict) and isinstance(stats, dict)
+        ]
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO book_stats (epub_path, fingerprint, data) "
+            "VALUES (?, ?, ?)",
+            rows,
+        )
+        return len(rows)
+
+    def get(self, epub_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Progress of one book.
+
+        Args:
+            epub_path: Resolved path of the EPUB
+
+        Returns:
+            Progress dictionary or None if none is saved
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM progress WHERE epub_path = ?", (epub_path,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, epub_path: str, progress: Dict[str, Any]) -> None:
+        """
+        Save the progress of one book atomically.
+
+        Args:
+            epub_path: Resolved path of the EPUB
+            progress: Progress dictionary (JSON-serializable)
+        """
+        self.put_many({epub_path: progress})
+
+    def put_many(self, all_progress: Dict[str, Dict[str, Any]]) -> int:
+        """
+        Save the progress of several books in one transaction.
+
+        Args:
+            all_progress: Progress dictionaries by EPUB path
+
+        Returns:
+            Number of rows written
+        """
+        with self._lock, self._transaction():
+            return self._upsert(all_progress.items())
+
+    def delete(self, epub_path: str) -> bool:
+        """
+        Remove the progress of one book.
+
+        Args:
+            epub_path: Resolved path of the EPUB
+
+        Returns:
+            True if a row was removed
+        """
+        with self._lock, self._transaction():
+            cursor = self._conn.execute(
+                "DELETE FROM progress WHERE epub_path = ?", (epub_path,)
+            )
+        return cursor.rowcount > 0
+
+    def clear(self) -> None:
+        """Remove the progress of every book."""
+        with self._lock, self._transaction():
+            self._conn.execute("DELETE FROM progress")
+
+    def all(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Progress of every book.
+
+        Returns:
+            Progress dictionaries by EPUB path, most recently saved first
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT epub_path, data FROM progress ORDER BY timestamp DESC"
+            ).fetchall()
+        return {epub_path: json.loads(data) for epub_path, data in rows}
+
+    def get_book_stats(
+        self, epub_path: str
+    ) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """
+        Reading statistics of one book.
+
+        Args:
+            epub_path: Resolved path of the EPUB
+
+        Returns:
+            (fingerprint of the file they were built from, statistics), or
+            None if none are saved
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fingerprint, data FROM book_stats WHERE epub_path = ?",
+                (epub_path,),
+            ).fetchone()
+        return (json.loads(row[0]), json.loads(row[1])) if row else None
+
+    def put_book_stats(
+        self, epub_path: str, fingerprint: Dict[str, Any], stats: Dict[str, Any]
+    ) -> None:
+        """
+        Save the reading statistics of one book atomically.
+
+        Args:
+            epub_path: Resolved path of the EPUB
+            fingerprint: Fingerprint of the file the statistics were built from
+            stats: Statistics (JSON-serializable)
+        """
+        with self._lock, self._transaction():
+            self._upsert_stats([(epub_path, fingerprint, stats)])
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM progress").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
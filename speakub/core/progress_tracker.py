@@ -5,10 +5,12 @@ Progress Tracker - Saves and loads reading progress.
 """
 
 import json
+import sqlite3
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, Optional
 
+from speakub.core.progress_store import ProgressStore
 from speakub.utils.text_utils import trace_log
 
 
@@ -30,16 +32,37 @@ class ProgressTracker:
         self.epub_path = str(resolved)
         self.trace = trace
 
-        # Progress file location
+        # Progress and statistics database (see speakub.core.progress_store);
+        # the JSON progress file of earlier versions is imported into it once
+        self.db_file = Path.home() / ".speakub_progress.db"
         self.progress_file = Path.home() / ".speakub_progress.json"
-
-        # Ensure parent directory exists
-        self.progress_file.parent.mkdir(parents=True, exist_ok=True)
+        self._store: Optional[ProgressStore] = None
+        self._store_failed = False
 
         trace_log(
             f"[INFO] Progress tracker initialized for: {self.epub_path}", self.trace
         )
 
+    def _get_store(self) -> Optional[ProgressStore]:
+        """Open the progress database on first use."""
+        if self._store is None and not self._store_failed:
+            try:
+                self._store = ProgressStore(
+                    self.db_file, legacy_json=self.progress_file
+                )
+            except sqlite3.Error as e:
+                self._store_failed = True
+                trace_log(
+                    f"[ERROR] Failed to open progress database: {e}", self.trace
+                )
+        return self._store
+
+    def close(self) -> None:
+        """Close the progress database."""
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
     def load_progress(self) -> Optional[Dict[str, Any]]:
         """
         Load saved progress for this EPUB.
@@ -49,32 +72,30 @@ class ProgressTracker:
         Returns:
             Progress dictionary or None if no progress saved
         """
-        if not self.progress_file.exists():
+        store = self._get_store()
+        if store is None:
             return None
 
         try:
-            with open(self.progress_file, "r", encoding="utf-8") as f:
-                all_progress = json.load(f)
-
-            progress = all_progress.get(self.epub_path)
-            if progress:
-                trace_log(f"[INFO] Loaded progress: {progress}", self.trace)
-                return progress
-            else:
-                trace_log("[INFO] No progress found for this EPUB", self.trace)
-                return None
-
-        except (json.JSONDecodeError, IOError, ValueError) as e:
+            progress = store.get(self.epub_path)
+        except (sqlite3.Error, ValueError) as e:
             trace_log(f"[WARN] Failed to load progress: {e}", self.trace)
             return None
 
-    # --- Main modification point ---
+        if progress:
+            trace_log(f"[INFO] Loaded progress: {progress}", self.trace)
+            return progress
+        trace_log("[INFO] No progress found for this EPUB", self.trace)
+        return None
+
     def save_progress(
         self, chapter_src: str, cfi: str, additional_data: Optional[Dict] = None
     ) -> bool:
         """
         Save reading progress using a CFI string.
 
+        Only the row of this EPUB is written, in its own transaction.
+
         Args:
             chapter_src: Current chapter source path
             cfi: The EPUB CFI string for the current position
@@ -83,44 +104,30 @@ class ProgressTracker:
         Returns:
             True if progress was saved successfully
         """
-        try:
-            # Load existing progress
-            all_progress = {}
-            if self.progress_file.exists():
-                try:
-                    with open(self.progress_file, "r", encoding="utf-8") as f:
-                        all_progress = json.load(f)
-                except (json.JSONDecodeError, IOError):
-                    trace_log(
-                        "[WARN] Corrupted progress file, starting fresh", self.trace
-                    )
-                    all_progress = {}
-
-            # Update progress for this EPUB
-            progress_data = {
-                "src": chapter_src,
-                "cfi": cfi,  # <-- Key change: Use 'cfi' key to store CFI string
-                "timestamp": datetime.now().isoformat(),
-                "epub_path": self.epub_path,
-            }
-
-            # Add any additional data
-            if additional_data:
-                progress_data.update(additional_data)
-
-            all_progress[self.epub_path] = progress_data
-
-            # Save to file
-            with open(self.progress_file, "w", encoding="utf-8") as f:
-                json.dump(all_progress, f, indent=2, ensure_ascii=False)
+        store = self._get_store()
+        if store is None:
+            return False
 
-            trace_log(f"[INFO] Progress saved: {progress_data}", self.trace)
-            return True
+        progress_data = {
+            "src": chapter_src,
+            "cfi": cfi,
+            "timestamp": datetime.now().isoformat(),
+            "epub_path": self.epub_path,
+        }
+
+        # Add any additional data
+        if additional_data:
+            progress_data.update(additional_data)
 
-        except (IOError, json.JSONDecodeError) as e:
+        try:
+            store.put(self.epub_path, progress_data)
+        except (sqlite3.Error, TypeError, ValueError) as e:
             trace_log(f"[ERROR] Failed to save progress: {e}", self.trace)
             return False
 
+        trace_log(f"[INFO] Progress saved: {progress_data}", self.trace)
+        return True
+
     def get_all_progress(self) -> Dict[str, Any]:
         """
         Get progress for all EPUBs.
@@ -128,13 +135,13 @@ class ProgressTracker:
         Returns:
             Dictionary of all saved progress
         """
-        if not self.progress_file.exists():
+        store = self._get_store()
+        if store is None:
             return {}
 
         try:
-            with open(self.progress_file, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError) as e:
+            return store.all()
+        except (sqlite3.Error, ValueError) as e:
             trace_log(f"[WARN] Failed to load all progress: {e}", self.trace)
             return {}
 
@@ -145,21 +152,17 @@ class ProgressTracker:
         Returns:
             True if progress was cleared successfully
         """
-        try:
-            all_progress = self.get_all_progress()
-            if self.epub_path in all_progress:
-                del all_progress[self.epub_path]
-
-                with open(self.progress_file, "w", encoding="utf-8") as f:
-                    json.dump(all_progress, f, indent=2, ensure_ascii=False)
+        store = self._get_store()
+        if store is None:
+            return False
 
+        try:
+            if store.delete(self.epub_path):
                 trace_log("[INFO] Progress cleared for this EPUB", self.trace)
-                return True
             else:
                 trace_log("[INFO] No progress to clear", self.trace)
-                return True
-
-        except (IOError, json.JSONDecodeError) as e:
+            return True
+        except sqlite3.Error as e:
             trace_log(f"[ERROR] Failed to clear progress: {e}", self.trace)
             return False
 
@@ -170,12 +173,15 @@ class ProgressTracker:
         Returns:
             True if all progress was cleared successfully
         """
+        store = self._get_store()
+        if store is None:
+            return False
+
         try:
-            if self.progress_file.exists():
-                self.progress_file.unlink()
-                trace_log("[INFO] All progress cleared", self.trace)
+            store.clear()
+            trace_log("[INFO] All progress cleared", self.trace)
             return True
-        except IOError as e:
+        except sqlite3.Error as e:
             trace_log(f"[ERROR] Failed to clear all progress: {e}", self.trace)
             return False
 
@@ -199,7 +205,7 @@ class ProgressTracker:
                 f"[INFO] Progress exported to: {output_file}", self.trace)
             return True
 
-        except (IOError, json.JSONDecodeError) as e:
+        except (IOError, TypeError, ValueError) as e:
             trace_log(f"[ERROR] Failed to export progress: {e}", self.trace)
             return False
 
@@ -207,31 +213,88 @@ class ProgressTracker:
         """
         Import progress data from a file.
 
+        Entries of the file replace saved progress of the same EPUB; all of
+        them are written in one transaction.
+
         Args:
             input_file: Path to input file
 
         Returns:
             True if import was successful
         """
+        store = self._get_store()
+        if store is None:
+            return False
+
         try:
             with open(input_file, "r", encoding="utf-8") as f:
                 imported_progress = json.load(f)
+            if not isinstance(imported_progress, dict):
+                raise ValueError("progress file does not hold an object")
 
-            # Merge with existing progress
-            all_progress = self.get_all_progress()
-            all_progress.update(imported_progress)
-
-            with open(self.progress_file, "w", encoding="utf-8") as f:
-                json.dump(all_progress, f, indent=2, ensure_ascii=False)
+            store.put_many(imported_progress)
 
             trace_log(
                 f"[INFO] Progress imported from: {input_file}", self.trace)
             return True
 
-        except (IOError, json.JSONDecodeError) as e:
+        except (IOError, sqlite3.Error, TypeError, ValueError) as e:
             trace_log(f"[ERROR] Failed to import progress: {e}", self.trace)
             return False
 
+    def load_book_stats(
+        self, fingerprint: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Load the saved statistics index of this EPUB.
+
+        Args:
+            fingerprint: Current fingerprint of the EPUB file
+
+        Returns:
+            Index data, or None if missing or saved for another version of
+            the file
+        """
+        store = self._get_store()
+        if store is None:
+            return None
+
+        try:
+            entry = store.get_book_stats(self.epub_path)
+        except (sqlite3.Error, ValueError) as e:
+            trace_log(f"[WARN] Failed to load book statistics: {e}", self.trace)
+            return None
+
+        if entry is None or entry[0] != fingerprint:
+            return None
+        return entry[1]
+
+    def save_book_stats(
+        self, fingerprint: Dict[str, Any], stats: Dict[str, Any]
+    ) -> bool:
+        """
+        Save the statistics index of this EPUB.
+
+        Args:
+            fingerprint: Fingerprint of the EPUB file the index was built from
+            stats: Index data
+
+        Returns:
+            True if the index was saved successfully
+        """
+        store = self._get_store()
+        if store is None:
+            return False
+
+        try:
+            store.put_book_stats(self.epub_path, fingerprint, stats)
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            trace_log(f"[ERROR] Failed to save book statistics: {e}", self.trace)
+            return False
+
+        trace_log("[INFO] Book statistics saved", self.trace)
+        return True
+
     def get_reading_statistics(self) -> Dict[str, Any]:
         """
         Get reading statistics.
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Background writer of reading progress.
+
+Saving progress is database I/O, which must not run on the Textual event
+loop. ProgressWriter hands positions to one daemon thread through a bounded
+queue. The thread takes everything queued at once, keeps only the newest
+position of each book, and writes each book's position in one transaction
+through ProgressTracker (see speakub.core.progress_store). Positions are
+written as soon as they arrive, so a killed process loses only what its
+caller had not yet submitted.
+"""
+
+import logging
+import queue
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from speakub.core.progress_tracker import ProgressTracker
+
+logger = logging.getLogger(__name__)
+
+# Positions queued while the thread is writing; a full queue rejects more
+DEFAULT_QUEUE_SIZE = 64
+
+# Seconds close() waits for queued positions to be written
+DEFAULT_FLUSH_TIMEOUT = 5.0
+
+# (tracker, chapter_src, cfi, additional_data)
+ProgressEntry = Tuple["ProgressTracker", str, str, Optional[Dict[str, Any]]]
+
+
+class ProgressWriter:
+    """Writes progress on a background thread, newest position per book."""
+
+    def __init__(self, max_queued: int = DEFAULT_QUEUE_SIZE):
+        """
+        Initialize the writer; the thread starts with the first submit().
+
+        Args:
+            max_queued: Maximum number of positions waiting to be written
+        """
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queued)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+        self.writes = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.failures = 0
+
+    def submit(
+        self,
+        tracker: "ProgressTracker",
+        chapter_src: str,
+        cfi: str,
+        additional_data: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """
+        Queue a position without blocking.
+
+        Args:
+            tracker: Progress tracker of the book
+            chapter_src: Current chapter source path
+            cfi: The EPUB CFI string for the current position
+            additional_data: Optional additional progress data
+
+        Returns:
+            True if the position was queued, False if the writer is closed
+
+        Raises:
+            queue.Full: If the queue is full; the position can be submitted
+                again later
+        """
+        if self._closed:
+            return False
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait((tracker, chapter_src, cfi, additional_data))
+        except queue.Full:
+            self.rejected += 1
+            logger.warning("Progress writer queue full, position not queued")
+            raise
+        return True
+
+    @property
+    def closed(self) -> bool:
+        """Whether close() was called; no more positions are accepted."""
+        return self._closed
+
+    def flush(self, timeout: float = DEFAULT_FLUSH_TIMEOUT) -> bool:
+        """
+        Wait until the positions queued so far are written.
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            True if everything was written in time
+        """
+        if self._thread is None or not self._thread.is_alive():
+            return self._queue.empty()
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout: float = DEFAULT_FLUSH_TIMEOUT) -> bool:
+        """
+        Write the queued positions and stop the thread.
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            True if everything was written in time
+        """
+        self._closed = True
+        flushed = self.flush(timeout)
+        if self._thread is not None and self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=timeout)
+            except queue.Full:
+                return False
+            self._thread.join(timeout)
+        return flushed
+
+    def _ensure_thread(self) -> None:
+        """Start the writer thread if it is not running."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="progress-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        """Thread body: write batches until the stop marker."""
+        while True:
+            batch = [self._queue.get()]
+            # Everything queued meanwhile goes into the same batch
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            entries: List[ProgressEntry] = []
+            waiters: List[threading.Event] = []
+            stop = False
+            for item in batch:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    entries.append(item)
+
+            self._write(entries)
+            for done in waiters:
+                done.set()
+            if stop:
+                return
+
+    def _write(self, entries: List[ProgressEntry]) -> None:
+        """Write the newest entry of each book."""
+        latest: Dict[int, ProgressEntry] = {}
+        for entry in entries:
+            latest[id(entry[0])] = entry
+        self.coalesced += len(entries) - len(latest)
+
+        for tracker, chapter_src, cfi, additional_data in latest.values():
+            try:
+                saved = tracker.save_progress(chapter_src, cfi, additional_data)
+            except Exception as e:
+                logger.error(f"Progress write failed: {e}")
+                saved = False
+            if saved:
+                self.writes += 1
+            else:
+                self.failures += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get writer statistics."""
+        return {
+            "queued": self._queue.qsize(),
+            "writes": self.writes,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+            "failures": self.failures,
+        }
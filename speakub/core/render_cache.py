@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Cache of rendered chapter text.
+
+Rendering a chapter (html2text plus CJK-aware wrapping) is the most expensive
+step of opening it, and it is repeated every time the chapter is revisited or
+the terminal width changes. Rendered lines are cached here by the digest of
+the chapter HTML and the render width:
+
+- an in-memory LRU tier bounded by an estimated byte size
+- an optional on-disk tier of zlib-compressed JSON files under
+  ~/.cache/speakub/render, so that reopening a book skips rendering as well
+
+Cached lines are stored as tuples and handed out as fresh lists, so callers
+can never modify a cached entry.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import html2text
+
+from speakub.utils.cache import ByteBudgetLRU
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever ContentRenderer output changes for the same input.
+RENDER_VERSION = 1
+
+RENDER_CACHE_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "speakub", "render")
+
+DEFAULT_RENDER_CACHE_BYTES = 16 * 1024 * 1024
+DEFAULT_DISK_CACHE_BYTES = 64 * 1024 * 1024
+
+# Once over budget, the disk tier is pruned to this fraction of it
+_DISK_PRUNE_RATIO = 0.8
+
+# Renderer output also depends on the html2text release
+_H2T_VERSION = html2text.__version__
+if not isinstance(_H2T_VERSION, str):
+    _H2T_VERSION = ".".join(str(part) for part in _H2T_VERSION)
+_RENDER_SIGNATURE = f"v{RENDER_VERSION}-h2t{_H2T_VERSION}"
+
+RenderKey = Tuple[str, int]
+
+
+def content_digest(html_content: str) -> str:
+    """
+    Digest of a chapter's HTML used as the content part of a cache key.
+
+    Args:
+        html_content: Chapter HTML
+
+    Returns:
+        Hex digest
+    """
+    return hashlib.sha1(
+        html_content.encode("utf-8", errors="surrogatepass")
+    ).hexdigest()
+
+
+def _lines_size(lines: Tuple[str, ...]) -> int:
+    """Estimate the memory held by a tuple of lines."""
+    return sys.getsizeof(lines) + sum(map(sys.getsizeof, lines))
+
+
+class RenderCache:
+    """Two-tier (memory, optional disk) cache of rendered chapter lines."""
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_RENDER_CACHE_BYTES,
+        disk_cache: bool = False,
+        cache_dir: Optional[str] = None,
+        max_disk_bytes: int = DEFAULT_DISK_CACHE_BYTES,
+    ):
+        """
+        Initialize the render cache.
+
+        Args:
+            max_bytes: Memory budget for cached lines (0 disables the memory tier)
+            disk_cache: Enable the compressed on-disk tier
+            cache_dir: Directory of the disk tier (defaults to ~/.cache/speakub/render)
+            max_disk_bytes: Size budget of the disk tier
+        """
+        self._memory = ByteBudgetLRU(max_bytes, sizeof=_lines_size)
+        self.disk_cache = bool(disk_cache)
+        self.cache_dir = os.path.join(
+            cache_dir or RENDER_CACHE_DIR, _RENDER_SIGNATURE)
+        self.max_disk_bytes = max(0, int(max_disk_bytes))
+        self._disk_lock = threading.Lock()
+        # Total size of the disk tier, measured on first write
+        self._disk_bytes: Optional[int] = None
+        self._disk_hits = 0
+        self._disk_misses = 0
+        self._disk_writes = 0
+        self._misses = 0
+
+    @staticmethod
+    def make_key(html_content: str, width: int) -> RenderKey:
+        """Build the cache key of a chapter rendered at a given width."""
+        return content_digest(html_content), int(width)
+
+    def get(self, key: RenderKey) -> Optional[List[str]]:
+        """
+        Look up rendered lines, trying memory first and then disk.
+
+        Args:
+            key: Key from make_key()
+
+        Returns:
+            A new list of lines, or None on a miss
+        """
+        lines = self._memory.get(key)
+        if lines is not None:
+            return list(lines)
+
+        if self.disk_cache:
+            lines = self._load_from_disk(key)
+            if lines is not None:
+                self._disk_hits += 1
+                self._memory.put(key, lines)
+                return list(lines)
+            self._disk_misses += 1
+
+        self._misses += 1
+        return None
+
+    def put(self, key: RenderKey, lines: Sequence[str]) -> None:
+        """
+        Store rendered lines in both tiers.
+
+        Args:
+            key: Key from make_key()
+            lines: Rendered lines (copied)
+        """
+        if not self._memory.max_bytes and not self.disk_cache:
+            return
+        frozen = tuple(lines)
+        if self._memory.max_bytes:
+            self._memory.put(key, frozen)
+        if self.disk_cache:
+            self._save_to_disk(key, frozen)
+
+    def clear(self, disk: bool = False) -> None:
+        """
+        Drop all in-memory entries.
+
+        Args:
+            disk: Also delete the on-disk tier
+        """
+        self._memory.clear()
+        if not disk:
+            return
+        with self._disk_lock:
+            for name, _, _ in self._scan_disk():
+                try:
+                    os.unlink(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+            self._disk_bytes = 0
+
+    def _entry_path(self, key: RenderKey) -> str:
+        """Return the disk tier file of a key."""
+        digest, width = key
+        return os.path.join(self.cache_dir, f"{digest}-{width}.json.z")
+
+    def _load_from_disk(self, key: RenderKey) -> Optional[Tuple[str, ...]]:
+        """Read a disk entry, discarding it if it is unreadable."""
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, "rb") as f:
+                lines = json.loads(zlib.decompress(f.read()).decode("utf-8"))
+            if not isinstance(lines, list):
+                raise ValueError("entry is not a list of lines")
+        except FileNotFoundError:
+            return None
+        except (IOError, OSError, ValueError, zlib.error) as e:
+            logger.debug(f"Discarding unreadable render cache entry {entry_path}: {e}")
+            try:
+                os.unlink(entry_path)
+            except OSError:
+                pass
+            return None
+
+        # Refresh the mtime so pruning removes least recently used entries first
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return tuple(lines)
+
+    def _save_to_disk(self, key: RenderKey, lines: Tuple[str, ...]) -> bool:
+        """Atomically write a compressed disk entry."""
+        entry_path = self._entry_path(key)
+        try:
+            data = zlib.compress(
+                json.dumps(lines, ensure_ascii=False,
+                           separators=(",", ":")).encode("utf-8")
+            )
+            if len(data) > self.max_disk_bytes:
+                return False
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(
+                dir=self.cache_dir, prefix=".render-", suffix=".tmp"
+            )
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, entry_path)
+            except BaseException:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+        except (IOError, OSError, TypeError, ValueError) as e:
+            logger.debug(f"Failed to write render cache entry {entry_path}: {e}")
+            return False
+
+        self._disk_writes += 1
+        with self._disk_lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._scan_disk())
+            else:
+                self._disk_bytes += len(data)
+            if self._disk_bytes > self.max_disk_bytes:
+                self._prune_disk()
+        return True
+
+    def _scan_disk(self) -> List[Tuple[str, int, float]]:
+        """List disk entries as (name, size, mtime)."""
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(".json.z"):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((entry.name, st.st_size, st.st_mtime))
+        except OSError:
+            pass
+        return entries
+
+    def _prune_disk(self) -> None:
+        """Delete least recently used disk entries (lock held)."""
+        entries = sorted(self._scan_disk(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        target = self.max_disk_bytes * _DISK_PRUNE_RATIO
+        for name, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.unlink(os.path.join(self.cache_dir, name))
+                total -= size
+            except OSError:
+                pass
+        self._disk_bytes = total
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dict with memory tier stats plus disk hits, misses and hit rate
+        """
+        memory = self._memory.get_stats()
+        memory_hits = memory["hits"]
+        lookups = memory_hits + memory["misses"]
+        hits = memory_hits + self._disk_hits
+        return {
+            "size": memory["size"],
+            "bytes": memory["bytes"],
+            "max_bytes": memory["max_bytes"],
+            "evictions": memory["evictions"],
+            "memory_hits": memory_hits,
+            "disk_hits": self._disk_hits,
+            "disk_misses": self._disk_misses,
+            "disk_writes": self._disk_writes,
+            "disk_enabled": self.disk_cache,
+            "misses": self._misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "memory_hit_rate": memory_hits / lookups if lookups else 0.0,
+        }
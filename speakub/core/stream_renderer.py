@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Streaming HTML-to-text renderer for large or pathological chapters.
+
+html2text keeps per-character state and can take seconds on multi-megabyte
+single-file chapters. This renderer is an html.parser.HTMLParser subclass
+that only tracks the open block element: character data is collected into a
+list of pieces and joined once when the block ends, so the work is linear in
+the size of the chapter. The input is fed in chunks and completed lines are
+handed out as soon as their block closes.
+
+Output follows the conventions of the primary renderer, so that it wraps and
+displays the same way: headings start with "#" marks, list items with "* ",
+strong and emphasis text is marked with "**" and "*", and blocks are
+separated by blank lines.
+"""
+
+import re
+from html.parser import HTMLParser
+from typing import Iterator, List, Optional, Tuple
+
+# Characters fed to the parser at a time
+STREAM_CHUNK_CHARS = 64 * 1024
+
+# Elements whose content is not shown
+SKIPPED_TAGS = frozenset(
+    ["head", "script", "style", "template", "noscript", "svg", "math", "iframe"]
+)
+
+# Elements that start a new paragraph
+BLOCK_TAGS = frozenset(
+    [
+        "address", "article", "aside", "blockquote", "body", "dd", "div", "dl",
+        "dt", "figcaption", "figure", "footer", "header", "hr", "html", "li",
+        "main", "nav", "ol", "p", "pre", "section", "table", "tbody", "td",
+        "tfoot", "th", "thead", "tr", "ul",
+        "h1", "h2", "h3", "h4", "h5", "h6",
+    ]
+)
+
+HEADING_LEVELS = {f"h{level}": level for level in range(1, 7)}
+
+INLINE_MARKS = {"b": "**", "strong": "**", "i": "*", "em": "*"}
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class StreamingTextRenderer(HTMLParser):
+    """HTMLParser that turns chapter HTML into unwrapped text lines."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._pieces: List[str] = []
+        self._lines: List[str] = []
+        self._skip_depth = 0
+        self._pre_depth = 0
+        self._list_depth = 0
+        self._heading_level = 0
+        self._in_item = False
+
+    def feed_chunks(
+        self, html: str, chunk_chars: int = STREAM_CHUNK_CHARS
+    ) -> Iterator[str]:
+        """
+        Feed a whole document in chunks, yielding lines as blocks complete.
+
+        Args:
+            html: Chapter HTML
+            chunk_chars: Characters fed per parser call
+
+        Yields:
+            Unwrapped text lines ("" between blocks)
+        """
+        for start in range(0, len(html), chunk_chars):
+            self.feed(html[start:start + chunk_chars])
+            yield from self.take_lines()
+        self.close()
+        self._end_block()
+        yield from self.take_lines()
+
+    def take_lines(self) -> List[str]:
+        """Return and forget the lines completed so far."""
+        lines, self._lines = self._lines, []
+        return lines
+
+    def _end_block(self, separate: bool = True) -> None:
+        """
+        Emit the text collected for the current block.
+
+        Args:
+            separate: Follow it with a blank line (False for a line break)
+        """
+        if not self._pieces:
+            return
+        text = "".join(self._pieces)
+        self._pieces = []
+        if self._pre_depth:
+            lines = [line.rstrip() for line in text.strip("\n").split("\n")]
+        else:
+            line = _WHITESPACE.sub(" ", text).strip()
+            lines = [line] if line else []
+        if not lines:
+            return
+        if self._heading_level:
+            lines[0] = "#" * self._heading_level + " " + lines[0]
+        elif self._in_item:
+            indent = "  " * max(0, self._list_depth - 1)
+            lines[0] = f"{indent}* {lines[0]}"
+            self._in_item = False
+        self._lines.extend(lines)
+        if separate:
+            self._lines.append("")
+
+    def _line_break(self) -> None:
+        """Handle <br>: end the line without ending the paragraph."""
+        if self._pre_depth:
+            self._pieces.append("\n")
+        else:
+            self._end_block(separate=False)
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+            return
+        if self._skip_depth:
+            return
+        if tag in BLOCK_TAGS:
+            self._end_block()
+            if tag in HEADING_LEVELS:
+                self._heading_level = HEADING_LEVELS[tag]
+            elif tag in ("ul", "ol"):
+                self._list_depth += 1
+            elif tag == "li":
+                self._in_item = True
+            elif tag == "pre":
+                self._pre_depth += 1
+        elif tag == "br":
+            self._line_break()
+        elif tag == "img":
+            self.handle_startendtag(tag, attrs)
+        elif tag in INLINE_MARKS:
+            self._pieces.append(INLINE_MARKS[tag])
+
+    def handle_startendtag(
+        self, tag: str, attrs: List[Tuple[str, Optional[str]]]
+    ) -> None:
+        if self._skip_depth:
+            return
+        if tag == "img":
+            values = dict(attrs)
+            src = values.get("src") or ""
+            alt = (values.get("alt") or "").strip()
+            if alt:
+                self._pieces.append(f' [Image: {alt} src="{src}"] ')
+            else:
+                self._pieces.append(f' [Image src="{src}"] ')
+        elif tag == "br":
+            self._line_break()
+        elif tag in BLOCK_TAGS:
+            self._end_block()
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in SKIPPED_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+            return
+        if self._skip_depth:
+            return
+        if tag in BLOCK_TAGS:
+            self._end_block()
+            if tag in HEADING_LEVELS:
+                self._heading_level = 0
+            elif tag in ("ul", "ol"):
+                self._list_depth = max(0, self._list_depth - 1)
+            elif tag == "pre":
+                self._pre_depth = max(0, self._pre_depth - 1)
+            elif tag == "li":
+                self._in_item = False
+        elif tag in INLINE_MARKS:
+            self._pieces.append(INLINE_MARKS[tag])
+
+    def handle_data(self, data: str) -> None:
+        if not self._skip_depth:
+            self._pieces.append(data)
+
+
+def iter_stream_lines(
+    html: str, chunk_chars: int = STREAM_CHUNK_CHARS
+) -> Iterator[str]:
+    """
+    Render HTML to unwrapped text lines incrementally.
+
+    Args:
+        html: Chapter HTML
+        chunk_chars: Characters fed to the parser at a time
+
+    Yields:
+        Lines, with "" separating blocks
+    """
+    yield from StreamingTextRenderer().feed_chunks(html, chunk_chars)
+
+
+def render_stream_lines(html: str) -> List[str]:
+    """
+    Render HTML to unwrapped text lines.
+
+    Args:
+        html: Chapter HTML
+
+    Returns:
+        Lines without trailing blank lines
+    """
+    lines = list(iter_stream_lines(html))
+    while lines and not lines[-1]:
+        lines.pop()
+    return lines
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Headless whole-book text export (``speakub book.epub --dump``).
+
+Chapters are read and rendered in worker processes, each of which opens its
+own EPUBParser and ContentRenderer. Results are written in spine order: a
+chapter that finishes early waits in a small reorder buffer until every
+chapter before it has been written. At most ``window`` chapters are in flight
+or buffered at any time, which bounds memory regardless of book size.
+"""
+
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, TextIO, Tuple
+
+from speakub.core.content_renderer import ContentRenderer
+from speakub.core.epub_parser import EPUBParser
+from speakub.core.render_cache import RenderCache
+
+logger = logging.getLogger(__name__)
+
+# Per-process state of pool workers (set by _init_worker)
+_worker_parser: Optional[EPUBParser] = None
+_worker_renderer: Optional[ContentRenderer] = None
+_worker_cols: int = 80
+
+
+def _init_worker(
+    epub_path: str,
+    cols: int,
+    max_entry_bytes: Optional[int] = None,
+    use_mmap: bool = False,
+) -> None:
+    """Open the book once per worker process."""
+    global _worker_parser, _worker_renderer, _worker_cols
+    # Every chapter is read and rendered exactly once, so the chapter and
+    # render caches are disabled; html2text gets no time limit, so that the
+    # output does not depend on machine load
+    _worker_parser = EPUBParser(
+        epub_path,
+        max_entry_bytes=max_entry_bytes,
+        chapter_cache_bytes=0,
+        use_mmap=use_mmap,
+    )
+    _worker_parser.open()
+    _worker_renderer = ContentRenderer(
+        content_width=cols,
+        render_cache=RenderCache(max_bytes=0),
+        html2text_timeout=None,
+    )
+    _worker_cols = cols
+
+
+def _render_one(index: int, src: str) -> Tuple[int, str]:
+    """
+    Read and render a single chapter in the current worker.
+
+    Returns:
+        (spine index, rendered chapter text)
+    """
+    try:
+        html = _worker_parser.read_chapter(src)
+        lines = _worker_renderer.render_chapter(html, width=_worker_cols)
+        return index, "\n".join(lines)
+    except Exception as e:
+        logger.warning(f"Failed to export chapter '{src}': {e}")
+        return index, f"[Error reading chapter: {src}]"
+
+
+def get_export_order(
+    epub_path: str, max_entry_bytes: Optional[int] = None
+) -> List[str]:
+    """
+    Get the chapter sources of a book in reading (spine) order.
+
+    Args:
+        epub_path: Path to the EPUB file
+        max_entry_bytes: Per-entry decompressed size limit (None = off)
+
+    Returns:
+        List of chapter sources
+    """
+    with EPUBParser(epub_path, max_entry_bytes=max_entry_bytes) as parser:
+        toc_data = parser.parse_toc()
+    spine = toc_data.get("spine_order") or []
+    if not spine:
+        spine = [ch["src"] for ch in toc_data.get("raw_chapters", [])
+                 if ch.get("src")]
+    return spine
+
+
+def dump_book(
+    epub_path: str,
+    out: TextIO,
+    cols: int = 80,
+    jobs: Optional[int] = None,
+    window: Optional[int] = None,
+    max_entry_bytes: Optional[int] = None,
+    use_mmap: bool = False,
+) -> int:
+    """
+    Render a whole book to plain text.
+
+    Args:
+        epub_path: Path to the EPUB file
+        out: Text stream to write to
+        cols: Wrap width in terminal columns
+        jobs: Worker processes (defaults to the CPU count; 1 renders in-process)
+        window: Maximum chapters in flight or awaiting output (defaults to 4 * jobs)
+        max_entry_bytes: Per-entry decompressed size limit (None = off), as
+            in the reader (see get_epub_config())
+        use_mmap: Read chapters through a memory map of the archive
+
+    Returns:
+        Number of chapters written
+    """
+    spine = get_export_order(epub_path, max_entry_bytes)
+    if not spine:
+        return 0
+
+    jobs = max(1, jobs or os.cpu_count() or 1)
+    jobs = min(jobs, len(spine))
+    window = max(jobs, window or jobs * 4)
+
+    written = 0
+
+    def emit(text: str) -> None:
+        nonlocal written
+        if written:
+            out.write("\n\n")
+        out.write(text)
+        written += 1
+
+    if jobs == 1:
+        _init_worker(epub_path, cols, max_entry_bytes, use_mmap)
+        try:
+            for index, src in enumerate(spine):
+                emit(_render_one(index, src)[1])
+        finally:
+            _worker_parser.close()
+        out.write("\n")
+        return written
+
+    pending: Dict[int, str] = {}
+    next_to_emit = 0
+    next_to_submit = 0
+    in_flight = set()
+
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=_init_worker,
+        initargs=(epub_path, cols, max_entry_bytes, use_mmap),
+    ) as pool:
+        while next_to_emit < len(spine):
+            # Keep the window full; buffered chapters count against it
+            while (
+                next_to_submit < len(spine)
+                and len(in_flight) + len(pending) < window
+            ):
+                in_flight.add(
+                    pool.submit(_render_one, next_to_submit,
+                                spine[next_to_submit])
+                )
+                next_to_submit += 1
+
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, text = future.result()
+                pending[index] = text
+
+            # Flush everything that is now contiguous
+            while next_to_emit in pending:
+                emit(pending.pop(next_to_emit))
+                next_to_emit += 1
+
+    out.write("\n")
+    return written
@@ -4,11 +4,18 @@
 Audio Player - Handles audio playback for TTS.
 """
 
+import logging
+import os
 import threading
 import time
 from pathlib import Path
 from typing import Callable, Optional
 
+logger = logging.getLogger(__name__)
+
+# Keep pygame's import banner off stdout (it would corrupt --dump output)
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
 try:
     import pygame
 
@@ -16,6 +23,10 @@ try:
     PYGAME_AVAILABLE = True
 except ImportError:
     PYGAME_AVAILABLE = False
+except Exception as e:
+    # No audio device (e.g. headless CI); the reader and --dump still work
+    logger.info(f"Audio output unavailable: {e}")
+    PYGAME_AVAILABLE = False
 
 
 class AudioPlayer:
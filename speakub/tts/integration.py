@@ -20,7 +20,10 @@ from speakub.tts.playlist_manager import PlaylistManager
 from speakub.tts.ui.network import NetworkManager
 from speakub.tts.ui.runners import find_and_play_next_chapter_worker
 from speakub.ui.protocols import AppInterface
-from speakub.utils.text_utils import correct_chinese_pronunciation
+from speakub.utils.text_utils import (
+    correct_chinese_pronunciation,
+    format_reading_time,
+)
 
 if TTS_AVAILABLE:
     try:
@@ -76,6 +79,30 @@ class TTSIntegration:
         except Exception:
             self.app.bell()
 
+    def _time_left_text(self, viewport_info: dict) -> str:
+        """
+        Format the TTS time left in the chapter and the book.
+
+        Args:
+            viewport_info: ViewportContent.get_viewport_info() of the chapter
+
+        Returns:
+            Text for the status bar, or "" before the statistics are built
+        """
+        stats = getattr(self.app, "book_stats", None)
+        chapter = getattr(self.app, "current_chapter", None)
+        if stats is None or not chapter or chapter.get("src") not in stats:
+            return ""
+        total_lines = viewport_info["total_content_lines"]
+        fraction = viewport_info["global_cursor"] / total_lines if total_lines else 0.0
+        rate = self.app.tts_rate
+        chapter_left = stats.chapter_seconds_left(chapter["src"], fraction, rate)
+        book_left = stats.book_seconds_left(chapter["src"], fraction, rate)
+        return (
+            f"Chapter: {format_reading_time(chapter_left / 60)} left"
+            f" | Book: {format_reading_time(book_left / 60)} left"
+        )
+
     async def update_tts_progress(self) -> None:
         """Update TTS progress display."""
         try:
@@ -105,6 +132,9 @@ class TTSIntegration:
             if self.app.viewport_content:
                 info = self.app.viewport_content.get_viewport_info()
                 page_text = f"Page {info['current_page'] + 1}/{info['total_pages']}"
+                time_left = self._time_left_text(info)
+                if time_left:
+                    page_text = f"{page_text} | {time_left}"
             page_widget.update(page_text)
 
             # Add debug info for current audio file
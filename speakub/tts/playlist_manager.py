@@ -5,12 +5,13 @@ Handles playlist generation and indexing.
 """
 
 import logging
-from typing import TYPE_CHECKING, List, Tuple, Union
+from typing import TYPE_CHECKING, List, Optional, Tuple, Union
 
 from speakub.tts.ui.playlist import prepare_tts_playlist, tts_load_next_chapter
 
 if TYPE_CHECKING:
     from speakub.tts.integration import TTSIntegration
+    from speakub.ui.widgets.content_widget import ViewportContent
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +26,10 @@ class PlaylistManager:
             Union[Tuple[str, int], Tuple[str, int, Union[bytes, str]]]
         ] = []
         self.current_index: int = 0
+        # Viewport of a chapter still being rendered, and its first paragraph
+        # not yet in the playlist (see tts_extend_playlist())
+        self.source_viewport: Optional["ViewportContent"] = None
+        self.next_paragraph: int = 0
 
     def generate_playlist(self) -> None:
         """Generate TTS playlist from current content."""
@@ -82,3 +87,5 @@ class PlaylistManager:
         """Reset playlist and index."""
         self.playlist = []
         self.current_index = 0
+        self.source_viewport = None
+        self.next_paragraph = 0
@@ -1,5 +1,6 @@
 
 import logging
+import time
 from typing import TYPE_CHECKING, List, Tuple, Union
 
 if TYPE_CHECKING:
@@ -7,6 +8,17 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# How often to look for newly rendered paragraphs of an incomplete chapter
+TAIL_POLL_SECONDS = 0.1
+
+
+def _finished_paragraphs(viewport_content) -> int:
+    """Number of paragraphs of a viewport that can no longer change."""
+    count = len(viewport_content.paragraphs)
+    if viewport_content.tail_is_open:
+        count -= 1
+    return count
+
 
 def prepare_tts_playlist(playlist_manager: "PlaylistManager") -> None:
     """Prepare TTS playlist from current content."""
@@ -28,18 +40,70 @@ def prepare_tts_playlist(playlist_manager: "PlaylistManager") -> None:
             if not para_info:
                 return
         start_idx = para_info["index"]
-        for p_info in app.viewport_content.paragraphs[start_idx:]:
+        end_idx = len(app.viewport_content.paragraphs)
+        if app.viewport_content.is_complete is False:
+            # The rest is added by tts_extend_playlist() as it is rendered
+            end_idx = _finished_paragraphs(app.viewport_content)
+            playlist_manager.source_viewport = app.viewport_content
+            playlist_manager.next_paragraph = max(start_idx, end_idx)
+        for p_info in app.viewport_content.paragraphs[start_idx:end_idx]:
             text = app.viewport_content.get_paragraph_text(p_info)
             if text.strip():
                 playlist_manager.playlist.append((text, p_info["start"]))
 
 
+def tts_extend_playlist(playlist_manager: "PlaylistManager") -> bool:
+    """
+    Append paragraphs of the current chapter rendered since the playlist was made.
+
+    Waits until the chapter renders more paragraphs, the chapter is left or
+    TTS is stopped.
+
+    Returns:
+        True if paragraphs were added
+    """
+    app = playlist_manager.app
+    tts_integration = playlist_manager.tts_integration
+    while not tts_integration.tts_stop_requested.is_set():
+        with tts_integration.tts_lock:
+            viewport_content = playlist_manager.source_viewport
+            if viewport_content is None or app.viewport_content is not viewport_content:
+                playlist_manager.source_viewport = None
+                return False
+            end_idx = _finished_paragraphs(viewport_content)
+            if end_idx > playlist_manager.next_paragraph:
+                start_idx = playlist_manager.next_paragraph
+                playlist_manager.next_paragraph = end_idx
+                if viewport_content.is_complete:
+                    playlist_manager.source_viewport = None
+                added = False
+                for p_info in viewport_content.paragraphs[start_idx:end_idx]:
+                    text = viewport_content.get_paragraph_text(p_info)
+                    if text.strip():
+                        playlist_manager.playlist.append((text, p_info["start"]))
+                        added = True
+                if added:
+                    return True
+                continue
+            if viewport_content.is_complete:
+                playlist_manager.source_viewport = None
+                return False
+        time.sleep(TAIL_POLL_SECONDS)
+    return False
+
+
 def tts_load_next_chapter(playlist_manager: "PlaylistManager") -> bool:
     """Load next chapter for TTS."""
     app = playlist_manager.app
     if not app.epub_manager:
         return False
 
+    # The current chapter may still be rendering
+    if playlist_manager.source_viewport is not None and tts_extend_playlist(
+        playlist_manager
+    ):
+        return True
+
     with playlist_manager.tts_integration.tts_lock:
         try:
             # Use the new facade method to get next chapter and its content
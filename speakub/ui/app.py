@@ -17,6 +17,8 @@ from textual.widgets import Footer, Header, Static, Tree
 
 from speakub import TTS_AVAILABLE
 from speakub.core import ConfigurationError
+from speakub.core.book_stats import BookStats
+from speakub.core.parsed_chapter import ParsedChapter
 from speakub.core.progress_tracker import ProgressTracker
 from speakub.tts.integration import TTSIntegration
 from speakub.ui.actions import SpeakUBActions
@@ -26,7 +28,11 @@ from speakub.ui.progress import ProgressManager
 from speakub.ui.ui_utils import UIUtils
 from speakub.ui.voice_selector_panel import VoiceSelectorPanel
 from speakub.ui.widgets.content_widget import ContentDisplay, ViewportContent
-from speakub.utils.config import ConfigManager
+from speakub.utils.config import ConfigManager, get_config
+from speakub.utils.performance_monitor import (
+    PerformanceMonitor,
+    create_performance_monitor,
+)
 
 if TTS_AVAILABLE:
     try:
@@ -139,12 +145,14 @@ class EPUBReaderApp(App):
         debug: bool = False,
         log_file: Optional[str] = None,
         fallback_viewport_height: int = 25,
+        rebuild_index: bool = False,
         **kwargs,
     ):
         super().__init__(**kwargs)
         self.epub_path = epub_path
         self.log_file = log_file
         self._debug = bool(debug)
+        self.rebuild_index = bool(rebuild_index)
         self.fallback_viewport_height = fallback_viewport_height
 
         self.current_focus = "toc"
@@ -152,8 +160,11 @@ class EPUBReaderApp(App):
         self.tts_visible = True
         self.toc_data: Optional[Dict] = None
         self.current_chapter: Optional[Dict] = None
+        self.current_parsed_chapter: Optional[ParsedChapter] = None
         self.current_chapter_soup: Optional[BeautifulSoup] = None
         self.viewport_content: Optional[ViewportContent] = None
+        # Reading statistics of the whole book, once built in the background
+        self.book_stats: Optional[BookStats] = None
         self.current_viewport_height = fallback_viewport_height
         self._widgets_ready = False
 
@@ -191,6 +202,12 @@ class EPUBReaderApp(App):
         self.ui_utils = UIUtils(self)
         self.progress_tracker: Optional[ProgressTracker] = None
         self.chapter_manager = None
+        # Render timing histograms, when monitoring or benchmarking is enabled
+        self.performance_monitor: Optional[PerformanceMonitor] = None
+        if get_config("performance.enable_monitoring", False) or get_config(
+            "performance.benchmark_enabled", False
+        ):
+            self.performance_monitor = create_performance_monitor(self)
 
     # --- Start: Property implementations for AppInterface ---
     @property
@@ -271,6 +288,8 @@ class EPUBReaderApp(App):
         content_display.app_ref = self
         content_display.can_focus = True
         self._widgets_ready = True
+        if self.performance_monitor:
+            self.performance_monitor.start_monitoring()
         self.set_timer(0.1, self._delayed_viewport_calculation)
         await self.tts_integration.setup_tts()
         await self.epub_manager.load_epub()
@@ -339,7 +358,11 @@ class EPUBReaderApp(App):
         self.ui_utils.calculate_viewport_height()
 
     def on_resize(self, event) -> None:
-        self.set_timer(0.05, self.ui_utils.calculate_viewport_height)
+        self.set_timer(0.05, self._on_resize_settled)
+
+    def _on_resize_settled(self) -> None:
+        self.epub_manager.reflow_content()
+        self.ui_utils.calculate_viewport_height()
 
     def on_tree_node_selected(self, event: Tree.NodeSelected) -> None:
         if event.node.data:
@@ -450,6 +473,17 @@ class EPUBReaderApp(App):
     async def _update_toc_tree(self, toc_data: dict) -> None:
         await self.ui_utils.update_toc_tree(toc_data)
 
+    async def _load_chapter(
+        self,
+        chapter: dict,
+        cfi: Optional[str] = None,
+        from_start: bool = False,
+        from_end: bool = False,
+    ) -> None:
+        await self.epub_manager.load_chapter(
+            chapter, cfi=cfi, from_start=from_start, from_end=from_end
+        )
+
     async def _update_tts_progress(self) -> None:
         await self.tts_integration.update_tts_progress()
 
@@ -475,3 +509,7 @@ class EPUBReaderApp(App):
         self.tts_integration.cleanup()
         self.progress_manager.cleanup()
         self.epub_manager.close_epub()
+        if self.performance_monitor:
+            if get_config("performance.benchmark_enabled", False):
+                self.performance_monitor.dump_benchmark()
+            self.performance_monitor.stop_monitoring()
@@ -4,19 +4,39 @@
 EPUB management for SpeakUB
 """
 
-from typing import TYPE_CHECKING, Dict, Optional
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
 
 from bs4 import BeautifulSoup
 
+from speakub.core.book_stats import BookStats
 from speakub.core.chapter_manager import ChapterManager
 from speakub.core.content_renderer import ContentRenderer
+from speakub.core.epub.index_cache import BookIndexCache, compute_fingerprint
 from speakub.core.epub_parser import EPUBParser
+from speakub.core.parsed_chapter import ParsedChapter
 from speakub.core.progress_tracker import ProgressTracker
+from speakub.core.render_cache import RenderCache
 from speakub.ui.widgets.content_widget import ViewportContent
+from speakub.utils.config import (
+    get_cache_config,
+    get_config,
+    get_epub_config,
+    get_render_config,
+)
+from speakub.utils.display_width import configure_width_cache
 
 if TYPE_CHECKING:
     from speakub.ui.app import EPUBReaderApp
 
+logger = logging.getLogger(__name__)
+
+# Name prefix of the chapter load worker thread
+_LOAD_THREAD_PREFIX = "speakub-chapter"
+
 
 class EPUBManager:
     """Manages EPUB loading, parsing, and content access."""
@@ -29,43 +49,284 @@ class EPUBManager:
         self.progress_tracker: Optional[ProgressTracker] = None
         self.toc_data: Optional[Dict] = None
         self.current_chapter: Optional[Dict] = None
+        self.current_parsed_chapter: Optional[ParsedChapter] = None
         self.current_chapter_soup: Optional[BeautifulSoup] = None
+        # Chapter reading, parsing and rendering run on this worker so the
+        # event loop stays responsive; one thread keeps parser and renderer
+        # access serial, so other threads queue their reads here as well
+        self._load_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix=_LOAD_THREAD_PREFIX
+        )
+        # Incremented per load_chapter() call; older loads are dropped
+        self._load_generation = 0
+        self.stale_loads = 0
+        # A resize during an incremental render is applied once it completes
+        self._reflow_pending = False
+        # Width of the shown viewport while a reflow is in flight
+        self._reflow_from_width: Optional[int] = None
+        # Renderer width once the queued work has run (None: no change queued)
+        self._target_width: Optional[int] = None
+        self.book_stats: Optional[BookStats] = None
+        # Set on close so a running statistics build stops early
+        self._stats_stop = threading.Event()
 
     async def load_epub(self) -> None:
         """Load and initialize EPUB file."""
         try:
-            self.epub_parser = EPUBParser(self.app.epub_path, trace=self.app._debug)
+            index_cache = None
+            if get_config("cache.book_index_enabled", True):
+                index_cache = BookIndexCache(rebuild=self.app.rebuild_index)
+            epub_config = get_epub_config()
+            cache_config = get_cache_config()
+            render_config = get_render_config()
+            configure_width_cache(cache_config["width_cache_size"])
+            self.epub_parser = EPUBParser(
+                self.app.epub_path,
+                trace=self.app._debug,
+                index_cache=index_cache,
+                max_entry_bytes=epub_config["max_entry_bytes"],
+                chapter_cache_bytes=cache_config["chapter_cache_bytes"],
+                use_mmap=epub_config["use_mmap"],
+                chapter_cache_items=cache_config["chapter_cache_size"],
+            )
             self.epub_parser.open()
-            self.toc_data = self.epub_parser.parse_toc()
+            # Only the OPF is read here (or the cached TOC reused), so the
+            # saved chapter can open before the navigation document is parsed
+            self.toc_data = self.epub_parser.read_spine_toc()
+            self._target_width = None
             self.content_renderer = ContentRenderer(
                 content_width=self.app.ui_utils.calculate_content_width(),
                 trace=self.app._debug,
+                render_cache=RenderCache(
+                    max_bytes=cache_config["render_cache_bytes"],
+                    disk_cache=cache_config["render_disk_cache"],
+                    max_disk_bytes=cache_config["render_disk_cache_bytes"],
+                ),
+                stream_threshold_bytes=render_config["stream_threshold_bytes"],
+                html2text_timeout=render_config["html2text_timeout"],
             )
-            self.chapter_manager = ChapterManager(self.toc_data, trace=self.app._debug)
+            self._set_chapter_manager()
             self.progress_tracker = ProgressTracker(
                 self.app.epub_path, trace=self.app._debug
             )
             self.app.progress_tracker = self.progress_tracker
             self.app.toc_data = self.toc_data
 
-            await self.app.ui_utils.update_toc_tree(self.toc_data)
-            self.app.ui_utils.update_panel_titles()
             await self.app.progress_manager.load_saved_progress()
-            self.app.ui_utils.update_panel_titles()
+            self.app.run_worker(
+                self.build_toc(), group="toc", exclusive=True)
+            self.app.run_worker(
+                self.build_book_stats(), group="stats", exclusive=True)
         except Exception as e:
             import logging
 
             logging.exception("Error loading EPUB")
             self.app.notify(f"Error: {e}", severity="error")
 
+    def _set_chapter_manager(self) -> None:
+        """(Re)build the chapter manager from the current TOC data."""
+        self.chapter_manager = ChapterManager(self.toc_data, trace=self.app._debug)
+        self.app.chapter_manager = self.chapter_manager
+
+    async def build_toc(self) -> None:
+        """
+        Complete the TOC and populate the tree incrementally.
+
+        Entries appear in batches while the navigation document is parsed.
+        Afterwards chapter navigation is rebuilt with the TOC titles and the
+        open chapter is re-bound to its entry in the new chapter list.
+        """
+        try:
+            await self.app.ui_utils.populate_toc_tree(
+                self.toc_data.get("book_title", "Book"),
+                self.epub_parser.iter_toc_nodes(self.toc_data),
+            )
+            self._set_chapter_manager()
+            if self.current_chapter:
+                chapter = self.chapter_manager.find_chapter_by_src(
+                    self.current_chapter["src"]
+                )
+                if chapter:
+                    self.current_chapter = chapter
+                    self.app.current_chapter = chapter
+            self.app.ui_utils.update_panel_titles()
+        except Exception as e:
+            import logging
+
+            logging.exception("Error building table of contents")
+            self.app.notify(f"Error: {e}", severity="error")
+
+    async def build_book_stats(self) -> None:
+        """
+        Load or build the reading statistics index of the book.
+
+        The saved index is reused while the file is unchanged. Otherwise
+        every chapter is counted on a background thread with a parser of its
+        own, so chapter loads are not held up, and the result is saved.
+        """
+        try:
+            stats = await asyncio.to_thread(self._load_or_build_book_stats)
+        except Exception as e:
+            logger.warning(f"Could not build reading statistics: {e}")
+            return
+        if stats is None:
+            return
+        self.book_stats = stats
+        self.app.book_stats = stats
+        await self.app._update_tts_progress()
+
+    def _load_or_build_book_stats(self) -> Optional[BookStats]:
+        """Thread part of build_book_stats()."""
+        fingerprint = compute_fingerprint(self.app.epub_path)
+        data = self.progress_tracker.load_book_stats(fingerprint)
+        if data is not None:
+            stats = BookStats.from_dict(data)
+            if stats is not None:
+                return stats
+
+        # Same limits as the reading parser, without a chapter cache
+        parser = EPUBParser(
+            self.app.epub_path,
+            trace=self.app._debug,
+            index_cache=self.epub_parser.index_cache,
+            max_entry_bytes=self.epub_parser.max_entry_bytes,
+            chapter_cache_bytes=0,
+            use_mmap=self.epub_parser.use_mmap,
+        )
+        parser.open()
+        try:
+            stats = BookStats.build(
+                self.toc_data.get("spine_order", []),
+                parser.read_chapter,
+                should_stop=self._stats_stop.is_set,
+            )
+        finally:
+            parser.close()
+        if stats is not None:
+            self.progress_tracker.save_book_stats(fingerprint, stats.to_dict())
+            logger.debug(f"Reading statistics built for {len(stats)} chapters")
+        return stats
+
     def close_epub(self) -> None:
         """Close EPUB parser and clean up resources."""
+        self._load_generation += 1
+        self._stats_stop.set()
+        self._load_executor.shutdown(wait=False, cancel_futures=True)
+        if self.progress_tracker:
+            self.progress_tracker.close()
         if self.epub_parser:
             try:
                 self.epub_parser.close()
             except Exception:
                 pass
 
+    def _prepare_chapter(
+        self,
+        chapter: dict,
+        generation: int,
+        need_index: bool,
+        incremental: bool = False,
+    ) -> Optional[
+        Tuple[ParsedChapter, ViewportContent, Optional[Iterator[List[str]]]]
+    ]:
+        """
+        CPU stage of a chapter load, run on the load worker.
+
+        Args:
+            chapter: Chapter to load
+            generation: Load generation this request belongs to
+            need_index: Also build the CFI indexes (used by every progress
+                save, so the loop never builds them)
+            incremental: Render a large chapter in batches, returning after
+                the first screenful
+
+        Returns:
+            (parsed chapter, viewport over its rendered lines, iterator of the
+            remaining line batches or None), or None if the load went stale
+            while it was queued
+        """
+        if generation != self._load_generation:
+            return None
+        parsed = self.epub_parser.read_parsed_chapter(chapter["src"])
+        height = self.app.current_viewport_height
+        if incremental and self.content_renderer.renders_incrementally(parsed.html):
+            # The tree and TTS text wait until the whole chapter is rendered
+            batches = self.content_renderer.iter_render_batches(
+                parsed.html, first_batch_lines=height
+            )
+            viewport_content = ViewportContent(
+                next(batches, []), height, complete=False
+            )
+            return parsed, viewport_content, batches
+        content_lines = parsed.render_lines(self.content_renderer)
+        parsed.prepare(tts=bool(self.app.tts_widget), index=need_index)
+        viewport_content = ViewportContent(content_lines, height)
+        return parsed, viewport_content, None
+
+    def _next_batch(
+        self, batches: Iterator[List[str]], generation: int
+    ) -> Optional[List[str]]:
+        """Render the next batch of a chapter on the load worker."""
+        if generation != self._load_generation:
+            return None
+        return next(batches, None)
+
+    def _finish_parse(self, parsed: ParsedChapter, generation: int) -> None:
+        """Build the tree, TTS text and CFI indexes of a streamed chapter."""
+        if generation != self._load_generation:
+            return
+        parsed.prepare(tts=bool(self.app.tts_widget), index=True)
+
+    async def _render_tail(
+        self,
+        parsed: ParsedChapter,
+        viewport_content: ViewportContent,
+        batches: Iterator[List[str]],
+        generation: int,
+    ) -> None:
+        """
+        Append the rest of an incrementally rendered chapter to its viewport.
+
+        Batches are rendered on the load worker, so a newer chapter load
+        queues behind at most one batch, and this stops once the load is
+        stale. When the last batch is in, the tree is built, which enables
+        progress saving and TTS text for the chapter.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                lines = await loop.run_in_executor(
+                    self._load_executor, self._next_batch, batches, generation
+                )
+                if generation != self._load_generation:
+                    return
+                if lines is None:
+                    break
+                viewport_content.append_lines(lines)
+                self.app.ui_utils.update_content_display()
+
+            await loop.run_in_executor(
+                self._load_executor, self._finish_parse, parsed, generation
+            )
+            if generation != self._load_generation:
+                return
+            viewport_content.mark_complete()
+            self.current_chapter_soup = parsed.soup
+            self.app.current_chapter_soup = self.current_chapter_soup
+            if self.app.tts_widget:
+                self.app.tts_widget.set_text(parsed.tts_text)
+            self.app.ui_utils.update_panel_titles()
+            self.app.ui_utils.update_content_display()
+            if self._reflow_pending:
+                self._reflow_pending = False
+                self.reflow_content()
+        except Exception as e:
+            logger.exception("Error rendering chapter")
+            if generation == self._load_generation:
+                self.app.notify(f"Error: {e}", severity="error")
+        finally:
+            batches.close()
+
     async def load_chapter(
         self,
         chapter: dict,
@@ -73,25 +334,56 @@ class EPUBManager:
         from_start: bool = False,
         from_end: bool = False,
     ) -> None:
-        """Load a specific chapter."""
+        """
+        Load a specific chapter.
+
+        The chapter is read, parsed and rendered on the load worker while a
+        loading indicator is shown; only applying the result to the viewport
+        runs on the event loop. When another load starts before this one
+        finishes (e.g. key-repeat across chapters), this one is dropped.
+
+        Large chapters opened at their start are rendered incrementally: the
+        first page is shown at once and the rest is appended in the
+        background. Opening at a CFI or at the end needs the whole chapter.
+        """
+        self._load_generation += 1
+        generation = self._load_generation
+        self._reflow_pending = False
+        # Navigation continues from the requested chapter right away
+        self._reflow_from_width = None
+        self.current_chapter = chapter
+        self.app.ui_utils.show_chapter_loading(chapter)
         try:
-            self.current_chapter = chapter
-            self.app.current_chapter = chapter
-            html_content = self.epub_parser.read_chapter(chapter["src"])
-            self.current_chapter_soup = BeautifulSoup(html_content, "html.parser")
-            content_lines = self.content_renderer.render_chapter(html_content)
-            self.app.viewport_content = ViewportContent(
-                content_lines, self.app.current_viewport_height
+            loop = asyncio.get_running_loop()
+            prepared = await loop.run_in_executor(
+                self._load_executor,
+                self._prepare_chapter,
+                chapter,
+                generation,
+                True,
+                not cfi and not from_end,
             )
+            if prepared is None or generation != self._load_generation:
+                self.stale_loads += 1
+                if prepared is not None and prepared[2] is not None:
+                    prepared[2].close()
+                return
+            parsed, viewport_content, batches = prepared
+
+            self.app.current_chapter = chapter
+            self.current_parsed_chapter = parsed
+            self.app.current_parsed_chapter = parsed
+            # Set once a streamed chapter is complete (see _render_tail())
+            self.current_chapter_soup = parsed.soup if batches is None else None
+            self.app.current_chapter_soup = self.current_chapter_soup
+            self.app.viewport_content = viewport_content
 
             cursor_position = 0
             if cfi and self.current_chapter_soup:
                 try:
                     cursor_position = self.app.progress_manager.get_line_from_cfi(cfi)
                 except Exception as e:
-                    import logging
-
-                    logging.warning(f"CFI resolution failed: {e}")
+                    logger.warning(f"CFI resolution failed: {e}")
                     cursor_position = 0
 
             if from_end:
@@ -111,18 +403,125 @@ class EPUBManager:
 
             self.app.ui_utils.update_content_display()
 
-            if self.app.tts_widget:
-                self.app.tts_widget.set_text(
-                    self.content_renderer.extract_text_for_tts(html_content)
-                )
+            if self.app.tts_widget and batches is None:
+                self.app.tts_widget.set_text(parsed.tts_text)
 
             self.app.title = f"SpeakUB - {self.toc_data.get('book_title', 'Book') if self.toc_data else 'Book'}"
             self.app.ui_utils.update_panel_titles()
+            if batches is not None:
+                self.app.run_worker(
+                    self._render_tail(parsed, viewport_content, batches, generation),
+                    group="chapter-render",
+                    exclusive=True,
+                )
         except Exception as e:
-            import logging
-
-            logging.exception("Error loading chapter")
+            logger.exception("Error loading chapter")
             self.app.notify(f"Error: {e}", severity="error")
+            if generation == self._load_generation:
+                # Drop the loading indicator
+                self.app.ui_utils.update_panel_titles()
+
+    def reflow_content(self) -> None:
+        """
+        Re-wrap the current chapter after the content width changed.
+
+        Only the wrapping stage runs again, on the load worker; the cursor
+        stays on the same paragraph and character offset.
+        """
+        if not (
+            self.content_renderer
+            and self.epub_parser
+            and self.app.current_chapter
+            and self.app.viewport_content
+        ):
+            return
+        if not getattr(self.app.viewport_content, "is_complete", True):
+            self._reflow_pending = True
+            return
+        old_width = self._target_width or self.content_renderer.content_width
+        # ContentRenderer.update_width() never goes below 20 columns
+        new_width = max(20, self.app.ui_utils.calculate_content_width())
+        if new_width == old_width:
+            return
+        # The renderer is only touched on the load worker: a render already
+        # queued finishes (and is cached) at the old width, later ones use
+        # the new one
+        try:
+            self._load_executor.submit(self.content_renderer.update_width, new_width)
+        except RuntimeError:
+            # The book was closed
+            return
+        self._target_width = new_width
+        if self._reflow_from_width is None:
+            # The viewport shown is still wrapped at this width
+            self._reflow_from_width = old_width
+        self.app.run_worker(
+            self._reflow(
+                self.app.current_chapter["src"],
+                self._reflow_from_width,
+                new_width,
+                self.app.viewport_content.get_cursor_global_position(),
+                self._load_generation,
+            ),
+            group="chapter-reflow",
+            exclusive=True,
+        )
+
+    def _prepare_reflow(
+        self,
+        src: str,
+        old_width: int,
+        new_width: int,
+        cursor: int,
+        generation: int,
+    ) -> Optional[Tuple[List[str], int]]:
+        """
+        Wrap a chapter at a new width on the load worker.
+
+        Returns:
+            (lines at the new width, line of the cursor), or None if a chapter
+            load started while this was queued
+        """
+        if generation != self._load_generation:
+            return None
+        html_content = self.epub_parser.read_chapter(src)
+        old_layout = self.content_renderer.layout_chapter(html_content, old_width)
+        new_layout = self.content_renderer.layout_chapter(html_content, new_width)
+        anchor = old_layout.anchor_at(cursor)
+        return new_layout.lines, new_layout.line_at(anchor)
+
+    async def _reflow(
+        self,
+        src: str,
+        old_width: int,
+        new_width: int,
+        cursor: int,
+        generation: int,
+    ) -> None:
+        """Apply a reflow prepared on the load worker to the viewport."""
+        loop = asyncio.get_running_loop()
+        try:
+            prepared = await loop.run_in_executor(
+                self._load_executor,
+                self._prepare_reflow,
+                src,
+                old_width,
+                new_width,
+                cursor,
+                generation,
+            )
+        except Exception as e:
+            logger.warning(f"Failed to reflow chapter: {e}")
+            prepared = None
+        # A newer resize cancels this one and keeps _reflow_from_width
+        self._reflow_from_width = None
+        if prepared is None or generation != self._load_generation:
+            return
+        lines, line = prepared
+        viewport_content = ViewportContent(lines, self.app.current_viewport_height)
+        viewport_content.jump_to_line(line)
+        self.app.viewport_content = viewport_content
+        self.app.ui_utils.update_content_display()
 
     def get_next_chapter(self) -> Optional[dict]:
         """Get the next chapter."""
@@ -148,7 +547,18 @@ class EPUBManager:
         if not self.epub_parser or not self.content_renderer:
             return None
 
-        html = self.epub_parser.read_chapter(next_chapter["src"])
-        lines = self.content_renderer.render_chapter(html)
+        # Called from the TTS thread: the read and render wait their turn on
+        # the load worker instead of racing a chapter load
+        if threading.current_thread().name.startswith(_LOAD_THREAD_PREFIX):
+            lines = self._read_and_render(next_chapter["src"])
+        else:
+            lines = self._load_executor.submit(
+                self._read_and_render, next_chapter["src"]
+            ).result()
 
         return next_chapter, lines
+
+    def _read_and_render(self, src: str) -> List[str]:
+        """Read and render a chapter (on the load worker)."""
+        html = self.epub_parser.read_chapter(src)
+        return self.content_renderer.render_chapter(html)
@@ -7,7 +7,7 @@ Panel title widget for SpeakUB
 from rich.text import Text
 from textual.widgets import Static
 
-from speakub.utils.text_utils import str_display_width
+from speakub.utils.display_width import display_width
 
 
 class PanelTitle(Static):
@@ -38,9 +38,10 @@ class PanelTitle(Static):
             return Text(self.main_title, no_wrap=True, overflow="ellipsis")
 
         # Use the correct function to measure the display width of strings,
-        # which handles wide characters (like Chinese) correctly.
-        main_width = str_display_width(self.main_title)
-        right_width = str_display_width(self.right_title)
+        # which handles wide characters (like Chinese) correctly. Titles are
+        # measured on every render, so go through the shared width cache.
+        main_width = display_width(self.main_title)
+        right_width = display_width(self.right_title)
 
         # Calculate the number of spaces needed to push the right title to the edge.
         padding = panel_width - main_width - right_width
@@ -57,7 +58,7 @@ class PanelTitle(Static):
                 from speakub.utils.text_utils import truncate_str_by_width
 
                 self.main_title = truncate_str_by_width(self.main_title, max_main_width)
-                main_width = str_display_width(self.main_title)
+                main_width = display_width(self.main_title)
                 padding = panel_width - main_width - right_width
                 if padding < 1:
                     padding = 1
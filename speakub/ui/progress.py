@@ -6,10 +6,14 @@ Progress management for SpeakUB
 
 import asyncio
 import logging
+import queue
 import time
 from typing import TYPE_CHECKING, Optional
 
-from speakub.core.cfi import CFIGenerator, CFIResolver, EPUBCFIError
+from speakub.core.cfi import CFIGenerator, CFIIndex, CFIResolver, EPUBCFIError
+from speakub.core.parsed_chapter import ChapterTextIndex
+from speakub.core.progress_writer import ProgressWriter
+from speakub.utils.profiling import SPAN_CFI_GENERATE, SPAN_CFI_RESOLVE, span
 
 if TYPE_CHECKING:
     from speakub.ui.app import EPUBReaderApp
@@ -36,6 +40,7 @@ class ProgressManager:
         self._progress_save_timer: Optional[asyncio.Task] = None
         self._progress_save_delay = 5.0  # 5 second debouncing
         self._pending_progress_save = False
+        self._progress_writer = ProgressWriter()
 
     async def start_progress_tracking(self) -> None:
         """Start progress tracking timers."""
@@ -81,36 +86,47 @@ class ProgressManager:
         """Update last user activity timestamp."""
         self._last_user_activity = time.time()
 
+    def _get_text_index(self) -> ChapterTextIndex:
+        """Text node index of the current chapter, built once per chapter."""
+        parsed = getattr(self.app, "current_parsed_chapter", None)
+        if parsed is not None and parsed.is_parsed:
+            if parsed.soup is self.app.current_chapter_soup:
+                return parsed.text_index
+        return ChapterTextIndex(self.app.current_chapter_soup)
+
+    def _get_cfi_index(self) -> CFIIndex:
+        """CFI node index of the current chapter, built once per chapter."""
+        parsed = getattr(self.app, "current_parsed_chapter", None)
+        if parsed is not None and parsed.is_parsed:
+            if parsed.soup is self.app.current_chapter_soup:
+                return parsed.cfi_index
+        return CFIIndex(self.app.current_chapter_soup)
+
     def get_line_from_cfi(self, cfi: str) -> int:
         """Convert CFI to line number."""
+        with span(SPAN_CFI_RESOLVE):
+            return self._line_from_cfi(cfi)
+
+    def _line_from_cfi(self, cfi: str) -> int:
+        """Resolve a CFI and map its text position to a content line."""
         if not self.app.current_chapter_soup or not self.app.viewport_content:
             raise ValueError("Chapter content not loaded.")
-        result = CFIResolver.resolve_cfi(self.app.current_chapter_soup, cfi)
+        result = CFIResolver.resolve_cfi(
+            self.app.current_chapter_soup, cfi, index=self._get_cfi_index()
+        )
         if not result or not result.get("node"):
             raise EPUBCFIError("CFI resolution failed.")
         target_node, offset = result["node"], result.get("offset", 0)
-        char_count = 0
-        body = (
-            self.app.current_chapter_soup.find("body") or self.app.current_chapter_soup
-        )
-        for el in body.descendants:
-            if el is target_node:
-                break
-            if hasattr(el, "text") and el.text:
-                text = el.text.strip()
-                if text:
-                    char_count += len(text) + 1
-        target_pos = char_count + offset
-        total_chars = 0
-        for i, line in enumerate(self.app.viewport_content.content_lines):
-            line_len = len(line) + 1
-            if total_chars + line_len > target_pos:
-                return i
-            total_chars += line_len
-        return len(self.app.viewport_content.content_lines) - 1
+        char_count = self._get_text_index().chars_before(target_node)
+        return self.app.viewport_content.line_at_char_offset(char_count + offset)
 
     def get_cfi_from_line(self, line_num: int) -> str:
         """Convert line number to CFI."""
+        with span(SPAN_CFI_GENERATE):
+            return self._cfi_from_line(line_num)
+
+    def _cfi_from_line(self, line_num: int) -> str:
+        """Find the text node of a content line and build its CFI."""
         if not all(
             [
                 self.app.current_chapter_soup,
@@ -125,39 +141,17 @@ class ProgressManager:
         )
         if spine_index is None:
             raise ValueError("Chapter not found in spine.")
-        body = (
-            self.app.current_chapter_soup.find("body") or self.app.current_chapter_soup
-        )
-        text_nodes = [
-            (el, el.text.strip())
-            for el in body.descendants
-            if hasattr(el, "text") and el.text and el.text.strip()
-        ]
-        if not text_nodes:
-            return f"epubcfi(/6/{(spine_index + 1) * 2}!/4:0)"
         if not (0 <= line_num < len(self.app.viewport_content.content_lines)):
             line_num = 0
-        char_offset_target = sum(
-            len(ln) + 1 for ln in self.app.viewport_content.content_lines[:line_num]
+        located = self._get_text_index().locate(
+            self.app.viewport_content.char_offset_of_line(line_num)
+        )
+        if located is None:
+            return f"epubcfi(/6/{(spine_index + 1) * 2}!/4:0)"
+        node, offset = located
+        return CFIGenerator.generate_cfi(
+            spine_index, node, offset, self._get_cfi_index()
         )
-        char_count_scanned = 0
-        best_node, best_offset, min_distance = None, 0, float("inf")
-        for node, text in text_nodes:
-            text_len, node_start = len(text), char_count_scanned
-            if node_start <= char_offset_target < node_start + text_len:
-                best_node, best_offset = node, char_offset_target - node_start
-                break
-            dist = abs(char_offset_target - (node_start + text_len / 2))
-            if dist < min_distance:
-                min_distance = dist
-                best_node, best_offset = (
-                    node,
-                    (0 if char_offset_target < node_start else text_len),
-                )
-            char_count_scanned += text_len + 1
-        if best_node is None:
-            best_node, _ = text_nodes[0]
-        return CFIGenerator.generate_cfi(spine_index, best_node, best_offset)
 
     async def load_saved_progress(self) -> None:
         """Load saved reading progress."""
@@ -192,47 +186,61 @@ class ProgressManager:
             pass
 
     def save_progress(self) -> None:
-        """Save current reading progress with debouncing."""
+        """
+        Save current reading progress with debouncing.
+
+        The first request starts a window of _progress_save_delay seconds;
+        further requests in the window only mark the save as pending. At the
+        end of the window the position is handed to the progress writer, so
+        key handling never waits for I/O and a killed process loses at most
+        one window.
+        """
         if (
             self.app.progress_tracker
             and self.app.current_chapter
             and self.app.viewport_content
         ):
-            # Set pending save flag
             self._pending_progress_save = True
-
-            # Cancel existing timer if any
-            if self._progress_save_timer:
-                try:
-                    self._progress_save_timer.cancel()
-                except Exception:
-                    pass
-
-            # Schedule delayed save
-            self._progress_save_timer = asyncio.create_task(
-                self._delayed_save_progress()
-            )
+            if self._progress_save_timer is None or self._progress_save_timer.done():
+                self._progress_save_timer = asyncio.create_task(
+                    self._delayed_save_progress()
+                )
 
     async def _delayed_save_progress(self) -> None:
-        """Perform delayed progress save after debouncing period."""
-        try:
+        """
+        Perform delayed progress save after debouncing period.
+
+        A position rejected by the writer's full queue stays pending and is
+        retried after another window.
+        """
+        while True:
             await asyncio.sleep(self._progress_save_delay)
+            self._submit_progress()
+            if not self._pending_progress_save:
+                return
 
-            # Only save if still pending (not cancelled by another save request)
-            if self._pending_progress_save:
-                self._pending_progress_save = False
-                try:
-                    line_num = self.app.viewport_content.get_cursor_global_position()
-                    cfi = self.get_cfi_from_line(line_num)
-                    self.app.progress_tracker.save_progress(
-                        self.app.current_chapter["src"], cfi
-                    )
-                except Exception:
-                    pass
-        except asyncio.CancelledError:
-            # Save was cancelled, reset flag
+    def _submit_progress(self) -> None:
+        """
+        Queue the current position for the progress writer if a save is pending.
+
+        The save stays pending only if the writer's queue is full; a position
+        that cannot be read, or a closed writer, drops it.
+        """
+        if not self._pending_progress_save or not self.app.progress_tracker:
+            return
+        try:
+            chapter_src = self.app.current_chapter["src"]
+            line_num = self.app.viewport_content.get_cursor_global_position()
+            cfi = self.get_cfi_from_line(line_num)
+        except Exception as e:
+            logger.debug(f"Progress position not saved: {e}")
             self._pending_progress_save = False
-            raise
+            return
+        try:
+            self._progress_writer.submit(self.app.progress_tracker, chapter_src, cfi)
+        except queue.Full:
+            return
+        self._pending_progress_save = False
 
     def cleanup(self) -> None:
         """Clean up progress tracking resources."""
@@ -251,3 +259,7 @@ class ProgressManager:
                 self._progress_save_timer.cancel()
             except Exception:
                 pass
+        # Write the last position before exiting
+        self._submit_progress()
+        if not self._progress_writer.close():
+            logger.warning("Progress writer did not finish before exit")
@@ -4,14 +4,18 @@
 UI utilities for SpeakUB
 """
 
+import asyncio
 import logging
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterable
 
 if TYPE_CHECKING:
     from speakub.ui.app import EPUBReaderApp
 
 logger = logging.getLogger(__name__)
 
+# TOC tree entries added between yields to the event loop
+TOC_BATCH_SIZE = 200
+
 
 class UIUtils:
     """Handles UI-related utilities and updates."""
@@ -88,12 +92,26 @@ class UIUtils:
                 filename = self.app.current_chapter.get("src", "")
                 if filename:
                     filename = filename.split("/")[-1]  # Get just the filename
+                viewport_content = self.app.viewport_content
+                if getattr(viewport_content, "is_complete", True) is False:
+                    filename = "Rendering..."
                 content_title_widget.update_texts(  # type: ignore
                     main_title=title_text, right_title=filename
                 )
         except Exception as e:
             logger.warning(f"Failed to update content panel title: {e}")
 
+    def show_chapter_loading(self, chapter: dict) -> None:
+        """Show a loading indicator for a chapter in the content panel title."""
+        try:
+            content_title_widget = self.app.query_one("#content-panel-title")
+            content_title_widget.update_texts(  # type: ignore
+                main_title=chapter.get("title", "Chapter Content"),
+                right_title="Loading...",
+            )
+        except Exception as e:
+            logger.debug(f"Failed to show loading indicator: {e}")
+
     def update_content_display(self) -> None:
         """Update content display with current viewport content."""
         try:
@@ -109,29 +127,68 @@ class UIUtils:
 
     async def update_toc_tree(self, toc_data: dict) -> None:
         """Update the table of contents tree."""
+        await self.populate_toc_tree(
+            toc_data.get("book_title", "Book"), toc_data.get("nodes", [])
+        )
+
+    async def populate_toc_tree(
+        self,
+        book_title: str,
+        nodes: Iterable[dict],
+        batch_size: int = TOC_BATCH_SIZE,
+    ) -> int:
+        """
+        Fill the table of contents tree from a stream of top-level nodes.
+
+        The tree is rebuilt in batches: after every batch_size added entries
+        control returns to the event loop so the entries appear (and the app
+        stays responsive) while the rest of the TOC is still being parsed.
+        The root shows "Loading..." until the stream is exhausted.
+
+        Args:
+            book_title: Label for the tree root
+            nodes: Top-level TOC nodes, e.g. from EPUBParser.iter_toc_nodes()
+            batch_size: Tree entries to add between yields to the event loop
+
+        Returns:
+            Number of tree entries added
+        """
         try:
             tree = self.app.query_one("#toc-tree")
-            tree.clear()  # type: ignore
-            tree.label = toc_data.get("book_title", "Book")  # type: ignore
-
-            # Build the TOC tree structure recursively
-            def add_node(parent, node_data):
-                """Recursively add nodes to the tree."""
-                if node_data.get("type") == "group":
-                    # Create a group node
-                    group_node = parent.add(
-                        node_data.get("title", "Group"), expand=False
-                    )
-                    for child in node_data.get("children", []):
-                        add_node(group_node, child)
-                else:
-                    # Create a leaf node
-                    parent.add_leaf(node_data.get("title", "Item"), data=node_data)
-
-            # Build the TOC tree structure
-            for node in toc_data.get("nodes", []):
-                add_node(tree.root, node)
+        except Exception as e:
+            logger.warning(f"Failed to update TOC tree: {e}")
+            return 0
 
+        added = 0
+        pending = 0
+
+        def add_node(parent, node_data) -> int:
+            """Recursively add nodes to the tree; returns entries added."""
+            if node_data.get("type") == "group":
+                # Create a group node
+                group_node = parent.add(
+                    node_data.get("title", "Group"), expand=False
+                )
+                count = 1
+                for child in node_data.get("children", []):
+                    count += add_node(group_node, child)
+                return count
+            # Create a leaf node
+            parent.add_leaf(node_data.get("title", "Item"), data=node_data)
+            return 1
+
+        try:
+            tree.clear()  # type: ignore
+            tree.root.set_label("Loading...")  # type: ignore
             tree.root.expand()  # type: ignore
+            for node in nodes:
+                count = add_node(tree.root, node)  # type: ignore
+                added += count
+                pending += count
+                if pending >= batch_size:
+                    pending = 0
+                    await asyncio.sleep(0)
+            tree.root.set_label(book_title)  # type: ignore
         except Exception as e:
             logger.warning(f"Failed to update TOC tree: {e}")
+        return added
@@ -3,12 +3,17 @@
 Content display widget for the EPUB reader.
 """
 
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
 from typing import Dict, List, Optional, Tuple
 
 from rich.text import Text
 from textual.binding import Binding
 from textual.widgets import Static
 
+from speakub.utils.profiling import SPAN_UPDATE_DISPLAY, SPAN_VIEWPORT, span
+
 
 class ViewportContent:
     """Manages viewport-based content structure with dynamic sizing and logical line navigation."""
@@ -27,66 +32,146 @@ class ViewportContent:
         "paragraphs",
         "logical_lines",
         "line_to_logical",
+        "line_offsets",
+        "is_complete",
+        "_open_paragraph",
+        "_open_logical",
     )
 
-    def __init__(self, content_lines: List[str], viewport_height: int = 25):
+    def __init__(
+        self, content_lines: List[str], viewport_height: int = 25, complete: bool = True
+    ):
+        """
+        Args:
+            content_lines: Rendered lines of the chapter
+            viewport_height: Lines per page
+            complete: False while more lines are still being rendered (see
+                append_lines() and mark_complete())
+        """
         self.content_lines = content_lines
         self.viewport_height = viewport_height
-        self.total_lines = len(content_lines)
-        self.total_pages = max(
-            1, (self.total_lines + viewport_height - 1) // viewport_height
-        )
+        self.is_complete = complete
         self.current_page = 0
         self.cursor_in_page = 0
-        self._build_logical_line_map()
-        self._build_content_line_map()
-        self._build_paragraph_map()
-
-    def _is_content_line(self, line: str) -> bool:
-        return bool(line and line.replace("&nbsp;", "").strip())
-
-    def _build_content_line_map(self):
         self.content_line_indices = []
         self.line_to_content_index = {}
-        content_index = 0
-        for line_idx, line in enumerate(self.content_lines):
-            if self._is_content_line(line):
-                self.content_line_indices.append(line_idx)
-                self.line_to_content_index[line_idx] = content_index
-                content_index += 1
-        self.total_content_lines = len(self.content_line_indices)
-
-    def _build_paragraph_map(self):
         self.line_to_paragraph_map = {}
         self.paragraphs = []
-        current_paragraph_lines = []
-        paragraph_idx = 0
-        for line_idx, line in enumerate(self.content_lines):
-            if self._is_content_line(line):
-                current_paragraph_lines.append(line_idx)
-            else:
-                if current_paragraph_lines:
-                    para_info = {
-                        "start": current_paragraph_lines[0],
-                        "end": current_paragraph_lines[-1],
-                        "lines": current_paragraph_lines,
-                        "index": paragraph_idx,
-                    }
-                    self.paragraphs.append(para_info)
-                    for p_line_idx in current_paragraph_lines:
-                        self.line_to_paragraph_map[p_line_idx] = para_info
-                    paragraph_idx += 1
-                    current_paragraph_lines = []
-        if current_paragraph_lines:
-            para_info = {
-                "start": current_paragraph_lines[0],
-                "end": current_paragraph_lines[-1],
-                "lines": current_paragraph_lines,
-                "index": paragraph_idx,
-            }
-            self.paragraphs.append(para_info)
-            for p_line_idx in current_paragraph_lines:
-                self.line_to_paragraph_map[p_line_idx] = para_info
+        self.logical_lines = []
+        self.line_to_logical = {}
+        # line_offsets[i]: characters before line i, counting one separator
+        # per line; the last entry is the total
+        self.line_offsets = array("q", [0])
+        self._open_paragraph = None
+        self._open_logical = None
+        self._update_totals()
+        with span(SPAN_VIEWPORT):
+            self._index_lines(0)
+
+    def _update_totals(self) -> None:
+        self.total_lines = len(self.content_lines)
+        self.total_pages = max(
+            1, (self.total_lines + self.viewport_height - 1) // self.viewport_height
+        )
+
+    def append_lines(self, lines: List[str]) -> None:
+        """
+        Add lines rendered after the viewport was created.
+
+        The page and cursor are kept; total_pages grows with the content.
+
+        Args:
+            lines: Lines following the current last line
+        """
+        start = len(self.content_lines)
+        self.content_lines.extend(lines)
+        self._update_totals()
+        with span(SPAN_VIEWPORT):
+            self._index_lines(start)
+
+    def mark_complete(self) -> None:
+        """Record that the chapter has no more lines to come."""
+        self.is_complete = True
+
+    @property
+    def tail_is_open(self) -> bool:
+        """Whether the last paragraph may still grow (content is incomplete)."""
+        return not self.is_complete and self._open_paragraph is not None
+
+    def _is_content_line(self, line: str) -> bool:
+        return bool(line and line.replace("&nbsp;", "").strip())
+
+    def _index_lines(self, start: int) -> None:
+        """
+        Map content lines, paragraphs and logical lines from `start` on.
+
+        Paragraphs are runs of content lines; a paragraph reaching the last
+        line stays open so that appended lines can continue it.
+        """
+        lines = self.content_lines
+        end = self.line_offsets.pop()
+        self.line_offsets.extend(
+            accumulate((len(line) + 1 for line in lines[start:]), initial=end)
+        )
+        is_content_line = self._is_content_line
+        content_line_indices = self.content_line_indices
+        para_info = self._open_paragraph
+        logical = self._open_logical
+        for line_idx in range(start, len(lines)):
+            if not is_content_line(lines[line_idx]):
+                para_info = logical = None
+                continue
+            self.line_to_content_index[line_idx] = len(content_line_indices)
+            content_line_indices.append(line_idx)
+            if para_info is None:
+                para_info = {
+                    "start": line_idx,
+                    "end": line_idx,
+                    "lines": [],
+                    "index": len(self.paragraphs),
+                }
+                self.paragraphs.append(para_info)
+                logical = {
+                    "lines": [],
+                    "start_line": line_idx,
+                    "end_line": line_idx,
+                    "is_paragraph": True,
+                }
+                self.logical_lines.append(logical)
+            para_info["lines"].append(line_idx)
+            para_info["end"] = line_idx
+            logical["lines"].append(line_idx)
+            logical["end_line"] = line_idx
+            self.line_to_paragraph_map[line_idx] = para_info
+            self.line_to_logical[line_idx] = len(self.logical_lines) - 1
+        self._open_paragraph = para_info
+        self._open_logical = logical
+        self.total_content_lines = len(content_line_indices)
+
+    def char_offset_of_line(self, line_idx: int) -> int:
+        """
+        Character position of a line, counting one separator per line.
+
+        Args:
+            line_idx: Line index (0 to total_lines)
+
+        Returns:
+            Characters in the lines before it
+        """
+        return self.line_offsets[line_idx]
+
+    def line_at_char_offset(self, position: int) -> int:
+        """
+        Line containing a character position (see char_offset_of_line()).
+
+        Args:
+            position: Character position
+
+        Returns:
+            Line index, the last line for positions past the end
+        """
+        line_idx = bisect_right(self.line_offsets, position) - 1
+        return min(line_idx, self.total_lines - 1)
 
     def get_paragraph_text(self, para_info: dict) -> str:
         # Step 1: This is the most important part of the original code,
@@ -253,40 +338,6 @@ class ViewportContent:
             viewport_lines = len(self.get_current_viewport_lines())
             self.cursor_in_page = min(new_cursor, max(0, viewport_lines - 1))
 
-    def _build_logical_line_map(self):
-        self.logical_lines = []
-        self.line_to_logical = {}
-        current_paragraph = []
-        logical_idx = 0
-        for i, line in enumerate(self.content_lines):
-            if not self._is_content_line(line):
-                if current_paragraph:
-                    self.logical_lines.append(
-                        {
-                            "lines": current_paragraph,
-                            "start_line": current_paragraph[0],
-                            "end_line": current_paragraph[-1],
-                            "is_paragraph": True,
-                        }
-                    )
-                    for line_idx in current_paragraph:
-                        self.line_to_logical[line_idx] = logical_idx
-                    logical_idx += 1
-                    current_paragraph = []
-            else:
-                current_paragraph.append(i)
-        if current_paragraph:
-            self.logical_lines.append(
-                {
-                    "lines": current_paragraph,
-                    "start_line": current_paragraph[0],
-                    "end_line": current_paragraph[-1],
-                    "is_paragraph": True,
-                }
-            )
-            for line_idx in current_paragraph:
-                self.line_to_logical[line_idx] = logical_idx
-
     def get_current_viewport_lines(self) -> List[str]:
         start_idx = self.current_page * self.viewport_height
         end_idx = min(start_idx + self.viewport_height, self.total_lines)
@@ -313,7 +364,8 @@ class ViewportContent:
             return self._move_cursor_down_content_fallback()
         next_logical_idx = current_logical_idx + 1
         if next_logical_idx >= len(self.logical_lines):
-            return False, True
+            # The end of the chapter is not rendered yet: stay put
+            return False, self.is_complete
         next_logical = self.logical_lines[next_logical_idx]
         next_line_pos = next_logical["start_line"]
         next_page = next_line_pos // self.viewport_height
@@ -344,7 +396,7 @@ class ViewportContent:
         current_global_pos = self.get_cursor_global_position()
         next_content_line = self._find_next_content_line(current_global_pos)
         if next_content_line is None:
-            return False, True
+            return False, self.is_complete
         next_page = next_content_line // self.viewport_height
         next_cursor = next_content_line % self.viewport_height
         return self._change_to_page(next_page, next_cursor), False
@@ -370,6 +422,12 @@ class ViewportContent:
     def jump_to_page(self, page_num: int) -> bool:
         return self._change_to_page(page_num, 0)
 
+    def jump_to_line(self, line_idx: int) -> bool:
+        """Put the cursor on a line of the chapter, changing page as needed."""
+        line_idx = max(0, min(line_idx, self.total_lines - 1))
+        page_num, cursor_pos = divmod(line_idx, self.viewport_height)
+        return self._change_to_page(page_num, cursor_pos)
+
     def page_down(self) -> Tuple[bool, bool]:
         if self.current_page < self.total_pages - 1:
             next_page = self.current_page + 1
@@ -385,7 +443,7 @@ class ViewportContent:
             self._change_to_page(next_page, first_content_cursor)
             return True, False
         else:
-            return False, True
+            return False, self.is_complete
 
     def page_up(self) -> Tuple[bool, bool]:
         if self.current_page > 0:
@@ -430,6 +488,10 @@ class ContentDisplay(Static):
             self._update_display()
 
     def _update_display(self):
+        with span(SPAN_UPDATE_DISPLAY):
+            self._render_viewport()
+
+    def _render_viewport(self):
         if not self.viewport_content:
             self.update("Select a chapter to begin reading...")
             return
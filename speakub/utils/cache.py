@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Byte-budgeted LRU cache shared by SpeakUB components.
+"""
+
+import logging
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ByteBudgetLRU:
+    """
+    Thread-safe least-recently-used cache bounded by an estimated byte size.
+
+    Every value is sized once when inserted. Inserting evicts least recently
+    used entries until the total fits the budget; a value larger than the whole
+    budget is not cached at all.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        max_items: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_bytes: Byte budget for all cached values
+            max_items: Optional cap on the number of entries
+            sizeof: Function estimating a value's size (defaults to sys.getsizeof)
+            on_evict: Called with (key, value) whenever an entry leaves the cache
+        """
+        self.max_bytes = max(0, int(max_bytes))
+        self.max_items = max_items
+        self._sizeof = sizeof or sys.getsizeof
+        self._on_evict = on_evict
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._current_bytes = 0
+        self._lock = threading.RLock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a cached value and mark it most recently used."""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self._hits += 1
+                return self._data[key]
+            self._misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any) -> bool:
+        """
+        Insert or replace a value.
+
+        Returns:
+            True if the value was cached, False if it exceeds the whole budget
+        """
+        size = self._sizeof(value)
+        evicted = []
+        with self._lock:
+            if key in self._data:
+                evicted.append(self._remove(key))
+            if size > self.max_bytes:
+                logger.debug(f"Not caching '{key}': {size} bytes exceeds budget")
+                cached = False
+            else:
+                while self._data and (
+                    self._current_bytes + size > self.max_bytes
+                    or (self.max_items and len(self._data) >= self.max_items)
+                ):
+                    evicted.append(self._remove(next(iter(self._data))))
+                    self._evictions += 1
+                self._data[key] = value
+                self._sizes[key] = size
+                self._current_bytes += size
+                cached = True
+        self._notify(evicted)
+        return cached
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove an entry and return its value."""
+        with self._lock:
+            if key not in self._data:
+                return default
+            item = self._remove(key)
+        self._notify([item])
+        return item[1]
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            items = list(self._data.items())
+            self._data.clear()
+            self._sizes.clear()
+            self._current_bytes = 0
+        self._notify(items)
+
+    def _remove(self, key: Hashable):
+        """Drop an entry (lock held) and return (key, value)."""
+        value = self._data.pop(key)
+        self._current_bytes -= self._sizes.pop(key)
+        return key, value
+
+    def _notify(self, items) -> None:
+        """Invoke the eviction callback outside the lock."""
+        if not self._on_evict:
+            return
+        for key, value in items:
+            try:
+                self._on_evict(key, value)
+            except Exception as e:
+                logger.debug(f"Eviction callback failed for '{key}': {e}")
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    @property
+    def current_bytes(self) -> int:
+        """Estimated bytes held by cached values."""
+        return self._current_bytes
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "size": len(self._data),
+                "bytes": self._current_bytes,
+                "max_bytes": self.max_bytes,
+                "max_items": self.max_items,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": self._hits / total if total > 0 else 0.0,
+            }
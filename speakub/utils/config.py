@@ -39,9 +39,31 @@ DEFAULT_CONFIG: Dict[str, Any] = {
     # Hardware-aware cache configuration
     "cache": {
         "auto_detect_hardware": True,
-        "chapter_cache_size": 50,  # Default fallback
+        "chapter_cache_size": 50,  # Max cached chapters (within the MB budget)
         "width_cache_size": 1000,  # Default fallback
+        # Chapter content cache budget in MB (None = from hardware profile)
+        "chapter_cache_mb": None,
+        # Rendered chapter cache budget in MB (None = from hardware profile)
+        "render_cache_mb": None,
+        "render_disk_cache": True,  # Keep rendered chapters in ~/.cache/speakub
+        "render_disk_cache_mb": 64,
         "hardware_profile": "auto",  # auto, low_end, mid_range, high_end
+        "book_index_enabled": True,  # Persist parsed book index in ~/.cache/speakub
+    },
+    # EPUB parsing configuration
+    "epub": {
+        # Abort reading any zip entry that decompresses past this size
+        "streaming_guard": True,
+        "max_entry_size_mb": 64,
+        # Serve chapter reads from a memory map of the archive
+        "use_mmap": False,
+    },
+    # Chapter rendering configuration
+    "render": {
+        # Chapters of at least this size use the streaming renderer
+        "stream_threshold_mb": 2,
+        # Seconds before html2text is abandoned for the streaming renderer
+        "html2text_timeout": 3.0,
     },
     # Network configuration
     "network": {
@@ -130,19 +152,26 @@ def get_cache_sizes_for_profile(profile: str) -> Dict[str, int]:
         profile: Hardware profile ('low_end', 'mid_range', 'high_end')
 
     Returns:
-        Dict with chapter_cache_size and width_cache_size
+        Dict with chapter_cache_size, chapter_cache_bytes, render_cache_bytes
+        and width_cache_size
     """
     profiles = {
         "low_end": {
             "chapter_cache_size": 10,  # Minimal cache for low memory
+            "chapter_cache_bytes": 8 * 1024 * 1024,
+            "render_cache_bytes": 4 * 1024 * 1024,
             "width_cache_size": 200,
         },
         "mid_range": {
             "chapter_cache_size": 25,  # Balanced cache
+            "chapter_cache_bytes": 32 * 1024 * 1024,
+            "render_cache_bytes": 16 * 1024 * 1024,
             "width_cache_size": 500,
         },
         "high_end": {
             "chapter_cache_size": 50,  # Maximum cache for performance
+            "chapter_cache_bytes": 64 * 1024 * 1024,
+            "render_cache_bytes": 32 * 1024 * 1024,
             "width_cache_size": 1000,
         },
     }
@@ -155,7 +184,10 @@ def get_adaptive_cache_config() -> Dict[str, int]:
     Get adaptive cache configuration based on detected hardware.
 
     Returns:
-        Dict with chapter_cache_size and width_cache_size
+        Dict with chapter_cache_size, chapter_cache_bytes, render_cache_bytes
+        and width_cache_size. If detection fails, the mid_range profile is
+        used (the former fallback of 50 chapters and 1000 widths had no
+        byte budgets).
     """
     try:
         profile = detect_hardware_profile()
@@ -164,10 +196,10 @@ def get_adaptive_cache_config() -> Dict[str, int]:
         return cache_sizes
     except Exception as e:
         logger.warning(f"Failed to get adaptive cache config: {e}, using defaults")
-        return {"chapter_cache_size": 50, "width_cache_size": 1000}
+        return get_cache_sizes_for_profile("mid_range")
 
 
-def get_cache_config(config: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
+def get_cache_config(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
     Get cache configuration, either from config file or auto-detected.
 
@@ -175,12 +207,22 @@ def get_cache_config(config: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
         config: Configuration dictionary (if None, loads from file)
 
     Returns:
-        Dict with chapter_cache_size and width_cache_size
+        Dict with chapter_cache_size (maximum number of cached chapters),
+        chapter_cache_bytes, render_cache_bytes, width_cache_size,
+        render_disk_cache and render_disk_cache_bytes
     """
     if config is None:
         config = load_config()
 
     cache_config = config.get("cache", {})
+    chapter_cache_mb = cache_config.get("chapter_cache_mb")
+    render_cache_mb = cache_config.get("render_cache_mb")
+    render_disk_config = {
+        "render_disk_cache": bool(cache_config.get("render_disk_cache", True)),
+        "render_disk_cache_bytes": int(
+            cache_config.get("render_disk_cache_mb", 64) * 1024 * 1024
+        ),
+    }
 
     # Check if auto-detection is enabled
     if cache_config.get("auto_detect_hardware", True):
@@ -194,13 +236,37 @@ def get_cache_config(config: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
         width_size = cache_config.get(
             "width_cache_size", adaptive_config["width_cache_size"]
         )
+        chapter_bytes = (
+            int(chapter_cache_mb * 1024 * 1024)
+            if chapter_cache_mb is not None
+            else adaptive_config["chapter_cache_bytes"]
+        )
+
+        render_bytes = (
+            int(render_cache_mb * 1024 * 1024)
+            if render_cache_mb is not None
+            else adaptive_config["render_cache_bytes"]
+        )
 
-        return {"chapter_cache_size": chapter_size, "width_cache_size": width_size}
+        return {
+            "chapter_cache_size": chapter_size,
+            "chapter_cache_bytes": chapter_bytes,
+            "render_cache_bytes": render_bytes,
+            "width_cache_size": width_size,
+            **render_disk_config,
+        }
     else:
         # Use manual configuration
         return {
             "chapter_cache_size": cache_config.get("chapter_cache_size", 50),
+            "chapter_cache_bytes": int(
+                (32 if chapter_cache_mb is None else chapter_cache_mb) * 1024 * 1024
+            ),
+            "render_cache_bytes": int(
+                (16 if render_cache_mb is None else render_cache_mb) * 1024 * 1024
+            ),
             "width_cache_size": cache_config.get("width_cache_size", 1000),
+            **render_disk_config,
         }
 
 
@@ -322,6 +388,65 @@ def get_network_config(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any
     return merged_network
 
 
+def get_epub_config(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Get EPUB parsing configuration from config file.
+
+    Args:
+        config: Configuration dictionary (if None, loads from file)
+
+    Returns:
+        Dict with EPUB parsing settings, plus max_entry_bytes (the per-entry
+        size limit for EPUBParser, None when the streaming guard is off)
+    """
+    if config is None:
+        config = load_config()
+
+    epub_config = config.get("epub", {})
+    default_epub = DEFAULT_CONFIG["epub"]
+
+    # Merge with defaults to ensure all keys are present
+    merged_epub = default_epub.copy()
+    merged_epub.update(epub_config)
+
+    merged_epub["max_entry_bytes"] = (
+        int(merged_epub["max_entry_size_mb"] * 1024 * 1024)
+        if merged_epub["streaming_guard"]
+        else None
+    )
+    return merged_epub
+
+
+def get_render_config(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Get chapter rendering configuration from config file.
+
+    Args:
+        config: Configuration dictionary (if None, loads from file)
+
+    Returns:
+        Dict with stream_threshold_bytes and html2text_timeout (either may be
+        None to disable the limit)
+    """
+    if config is None:
+        config = load_config()
+
+    render_config = config.get("render", {})
+    default_render = DEFAULT_CONFIG["render"]
+
+    merged_render = default_render.copy()
+    merged_render.update(render_config)
+
+    threshold_mb = merged_render["stream_threshold_mb"]
+    timeout = merged_render["html2text_timeout"]
+    return {
+        "stream_threshold_bytes": (
+            int(threshold_mb * 1024 * 1024) if threshold_mb else None
+        ),
+        "html2text_timeout": float(timeout) if timeout else None,
+    }
+
+
 # Define the path for the pronunciation corrections file
 CORRECTIONS_FILE = os.path.join(CONFIG_DIR, "corrections.json")
 
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Display-width measurement service.
+
+Single characters are looked up in the fixed-size codepoint-width table of
+speakub.utils.line_wrap (one byte per BMP codepoint). Short strings, such as
+panel titles, headings and status text that are measured again and again,
+are memoized in a bounded segmented LRU: a string enters a probation segment
+and is promoted to a protected segment when it is hit again, so a one-off
+scan of new chapter lines cannot evict the strings that are measured all the
+time. Long strings are measured directly and never cached, which bounds the
+memory held per entry.
+
+Strings are measured by summing their table widths, which is what wcswidth()
+computes unless the string contains control characters, a zero-width joiner
+or a variation selector; those strings are handed to str_display_width().
+
+The capacity comes from the `cache.width_cache_size` setting (see
+get_cache_config()); statistics are published through get_stats().
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict
+
+from speakub.utils.line_wrap import char_widths, width_table_blocks
+from speakub.utils.text_utils import str_display_width
+
+# Default number of cached strings (mid-range hardware profile)
+DEFAULT_WIDTH_CACHE_SIZE = 500
+
+# Longer strings are measured without caching
+MAX_CACHED_CHARS = 256
+
+# Share of the capacity reserved for strings hit at least twice
+PROTECTED_RATIO = 0.8
+
+# Characters for which wcswidth() is not the sum of the character widths
+_SEQUENCE_SENSITIVE = re.compile("[\x01-\x1f\x7f-\x9f\u200d\ufe0f]")
+
+
+def measure_width(text: str) -> int:
+    """
+    Display width of a string without caching.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Width in terminal columns, equal to str_display_width(text)
+    """
+    if _SEQUENCE_SENSITIVE.search(text):
+        return str_display_width(text)
+    return sum(char_widths(text))
+
+
+class DisplayWidthCache:
+    """Thread-safe display-width measurement with a bounded string cache."""
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_WIDTH_CACHE_SIZE,
+        max_chars: int = MAX_CACHED_CHARS,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached strings (0 disables caching)
+            max_chars: Longest string that is cached
+        """
+        self.max_chars = max_chars
+        self._lock = threading.Lock()
+        self._probation: "OrderedDict[str, int]" = OrderedDict()
+        self._protected: "OrderedDict[str, int]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._char_lookups = 0
+        self._uncached = 0
+        self.resize(max_entries)
+
+    def width(self, text: str) -> int:
+        """
+        Display width of a string, as str_display_width() measures it.
+
+        Args:
+            text: Text to measure
+
+        Returns:
+            Width in terminal columns
+        """
+        length = len(text)
+        if length <= 1:
+            self._char_lookups += 1
+            return char_widths(text)[0] if length else 0
+        if length > self.max_chars or not self.max_entries:
+            self._uncached += 1
+            return measure_width(text)
+
+        with self._lock:
+            width = self._protected.get(text)
+            if width is not None:
+                self._protected.move_to_end(text)
+                self._hits += 1
+                return width
+            width = self._probation.pop(text, None)
+            if width is not None:
+                self._hits += 1
+                self._promote(text, width)
+                return width
+            self._misses += 1
+
+        width = measure_width(text)
+        with self._lock:
+            if text not in self._protected:
+                self._probation[text] = width
+                self._probation.move_to_end(text)
+                self._evict()
+        return width
+
+    def _promote(self, text: str, width: int) -> None:
+        """Move a string hit again into the protected segment (lock held)."""
+        self._protected[text] = width
+        if len(self._protected) > self._protected_size:
+            demoted, demoted_width = self._protected.popitem(last=False)
+            self._probation[demoted] = demoted_width
+
+    def _evict(self) -> None:
+        """Drop least recently used probation entries over capacity (lock held)."""
+        while len(self._probation) + len(self._protected) > self.max_entries:
+            if self._probation:
+                self._probation.popitem(last=False)
+            else:
+                self._protected.popitem(last=False)
+            self._evictions += 1
+
+    def resize(self, max_entries: int) -> None:
+        """
+        Change the capacity, evicting entries if needed.
+
+        Args:
+            max_entries: Maximum number of cached strings (0 disables caching)
+        """
+        with self._lock:
+            self.max_entries = max(0, int(max_entries))
+            self._protected_size = int(self.max_entries * PROTECTED_RATIO)
+            while len(self._protected) > self._protected_size:
+                demoted, demoted_width = self._protected.popitem(last=False)
+                self._probation[demoted] = demoted_width
+                self._probation.move_to_end(demoted, last=False)
+            self._evict()
+
+    def clear(self) -> None:
+        """Remove all cached strings."""
+        with self._lock:
+            self._probation.clear()
+            self._protected.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._probation) + len(self._protected)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "size": len(self._probation) + len(self._protected),
+                "protected": len(self._protected),
+                "max_size": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": self._hits / total if total > 0 else 0.0,
+                "char_lookups": self._char_lookups,
+                "uncached": self._uncached,
+                "char_table_blocks": width_table_blocks(),
+            }
+
+
+_width_cache = DisplayWidthCache()
+
+
+def display_width(text: str) -> int:
+    """
+    Display width of a string through the shared cache.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Width in terminal columns
+    """
+    return _width_cache.width(text)
+
+
+def configure_width_cache(max_entries: int) -> None:
+    """
+    Set the capacity of the shared cache.
+
+    Args:
+        max_entries: Maximum number of cached strings (0 disables caching)
+    """
+    _width_cache.resize(max_entries)
+
+
+def get_width_cache() -> DisplayWidthCache:
+    """Return the shared cache."""
+    return _width_cache
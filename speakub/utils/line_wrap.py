@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Display-width line wrapping for CJK and mixed-script text.
+
+Wrapping used to walk a paragraph one character at a time, measuring each
+character through a dictionary and growing the line with string
+concatenation, which is quadratic for long CJK paragraphs. Here a whole
+paragraph is measured in one pass: characters are mapped to their column
+widths with str.translate() over a codepoint-width table, the widths are
+summed with itertools.accumulate(), and line breaks are found by bisecting
+the running total. Lines are then cut out of the paragraph with slices.
+
+The table covers the Basic Multilingual Plane and is filled lazily, one block
+of 256 codepoints at a time, from the same per-character width that
+str_display_width() reports. Paragraphs containing characters beyond the BMP
+(e.g. emoji) are measured character by character, and paragraphs whose
+characters all have the same width are cut at fixed offsets.
+"""
+
+import threading
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate
+from typing import List, Sequence
+
+from speakub.utils.text_utils import str_display_width
+
+_BLOCK_BITS = 8
+_BLOCK_SIZE = 1 << _BLOCK_BITS
+_BMP_SIZE = 0x10000
+
+# Marks table entries whose block has not been computed yet
+_UNFILLED = 0xFF
+
+# Column width of every BMP codepoint
+_width_table = bytearray([_UNFILLED]) * _BMP_SIZE
+_table_lock = threading.Lock()
+
+
+@lru_cache(maxsize=4096)
+def char_width(char: str) -> int:
+    """
+    Display width of a single character, as str_display_width() measures it.
+
+    Args:
+        char: A single character
+
+    Returns:
+        Width in terminal columns
+    """
+    return str_display_width(char)
+
+
+def _fill_blocks(text: str) -> None:
+    """Compute the table blocks of every BMP character in text."""
+    blocks = {cp >> _BLOCK_BITS for cp in map(ord, set(text)) if cp < _BMP_SIZE}
+    with _table_lock:
+        for block in blocks:
+            start = block << _BLOCK_BITS
+            if _width_table[start] != _UNFILLED:
+                continue
+            _width_table[start:start + _BLOCK_SIZE] = bytes(
+                str_display_width(chr(cp)) for cp in range(start, start + _BLOCK_SIZE)
+            )
+
+
+def width_table_blocks() -> int:
+    """Number of 256-codepoint blocks of the width table computed so far."""
+    return sum(
+        1 for start in range(0, _BMP_SIZE, _BLOCK_SIZE)
+        if _width_table[start] != _UNFILLED
+    )
+
+
+def char_widths(text: str) -> bytes:
+    """
+    Display widths of every character of a string.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        One byte per character holding its width in columns
+    """
+    # Characters beyond the table are left unchanged by translate()
+    try:
+        widths = text.translate(_width_table).encode("latin-1")
+    except UnicodeEncodeError:
+        return bytes(map(char_width, text))
+    if _UNFILLED in widths:
+        _fill_blocks(text)
+        widths = text.translate(_width_table).encode("latin-1")
+    return widths
+
+
+def _uniform_width(widths: bytes) -> int:
+    """Column width shared by every character, or 0 if widths differ."""
+    char_cols = widths[0] if widths else 0
+    if char_cols and not widths.strip(widths[:1]):
+        return char_cols
+    return 0
+
+
+def _line_starts(cumulative: Sequence[int], length: int, width: int) -> List[int]:
+    """Greedy line start offsets from the running display width."""
+    starts = []
+    start = 0
+    base = 0
+    while start < length:
+        starts.append(start)
+        # First character whose end column overflows the line
+        end = bisect_right(cumulative, base + width, start)
+        if end == start:
+            end = start + 1
+        base = cumulative[end - 1]
+        start = end
+    return starts
+
+
+def _slice_lines(text: str, starts: List[int]) -> List[str]:
+    """Cut text into lines at the given start offsets."""
+    ends = starts[1:]
+    ends.append(len(text))
+    return [text[start:end] for start, end in zip(starts, ends)]
+
+
+def wrap_by_width(text: str, width: int) -> List[str]:
+    """
+    Split text into lines of at most `width` display columns.
+
+    Characters are placed greedily; a character that does not fit starts a new
+    line, and a line always holds at least one character. Zero-width
+    characters stay on the line of the character they follow.
+
+    Args:
+        text: Input text to split
+        width: Maximum display width per line
+
+    Returns:
+        List of text lines ([""] for blank input)
+    """
+    if not text.strip():
+        return [""]
+
+    widths = char_widths(text)
+    # Uniform widths (plain ASCII, or pure CJK) need no running total
+    char_cols = _uniform_width(widths)
+    if char_cols:
+        step = max(1, width // char_cols)
+        return [text[i:i + step] for i in range(0, len(text), step)]
+
+    cumulative = list(accumulate(widths))
+    return _slice_lines(text, _line_starts(cumulative, len(text), width))
+
+
+class MeasuredText:
+    """
+    A paragraph measured once so that it can be wrapped at any width.
+
+    The running display width is kept as a compact array (None when every
+    character has the same width), so re-wrapping only bisects it once per
+    output line.
+    """
+
+    __slots__ = ("text", "display_width", "cumulative", "_uniform")
+
+    def __init__(self, text: str):
+        """
+        Measure a paragraph.
+
+        Args:
+            text: Paragraph text
+        """
+        self.text = text
+        widths = char_widths(text)
+        self._uniform = _uniform_width(widths)
+        if self._uniform:
+            self.cumulative = None
+            self.display_width = self._uniform * len(text)
+        else:
+            self.cumulative = array("I", accumulate(widths))
+            self.display_width = self.cumulative[-1] if text else 0
+
+    def line_starts(self, width: int) -> List[int]:
+        """
+        Character offsets at which the lines of a wrap start.
+
+        Args:
+            width: Maximum display width per line
+
+        Returns:
+            Start offsets, matching the lines of wrap()
+        """
+        if self.display_width <= width or not self.text.strip():
+            return [0]
+        if self._uniform:
+            step = max(1, width // self._uniform)
+            return list(range(0, len(self.text), step))
+        return _line_starts(self.cumulative, len(self.text), width)
+
+    def slice(self, starts: List[int]) -> List[str]:
+        """Cut the text into lines at offsets from line_starts()."""
+        return _slice_lines(self.text, starts)
+
+    def wrap(self, width: int) -> List[str]:
+        """Wrap like wrap_by_width() without measuring the text again."""
+        if not self.text.strip():
+            return [""]
+        return self.slice(self.line_starts(width))
@@ -4,12 +4,22 @@
 Performance monitoring utilities for SpeakUB.
 """
 
+import json
 import logging
+import os
+import tempfile
 import threading
 import time
 from dataclasses import dataclass
 from typing import Any, Dict, Optional
 
+from speakub.utils.display_width import get_width_cache
+from speakub.utils.profiling import (
+    disable_profiling,
+    enable_profiling,
+    get_span_recorder,
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -57,14 +67,19 @@ class PerformanceMonitor:
         self._monitoring = False
         self._monitor_thread: Optional[threading.Thread] = None
         self._lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        # Wakes the monitor loop so stop_monitoring() does not wait out a sleep
+        self._stop_event = threading.Event()
 
-        # Metrics storage
+        # Metrics storage; render_time_ms holds (stage, duration) per span
         self.metrics_history: Dict[str, list] = {
             "cache_hit_rate": [],
             "memory_usage_mb": [],
             "tts_state_changes": [],
             "render_time_ms": [],
         }
+        # Per-stage render timings (see speakub.utils.profiling)
+        self.span_recorder = get_span_recorder()
 
         # Configuration
         self.monitor_interval = 30  # seconds
@@ -77,6 +92,9 @@ class PerformanceMonitor:
                 return
 
             self._monitoring = True
+            self._stop_event.clear()
+            self.span_recorder = enable_profiling()
+            self.span_recorder.add_listener(self._on_span)
             self._monitor_thread = threading.Thread(
                 target=self._monitor_loop, daemon=True, name="PerformanceMonitor"
             )
@@ -90,6 +108,9 @@ class PerformanceMonitor:
                 return
 
             self._monitoring = False
+            self._stop_event.set()
+            self.span_recorder.remove_listener(self._on_span)
+            disable_profiling()
             if self._monitor_thread:
                 self._monitor_thread.join(timeout=5.0)
             logger.info("Performance monitoring stopped")
@@ -99,10 +120,10 @@ class PerformanceMonitor:
         while self._monitoring:
             try:
                 self._collect_metrics()
-                time.sleep(self.monitor_interval)
+                self._stop_event.wait(self.monitor_interval)
             except Exception as e:
                 logger.error(f"Error in performance monitoring: {e}")
-                time.sleep(5)  # Brief pause on error
+                self._stop_event.wait(5)  # Brief pause on error
 
     def _collect_metrics(self):
         """Collect current performance metrics."""
@@ -130,17 +151,81 @@ class PerformanceMonitor:
         except Exception as e:
             logger.debug(f"Failed to collect metrics: {e}")
 
+    def _on_span(self, name: str, duration_ms: float) -> None:
+        """Record a render pipeline span in the render_time_ms series."""
+        self._add_metric("render_time_ms", (name, duration_ms))
+
     def _add_metric(self, name: str, value: Any):
         """Add metric to history."""
-        if name not in self.metrics_history:
-            self.metrics_history[name] = []
+        with self._metrics_lock:
+            if name not in self.metrics_history:
+                self.metrics_history[name] = []
+
+            history = self.metrics_history[name]
+            history.append((time.time(), value))
+
+            # Keep history size manageable
+            if len(history) > self.max_history_size:
+                history.pop(0)
+
+    def get_render_histograms(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get render timing histograms.
+
+        Returns:
+            Dict of stage name (read_chapter, html2text, measure, wrap,
+            viewport, cfi_resolve, cfi_generate, update_display) to count,
+            total_ms, mean_ms, p50_ms, p95_ms, p99_ms and max_ms
+        """
+        return self.span_recorder.get_stats()
 
-        history = self.metrics_history[name]
-        history.append((time.time(), value))
+    def dump_benchmark(self, output_file: Optional[str] = None) -> Optional[str]:
+        """
+        Write render histograms and current metrics to a JSON file.
 
-        # Keep history size manageable
-        if len(history) > self.max_history_size:
-            history.pop(0)
+        Args:
+            output_file: Target path (defaults to performance.benchmark_output_file;
+                relative paths are placed in the config directory)
+
+        Returns:
+            Path written, or None on failure
+        """
+        from speakub.utils.config import CONFIG_DIR, get_config
+
+        if output_file is None:
+            output_file = get_config(
+                "performance.benchmark_output_file", "performance_benchmark.json"
+            )
+        output_file = os.path.expanduser(output_file)
+        if not os.path.isabs(output_file):
+            output_file = os.path.join(CONFIG_DIR, output_file)
+
+        report = {
+            "timestamp": time.time(),
+            "render_stages": self.get_render_histograms(),
+            "metrics": self.get_metrics_summary(),
+        }
+        try:
+            directory = os.path.dirname(output_file) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(
+                dir=directory, prefix=".benchmark-", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(report, f, indent=2, default=str)
+                os.replace(tmp_path, output_file)
+            except BaseException:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+        except (IOError, OSError, TypeError, ValueError) as e:
+            logger.error(f"Failed to write benchmark file {output_file}: {e}")
+            return None
+
+        logger.info(f"Performance benchmark written to {output_file}")
+        return output_file
 
     def _get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics from viewport content."""
@@ -188,6 +273,16 @@ class PerformanceMonitor:
                     }
                 )
 
+            # Display-width cache
+            width_stats = get_width_cache().get_stats()
+            metrics.update(
+                {
+                    "width_cache_size": width_stats["size"],
+                    "width_cache_max_size": width_stats["max_size"],
+                    "width_cache_hit_rate": width_stats["hit_rate"],
+                }
+            )
+
             # Memory usage
             memory_info = self._get_memory_info()
             metrics.update(
@@ -265,7 +360,11 @@ class PerformanceMonitor:
         """Get summary of performance metrics."""
         summary = {}
 
-        for metric_name, history in self.metrics_history.items():
+        with self._metrics_lock:
+            histories = {
+                name: list(history) for name, history in self.metrics_history.items()
+            }
+        for metric_name, history in histories.items():
             if not history:
                 continue
 
@@ -282,6 +381,12 @@ class PerformanceMonitor:
                 summary["peak_memory_mb"] = max(values) if values else 0
             elif metric_name == "tts_state_changes":
                 summary["tts_state_change_count"] = len(set(values))
+            elif metric_name == "render_time_ms":
+                summary["recent_render_spans"] = len(values)
+
+        render_stages = self.get_render_histograms()
+        if render_stages:
+            summary["render_stages"] = render_stages
 
         # Add current metrics
         summary.update(self.get_current_metrics())
@@ -305,6 +410,12 @@ class PerformanceMonitor:
                 logger.info(f"Current cache hit rate: {metrics['cache_hit_rate']:.1%}")
             if "memory_rss_mb" in metrics:
                 logger.info(f"Current memory: {metrics['memory_rss_mb']:.1f} MB")
+            for stage, stats in metrics.get("render_stages", {}).items():
+                logger.info(
+                    f"Render {stage}: p50 {stats['p50_ms']:.2f} ms, "
+                    f"p95 {stats['p95_ms']:.2f} ms, p99 {stats['p99_ms']:.2f} ms "
+                    f"({stats['count']} spans)"
+                )
 
         except Exception as e:
             logger.error(f"Failed to generate performance report: {e}")
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Low-overhead timing spans for the chapter pipeline.
+
+Stages of opening and displaying a chapter are wrapped in span() blocks:
+
+    with span("html2text"):
+        text = renderer.handle(html)
+
+While profiling is disabled (the default), span() returns a shared no-op
+context manager, so an instrumented block costs one global lookup and a
+call. Once enable_profiling() is called, each span records its duration in a
+bounded per-stage sample buffer from which percentiles are computed, and
+listeners (e.g. PerformanceMonitor) are told about every sample.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Samples kept per stage for percentile estimates
+DEFAULT_MAX_SAMPLES = 2048
+
+# Stage names used by SpeakUB's instrumentation
+SPAN_READ_CHAPTER = "read_chapter"
+SPAN_HTML2TEXT = "html2text"
+SPAN_MEASURE = "measure"
+SPAN_WRAP = "wrap"
+SPAN_VIEWPORT = "viewport"
+SPAN_CFI_RESOLVE = "cfi_resolve"
+SPAN_CFI_GENERATE = "cfi_generate"
+SPAN_UPDATE_DISPLAY = "update_display"
+
+SpanListener = Callable[[str, float], None]
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """
+    Nearest-rank percentile of sorted values.
+
+    Args:
+        sorted_values: Values in ascending order
+        q: Percentile between 0 and 100
+
+    Returns:
+        The percentile, or 0.0 for no values
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class SpanRecorder:
+    """Thread-safe collection of span durations per stage."""
+
+    def __init__(self, max_samples: int = DEFAULT_MAX_SAMPLES):
+        """
+        Initialize the recorder.
+
+        Args:
+            max_samples: Most recent samples kept per stage
+        """
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[float]] = {}
+        self._counts: Dict[str, int] = {}
+        self._totals: Dict[str, float] = {}
+        self._listeners: List[SpanListener] = []
+
+    def record(self, name: str, duration_ms: float) -> None:
+        """
+        Record one span.
+
+        Args:
+            name: Stage name
+            duration_ms: Duration in milliseconds
+        """
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.max_samples)
+            samples.append(duration_ms)
+            self._counts[name] = self._counts.get(name, 0) + 1
+            self._totals[name] = self._totals.get(name, 0.0) + duration_ms
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(name, duration_ms)
+            except Exception as e:
+                logger.debug(f"Span listener failed: {e}")
+
+    def add_listener(self, listener: SpanListener) -> None:
+        """Call listener(name, duration_ms) for every recorded span."""
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def remove_listener(self, listener: SpanListener) -> None:
+        """Stop calling a listener."""
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get per-stage histograms.
+
+        Returns:
+            Dict of stage name to count, total_ms, mean_ms, p50_ms, p95_ms,
+            p99_ms and max_ms (percentiles over the retained samples)
+        """
+        with self._lock:
+            snapshot = {
+                name: (sorted(samples), self._counts[name], self._totals[name])
+                for name, samples in self._samples.items()
+            }
+        stats = {}
+        for name, (values, count, total) in snapshot.items():
+            stats[name] = {
+                "count": count,
+                "total_ms": total,
+                "mean_ms": total / count if count else 0.0,
+                "p50_ms": percentile(values, 50),
+                "p95_ms": percentile(values, 95),
+                "p99_ms": percentile(values, 99),
+                "max_ms": values[-1] if values else 0.0,
+            }
+        return stats
+
+    def reset(self) -> None:
+        """Drop all samples."""
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+            self._totals.clear()
+
+
+class _Span:
+    """Context manager timing one block into a recorder."""
+
+    __slots__ = ("_recorder", "_name", "_start")
+
+    def __init__(self, recorder: SpanRecorder, name: str):
+        self._recorder = recorder
+        self._name = name
+        self._start = 0
+
+    def __enter__(self) -> "_Span":
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._recorder.record(
+            self._name, (time.perf_counter_ns() - self._start) / 1e6)
+
+
+class _NoSpan:
+    """Context manager that does nothing (profiling disabled)."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+
+
+_NO_SPAN = _NoSpan()
+_recorder = SpanRecorder()
+_enabled = False
+
+
+def span(name: str):
+    """
+    Time a block as a stage of the chapter pipeline.
+
+    Args:
+        name: Stage name (see the SPAN_* constants)
+
+    Returns:
+        A context manager
+    """
+    if not _enabled:
+        return _NO_SPAN
+    return _Span(_recorder, name)
+
+
+def enable_profiling(recorder: Optional[SpanRecorder] = None) -> SpanRecorder:
+    """
+    Start recording spans.
+
+    Args:
+        recorder: Recorder to use (keeps the current one if None)
+
+    Returns:
+        The active recorder
+    """
+    global _enabled, _recorder
+    if recorder is not None:
+        _recorder = recorder
+    _enabled = True
+    return _recorder
+
+
+def disable_profiling() -> None:
+    """Stop recording spans (samples are kept)."""
+    global _enabled
+    _enabled = False
+
+
+def is_profiling_enabled() -> bool:
+    """Whether spans are being recorded."""
+    return _enabled
+
+
+def get_span_recorder() -> SpanRecorder:
+    """Return the active recorder."""
+    return _recorder
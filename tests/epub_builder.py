@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Minimal EPUB builder shared by the tests and benchmarks.
+"""
+
+import posixpath
+import zipfile
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+CONTAINER_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+    <rootfiles>
+        <rootfile full-path="{opf_path}" media-type="application/oebps-package+xml"/>
+    </rootfiles>
+</container>"""
+
+
+def write_epub(
+    epub_path: str,
+    chapters: Dict[str, str],
+    title: str = "Test Book",
+    opf_dir: str = "",
+    spine: Optional[Sequence[int]] = None,
+    resources: Optional[Dict[str, Tuple[Union[str, bytes], str]]] = None,
+    ncx: bool = False,
+    compression: int = zipfile.ZIP_STORED,
+) -> str:
+    """
+    Write a minimal EPUB 3 book.
+
+    Chapters get the manifest ids c0, c1, ... in the order given.
+
+    Args:
+        epub_path: File to write
+        chapters: Chapter HTML by href (relative to opf_dir), in manifest order
+        title: Book title
+        opf_dir: Directory of content.opf and the content inside the archive
+        spine: Reading order as chapter positions (defaults to manifest order)
+        resources: Other manifest items as href -> (data, media type)
+        ncx: Also write an NCX with one "Chapter <n>" entry per chapter
+        compression: Compression of every member but the mimetype
+
+    Returns:
+        epub_path
+    """
+    hrefs = list(chapters)
+    if spine is None:
+        spine = range(len(hrefs))
+    resources = resources or {}
+    manifest = [
+        f'<item id="c{i}" href="{href}" media-type="application/xhtml+xml"/>'
+        for i, href in enumerate(hrefs)
+    ]
+    manifest += [
+        f'<item id="r{i}" href="{href}" media-type="{media_type}"/>'
+        for i, (href, (_, media_type)) in enumerate(resources.items())
+    ]
+    if ncx:
+        manifest.append(
+            '<item id="ncx" href="toc.ncx" media-type="application/x-dtbncx+xml"/>'
+        )
+    itemrefs = "".join(f'<itemref idref="c{i}"/>' for i in spine)
+    toc_attr = ' toc="ncx"' if ncx else ""
+
+    def member(href: str) -> str:
+        return posixpath.join(opf_dir, href)
+
+    with zipfile.ZipFile(epub_path, "w", compression) as zf:
+        zf.writestr(
+            "mimetype", "application/epub+zip", compress_type=zipfile.ZIP_STORED
+        )
+        zf.writestr(
+            "META-INF/container.xml",
+            CONTAINER_XML.format(opf_path=member("content.opf")),
+        )
+        zf.writestr(
+            member("content.opf"),
+            '<?xml version="1.0"?>\n'
+            '<package xmlns="http://www.idpf.org/2007/opf" version="3.0">'
+            '<metadata xmlns:dc="http://purl.org/dc/elements/1.1/">'
+            f"<dc:title>{title}</dc:title></metadata>"
+            f'<manifest>{"".join(manifest)}</manifest>'
+            f"<spine{toc_attr}>{itemrefs}</spine></package>",
+        )
+        for href, html in chapters.items():
+            zf.writestr(member(href), html)
+        for href, (data, _) in resources.items():
+            zf.writestr(member(href), data)
+        if ncx:
+            nav_points = "".join(
+                f'<navPoint id="n{i}"><navLabel><text>Chapter {i}</text>'
+                f'</navLabel><content src="{href}"/></navPoint>'
+                for i, href in enumerate(hrefs)
+            )
+            zf.writestr(
+                member("toc.ncx"),
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" version="2005-1">'
+                f"<navMap>{nav_points}</navMap></ncx>",
+            )
+    return epub_path
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the persistent book index cache.
+"""
+
+import os
+import tempfile
+import time
+from unittest.mock import patch
+
+import pytest
+from epub_builder import write_epub
+
+from speakub.core.epub.index_cache import INDEX_VERSION, BookIndexCache
+from speakub.core.epub_parser import EPUBParser
+
+def write_book(epub_path: str, title: str = "Indexed Book") -> None:
+    """Write a minimal two-chapter EPUB."""
+    write_epub(
+        epub_path,
+        {
+            f"chapter{i}.xhtml": (
+                f"<html><body><h1>Chapter {i}</h1><p>Text {i}</p></body></html>"
+            )
+            for i in (1, 2)
+        },
+        title=title,
+        opf_dir="OEBPS",
+    )
+
+
+class TestBookIndexCache:
+    """Test the on-disk book index."""
+
+    @pytest.fixture
+    def workspace(self):
+        """Provide an EPUB path and an isolated cache directory."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            epub_path = os.path.join(temp_dir, "book.epub")
+            write_book(epub_path)
+            yield epub_path, os.path.join(temp_dir, "cache")
+
+    def test_cold_open_writes_index(self, workspace):
+        """Test that the first open stores namelist, verdict, OPF and TOC."""
+        epub_path, cache_dir = workspace
+        cache = BookIndexCache(cache_dir=cache_dir)
+
+        with EPUBParser(epub_path, index_cache=cache) as parser:
+            assert parser.get_statistics()["index_cache_hit"] is False
+            toc = parser.parse_toc()
+
+        assert toc["book_title"] == "Indexed Book"
+        entry_files = os.listdir(cache_dir)
+        assert len(entry_files) == 1
+
+        fingerprint = parser._fingerprint
+        entry = cache.load(epub_path, fingerprint)
+        assert entry["version"] == INDEX_VERSION
+        assert "OEBPS/chapter1.xhtml" in entry["namelist"]
+        assert entry["security"]["passed"] is True
+        assert entry["opf_path"] == "OEBPS/content.opf"
+        assert entry["opf"]["spine_order"] == [
+            "OEBPS/chapter1.xhtml",
+            "OEBPS/chapter2.xhtml",
+        ]
+        assert entry["toc"]["book_title"] == "Indexed Book"
+
+    def test_warm_open_skips_parsing(self, workspace):
+        """Test that a warm open restores state without re-parsing the OPF."""
+        epub_path, cache_dir = workspace
+        with EPUBParser(epub_path, index_cache=BookIndexCache(cache_dir)) as parser:
+            cold_toc = parser.parse_toc()
+
+        with patch.object(
+            EPUBParser, "extract_structured_toc", side_effect=AssertionError
+        ), patch("speakub.core.epub_parser.ET.fromstring", side_effect=AssertionError):
+            with EPUBParser(
+                epub_path, index_cache=BookIndexCache(cache_dir)
+            ) as parser:
+                assert parser.get_statistics()["index_cache_hit"] is True
+                assert parser.opf_path == "OEBPS/content.opf"
+                assert parser.opf_dir == "OEBPS"
+                assert parser.parse_toc() == cold_toc
+                assert "Chapter 2" in parser.read_chapter("chapter2.xhtml")
+
+    def test_modified_book_invalidates_index(self, workspace):
+        """Test that rewriting the book makes the cached entry stale."""
+        epub_path, cache_dir = workspace
+        with EPUBParser(epub_path, index_cache=BookIndexCache(cache_dir)) as parser:
+            parser.parse_toc()
+
+        time.sleep(0.01)
+        write_book(epub_path, title="Second Edition")
+
+        with EPUBParser(epub_path, index_cache=BookIndexCache(cache_dir)) as parser:
+            assert parser.get_statistics()["index_cache_hit"] is False
+            assert parser.parse_toc()["book_title"] == "Second Edition"
+
+    def test_rebuild_ignores_existing_entry(self, workspace):
+        """Test that rebuild=True forces a cold open and rewrites the entry."""
+        epub_path, cache_dir = workspace
+        with EPUBParser(epub_path, index_cache=BookIndexCache(cache_dir)) as parser:
+            parser.parse_toc()
+
+        cache = BookIndexCache(cache_dir, rebuild=True)
+        with EPUBParser(epub_path, index_cache=cache) as parser:
+            assert parser.get_statistics()["index_cache_hit"] is False
+            parser.parse_toc()
+
+        with EPUBParser(epub_path, index_cache=BookIndexCache(cache_dir)) as parser:
+            assert parser.get_statistics()["index_cache_hit"] is True
+
+    def test_changed_security_limits_revalidate(self, workspace):
+        """Test that a verdict computed under other limits is not reused."""
+        epub_path, cache_dir = workspace
+        with EPUBParser(epub_path, index_cache=BookIndexCache(cache_dir)):
+            pass
+
+        with patch.object(EPUBParser, "MAX_FILES_IN_ZIP", 3):
+            with pytest.raises(Exception, match="Too many files"):
+                EPUBParser(epub_path, index_cache=BookIndexCache(cache_dir)).open()
+
+    def test_corrupt_index_file_is_discarded(self, workspace):
+        """Test that an unreadable index file is treated as a miss."""
+        epub_path, cache_dir = workspace
+        cache = BookIndexCache(cache_dir)
+        os.makedirs(cache_dir)
+        with open(cache._entry_path(epub_path), "w") as f:
+            f.write("{not json")
+
+        with EPUBParser(epub_path, index_cache=cache) as parser:
+            assert parser.get_statistics()["index_cache_hit"] is False
+            assert parser.parse_toc()["book_title"] == "Indexed Book"
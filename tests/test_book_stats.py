@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-book reading statistics index.
+"""
+
+import asyncio
+import os
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from epub_builder import write_epub
+
+from speakub.core.book_stats import (
+    TTS_CJK_CHARS_PER_MINUTE,
+    TTS_WORDS_PER_MINUTE,
+    BookStats,
+    chapter_counts,
+    count_text,
+)
+from speakub.core.epub.index_cache import compute_fingerprint
+from speakub.core.epub_parser import EPUBParser
+from speakub.core.progress_tracker import ProgressTracker
+from speakub.ui.epub_manager import EPUBManager
+
+CHAPTERS = 5
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    """A temporary home directory for progress and statistics files."""
+    monkeypatch.setattr(Path, "home", classmethod(lambda cls: tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def epub_path(home):
+    """A book whose chapter i has i * 10 English words and i * 27 CJK characters."""
+    chapters = {}
+    for i in range(CHAPTERS):
+        body = "<p>one two three four five</p>" * (2 * i)
+        body += "<p>" + "中文字" * (9 * i) + "</p>"
+        chapters[f"c{i}.xhtml"] = f"<html><body>{body}</body></html>"
+    return write_epub(os.path.join(home, "stats.epub"), chapters, title="Stats")
+
+
+def sample_stats() -> BookStats:
+    """Three chapters of one minute of speech each at normal speed."""
+    return BookStats(
+        [
+            ("a.xhtml", 0, TTS_CJK_CHARS_PER_MINUTE, 0),
+            ("b.xhtml", 0, 0, TTS_WORDS_PER_MINUTE),
+            ("c.xhtml", 0, TTS_CJK_CHARS_PER_MINUTE // 2, TTS_WORDS_PER_MINUTE // 2),
+        ]
+    )
+
+
+class TestCounting:
+    """Test CJK-aware text counts."""
+
+    def test_count_text(self):
+        """CJK characters are words of their own, other scripts split on word runs."""
+        assert count_text("第一章 Hello, world! 한국어 かな 42") == (22, 8, 3)
+        assert count_text("   ") == (0, 0, 0)
+
+    def test_chapter_counts_skip_markup(self):
+        """Only readable text is counted, not tags, scripts or styles."""
+        html = (
+            "<html><head><style>p { color: red }</style></head><body>"
+            "<h1>標題</h1><p>Two words</p><script>var x = 1;</script></body></html>"
+        )
+        # The heading mark "#" counts as a character but not as a word
+        assert chapter_counts(html) == (11, 2, 2)
+
+    def test_images_are_not_counted(self):
+        """Image placeholders of the streaming renderer are not spoken."""
+        html = (
+            "<p>Two words<img src='a.png' alt='A long caption'/></p>"
+            "<p><img src='images/b.png'/></p>"
+        )
+        assert chapter_counts(html) == chapter_counts("<p>Two words</p>")
+
+
+class TestBookStats:
+    """Test time-left queries and persistence."""
+
+    def test_time_left(self):
+        """Time left combines the rest of the chapter and the following ones."""
+        stats = sample_stats()
+        assert stats.total_seconds == pytest.approx(180)
+        assert stats.chapter_seconds_left("a.xhtml") == pytest.approx(60)
+        assert stats.chapter_seconds_left("a.xhtml", 0.25) == pytest.approx(45)
+        assert stats.book_seconds_left("a.xhtml", 0.25) == pytest.approx(165)
+        assert stats.book_seconds_left("c.xhtml", 1.0) == pytest.approx(0)
+        assert stats.book_seconds_left("missing.xhtml") is None
+
+    def test_tts_rate_scales_time(self):
+        """Faster speech leaves less time."""
+        stats = sample_stats()
+        faster = stats.book_seconds_left("b.xhtml", 0.0, tts_rate=50)
+        slower = stats.book_seconds_left("b.xhtml", 0.0, tts_rate=-50)
+        assert faster == pytest.approx(80)
+        assert slower == pytest.approx(240)
+
+    def test_round_trip(self):
+        """to_dict() / from_dict() keep the counts; other versions are rejected."""
+        stats = sample_stats()
+        restored = BookStats.from_dict(stats.to_dict())
+        assert restored.srcs == stats.srcs
+        assert list(restored.seconds) == list(stats.seconds)
+        assert BookStats.from_dict({**stats.to_dict(), "version": 0}) is None
+        assert BookStats.from_dict({"version": 1, "chapters": [["x"]]}) is None
+
+    def test_build_can_stop(self):
+        """A build abandoned between chapters returns None."""
+        reads = []
+
+        def read_chapter(src):
+            reads.append(src)
+            return "<p>text</p>"
+
+        stats = BookStats.build(["a", "b", "c"], read_chapter, lambda: len(reads) == 2)
+        assert stats is None
+        assert reads == ["a", "b"]
+
+    def test_saved_stats_follow_the_file(self, epub_path):
+        """Saved statistics are only returned for an unchanged file."""
+        tracker = ProgressTracker(epub_path)
+        fingerprint = compute_fingerprint(epub_path)
+        assert tracker.load_book_stats(fingerprint) is None
+        assert tracker.save_book_stats(fingerprint, sample_stats().to_dict())
+        assert tracker.load_book_stats(fingerprint) == sample_stats().to_dict()
+        changed = {**fingerprint, "size": fingerprint["size"] + 1}
+        assert tracker.load_book_stats(changed) is None
+
+
+class TestBackgroundBuild:
+    """Test building the index when a book is opened."""
+
+    def make_manager(self, epub_path: str) -> EPUBManager:
+        """An EPUBManager for the book with a mocked app."""
+        app = MagicMock()
+        app.epub_path = epub_path
+        app._debug = False
+        app._update_tts_progress = AsyncMock()
+        manager = EPUBManager(app)
+        manager.epub_parser = EPUBParser(epub_path)
+        manager.epub_parser.open()
+        manager.toc_data = manager.epub_parser.read_spine_toc()
+        manager.progress_tracker = ProgressTracker(epub_path)
+        return manager
+
+    def test_build_then_reuse(self, epub_path):
+        """The first open counts every chapter, the next one reads the saved index."""
+        manager = self.make_manager(epub_path)
+        try:
+            asyncio.run(manager.build_book_stats())
+        finally:
+            manager.close_epub()
+        stats = manager.app.book_stats
+        assert stats is manager.book_stats
+        assert list(stats.words) == [i * 10 for i in range(CHAPTERS)]
+        assert list(stats.cjk_chars) == [i * 27 for i in range(CHAPTERS)]
+        manager.app._update_tts_progress.assert_awaited_once()
+
+        reopened = self.make_manager(epub_path)
+        reopened.toc_data = {"spine_order": []}
+        try:
+            asyncio.run(reopened.build_book_stats())
+        finally:
+            reopened.close_epub()
+        assert list(reopened.book_stats.seconds) == list(stats.seconds)
+
+    def test_build_uses_reader_limits(self, epub_path):
+        """The statistics pass reads chapters with the reading parser's limits."""
+        manager = self.make_manager(epub_path)
+        manager.epub_parser.max_entry_bytes = 1 << 20
+        manager.epub_parser.use_mmap = True
+        with patch(
+            "speakub.ui.epub_manager.EPUBParser", wraps=EPUBParser
+        ) as parser_class:
+            try:
+                asyncio.run(manager.build_book_stats())
+            finally:
+                manager.close_epub()
+        kwargs = parser_class.call_args.kwargs
+        assert kwargs["max_entry_bytes"] == 1 << 20
+        assert kwargs["use_mmap"] is True
+        assert list(manager.book_stats.words) == [i * 10 for i in range(CHAPTERS)]
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Unit tests for ByteBudgetLRU functionality.
+"""
+
+import threading
+import unittest
+
+from speakub.utils.cache import ByteBudgetLRU
+
+
+class TestByteBudgetLRU(unittest.TestCase):
+    """Test cases for ByteBudgetLRU."""
+
+    def test_basic_cache_operations(self):
+        """Test basic get/put operations and statistics."""
+        cache = ByteBudgetLRU(max_bytes=100, sizeof=len)
+
+        self.assertTrue(cache.put("key1", "x" * 10))
+        self.assertEqual(cache.get("key1"), "x" * 10)
+        self.assertIsNone(cache.get("nonexistent"))
+
+        stats = cache.get_stats()
+        self.assertEqual(stats["size"], 1)
+        self.assertEqual(stats["bytes"], 10)
+        self.assertEqual(stats["max_bytes"], 100)
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertAlmostEqual(stats["hit_rate"], 0.5)
+
+    def test_evicts_least_recently_used_by_bytes(self):
+        """Test that inserting past the budget evicts the LRU entries."""
+        cache = ByteBudgetLRU(max_bytes=100, sizeof=len)
+        cache.put("a", "x" * 40)
+        cache.put("b", "x" * 40)
+        cache.get("a")  # b is now least recently used
+        cache.put("c", "x" * 40)
+
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIn("c", cache)
+        self.assertEqual(cache.current_bytes, 80)
+        self.assertEqual(cache.get_stats()["evictions"], 1)
+
+    def test_large_value_evicts_several_entries(self):
+        """Test that one large value can displace several small ones."""
+        cache = ByteBudgetLRU(max_bytes=100, sizeof=len)
+        for key in "abcde":
+            cache.put(key, "x" * 20)
+        cache.put("big", "x" * 90)
+
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get_stats()["evictions"], 5)
+
+    def test_oversized_value_not_cached(self):
+        """Test that a value larger than the budget is rejected."""
+        cache = ByteBudgetLRU(max_bytes=10, sizeof=len)
+        cache.put("small", "x")
+        self.assertFalse(cache.put("huge", "x" * 11))
+        self.assertNotIn("huge", cache)
+        self.assertIn("small", cache)
+
+    def test_replace_does_not_duplicate_bytes(self):
+        """Test that replacing a key accounts its size only once."""
+        cache = ByteBudgetLRU(max_bytes=100, sizeof=len)
+        cache.put("a", "x" * 30)
+        cache.put("a", "x" * 50)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.current_bytes, 50)
+
+    def test_max_items_and_eviction_callback(self):
+        """Test the item cap and that evicted entries are reported."""
+        evicted = []
+        cache = ByteBudgetLRU(
+            max_bytes=1000, max_items=2, sizeof=len,
+            on_evict=lambda key, value: evicted.append(key))
+        cache.put("a", "1")
+        cache.put("b", "2")
+        cache.put("c", "3")
+        cache.pop("b")
+        cache.clear()
+
+        self.assertEqual(evicted, ["a", "b", "c"])
+        self.assertEqual(cache.current_bytes, 0)
+
+    def test_concurrent_access(self):
+        """Test that concurrent puts keep the byte accounting consistent."""
+        cache = ByteBudgetLRU(max_bytes=500, sizeof=len)
+
+        def worker(offset):
+            for i in range(200):
+                cache.put(f"{offset}-{i % 30}", "x" * (i % 17 + 1))
+                cache.get(f"{offset}-{(i + 1) % 30}")
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertLessEqual(cache.current_bytes, 500)
+        self.assertEqual(
+            cache.current_bytes, sum(len(cache.get(k)) for k in list(cache._data))
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Tests for CFI generation and resolution.
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+from bs4 import BeautifulSoup
+
+from speakub.core.cfi import CFI, CFIGenerator, CFIIndex, CFIResolver
+from speakub.core.content_renderer import ContentRenderer
+from speakub.core.parsed_chapter import ParsedChapter
+from speakub.ui.progress import ProgressManager
+from speakub.ui.widgets.content_widget import ViewportContent
+
+SAMPLES = [
+    (
+        "<html><head><title>T</title></head><body><p>One <b>two</b> three</p>"
+        "<p>One <b>two</b> three</p><div id='d'><p>x</p><!-- note --> y</div>"
+        "</body></html>"
+    ),
+    "<p>No html element</p>text<span>tail <i>end</i></span>",
+    "<html><body>  <div><div><p>Deep</p></div></div>\n</body></html>",
+]
+
+CFIS = [
+    "epubcfi(/6/2!/4/2/1:0)",
+    "epubcfi(/6/4[chap01]!/4[body01]/10[para05]/3:10)",
+    "epubcfi(/6/4!/4/2,/1:3,/1:9)",
+    "epubcfi(/6/4!/4/2/1:3[yyy,zzz;s=b])",
+    "epubcfi(/2/4~23.5@27.1:68)",
+    "epubcfi(/6/4!/4/2[a^[1^]])",
+    "/6/14!/4/2/1:0",
+    " /6/2 ",
+]
+
+
+def legacy_compare(a, b) -> int:
+    """Part-by-part comparison used before CFI.sort_key()."""
+    a, b = CFI.parse(a), CFI.parse(b)
+    if isinstance(a, dict) or isinstance(b, dict):
+        start = legacy_compare_points(CFI.collapse(a), CFI.collapse(b))
+        if start:
+            return start
+        return legacy_compare_points(CFI.collapse(a, True), CFI.collapse(b, True))
+    return legacy_compare_points(a, b)
+
+
+def legacy_compare_points(a, b) -> int:
+    """Compare two collapsed CFIs."""
+    for i in range(max(len(a), len(b))):
+        parts_a = a[i] if i < len(a) else []
+        parts_b = b[i] if i < len(b) else []
+        max_index = max(len(parts_a), len(parts_b)) - 1
+        for j in range(max_index + 1):
+            part_a = parts_a[j] if j < len(parts_a) else None
+            part_b = parts_b[j] if j < len(parts_b) else None
+            if not part_a:
+                return -1
+            if not part_b:
+                return 1
+            if part_a.index != part_b.index:
+                return 1 if part_a.index > part_b.index else -1
+            if j == max_index:
+                offset_a, offset_b = part_a.offset or 0, part_b.offset or 0
+                if offset_a != offset_b:
+                    return 1 if offset_a > offset_b else -1
+    return 0
+
+
+def text_nodes(soup: BeautifulSoup):
+    """Nodes a CFI can point at: elements and non-blank strings."""
+    return [
+        node
+        for node in soup.descendants
+        if getattr(node, "name", None) or str(node).strip()
+    ]
+
+
+class TestCFIIndex:
+    """Test the per-document node index."""
+
+    @pytest.mark.parametrize("html", SAMPLES)
+    def test_index_matches_tree_walk(self, html):
+        """CFIs and resolutions are the same with and without the index."""
+        soup = BeautifulSoup(html, "html.parser")
+        index = CFIIndex(soup)
+        for node in soup.descendants:
+            cfi = CFIGenerator.generate_cfi(2, node, 1)
+            assert CFIGenerator.generate_cfi(2, node, 1, index) == cfi
+            walked = CFIResolver.resolve_cfi(soup, cfi)
+            indexed = CFIResolver.resolve_cfi(soup, cfi, index=index)
+            assert walked.keys() == indexed.keys()
+            if isinstance(walked["node"], list):
+                # A group of text nodes
+                assert list(map(id, walked["node"])) == list(map(id, indexed["node"]))
+            else:
+                assert walked["node"] is indexed["node"]
+            assert walked.get("offset") == indexed.get("offset")
+
+    @pytest.mark.parametrize("html", SAMPLES)
+    def test_round_trip(self, html):
+        """A CFI resolves back to the node and offset it was made from."""
+        soup = BeautifulSoup(html, "html.parser")
+        index = CFIIndex(soup)
+        for node in text_nodes(soup):
+            if node.parent is soup or getattr(node, "name", None) == "html":
+                continue
+            is_element = bool(getattr(node, "name", None))
+            if not is_element and index.position(node)[0] % 2 == 0:
+                # Text following an element gets an even step, which
+                # carries no offset
+                continue
+            offset = 0 if is_element else 1
+            cfi = CFIGenerator.generate_cfi(0, node, offset, index)
+            result = CFIResolver.resolve_cfi(soup, cfi, index=index)
+            assert result["node"] is node, cfi
+            assert result["offset"] == offset
+
+    def test_equal_siblings_are_distinct(self):
+        """Structurally equal elements get their own CFIs."""
+        soup = BeautifulSoup(SAMPLES[0], "html.parser")
+        first, second = soup.find_all("p")[:2]
+        assert first == second
+        assert CFIGenerator.generate_cfi(0, first) != CFIGenerator.generate_cfi(
+            0, second
+        )
+
+    def test_owned_by_parsed_chapter(self):
+        """The index is built once per parsed document."""
+        chapter = ParsedChapter(SAMPLES[0])
+        assert chapter.cfi_index is chapter.cfi_index
+        assert chapter.cfi_index.document is chapter.soup
+        assert ParsedChapter(SAMPLES[0]).cfi_index is not chapter.cfi_index
+
+
+class TestCFIEngine:
+    """Test tokenizing, parsing and ordering CFI strings."""
+
+    @pytest.mark.parametrize("cfi", CFIS)
+    def test_tokenizers_agree(self, cfi):
+        """The regex tokenizer gives the tokens of the character state machine."""
+        inner = CFI.unwrap(cfi.strip())
+        assert CFI.tokenize(inner) == CFI._tokenize_chars(inner)
+
+    @pytest.mark.parametrize("cfi", CFIS)
+    def test_round_trip(self, cfi):
+        """to_string(parse()) is stable."""
+        text = CFI.to_string(CFI.parse(cfi))
+        assert CFI.to_string(CFI.parse(text)) == text
+
+    def test_parse_returns_fresh_parts(self):
+        """Memoized parsing never shares parts between callers."""
+        first = CFI.parse(CFIS[0])
+        first[1][0].index = 99
+        assert CFI.parse(CFIS[0])[1][0].index == 4
+
+    def test_order_matches_part_comparison(self):
+        """compare() and sort_key() agree with the part-by-part comparison."""
+        cfis = [
+            f"epubcfi(/6/{s}!/4/{p}/1:{o})"
+            for s in (2, 4, 10)
+            for p in (2, 6)
+            for o in (0, 5, 12)
+        ]
+        cfis += ["epubcfi(/6/4!/4)", "epubcfi(/6/4!/4/2,/1:3,/1:9)", "epubcfi(/6/4)"]
+        for a in cfis:
+            for b in cfis:
+                assert CFI.compare(a, b) == legacy_compare(a, b), (a, b)
+        ordered = CFI.sort(list(reversed(cfis)))
+        assert all(CFI.compare(x, y) <= 0 for x, y in zip(ordered, ordered[1:]))
+
+    def test_clear_cache_is_deprecated(self):
+        """The old clear_cache() only warns; parsing is unaffected."""
+        key = CFI.sort_key(CFIS[0])
+        with pytest.warns(DeprecationWarning):
+            CFIGenerator.clear_cache()
+        assert CFI.sort_key(CFIS[0]) == key
+        assert CFI.parse(CFIS[0])[1][0].index == 4
+
+
+class TestProgressConversion:
+    """Test line and CFI conversion in the progress manager."""
+
+    def test_round_trip(self):
+        """A line's CFI leads back to the same line."""
+        html = "<html><body>%s</body></html>" % "".join(
+            f"<p>Paragraph <b>{i}</b> text.</p>" for i in range(50)
+        )
+        chapter = ParsedChapter(html)
+        lines = ContentRenderer().render_chapter(html)
+        app = MagicMock()
+        app.current_parsed_chapter = chapter
+        app.current_chapter_soup = chapter.soup
+        app.chapter_manager.get_chapter_index.return_value = 0
+        app.viewport_content = ViewportContent(lines, 10)
+        progress = ProgressManager(app, None)
+        for line_num in (0, 10, 40, len(lines) - 1):
+            cfi = progress.get_cfi_from_line(line_num)
+            assert cfi.startswith("epubcfi(/6/2!")
+            assert progress.get_line_from_cfi(cfi) <= line_num
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests for width-independent chapter preparation and reflow.
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from speakub.core.chapter_layout import PreparedChapter
+from speakub.core.content_renderer import ContentRenderer
+from speakub.core.render_cache import RenderCache
+from speakub.ui.widgets.content_widget import ViewportContent
+
+CHAPTER_HTML = (
+    "<html><body><h1>第一章 開始</h1>"
+    + "".join(
+        f"<p>第{i}段，這是一段用來測試的中文內容。Paragraph {i} with "
+        f"<b>bold</b> and <i>italic</i> English words.</p>"
+        for i in range(30)
+    )
+    + "<h2>" + "很長的標題" * 30 + "</h2><p>Last paragraph.</p></body></html>"
+)
+
+
+def uncached_renderer() -> ContentRenderer:
+    """A renderer that renders every call from scratch."""
+    return ContentRenderer(render_cache=RenderCache(max_bytes=0))
+
+
+class TestPreparedChapter:
+    """Test layouts of a prepared chapter."""
+
+    @pytest.mark.parametrize("width", [20, 35, 60, 80, 120])
+    def test_layout_matches_render(self, width):
+        """layout_chapter() wraps exactly like render_chapter()."""
+        renderer = uncached_renderer()
+        layout = renderer.layout_chapter(CHAPTER_HTML, width)
+        assert layout.lines == renderer.render_chapter(CHAPTER_HTML, width)
+        assert layout.anchor_at(len(layout.lines) - 1)[0] > 0
+
+    def test_reflow_skips_html2text(self):
+        """Re-wrapping a prepared chapter does not convert the HTML again."""
+        renderer = uncached_renderer()
+        renderer.layout_chapter(CHAPTER_HTML, 60)
+        with patch.object(
+            renderer, "_prepare_uncached", side_effect=AssertionError("re-parsed")
+        ):
+            renderer.layout_chapter(CHAPTER_HTML, 90)
+            renderer.render_chapter(CHAPTER_HTML, 45)
+
+    def test_anchor_survives_width_change(self):
+        """The line found for an anchor contains the same text position."""
+        prepared = uncached_renderer().prepare_chapter(CHAPTER_HTML)
+        narrow = prepared.layout(24)
+        wide = prepared.layout(100)
+        for line_index in range(len(narrow.lines)):
+            paragraph, offset = narrow.anchor_at(line_index)
+            target = wide.line_at((paragraph, offset))
+            start_paragraph, start_offset = wide.anchor_at(target)
+            assert start_paragraph == paragraph
+            assert start_offset <= offset
+            assert offset < start_offset + max(1, len(wide.lines[target]))
+
+    def test_fitting_markup_lines_stay_whole(self):
+        """Header lines that fit are kept even if per-character wrap differs."""
+        prepared = PreparedChapter(["# Title", "", "plain text " * 10])
+        layout = prepared.layout(20)
+        assert layout.lines[0] == "# Title"
+        assert layout.lines[1] == ""
+        assert [layout.anchor_at(i) for i in range(2)] == [(0, 0), (1, 0)]
+        assert all(
+            layout.anchor_at(i)[0] == 2 for i in range(2, len(layout.lines))
+        )
+
+
+class TestViewportReflow:
+    """Test moving the cursor into a rebuilt viewport."""
+
+    def test_jump_to_line(self):
+        """jump_to_line() selects the page and cursor of a global line."""
+        viewport = ViewportContent([f"line {i}" for i in range(100)], 10)
+        viewport.jump_to_line(57)
+        assert viewport.current_page == 5
+        assert viewport.cursor_in_page == 7
+        viewport.jump_to_line(500)
+        assert viewport.get_cursor_global_position() == 99
+
+    def test_cursor_keeps_paragraph(self):
+        """After a resize the cursor is on the paragraph it was on before."""
+        prepared = uncached_renderer().prepare_chapter(CHAPTER_HTML)
+        old_layout = prepared.layout(100)
+        old_viewport = ViewportContent(old_layout.lines, 10)
+        target = next(
+            i for i, line in enumerate(old_layout.lines) if "第20段" in line
+        )
+        old_viewport.jump_to_line(target)
+
+        new_layout = prepared.layout(30)
+        anchor = old_layout.anchor_at(old_viewport.get_cursor_global_position())
+        new_viewport = ViewportContent(new_layout.lines, 10)
+        new_viewport.jump_to_line(new_layout.line_at(anchor))
+
+        cursor = new_viewport.get_cursor_global_position()
+        assert "第20段" in new_layout.lines[cursor]
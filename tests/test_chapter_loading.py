@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Tests for chapter loading off the event loop.
+"""
+
+import asyncio
+import os
+import tempfile
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+from epub_builder import write_epub
+
+from speakub.core.content_renderer import ContentRenderer
+from speakub.core.epub_parser import EPUBParser
+from speakub.core.render_cache import RenderCache
+from speakub.ui.epub_manager import EPUBManager
+
+CHAPTERS = 20
+
+
+@pytest.fixture
+def epub_path():
+    """A book with CHAPTERS short chapters."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        chapters = {}
+        for i in range(CHAPTERS):
+            body = "".join(f"<p>Chapter {i} paragraph {j}.</p>" for j in range(50))
+            chapters[f"c{i}.xhtml"] = (
+                f"<html><body><h1>Chapter {i}</h1>{body}</body></html>"
+            )
+        yield write_epub(
+            os.path.join(temp_dir, "loading.epub"), chapters, title="Loading"
+        )
+
+
+def make_manager(path: str) -> EPUBManager:
+    """An EPUBManager with a real parser and renderer and a mocked app."""
+    app = MagicMock()
+    app.current_viewport_height = 10
+    app.tts_widget = MagicMock()
+    manager = EPUBManager(app)
+    manager.epub_parser = EPUBParser(path)
+    manager.epub_parser.open()
+    manager.content_renderer = ContentRenderer(render_cache=RenderCache(max_bytes=0))
+    return manager
+
+
+def chapter(i: int) -> dict:
+    """Chapter dict as the chapter manager builds it."""
+    return {"src": f"c{i}.xhtml", "title": f"Chapter {i}"}
+
+
+class TestChapterLoading:
+    """Test the CPU stage / UI-apply split of load_chapter()."""
+
+    def test_cpu_stage_runs_off_event_loop(self, epub_path):
+        """Reading and rendering happen on the worker, applying on the loop."""
+        manager = make_manager(epub_path)
+        threads = []
+        read = manager.epub_parser.read_parsed_chapter
+
+        def recording_read(src):
+            threads.append(threading.current_thread())
+            return read(src)
+
+        manager.epub_parser.read_parsed_chapter = recording_read
+        try:
+            asyncio.run(manager.load_chapter(chapter(3), from_start=True))
+        finally:
+            manager.close_epub()
+
+        assert threads and threads[0] is not threading.main_thread()
+        app = manager.app
+        assert app.current_chapter == chapter(3)
+        assert app.viewport_content.content_lines[0] == "# Chapter 3"
+        assert app.current_chapter_soup is app.current_parsed_chapter.soup
+        app.tts_widget.set_text.assert_called_once()
+        app.ui_utils.show_chapter_loading.assert_called_once_with(chapter(3))
+        app.ui_utils.update_panel_titles.assert_called_once()
+
+    def test_key_repeat_drops_stale_loads(self, epub_path):
+        """Only the last of a burst of loads is applied."""
+        manager = make_manager(epub_path)
+
+        async def burst():
+            await asyncio.gather(
+                *(
+                    manager.load_chapter(chapter(i), from_start=True)
+                    for i in range(CHAPTERS)
+                )
+            )
+
+        try:
+            asyncio.run(burst())
+        finally:
+            manager.close_epub()
+
+        app = manager.app
+        assert manager.stale_loads == CHAPTERS - 1
+        assert app.current_chapter == chapter(CHAPTERS - 1)
+        assert app.viewport_content.content_lines[0] == f"# Chapter {CHAPTERS - 1}"
+        assert app.tts_widget.set_text.call_count == 1
+
+    def test_next_chapter_for_tts_reads_on_worker(self, epub_path):
+        """The TTS thread's next-chapter read is queued on the load worker."""
+        manager = make_manager(epub_path)
+        manager.chapter_manager = MagicMock()
+        manager.chapter_manager.get_next_chapter.return_value = chapter(4)
+        manager.current_chapter = chapter(3)
+        threads = []
+        read = manager.epub_parser.read_chapter
+
+        def recording_read(src):
+            threads.append(threading.current_thread().name)
+            return read(src)
+
+        manager.epub_parser.read_chapter = recording_read
+        try:
+            next_chapter, lines = manager.get_next_chapter_content_lines()
+        finally:
+            manager.close_epub()
+
+        assert next_chapter == chapter(4)
+        assert lines[0] == "# Chapter 4"
+        assert threads and threads[0].startswith("speakub-chapter")
+
+    def test_navigation_follows_requested_chapter(self, epub_path):
+        """Next-chapter is relative to the chapter being loaded."""
+        manager = make_manager(epub_path)
+
+        async def start_load():
+            task = asyncio.ensure_future(manager.load_chapter(chapter(5)))
+            await asyncio.sleep(0)
+            assert manager.current_chapter == chapter(5)
+            await task
+
+        try:
+            asyncio.run(start_load())
+        finally:
+            manager.close_epub()
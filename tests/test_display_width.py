@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Tests for the display-width measurement service.
+"""
+
+import tracemalloc
+
+from speakub.core.content_renderer import ContentRenderer
+from speakub.utils.config import get_cache_config
+from speakub.utils.display_width import DisplayWidthCache, get_width_cache
+from speakub.utils.text_utils import str_display_width
+
+SAMPLES = [
+    "a", "中", "", "\t", "\u00e9", "e\u0301", "😀", "Hello", "中文標題 Title",
+    "x\x07y", "👩\u200d💻 dev", "\u2764\ufe0f love", "zero\u200bwidth",
+]
+
+
+class TestDisplayWidthCache:
+    """Test measurement and the bounded string cache."""
+
+    def test_matches_str_display_width(self):
+        """Cached and uncached measurements agree with str_display_width()."""
+        cache = DisplayWidthCache(max_entries=4, max_chars=8)
+        for _ in range(3):
+            for text in SAMPLES:
+                assert cache.width(text) == str_display_width(text), repr(text)
+
+    def test_single_characters_use_the_table(self):
+        """Characters are never stored in the string cache."""
+        cache = DisplayWidthCache(max_entries=10)
+        for char in "漢字かなabc":
+            cache.width(char)
+        stats = cache.get_stats()
+        assert stats["size"] == 0
+        assert stats["char_lookups"] == 7
+        assert stats["char_table_blocks"] > 0
+
+    def test_frequent_strings_survive_scans(self):
+        """Strings hit repeatedly are not evicted by a stream of new strings."""
+        cache = DisplayWidthCache(max_entries=10)
+        cache.width("Chapter 1")
+        cache.width("Chapter 1")
+        for i in range(1000):
+            cache.width(f"line {i}")
+        hits = cache.get_stats()["hits"]
+        cache.width("Chapter 1")
+        stats = cache.get_stats()
+        assert stats["hits"] == hits + 1
+        assert stats["size"] == 10
+        assert stats["evictions"] == 1000 + 1 - 10
+
+    def test_resize_and_disable(self):
+        """Shrinking evicts entries; a size of 0 disables caching."""
+        cache = DisplayWidthCache(max_entries=100)
+        for i in range(100):
+            cache.width(f"text {i}")
+        cache.resize(10)
+        assert len(cache) == 10
+        cache.resize(0)
+        assert len(cache) == 0
+        assert cache.width("中文") == 4
+        assert len(cache) == 0
+
+    def test_stats_are_published(self):
+        """The renderer reports the shared cache under width_cache."""
+        ContentRenderer()._get_display_width("Published 標題")
+        stats = ContentRenderer().get_cache_stats()["width_cache"]
+        assert stats is not None and stats == get_width_cache().get_stats()
+        assert stats["max_size"] >= stats["size"]
+
+    def test_configured_size(self):
+        """The capacity setting comes from the cache config."""
+        config = {"cache": {"auto_detect_hardware": False, "width_cache_size": 42}}
+        assert get_cache_config(config)["width_cache_size"] == 42
+
+    def test_zero_budgets_are_kept(self):
+        """A budget of 0 MB disables a cache instead of using the default."""
+        for auto in (True, False):
+            config = {
+                "cache": {
+                    "auto_detect_hardware": auto,
+                    "chapter_cache_mb": 0,
+                    "render_cache_mb": 0,
+                    "chapter_cache_size": 7,
+                }
+            }
+            cache_config = get_cache_config(config)
+            assert cache_config["chapter_cache_bytes"] == 0
+            assert cache_config["render_cache_bytes"] == 0
+            assert cache_config["chapter_cache_size"] == 7
+
+
+class TestLongSession:
+    """Test memory use over a long reading session."""
+
+    def test_memory_stays_bounded(self):
+        """Measuring many distinct lines keeps the cache at its capacity."""
+        cache = DisplayWidthCache(max_entries=500)
+        paragraph = "這是一段用來測試的中文內容，Mixed with English words. "
+
+        def session(lines: int) -> None:
+            for i in range(lines):
+                cache.width(f"{i} {paragraph}"[: 20 + i % 200])
+                cache.width(f"Chapter {i % 30}")
+                cache.width(f"{i} {paragraph * 8}")
+
+        session(2000)
+        tracemalloc.start()
+        try:
+            baseline, _ = tracemalloc.get_traced_memory()
+            session(10000)
+            current, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        stats = cache.get_stats()
+        assert stats["size"] == 500
+        assert stats["uncached"] == 12000
+        # Entries are replaced, not accumulated
+        assert current - baseline < 256 * 1024
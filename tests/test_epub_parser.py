@@ -7,9 +7,11 @@ Unit tests for EPUB parser functionality.
 import os
 import tempfile
 import zipfile
+from unittest.mock import patch
 
 import pytest
 
+from speakub.core.epub.path_resolver import HrefResolver
 from speakub.core.epub_parser import EPUBParser, normalize_src_for_matching
 
 
@@ -41,6 +43,63 @@ class TestNormalizeSrcForMatching:
         assert normalize_src_for_matching("CHAPTER1.HTML") == "chapter1.html"
 
 
+class TestHrefResolver:
+    """Test the per-book href index."""
+
+    NAMES = [
+        "mimetype",
+        "OEBPS/content.opf",
+        "OEBPS/Text/Chapter 1.xhtml",
+        "OEBPS/Text/chapter2.xhtml",
+        "OEBPS/Images/cover.jpg",
+        "OEBPS/Text/",
+    ]
+
+    @pytest.fixture
+    def resolver(self):
+        return HrefResolver(self.NAMES, "OEBPS")
+
+    def test_exact_match(self, resolver):
+        """Test that full zip paths resolve to themselves."""
+        resolved = resolver.resolve("OEBPS/Text/chapter2.xhtml")
+        assert resolved == "OEBPS/Text/chapter2.xhtml"
+
+    def test_percent_decoded_and_opf_relative(self, resolver):
+        """Test percent-encoded hrefs relative to the OPF directory."""
+        resolved = resolver.resolve("Text/Chapter%201.xhtml")
+        assert resolved == "OEBPS/Text/Chapter 1.xhtml"
+
+    def test_case_folded_match(self, resolver):
+        """Test case-insensitive matching."""
+        resolved = resolver.resolve("oebps/text/CHAPTER2.XHTML")
+        assert resolved == "OEBPS/Text/chapter2.xhtml"
+
+    def test_fragment_and_basename(self, resolver):
+        """Test that fragments are ignored and bare basenames resolve."""
+        assert resolver.resolve("chapter2.xhtml#p3") == "OEBPS/Text/chapter2.xhtml"
+        assert resolver.resolve("cover.jpg") == "OEBPS/Images/cover.jpg"
+
+    def test_suffix_and_missing_extension(self, resolver):
+        """Test path-suffix keys and hrefs without an extension."""
+        assert resolver.resolve("Images/cover.jpg") == "OEBPS/Images/cover.jpg"
+        assert resolver.resolve("Text/chapter2") == "OEBPS/Text/chapter2.xhtml"
+
+    def test_miss_and_statistics(self, resolver):
+        """Test misses and hit/miss counters, including memoized lookups."""
+        assert resolver.resolve("missing.xhtml") is None
+        assert resolver.resolve("chapter2.xhtml") is not None
+        assert resolver.resolve("chapter2.xhtml") is not None
+        assert resolver.stats["lookups"] == 3
+        assert resolver.stats["hits"] == 2
+        assert resolver.stats["misses"] == 1
+
+    def test_first_entry_wins_on_collision(self):
+        """Test that duplicate basenames resolve to the first entry in zip order."""
+        resolver = HrefResolver(["a/index.html", "b/index.html"])
+        assert resolver.resolve("index.html") == "a/index.html"
+        assert resolver.resolve("b/index.html") == "b/index.html"
+
+
 class TestEPUBParser:
     """Test EPUB parser functionality."""
 
@@ -152,3 +211,196 @@ class TestEPUBParser:
             content2 = parser.read_chapter("chapter1.xhtml")
             assert content1 == content2
             assert "Chapter 1" in content1
+
+    def test_chapter_read_once(self, sample_epub_path):
+        """Test that a chapter is decompressed once per uncached read."""
+        with EPUBParser(sample_epub_path) as parser:
+            with patch.object(
+                parser, "_read_entry_view", wraps=parser._read_entry_view
+            ) as read_entry:
+                parser.read_chapter("chapter1.xhtml")
+            assert read_entry.call_count == 1
+            assert parser.get_statistics()["total_reads"] == 1
+
+    def test_open_decompresses_items_lazily(self, sample_epub_path):
+        """Test that opening builds the item map without reading any item."""
+        with patch("ebooklib.epub.read_epub", side_effect=AssertionError):
+            with EPUBParser(sample_epub_path) as parser:
+                assert parser.item_provider.stats["items_read"] == 0
+                assert "chapter1.xhtml" in parser.item_provider
+                assert "Chapter 1" in parser.read_chapter("chapter1.xhtml")
+
+    def test_read_resource(self, sample_epub_path):
+        """Test reading an image relative to its chapter."""
+        with zipfile.ZipFile(sample_epub_path, "a") as zf:
+            zf.writestr("images/cover.png", b"\x89PNG fake image")
+
+        with EPUBParser(sample_epub_path) as parser:
+            data = parser.read_resource(
+                "images/cover.png", base_href="chapter1.xhtml")
+            assert data == b"\x89PNG fake image"
+            assert parser.read_resource("cover.png") == data
+            with pytest.raises(FileNotFoundError):
+                parser.read_resource("missing.png")
+
+    def test_chapter_cache_is_shared_across_hrefs(self, sample_epub_path):
+        """Test that hrefs naming the same file share one cache entry."""
+        with EPUBParser(sample_epub_path) as parser:
+            parser.read_chapter("chapter1.xhtml")
+            parser.read_chapter("./chapter1.xhtml")
+            parser.read_chapter("CHAPTER1.XHTML")
+            cache_stats = parser.get_statistics()["chapter_cache"]
+            assert cache_stats["size"] == 1
+            assert cache_stats["misses"] == 1
+            assert cache_stats["hits"] == 2
+            assert cache_stats["bytes"] > 0
+
+    def test_chapter_cache_byte_budget(self, sample_epub_path):
+        """Test that a tiny budget keeps chapters out of the cache."""
+        with EPUBParser(
+            sample_epub_path, chapter_cache_bytes=16
+        ) as parser:
+            parser.read_chapter("chapter1.xhtml")
+            parser.read_chapter("chapter1.xhtml")
+            stats = parser.get_statistics()
+            assert stats["total_reads"] == 2
+            assert stats["chapter_cache"]["size"] == 0
+
+    def test_chapter_cache_item_cap(self, sample_epub_path):
+        """Test that chapter_cache_items caps the number of cached entries."""
+        with EPUBParser(sample_epub_path, chapter_cache_items=1) as parser:
+            parser.read_chapter("chapter1.xhtml")
+            parser.read_chapter("content.opf")
+            cache_stats = parser.get_statistics()["chapter_cache"]
+            assert cache_stats["max_items"] == 1
+            assert cache_stats["size"] == 1
+            assert cache_stats["evictions"] == 1
+
+
+class TestIncrementalToc:
+    """Test the incremental TOC builders."""
+
+    NCX = """<?xml version="1.0" encoding="UTF-8"?>
+<ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" version="2005-1">
+  <navMap>
+    <navPoint id="p1"><navLabel><text> Preface </text></navLabel>
+      <content src="Text/c1.xhtml"/></navPoint>
+    <navPoint id="p2"><navLabel><text>Part One</text></navLabel>
+      <content src="Text/c2.xhtml#top"/>
+      <navPoint id="p3"><navLabel><text>Chapter 1</text></navLabel>
+        <content src="Text/c3.xhtml"/></navPoint>
+    </navPoint>
+    <navPoint id="p4"><navLabel><text>Volume 2</text></navLabel>
+      <content src="Text/c4.xhtml"/></navPoint>
+    <navPoint id="p5"><navLabel><text>Chapter 2</text></navLabel>
+      <content src="Text/c5.xhtml"/></navPoint>
+  </navMap>
+</ncx>"""
+
+    @pytest.fixture
+    def ncx_epub_path(self):
+        """Create an EPUB2 book whose TOC comes from a nested NCX."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            epub_path = os.path.join(temp_dir, "ncx.epub")
+            items = "".join(
+                f'<item id="c{i}" href="Text/c{i}.xhtml" '
+                'media-type="application/xhtml+xml"/>'
+                for i in range(1, 6)
+            )
+            spine = "".join(f'<itemref idref="c{i}"/>' for i in range(1, 6))
+            with zipfile.ZipFile(epub_path, "w") as zf:
+                zf.writestr("mimetype", "application/epub+zip")
+                zf.writestr("META-INF/container.xml", """<?xml version="1.0"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+    <rootfiles>
+        <rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>
+    </rootfiles>
+</container>""")
+                zf.writestr("OEBPS/content.opf", f"""<?xml version="1.0"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="2.0">
+    <metadata xmlns:dc="http://purl.org/dc/elements/1.1/">
+        <dc:title>NCX Book</dc:title>
+    </metadata>
+    <manifest>{items}
+        <item id="ncx" href="toc.ncx" media-type="application/x-dtbncx+xml"/>
+    </manifest>
+    <spine toc="ncx">{spine}</spine>
+</package>""")
+                zf.writestr("OEBPS/toc.ncx", self.NCX)
+                for i in range(1, 6):
+                    zf.writestr(f"OEBPS/Text/c{i}.xhtml",
+                                f"<html><body><p>Chapter {i}</p></body></html>")
+            yield epub_path
+
+    def test_streamed_ncx_matches_soup_parse(self):
+        """Test that the streaming NCX parse agrees with BeautifulSoup."""
+        import xml.etree.ElementTree as ET
+
+        from speakub.core.epub import toc_parser
+
+        streamed = list(toc_parser._iter_ncx_root_nodes(self.NCX, "OEBPS/"))
+        with patch.object(
+            toc_parser, "_iter_ncx_root_elements",
+            side_effect=ET.ParseError("forced"),
+        ):
+            souped = list(toc_parser._iter_ncx_root_nodes(self.NCX, "OEBPS/"))
+        assert streamed == souped
+        assert [n["title"] for n in streamed] == [
+            "Preface", "Part One", "Volume 2", "Chapter 2"]
+        assert streamed[1]["children"][0]["src"] == "OEBPS/Text/c3.xhtml"
+
+    def test_malformed_ncx_resumes_with_soup(self):
+        """Test that a parse error mid-document keeps the streamed prefix."""
+        import xml.etree.ElementTree as ET
+
+        from speakub.core.epub import toc_parser
+
+        malformed = self.NCX.replace("Chapter 2", "Chapter&nbsp;2")
+        nodes = list(toc_parser._iter_ncx_root_nodes(malformed, ""))
+        with patch.object(
+            toc_parser, "_iter_ncx_root_elements",
+            side_effect=ET.ParseError("forced"),
+        ):
+            souped = list(toc_parser._iter_ncx_root_nodes(malformed, ""))
+        assert len(nodes) == 4
+        assert nodes == souped
+
+    def test_first_navpoint_streams_before_document_end(self):
+        """Test that a root navPoint is produced before the rest is parsed."""
+        from speakub.core.epub import toc_parser
+
+        truncated = self.NCX[: self.NCX.index('<navPoint id="p2"')] + "<broken"
+        with patch.object(toc_parser, "NCX_FEED_CHUNK", 64):
+            elements = toc_parser._iter_ncx_root_elements(truncated)
+            first = next(elements)
+        assert first.get("id") == "p1"
+
+    def test_grouping_yields_top_level_chapters_eagerly(self):
+        """Test that a chapter outside any group is yielded immediately."""
+        from speakub.core.epub.toc_parser import iter_grouped_chapters
+
+        def chapters():
+            yield {"type": "chapter", "title": "Intro", "src": "a.xhtml"}
+            raise AssertionError("consumed too far")
+
+        assert next(iter_grouped_chapters(chapters()))["title"] == "Intro"
+
+    def test_iter_toc_nodes_completes_spine_toc(self, ncx_epub_path):
+        """Test that the incremental build ends with the parse_toc result."""
+        with EPUBParser(ncx_epub_path) as parser:
+            expected = parser.parse_toc()
+
+        with EPUBParser(ncx_epub_path) as parser:
+            toc = parser.read_spine_toc()
+            assert toc["book_title"] == "NCX Book"
+            assert len(toc["spine_order"]) == 5
+            assert toc["nodes"] == []
+
+            streamed = list(parser.iter_toc_nodes(toc))
+            assert toc == expected
+            assert streamed == expected["nodes"]
+            assert toc["toc_source"] == "toc.ncx"
+            assert parser.parse_toc() is toc
+            # A complete TOC is replayed without being rebuilt
+            assert parser.read_spine_toc() is toc
+            assert list(parser.iter_toc_nodes(toc)) == streamed
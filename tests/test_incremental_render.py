@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Tests for incremental rendering of large chapters.
+"""
+
+import asyncio
+import os
+import tempfile
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+from epub_builder import write_epub
+
+from speakub.core.content_renderer import ContentRenderer
+from speakub.core.epub_parser import EPUBParser
+from speakub.core.render_cache import RenderCache
+from speakub.tts.playlist_manager import PlaylistManager
+from speakub.tts.ui.playlist import prepare_tts_playlist, tts_extend_playlist
+from speakub.ui.epub_manager import EPUBManager
+from speakub.ui.widgets.content_widget import ViewportContent
+
+PARAGRAPHS = 400
+CHAPTER_HTML = "<html><body><h1>Big chapter</h1>%s</body></html>" % "".join(
+    f"<p>Paragraph {i} " + "with some words to wrap " * (i % 7) + "</p>"
+    for i in range(PARAGRAPHS)
+)
+
+
+def streaming_renderer() -> ContentRenderer:
+    """A renderer that streams CHAPTER_HTML and caches nothing."""
+    renderer = ContentRenderer(content_width=40, render_cache=RenderCache(max_bytes=0))
+    renderer.stream_threshold_bytes = 1000
+    return renderer
+
+
+def batches_of(renderer: ContentRenderer, html: str = CHAPTER_HTML):
+    """Batches of a chapter, small enough to exercise the joins."""
+    return list(
+        renderer.iter_render_batches(html, first_batch_lines=10, batch_lines=50)
+    )
+
+
+class TestRenderBatches:
+    """Test ContentRenderer.iter_render_batches()."""
+
+    def test_batches_join_to_full_render(self):
+        """The joined batches are exactly the lines render_chapter() produces."""
+        renderer = streaming_renderer()
+        assert renderer.renders_incrementally(CHAPTER_HTML)
+        batches = batches_of(renderer)
+        assert len(batches) > 2
+        assert len(batches[0]) < len(batches[1])
+        joined = [line for batch in batches for line in batch]
+        assert joined == streaming_renderer().render_chapter(CHAPTER_HTML)
+
+    def test_small_chapters_render_at_once(self):
+        """Chapters under the threshold come in a single batch."""
+        renderer = streaming_renderer()
+        renderer.stream_threshold_bytes = None
+        assert not renderer.renders_incrementally(CHAPTER_HTML)
+        assert batches_of(renderer) == [renderer.render_chapter(CHAPTER_HTML)]
+
+
+class TestIncompleteViewport:
+    """Test a ViewportContent whose lines are still being appended."""
+
+    def test_appending_matches_building_at_once(self):
+        """Line, paragraph and logical-line maps do not depend on the batching."""
+        batches = batches_of(streaming_renderer())
+        full = ViewportContent([line for b in batches for line in b], 10)
+        viewport = ViewportContent(batches[0], 10, complete=False)
+        for batch in batches[1:]:
+            viewport.append_lines(batch)
+        viewport.mark_complete()
+        assert viewport.paragraphs == full.paragraphs
+        assert viewport.line_to_paragraph_map == full.line_to_paragraph_map
+        assert viewport.total_pages == full.total_pages
+
+    def test_end_is_not_chapter_end_until_complete(self):
+        """Paging past the rendered lines does not leave the chapter early."""
+        viewport = ViewportContent(["one", "", "two"], 2, complete=False)
+        assert viewport.tail_is_open
+        assert viewport.page_down() == (True, False)
+        assert viewport.page_down() == (False, False)
+        viewport.mark_complete()
+        assert not viewport.tail_is_open
+        assert viewport.page_down() == (False, True)
+
+
+def make_epub(temp_dir: str) -> str:
+    """A one-chapter book with CHAPTER_HTML."""
+    return write_epub(
+        os.path.join(temp_dir, "big.epub"), {"c0.xhtml": CHAPTER_HTML}, title="Big"
+    )
+
+
+@pytest.fixture
+def manager():
+    """An EPUBManager over a one-chapter book with a mocked app."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        app = MagicMock()
+        app.current_viewport_height = 10
+        app.tts_widget = MagicMock()
+        manager = EPUBManager(app)
+        manager.epub_parser = EPUBParser(make_epub(temp_dir))
+        manager.epub_parser.open()
+        manager.content_renderer = streaming_renderer()
+        try:
+            yield manager
+        finally:
+            manager.close_epub()
+
+
+class TestIncrementalLoad:
+    """Test load_chapter() with a chapter over the streaming threshold."""
+
+    CHAPTER = {"src": "c0.xhtml", "title": "Big"}
+
+    def test_first_page_then_tail(self, manager):
+        """The first page is applied before the rest is rendered in the background."""
+        app = manager.app
+
+        async def load():
+            await manager.load_chapter(self.CHAPTER, from_start=True)
+            viewport = app.viewport_content
+            assert not viewport.is_complete
+            assert len(viewport.content_lines) < 100
+            assert app.current_chapter_soup is None
+            app.tts_widget.set_text.assert_not_called()
+            tail = app.run_worker.call_args.args[0]
+            await tail
+            return viewport
+
+        viewport = asyncio.run(load())
+        assert viewport.is_complete
+        assert viewport.content_lines == streaming_renderer().render_chapter(
+            CHAPTER_HTML
+        )
+        assert app.current_chapter_soup is app.current_parsed_chapter.soup
+        app.tts_widget.set_text.assert_called_once()
+
+    def test_cfi_loads_whole_chapter(self, manager):
+        """Positioning at a CFI needs the whole chapter at once."""
+        asyncio.run(manager.load_chapter(self.CHAPTER, cfi="epubcfi(/6/2!/4/2/1:0)"))
+        assert manager.app.viewport_content.is_complete
+        manager.app.run_worker.assert_not_called()
+
+    def test_stale_tail_stops(self, manager):
+        """A newer load stops the background render of the previous chapter."""
+        app = manager.app
+
+        async def load_twice():
+            await manager.load_chapter(self.CHAPTER, from_start=True)
+            viewport = app.viewport_content
+            tail = app.run_worker.call_args.args[0]
+            manager._load_generation += 1
+            await tail
+            return viewport
+
+        viewport = asyncio.run(load_twice())
+        assert not viewport.is_complete
+
+    def test_resize_waits_for_tail(self, manager):
+        """A resize during the render is applied once the chapter is complete."""
+        manager.reflow_content = MagicMock(wraps=manager.reflow_content)
+        app = manager.app
+        app.ui_utils.calculate_content_width.return_value = 30
+
+        async def load_and_resize():
+            await manager.load_chapter(self.CHAPTER, from_start=True)
+            app.current_chapter = self.CHAPTER
+            manager.reflow_content()
+            assert manager._reflow_pending
+            await app.run_worker.call_args.args[0]
+            # The reflow itself runs as another worker
+            await app.run_worker.call_args.args[0]
+
+        asyncio.run(load_and_resize())
+        assert not manager._reflow_pending
+        assert manager.reflow_content.call_count == 2
+        layout = manager.content_renderer.layout_chapter(CHAPTER_HTML, 30)
+        assert app.viewport_content.content_lines == layout.lines
+
+    def test_reflow_dropped_by_newer_load(self, manager):
+        """A reflow queued before a chapter load does not replace its viewport."""
+        app = manager.app
+        app.ui_utils.calculate_content_width.return_value = 30
+
+        async def resize_then_load():
+            await manager.load_chapter(self.CHAPTER, from_end=True)
+            app.current_chapter = self.CHAPTER
+            manager.reflow_content()
+            reflow = app.run_worker.call_args.args[0]
+            manager._load_generation += 1
+            viewport = app.viewport_content
+            await reflow
+            return viewport
+
+        viewport = asyncio.run(resize_then_load())
+        assert app.viewport_content is viewport
+        assert manager._reflow_from_width is None
+
+    def test_width_changes_on_load_worker(self, manager):
+        """The renderer width is changed on the load worker, not the loop."""
+        app = manager.app
+        app.ui_utils.calculate_content_width.return_value = 30
+        threads = []
+        update_width = manager.content_renderer.update_width
+
+        def recording_update(width):
+            threads.append(threading.current_thread().name)
+            update_width(width)
+
+        manager.content_renderer.update_width = recording_update
+
+        async def load_and_resize():
+            await manager.load_chapter(self.CHAPTER, from_end=True)
+            app.current_chapter = self.CHAPTER
+            manager.reflow_content()
+            # A second resize to the same width queues nothing
+            manager.reflow_content()
+            await app.run_worker.call_args.args[0]
+
+        asyncio.run(load_and_resize())
+        assert len(threads) == 1
+        assert threads[0].startswith("speakub-chapter")
+        assert manager.content_renderer.content_width == 30
+
+
+class TestPlaylistTail:
+    """Test TTS over a chapter that is still being rendered."""
+
+    def make_playlist_manager(self, viewport: ViewportContent) -> PlaylistManager:
+        """A PlaylistManager reading from viewport."""
+        integration = MagicMock()
+        integration.tts_lock = threading.RLock()
+        integration.tts_stop_requested = threading.Event()
+        integration.app.viewport_content = viewport
+        return PlaylistManager(integration)
+
+    def test_playlist_grows_with_render(self):
+        """Finished paragraphs are read; the rest are added as they appear."""
+        viewport = ViewportContent(["one", "", "two", "two b"], 10, complete=False)
+        playlist_manager = self.make_playlist_manager(viewport)
+        prepare_tts_playlist(playlist_manager)
+        assert [text for text, _ in playlist_manager.playlist] == ["one"]
+
+        viewport.append_lines(["", "three"])
+        viewport.mark_complete()
+        assert tts_extend_playlist(playlist_manager)
+        assert [text for text, _ in playlist_manager.playlist] == [
+            "one",
+            "two two b",
+            "three",
+        ]
+        assert playlist_manager.source_viewport is None
+        assert not tts_extend_playlist(playlist_manager)
+
+    def test_leaving_the_chapter_stops_waiting(self):
+        """The wait ends when another chapter is shown."""
+        viewport = ViewportContent(["one", "", "two"], 10, complete=False)
+        playlist_manager = self.make_playlist_manager(viewport)
+        prepare_tts_playlist(playlist_manager)
+        playlist_manager.app.viewport_content = ViewportContent(["other"], 10)
+        assert not tts_extend_playlist(playlist_manager)
+        assert playlist_manager.source_viewport is None
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Golden tests for the display-width wrapping engine.
+"""
+
+import random
+
+import pytest
+
+from speakub.utils.line_wrap import char_widths, wrap_by_width
+from speakub.utils.text_utils import str_display_width
+
+
+def legacy_split_text_by_width(text, width):
+    """The per-character wrapping loop the engine replaced (reference output)."""
+    if not text.strip():
+        return [""]
+
+    lines = []
+    current_line = ""
+    current_width = 0
+    for char in text:
+        char_width = str_display_width(char)
+        if current_width + char_width > width and current_line:
+            lines.append(current_line)
+            current_line = char
+            current_width = char_width
+        else:
+            current_line += char
+            current_width += char_width
+    if current_line:
+        lines.append(current_line)
+    return lines if lines else [""]
+
+
+GOLDEN_CORPUS = [
+    "",
+    "   \t ",
+    "Short line.",
+    "A plain English paragraph that is long enough to wrap several times "
+    "at narrow widths, with punctuation, numbers 12345 and hyphen-ated words.",
+    "這是一段用來測試的中文內容，包含全形標點符號「引號」與（括號）。" * 6,
+    "日本語のテキストとカタカナ、ひらがなを混ぜた文章です。" * 5,
+    "한국어 문장과 English words 가 섞여 있는 단락입니다. " * 4,
+    "Mixed 中英文 text with ＦＵＬＬＷＩＤＴＨ letters and half-width ｶﾀｶﾅ. " * 4,
+    "Combining marks: é à ô ñ " * 10,
+    "Zero width​space and joiner‍ and VS16 ❤️ " * 6,
+    "Emoji beyond the BMP 😀🎉👍🏽 and CJK Ext-B 𠀀𠀁𠀂 " * 5,
+    "Control\x07chars\x1b[0m and tabs\tinside\x00 a line " * 4,
+    "** Bold heading 第一章 開始 **",
+    "# " + "標題" * 40,
+    "　　全形空白開頭的段落，" * 10,
+    "x" * 500,
+    "字" * 500,
+]
+
+
+class TestWrapByWidth:
+    """Compare the engine with the legacy loop."""
+
+    @pytest.mark.parametrize("width", [20, 21, 33, 40, 59, 80, 120])
+    @pytest.mark.parametrize("text", GOLDEN_CORPUS)
+    def test_matches_legacy_output(self, text, width):
+        """Output is identical to the per-character loop."""
+        assert wrap_by_width(text, width) == legacy_split_text_by_width(text, width)
+
+    def test_random_mixed_script(self):
+        """Randomised paragraphs over a mixed alphabet match as well."""
+        alphabet = (
+            "abc XYZ.,;'-" "中文測試。，" "かなカナ" "한글" "́​️"
+            "😀𠀀" "\t\x07"
+        )
+        rng = random.Random(1971)
+        for _ in range(300):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 400)))
+            width = rng.randint(1, 100)
+            assert wrap_by_width(text, width) == legacy_split_text_by_width(
+                text, width
+            ), (text, width)
+
+    def test_char_widths(self):
+        """Per-character widths agree with str_display_width."""
+        text = "aあ́😀\t"
+        assert list(char_widths(text)) == [str_display_width(c) for c in text]
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Unit tests for memory-mapped zip member access.
+"""
+
+import os
+import tempfile
+import zipfile
+
+import pytest
+from epub_builder import write_epub
+
+from speakub.core import SecurityError
+from speakub.core.epub.mmap_zip import MmapZipReader
+from speakub.core.epub_parser import EPUBParser
+
+CHAPTER = (
+    "<html><body><h1>第一章</h1><p>Memory mapped chapter text.</p></body></html>"
+)
+
+
+def write_book(epub_path: str, compression: int) -> None:
+    """Write a minimal EPUB whose members all use the given compression."""
+    write_epub(
+        epub_path,
+        {"chapter1.xhtml": CHAPTER},
+        title="Mapped",
+        resources={"big.bin": (os.urandom(100_000), "application/octet-stream")},
+        compression=compression,
+    )
+
+
+@pytest.fixture(params=[zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED],
+                ids=["stored", "deflated"])
+def epub_path(request):
+    """Provide an EPUB written with stored or deflated members."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "book.epub")
+        write_book(path, request.param)
+        yield path, request.param
+
+
+class TestMmapZipReader:
+    """Test the mmap-backed reader."""
+
+    def test_matches_zipfile(self, epub_path):
+        """Test that every member reads identically to zipfile."""
+        path, _ = epub_path
+        with zipfile.ZipFile(path) as zf:
+            reader = MmapZipReader(path, zf.infolist())
+            try:
+                for name in zf.namelist():
+                    assert reader.read(name) == zf.read(name)
+            finally:
+                reader.close()
+
+    def test_stored_members_are_zero_copy(self, epub_path):
+        """Test that stored members come back as memoryviews."""
+        path, compression = epub_path
+        with zipfile.ZipFile(path) as zf:
+            reader = MmapZipReader(path, zf.infolist())
+            data = reader.read_view("chapter1.xhtml")
+            if compression == zipfile.ZIP_STORED:
+                assert isinstance(data, memoryview)
+                assert reader.stats["zero_copy_reads"] == 1
+                data.release()
+            else:
+                assert isinstance(data, bytes)
+            reader.close()
+
+    def test_size_limit(self, epub_path):
+        """Test that the per-member size limit is enforced."""
+        path, _ = epub_path
+        with zipfile.ZipFile(path) as zf:
+            reader = MmapZipReader(path, zf.infolist())
+            with pytest.raises(SecurityError):
+                reader.read("big.bin", max_bytes=1000)
+            reader.close()
+
+    def test_crc_mismatch_detected(self, epub_path):
+        """Test that corrupted member data fails the CRC check."""
+        path, _ = epub_path
+        with zipfile.ZipFile(path) as zf:
+            info = zf.getinfo("big.bin")
+            info.CRC ^= 0xFFFFFFFF
+            reader = MmapZipReader(path, zf.infolist())
+            with pytest.raises(zipfile.BadZipFile):
+                reader.read("big.bin")
+            reader.close()
+
+    def test_unsupported_member_rejected(self, epub_path):
+        """Test that members of other compression methods raise ValueError."""
+        path, _ = epub_path
+        with zipfile.ZipFile(path) as zf:
+            info = zf.getinfo("big.bin")
+            info.compress_type = zipfile.ZIP_BZIP2
+            reader = MmapZipReader(path, zf.infolist())
+            assert not reader.supports("big.bin")
+            with pytest.raises(ValueError):
+                reader.read("big.bin")
+            reader.close()
+
+
+class TestParserWithMmap:
+    """Test EPUBParser with memory-mapped reads enabled."""
+
+    def test_reads_match_default_path(self, epub_path):
+        """Test that chapter content is identical with and without mmap."""
+        path, _ = epub_path
+        with EPUBParser(path) as parser:
+            expected = parser.read_chapter("chapter1.xhtml")
+
+        with EPUBParser(path, use_mmap=True) as parser:
+            assert parser.read_chapter("chapter1.xhtml") == expected
+            assert parser.parse_toc()["book_title"] == "Mapped"
+            stats = parser.get_statistics()
+            assert stats["use_mmap"] is True
+            assert stats["mmap"]["reads"] >= 1
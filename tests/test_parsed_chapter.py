@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-chapter parsed document.
+"""
+
+import os
+import re
+import tempfile
+
+import pytest
+from epub_builder import write_epub
+from bs4 import BeautifulSoup
+
+from speakub.core.content_renderer import ContentRenderer
+from speakub.core.epub_parser import EPUBParser
+from speakub.core.parsed_chapter import ChapterTextIndex, ParsedChapter
+from speakub.ui.widgets.content_widget import ViewportContent
+
+SAMPLES = [
+    "<html><body><p>Hello <b>world</b>.</p><p>Second   paragraph</p></body></html>",
+    (
+        "<html><head><style>p {color: red}</style><script>var x = 1;</script>"
+        "</head><body><nav><a href='#'>Skip me</a></nav><header>Header</header>"
+        "<h1>第一章</h1><p>這是<i>中文</i>內容。</p><aside>Note<footer>F</footer>"
+        "</aside><p>Tail <img src='a.png' alt='A'/> text</p><img src='b.png'/>"
+        "<img alt='no source'/><footer>Footer</footer></body></html>"
+    ),
+    "<p>No body element</p><script>ignored()</script>plain tail",
+    "<html><body></body></html>",
+    (
+        "<html><body><div> <p>A <!-- note --> <span>b<script>x()</script></span>"
+        "</p>\n<pre> c </pre><template><i>t</i></template></div></body></html>"
+    ),
+]
+
+
+def legacy_tts_text(html: str) -> str:
+    """TTS extraction as it was done before ParsedChapter."""
+    soup = BeautifulSoup(html, "html.parser")
+    for element in soup(["script", "style", "nav", "header", "footer", "aside"]):
+        element.decompose()
+    text = soup.get_text()
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"\n\s*\n", "\n\n", text)
+    return text.strip()
+
+
+def legacy_chars_before(soup: BeautifulSoup, target) -> int:
+    """Character count of the CFI-to-line walk before ChapterTextIndex."""
+    char_count = 0
+    body = soup.find("body") or soup
+    for el in body.descendants:
+        if el is target:
+            break
+        if hasattr(el, "text") and el.text:
+            text = el.text.strip()
+            if text:
+                char_count += len(text) + 1
+    return char_count
+
+
+def legacy_locate(index: ChapterTextIndex, target: int):
+    """Node search of the line-to-CFI conversion before ChapterTextIndex.locate()."""
+    scanned = 0
+    best_node, best_offset, min_distance = None, 0, float("inf")
+    for node, text in zip(index.nodes, index.texts):
+        if scanned <= target < scanned + len(text):
+            return node, target - scanned
+        distance = abs(target - (scanned + len(text) / 2))
+        if distance < min_distance:
+            min_distance = distance
+            best_node = node
+            best_offset = 0 if target < scanned else len(text)
+        scanned += len(text) + 1
+    return best_node, best_offset
+
+
+def make_epub(directory: str, chapters: int = 3) -> str:
+    """Write a minimal EPUB with a few chapters and return its path."""
+    return write_epub(
+        os.path.join(directory, "parsed.epub"),
+        {
+            f"c{i}.xhtml": SAMPLES[1].replace("第一章", f"Chapter {i}")
+            for i in range(chapters)
+        },
+        title="Parsed",
+    )
+
+
+class TestDerivedViews:
+    """Test the products derived from a ParsedChapter."""
+
+    @pytest.mark.parametrize("html", SAMPLES)
+    def test_tts_text_matches_legacy(self, html):
+        """TTS text is unchanged, and the shared tree is left intact."""
+        chapter = ParsedChapter(html)
+        before = str(chapter.soup)
+        assert chapter.tts_text == legacy_tts_text(html)
+        assert str(chapter.soup) == before
+
+    def test_renderer_extraction_delegates(self):
+        """ContentRenderer extraction gives the same results."""
+        renderer = ContentRenderer()
+        for html in SAMPLES:
+            assert renderer.extract_text_for_tts(html) == legacy_tts_text(html)
+        assert renderer.extract_images(SAMPLES[1]) == [("a.png", "A"), ("b.png", "")]
+
+    def test_images_are_copied(self):
+        """Callers cannot modify the cached image list."""
+        chapter = ParsedChapter(SAMPLES[1])
+        chapter.images.clear()
+        assert len(chapter.images) == 2
+
+    @pytest.mark.parametrize("html", SAMPLES)
+    def test_text_index_matches_legacy_walk(self, html):
+        """chars_before() agrees with the per-lookup walk for every node."""
+        soup = BeautifulSoup(html, "html.parser")
+        index = ChapterTextIndex(soup)
+        for node in list(soup.descendants) + [object()]:
+            assert index.chars_before(node) == legacy_chars_before(soup, node)
+        body = soup.find("body") or soup
+        expected = [
+            (el, el.text.strip())
+            for el in body.descendants
+            if hasattr(el, "text") and el.text and el.text.strip()
+        ]
+        assert list(zip(index.nodes, index.texts)) == expected
+
+    @pytest.mark.parametrize("html", SAMPLES)
+    def test_locate_matches_legacy_scan(self, html):
+        """Bisecting the node offsets finds the node the linear scan found."""
+        index = ChapterTextIndex(BeautifulSoup(html, "html.parser"))
+        for position in range(index.total_chars + 3):
+            located = index.locate(position) or (None, 0)
+            expected = legacy_locate(index, position)
+            assert located[0] is expected[0] and located[1] == expected[1]
+
+
+class TestLineOffsets:
+    """Test the character offsets of rendered lines."""
+
+    LINES = ["# Title", "", "第一段中文內容", "second line", "", "", "x" * 30]
+
+    def test_offsets_match_summed_lengths(self):
+        """Offsets and lookups agree with summing line lengths, across appends."""
+        viewport = ViewportContent(self.LINES[:3], 5, complete=False)
+        viewport.append_lines(self.LINES[3:])
+        for line_idx in range(len(self.LINES) + 1):
+            expected = sum(len(line) + 1 for line in self.LINES[:line_idx])
+            assert viewport.char_offset_of_line(line_idx) == expected
+        total = viewport.char_offset_of_line(len(self.LINES))
+        for position in range(total + 5):
+            line_idx = viewport.line_at_char_offset(position)
+            assert viewport.char_offset_of_line(line_idx) <= position
+            if line_idx < len(self.LINES) - 1:
+                assert position < viewport.char_offset_of_line(line_idx + 1)
+
+
+class TestSingleParse:
+    """Test that a chapter's HTML is parsed once while it is cached."""
+
+    def test_one_parse_for_all_views(self):
+        """soup, TTS text, images and the CFI index share one parse."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with EPUBParser(make_epub(temp_dir)) as parser:
+                chapter = parser.read_parsed_chapter("c0.xhtml")
+                assert not chapter.is_parsed
+                chapter.soup
+                chapter.tts_text
+                chapter.images
+                chapter.text_index
+                again = parser.read_parsed_chapter("./c0.xhtml")
+                assert again is chapter
+                again.tts_text
+                assert parser.stats["dom_parses"] == 1
+                assert isinstance(parser.read_chapter("c0.xhtml"), str)
+
+    def test_prepare_builds_requested_views(self):
+        """prepare() builds the tree and only the views asked for."""
+        chapter = ParsedChapter("<html><body><p>One two.</p></body></html>")
+        chapter.prepare()
+        assert chapter.is_parsed
+        assert chapter._tts_text is None and chapter._cfi_index is None
+        chapter.prepare(tts=True, index=True)
+        assert chapter._tts_text == "One two."
+        assert chapter._text_index is not None and chapter._cfi_index is not None
+
+    def test_parse_is_charged_to_cache(self):
+        """Building the tree grows the entry's size in the chapter cache."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with EPUBParser(make_epub(temp_dir)) as parser:
+                chapter = parser.read_parsed_chapter("c0.xhtml")
+                unparsed = parser.get_statistics()["chapter_cache"]["bytes"]
+                chapter.soup
+                parsed = parser.get_statistics()["chapter_cache"]["bytes"]
+                assert parsed > unparsed
+
+    def test_tree_dropped_with_cache_entry(self):
+        """An evicted chapter is read and parsed afresh."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with EPUBParser(make_epub(temp_dir), chapter_cache_bytes=16) as parser:
+                first = parser.read_parsed_chapter("c0.xhtml")
+                first.soup
+                second = parser.read_parsed_chapter("c0.xhtml")
+                assert second is not first
+                second.soup
+                assert parser.stats["dom_parses"] == 2
@@ -4,11 +4,17 @@
 Performance benchmarks for SpeakUB optimizations.
 """
 
+import os
+import statistics
+import tempfile
 import time
+import zipfile
 import psutil
 from collections import OrderedDict
+from epub_builder import write_epub
 
 from speakub.core.content_renderer import AdaptiveCache, ContentRenderer
+from speakub.core.epub_parser import EPUBParser
 
 
 class LegacyCache:
@@ -151,6 +157,959 @@ def benchmark_content_renderer():
     print()
 
 
+def build_synthetic_epub(
+    epub_path: str,
+    chapters: int = 300,
+    paragraphs: int = 60,
+    compression=None,
+    images: int = 0,
+    image_size: int = 256 * 1024,
+    ncx: bool = False,
+) -> None:
+    """Write a large synthetic EPUB with CJK and Latin paragraphs (and images)."""
+    if compression is None:
+        compression = zipfile.ZIP_DEFLATED
+    contents = {}
+    for i in range(chapters):
+        body = "".join(
+            f"<p>第{i}章第{j}段，這是一段用來測試的中文內容。"
+            f"Paragraph {j} of chapter {i} with some English words.</p>"
+            for j in range(paragraphs)
+        )
+        contents[f"Text/chapter{i:04d}.xhtml"] = (
+            f"<?xml version='1.0' encoding='utf-8'?>\n"
+            f"<html xmlns=\"http://www.w3.org/1999/xhtml\"><head>"
+            f"<title>Chapter {i}</title></head><body><h1>Chapter {i}</h1>"
+            f"{body}</body></html>"
+        )
+    write_epub(
+        epub_path,
+        contents,
+        title="Synthetic Benchmark Book",
+        opf_dir="OEBPS",
+        resources={
+            f"Images/image{i:04d}.jpg": (os.urandom(image_size), "image/jpeg")
+            for i in range(images)
+        },
+        ncx=ncx,
+        compression=compression,
+    )
+
+
+def benchmark_chapter_reads(chapters: int = 300):
+    """Benchmark per-chapter read latency, cold read vs chapter cache hit."""
+    print("=== Chapter Read Benchmark ===\n")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        epub_path = os.path.join(temp_dir, "synthetic.epub")
+        build_synthetic_epub(epub_path, chapters=chapters)
+        srcs = [f"Text/chapter{i:04d}.xhtml" for i in range(chapters)]
+
+        with EPUBParser(epub_path, chapter_cache_bytes=256 * 1024 * 1024) as parser:
+            # The first pass decompresses every entry, the second is served
+            # from the ByteBudgetLRU
+            for label in ("cold read", "cache hit"):
+                latencies = []
+                for src in srcs:
+                    start_time = time.perf_counter()
+                    parser.read_chapter(src)
+                    latencies.append((time.perf_counter() - start_time) * 1000)
+
+                latencies.sort()
+                p95 = latencies[int(len(latencies) * 0.95) - 1]
+                print(f"  {label:9s} mean {statistics.mean(latencies):7.3f} ms  "
+                      f"p95 {p95:7.3f} ms")
+            hit_rate = parser.get_statistics()["chapter_cache"]["hit_rate"]
+            print(f"  cache hit rate {hit_rate:.0%}")
+
+    print()
+
+
+def benchmark_lazy_item_loading(images: int = 150):
+    """Benchmark time-to-first-page and peak memory, eager vs lazy items."""
+    import tracemalloc
+
+    print("=== Lazy Item Loading Benchmark ===\n")
+
+    try:
+        from ebooklib import epub
+    except ImportError:
+        epub = None
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        epub_path = os.path.join(temp_dir, "comic.epub")
+        build_synthetic_epub(epub_path, chapters=50, images=images)
+        size_mb = os.path.getsize(epub_path) / 1024 / 1024
+        print(f"  Book: 50 chapters, {images} images, {size_mb:.1f} MB")
+
+        def first_page(eager: bool) -> None:
+            if eager:
+                # Previous behaviour: every manifest item decompressed at open
+                epub.read_epub(epub_path)
+            with EPUBParser(epub_path) as parser:
+                parser.parse_toc()
+                parser.read_chapter("Text/chapter0000.xhtml")
+
+        modes = [("lazy", False)]
+        if epub is not None:
+            modes.insert(0, ("eager (read_epub)", True))
+
+        for label, eager in modes:
+            tracemalloc.start()
+            start_time = time.perf_counter()
+            first_page(eager)
+            elapsed = (time.perf_counter() - start_time) * 1000
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"  {label:18s} first page {elapsed:8.1f} ms  "
+                  f"peak alloc {peak / 1024 / 1024:7.1f} MB")
+
+    print()
+
+
+def benchmark_href_resolution(entries: int = 20000, lookups: int = 2000):
+    """Benchmark HrefResolver against a book with many zip entries."""
+    import random
+
+    from speakub.core.epub.path_resolver import HrefResolver
+
+    print("=== Href Resolution Benchmark ===\n")
+
+    names = [f"OEBPS/Text/part{i // 100:03d}/chapter{i:05d}.xhtml"
+             for i in range(entries)]
+    rng = random.Random(42)
+    picked = [rng.choice(names) for _ in range(lookups)]
+    cases = (
+        ("exact path", picked),
+        ("OPF-relative", [name[len("OEBPS/"):] for name in picked]),
+        ("basename, case", [os.path.basename(name).upper() for name in picked]),
+    )
+
+    start_time = time.perf_counter()
+    resolver = HrefResolver(names, "OEBPS")
+    resolver._build_index()
+    build_time = time.perf_counter() - start_time
+    print(f"  {entries} entries, index built in {build_time * 1000:.1f} ms")
+
+    for label, hrefs in cases:
+        start_time = time.perf_counter()
+        for href in hrefs:
+            resolver._resolve(href)
+        elapsed = time.perf_counter() - start_time
+        print(f"  {label:16s} {elapsed / lookups * 1e6:8.2f} us/lookup")
+    print()
+
+
+def benchmark_open_validation(chapters: int = 5000):
+    """Benchmark EPUBParser.open() with and without a cached security verdict."""
+    from speakub.core.epub import zip_guard
+
+    print("=== Open Validation Benchmark ===\n")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        epub_path = os.path.join(temp_dir, "many_entries.epub")
+        build_synthetic_epub(epub_path, chapters=chapters, paragraphs=2)
+
+        for label, clear in (("validation pass", True), ("cached verdict", False)):
+            timings = []
+            for _ in range(5):
+                if clear:
+                    zip_guard._verdicts.clear()
+                parser = EPUBParser(epub_path)
+                start_time = time.perf_counter()
+                parser.open()
+                timings.append((time.perf_counter() - start_time) * 1000)
+                parser.close()
+            print(f"  {label:16s} {min(timings):7.2f} ms ({chapters} entries)")
+
+    print()
+
+
+def _drop_page_cache(path: str) -> bool:
+    """Ask the kernel to drop cached pages of a file (POSIX only)."""
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    with open(path, "rb") as f:
+        os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+    return True
+
+
+def benchmark_mmap_reads(chapters: int = 300):
+    """Benchmark chapter reads through zipfile vs the mmap reader."""
+    print("=== Memory-Mapped Read Benchmark ===\n")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for compression, label in (
+            (zipfile.ZIP_STORED, "stored"),
+            (zipfile.ZIP_DEFLATED, "deflated"),
+        ):
+            epub_path = os.path.join(temp_dir, f"{label}.epub")
+            build_synthetic_epub(epub_path, chapters=chapters,
+                                 compression=compression)
+            srcs = [f"Text/chapter{i:04d}.xhtml" for i in range(chapters)]
+
+            for cache_state in ("cold", "warm"):
+                for use_mmap in (False, True):
+                    if cache_state == "cold" and not _drop_page_cache(epub_path):
+                        continue
+                    with EPUBParser(
+                        epub_path,
+                        chapter_cache_bytes=0,
+                        use_mmap=use_mmap,
+                    ) as parser:
+                        start_time = time.perf_counter()
+                        for src in srcs:
+                            parser.read_chapter(src)
+                        elapsed = (time.perf_counter() - start_time) * 1000
+                    reader = "mmap" if use_mmap else "zipfile"
+                    print(f"  {label:8s} {cache_state:4s} {reader:7s} "
+                          f"{elapsed / chapters:7.3f} ms/chapter")
+
+    print()
+
+
+def benchmark_dump_pipeline(chapters: int = 200):
+    """Benchmark --dump throughput for increasing worker counts."""
+    import io
+
+    from speakub.core.text_export import dump_book
+
+    print("=== Dump Pipeline Benchmark ===\n")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        epub_path = os.path.join(temp_dir, "dump.epub")
+        build_synthetic_epub(epub_path, chapters=chapters)
+
+        cpu_count = os.cpu_count() or 1
+        for jobs in sorted({1, 2, cpu_count}):
+            out = io.StringIO()
+            start_time = time.perf_counter()
+            dump_book(epub_path, out, cols=80, jobs=jobs)
+            elapsed = time.perf_counter() - start_time
+            print(f"  jobs={jobs:2d}: {elapsed:6.2f}s "
+                  f"({chapters / elapsed:6.1f} chapters/s)")
+
+    print()
+
+
+def benchmark_incremental_toc(chapters: int = 8000):
+    """Benchmark time to the first TOC entry versus the complete TOC."""
+    print("=== Incremental TOC Benchmark ===\n")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        epub_path = os.path.join(temp_dir, "toc.epub")
+        build_synthetic_epub(epub_path, chapters=chapters, paragraphs=1, ncx=True)
+
+        with EPUBParser(epub_path) as parser:
+            start_time = time.perf_counter()
+            toc = parser.parse_toc()
+            full = time.perf_counter() - start_time
+
+        with EPUBParser(epub_path) as parser:
+            start_time = time.perf_counter()
+            toc = parser.read_spine_toc()
+            spine_ready = time.perf_counter() - start_time
+            nodes = parser.iter_toc_nodes(toc)
+            next(nodes)
+            first_entry = time.perf_counter() - start_time
+            for _ in nodes:
+                pass
+            complete = time.perf_counter() - start_time
+
+        print(f"  {chapters} navPoints")
+        print(f"  parse_toc (all at once): {full * 1000:8.1f} ms")
+        print(f"  spine ready:             {spine_ready * 1000:8.1f} ms")
+        print(f"  first TOC entry:         {first_entry * 1000:8.1f} ms")
+        print(f"  incremental complete:    {complete * 1000:8.1f} ms")
+
+    print()
+
+
+def benchmark_package_parsing(chapters: int = 8000):
+    """Benchmark OPF/NCX parse time with lxml versus BeautifulSoup."""
+    from contextlib import ExitStack
+    from unittest.mock import patch
+
+    from speakub.core.epub.xml_backend import HAS_LXML
+
+    print("=== Package Document Parsing Benchmark ===\n")
+    if not HAS_LXML:
+        print("  lxml not installed, skipping\n")
+        return
+
+    modules = [
+        "speakub.core.epub.xml_backend",
+        "speakub.core.epub.opf_parser",
+        "speakub.core.epub.toc_parser",
+        "speakub.core.epub_parser",
+    ]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        epub_path = os.path.join(temp_dir, "package.epub")
+        build_synthetic_epub(epub_path, chapters=chapters, paragraphs=1, ncx=True)
+
+        for backend in ("lxml", "bs4"):
+            with ExitStack() as stack:
+                if backend == "bs4":
+                    for module in modules:
+                        stack.enter_context(patch(f"{module}.HAS_LXML", False))
+                with EPUBParser(epub_path) as parser:
+                    parser.parse_toc()
+                    times = parser.get_statistics()["parse_times_ms"]
+            stages = ", ".join(f"{k} {v:7.1f} ms" for k, v in times.items())
+            print(f"  {backend:5s}: {stages}")
+
+    print()
+
+
+def benchmark_render_cache(chapters: int = 20, paragraphs: int = 200):
+    """Benchmark chapter rendering cold, from memory and from the disk tier."""
+    from speakub.core.render_cache import RenderCache
+
+    print("=== Rendered Chapter Cache Benchmark ===\n")
+    htmls = [
+        "<html><body>"
+        + "".join(
+            f"<p>第{i}章第{j}段，這是一段用來測試的中文內容。"
+            f"Paragraph {j} of chapter {i} with some English words.</p>"
+            for j in range(paragraphs)
+        )
+        + "</body></html>"
+        for i in range(chapters)
+    ]
+
+    def render_all(renderer, widths):
+        start_time = time.perf_counter()
+        for width in widths:
+            for html in htmls:
+                renderer.render_chapter(html, width=width)
+        return (time.perf_counter() - start_time) * 1000 / (len(htmls) * len(widths))
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        renderer = ContentRenderer(
+            render_cache=RenderCache(disk_cache=True, cache_dir=cache_dir)
+        )
+        cold = render_all(renderer, (80, 120))
+        flip = render_all(renderer, (80, 120, 80, 120))
+        reopened = ContentRenderer(
+            render_cache=RenderCache(disk_cache=True, cache_dir=cache_dir)
+        )
+        disk = render_all(reopened, (80, 120))
+
+        print(f"  cold render:         {cold:7.2f} ms/chapter")
+        print(f"  width flip (memory): {flip:7.2f} ms/chapter")
+        print(f"  reopen (disk):       {disk:7.2f} ms/chapter")
+        print(f"  stats: {renderer.get_cache_stats()['render_cache']}")
+
+    print()
+
+
+def benchmark_line_wrapping(paragraph_chars: int = 50000, width: int = 80):
+    """Benchmark the wrapping engine against the per-character loop."""
+    from speakub.utils.line_wrap import wrap_by_width
+    from speakub.utils.text_utils import str_display_width
+
+    print("=== CJK Line Wrapping Benchmark ===\n")
+    unit = "這是一段用來測試的中文內容，Mixed with English words. "
+    text = (unit * (paragraph_chars // len(unit) + 1))[:paragraph_chars]
+
+    width_cache = {}
+
+    def per_character(text, width):
+        lines = []
+        current_line = ""
+        current_width = 0
+        for char in text:
+            char_width = width_cache.get(char)
+            if char_width is None:
+                char_width = width_cache[char] = str_display_width(char)
+            if current_width + char_width > width and current_line:
+                lines.append(current_line)
+                current_line = char
+                current_width = char_width
+            else:
+                current_line += char
+                current_width += char_width
+        if current_line:
+            lines.append(current_line)
+        return lines
+
+    # Warm both width caches
+    per_character(text, width)
+    wrap_by_width(text, width)
+    for name, wrap in (("per-character", per_character),
+                       ("engine", wrap_by_width)):
+        times = []
+        for _ in range(5):
+            start_time = time.perf_counter()
+            lines = wrap(text, width)
+            times.append((time.perf_counter() - start_time) * 1000)
+        print(f"  {name:14s}: {statistics.median(times):7.2f} ms "
+              f"({paragraph_chars} chars, {len(lines)} lines)")
+
+    print()
+
+
+def benchmark_reflow(chapter_bytes: int = 1024 * 1024):
+    """Benchmark re-wrapping a prepared chapter versus rendering it again."""
+    from speakub.core.render_cache import RenderCache
+
+    print("=== Reflow-on-Resize Benchmark ===\n")
+    paragraph = (
+        "<p>這是一段用來測試的中文內容，Mixed with <b>bold</b> English "
+        "words and more 中文字元。</p>"
+    )
+    html = "<html><body>" + paragraph * (
+        chapter_bytes // len(paragraph.encode("utf-8")) + 1) + "</body></html>"
+
+    renderer = ContentRenderer(render_cache=RenderCache(max_bytes=0))
+    start_time = time.perf_counter()
+    renderer.render_chapter(html, width=80)
+    full_ms = (time.perf_counter() - start_time) * 1000
+
+    times = []
+    for width in (60, 100, 73, 120, 80):
+        start_time = time.perf_counter()
+        layout = renderer.layout_chapter(html, width)
+        times.append((time.perf_counter() - start_time) * 1000)
+
+    print(f"  chapter: {len(html.encode('utf-8')) / 1024:.0f} KB, "
+          f"{len(layout.lines)} lines at width 80")
+    print(f"  full render: {full_ms:8.2f} ms")
+    print(f"  reflow:      {statistics.median(times):8.2f} ms (median)")
+
+    print()
+
+
+def benchmark_chapter_load_parses(chapters: int = 20, paragraphs: int = 400):
+    """Benchmark HTML parses and latency of loading chapters, old path vs ParsedChapter."""
+    import re
+
+    from bs4 import BeautifulSoup
+
+    from speakub.core.render_cache import RenderCache
+
+    print("=== Chapter Load Parse Benchmark ===\n")
+    parses = [0]
+    original_init = BeautifulSoup.__init__
+
+    def counting_init(self, *args, **kwargs):
+        parses[0] += 1
+        original_init(self, *args, **kwargs)
+
+    def legacy_load(parser, renderer, src):
+        # Chapter tree for CFIs, rendering, then a second parse for TTS text
+        html = parser.read_chapter(src)
+        soup = BeautifulSoup(html, "html.parser")
+        renderer.render_chapter(html)
+        tts_soup = BeautifulSoup(html, "html.parser")
+        for element in tts_soup(["script", "style", "nav", "header", "footer", "aside"]):
+            element.decompose()
+        re.sub(r"\s+", " ", tts_soup.get_text()).strip()
+        # Resolving the saved position walks the body once per lookup
+        body = soup.find("body") or soup
+        sum(len(el.text.strip()) + 1 for el in body.descendants
+            if hasattr(el, "text") and el.text and el.text.strip())
+
+    def parsed_load(parser, renderer, src):
+        chapter = parser.read_parsed_chapter(src)
+        chapter.soup
+        chapter.render_lines(renderer)
+        chapter.tts_text
+        chapter.text_index.total_chars
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        epub_path = os.path.join(temp_dir, "parses.epub")
+        build_synthetic_epub(epub_path, chapters=chapters, paragraphs=paragraphs)
+        srcs = [f"Text/chapter{i:04d}.xhtml" for i in range(chapters)]
+        BeautifulSoup.__init__ = counting_init
+        try:
+            for name, load in (("legacy", legacy_load), ("parsed", parsed_load)):
+                with EPUBParser(epub_path) as parser:
+                    renderer = ContentRenderer(render_cache=RenderCache(max_bytes=0))
+                    parses[0] = 0
+                    start_time = time.perf_counter()
+                    # Every chapter is opened twice, e.g. when paging back
+                    for src in srcs + srcs:
+                        load(parser, renderer, src)
+                    elapsed = (time.perf_counter() - start_time) * 1000
+                print(f"  {name:7s} {parses[0]:4d} parses, "
+                      f"{elapsed / (2 * chapters):7.2f} ms/load")
+        finally:
+            BeautifulSoup.__init__ = original_init
+
+    print()
+
+
+def benchmark_chapter_navigation(chapters: int = 20, paragraphs: int = 400):
+    """Benchmark event loop stalls during key-repeat chapter navigation."""
+    import asyncio
+    from unittest.mock import MagicMock
+
+    from speakub.core.render_cache import RenderCache
+    from speakub.ui.epub_manager import EPUBManager
+
+    print("=== Chapter Navigation Responsiveness Benchmark ===\n")
+    frame_ms = 1000 / 60
+    repeat_interval = 1 / 30
+
+    async def navigate(manager, blocking):
+        stalls = []
+        done = False
+
+        async def ticker():
+            last = time.perf_counter()
+            while not done:
+                await asyncio.sleep(0.001)
+                now = time.perf_counter()
+                stalls.append((now - last) * 1000)
+                last = now
+
+        tick_task = asyncio.ensure_future(ticker())
+        start_time = time.perf_counter()
+        loads = []
+        for i in range(chapters):
+            chapter = {"src": f"Text/chapter{i:04d}.xhtml", "title": f"Chapter {i}"}
+            if blocking:
+                # Previous behaviour: the whole load on the event loop
+                manager._load_generation += 1
+                manager._prepare_chapter(chapter, manager._load_generation, False)
+            else:
+                loads.append(asyncio.ensure_future(
+                    manager.load_chapter(chapter, from_start=True)))
+            await asyncio.sleep(repeat_interval)
+        await asyncio.gather(*loads)
+        elapsed = (time.perf_counter() - start_time) * 1000
+        done = True
+        await tick_task
+        return max(stalls), elapsed
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        epub_path = os.path.join(temp_dir, "navigation.epub")
+        build_synthetic_epub(epub_path, chapters=chapters, paragraphs=paragraphs)
+        for name, blocking in (("on event loop", True), ("load worker", False)):
+            app = MagicMock()
+            app.current_viewport_height = 30
+            manager = EPUBManager(app)
+            with EPUBParser(epub_path) as parser:
+                manager.epub_parser = parser
+                manager.content_renderer = ContentRenderer(
+                    render_cache=RenderCache(max_bytes=0))
+                worst, elapsed = asyncio.run(navigate(manager, blocking))
+            manager.close_epub()
+            print(f"  {name:14s} worst stall {worst:7.2f} ms "
+                  f"(frame {frame_ms:.1f} ms), total {elapsed:7.1f} ms, "
+                  f"stale loads dropped: {manager.stale_loads}")
+
+    print()
+
+
+def benchmark_render_spans(iterations: int = 200000):
+    """Benchmark span overhead and print per-stage render histograms."""
+    from speakub.core.render_cache import RenderCache
+    from speakub.utils import profiling
+
+    print("=== Render Span Profiling Benchmark ===\n")
+
+    def per_span_ns():
+        start_time = time.perf_counter_ns()
+        for _ in range(iterations):
+            with profiling.span("bench"):
+                pass
+        return (time.perf_counter_ns() - start_time) / iterations
+
+    previous = profiling.get_span_recorder()
+    recorder = profiling.enable_profiling(profiling.SpanRecorder())
+    try:
+        profiling.disable_profiling()
+        disabled = per_span_ns()
+        profiling.enable_profiling()
+        enabled = per_span_ns()
+        print(f"  span overhead: {disabled:6.0f} ns disabled, {enabled:6.0f} ns enabled")
+
+        recorder.reset()
+        renderer = ContentRenderer(render_cache=RenderCache(max_bytes=0))
+        html = "<html><body>" + "".join(
+            f"<p>第{i}段，這是一段用來測試的中文內容。Paragraph {i}.</p>"
+            for i in range(500)
+        ) + "</body></html>"
+        for width in (60, 80, 100, 120) * 5:
+            renderer.render_chapter(html, width=width)
+        for stage, stats in recorder.get_stats().items():
+            print(f"  {stage:10s} n={stats['count']:3d} p50 {stats['p50_ms']:7.2f} ms"
+                  f"  p95 {stats['p95_ms']:7.2f} ms  p99 {stats['p99_ms']:7.2f} ms")
+    finally:
+        profiling.enable_profiling(previous)
+        profiling.disable_profiling()
+
+    print()
+
+
+def benchmark_stream_renderer(chapter_mb: int = 5):
+    """Benchmark the streaming renderer on large single-file chapters."""
+    from speakub.core.stream_renderer import render_stream_lines
+
+    print("=== Streaming Fallback Renderer Benchmark ===\n")
+    paragraph = (
+        "<p>這是一段用來測試的中文內容，Mixed with <b>bold</b> English "
+        "words &amp; entities.</p>\n"
+    )
+    for size_mb in (chapter_mb // 2 or 1, chapter_mb):
+        html = "<html><body>" + paragraph * (
+            size_mb * 1024 * 1024 // len(paragraph.encode("utf-8"))) + "</body></html>"
+        start_time = time.perf_counter()
+        lines = render_stream_lines(html)
+        elapsed = time.perf_counter() - start_time
+        print(f"  {size_mb} MB chapter: {elapsed:6.2f} s, {len(lines)} lines, "
+              f"{size_mb / elapsed:5.2f} MB/s")
+
+    renderer = ContentRenderer()
+    html = "<html><body>" + paragraph * 3000 + "</body></html>"
+    start_time = time.perf_counter()
+    renderer._run_html2text(renderer._get_renderer(80), html)
+    html2text_ms = (time.perf_counter() - start_time) * 1000
+    start_time = time.perf_counter()
+    render_stream_lines(html)
+    stream_ms = (time.perf_counter() - start_time) * 1000
+    print(f"  {len(html) // 1024} KB: html2text {html2text_ms:7.1f} ms, "
+          f"streaming {stream_ms:7.1f} ms")
+
+    print()
+
+
+def benchmark_book_stats(chapters: int = 100):
+    """Benchmark building and querying the reading statistics index."""
+    from speakub.core.book_stats import BookStats
+
+    print("=== Reading Statistics Index Benchmark ===\n")
+    paragraph = "<p>這是一段用來測試的中文內容，Mixed with English words.</p>"
+    html = "<html><body>" + paragraph * 400 + "</body></html>"
+    spine = [f"c{i}.xhtml" for i in range(chapters)]
+
+    start_time = time.perf_counter()
+    stats = BookStats.build(spine, lambda src: html)
+    build_s = time.perf_counter() - start_time
+    print(f"  Build ({chapters} chapters, {len(html) // 1024} KB each): {build_s:.2f} s")
+
+    renderer = ContentRenderer()
+    start_time = time.perf_counter()
+    renderer.render_chapter(html, 80)
+    render_ms = (time.perf_counter() - start_time) * 1000
+    print(f"  Rendering one chapter instead: {render_ms:.1f} ms "
+          f"(~{render_ms * chapters / 1000:.1f} s for the book)")
+
+    queries = 100000
+    start_time = time.perf_counter()
+    for i in range(queries):
+        stats.book_seconds_left(spine[i % chapters], 0.5, 20)
+    query_us = (time.perf_counter() - start_time) / queries * 1e6
+    print(f"  Time-left query: {query_us:.2f} us")
+    print(f"  Book length at +0%: {stats.total_seconds / 3600:.1f} h")
+
+    print()
+
+
+def benchmark_width_cache(lines: int = 20000):
+    """Benchmark display-width measurement through the width service."""
+    from speakub.utils.display_width import DisplayWidthCache
+    from speakub.utils.text_utils import str_display_width
+
+    print("=== Display Width Cache Benchmark ===\n")
+    unit = "這是一段用來測試的中文內容，Mixed with English words. "
+    texts = [f"{i} {unit}"[: 20 + i % 60] for i in range(lines)]
+    titles = [f"第 {i} 章 Chapter title" for i in range(20)]
+
+    cache = DisplayWidthCache(max_entries=500)
+    for name, measure in (("str_display_width", str_display_width),
+                          ("width cache", cache.width)):
+        start_time = time.perf_counter()
+        for i, text in enumerate(texts):
+            measure(text)
+            measure(titles[i % len(titles)])
+        elapsed_us = (time.perf_counter() - start_time) / (2 * lines) * 1e6
+        print(f"  {name:18s}: {elapsed_us:6.2f} us per string")
+
+    long_text = unit * 200
+    start_time = time.perf_counter()
+    str_display_width(long_text)
+    direct_ms = (time.perf_counter() - start_time) * 1000
+    start_time = time.perf_counter()
+    cache.width(long_text)
+    table_ms = (time.perf_counter() - start_time) * 1000
+    print(f"  {len(long_text)}-char line: wcswidth {direct_ms:.2f} ms, "
+          f"table {table_ms:.2f} ms")
+
+    stats = cache.get_stats()
+    print(f"  Cache: {stats['size']}/{stats['max_size']} entries, "
+          f"hit rate {stats['hit_rate']:.1%}, {stats['evictions']} evictions")
+
+    print()
+
+
+def benchmark_incremental_render(paragraphs: int = 20000):
+    """Benchmark time to the first page of a large chapter."""
+    from speakub.core.render_cache import RenderCache
+
+    print("=== Incremental Render Benchmark ===\n")
+    html = "<html><body>%s</body></html>" % "".join(
+        f"<p>第 {i} 段，這是一段用來測試的中文內容 with English words.</p>"
+        for i in range(paragraphs)
+    )
+    print(f"  Chapter: {len(html) / 1024 / 1024:.1f} MB, {paragraphs} paragraphs")
+
+    def renderer() -> ContentRenderer:
+        r = ContentRenderer(content_width=80, render_cache=RenderCache(max_bytes=0))
+        r.stream_threshold_bytes = 1024
+        return r
+
+    start_time = time.perf_counter()
+    renderer().render_chapter(html)
+    full_ms = (time.perf_counter() - start_time) * 1000
+
+    start_time = time.perf_counter()
+    batches = renderer().iter_render_batches(html, first_batch_lines=25)
+    next(batches)
+    first_ms = (time.perf_counter() - start_time) * 1000
+    count = 1 + sum(1 for _ in batches)
+
+    print(f"  Full render:  {full_ms:8.1f} ms")
+    print(f"  First page:   {first_ms:8.1f} ms ({count} batches in total)")
+    print()
+
+
+def benchmark_cfi_offsets(chapter_bytes: int = 1024 * 1024, saves: int = 200):
+    """Benchmark the CFI text index and line lookups of a progress save."""
+    from bs4 import BeautifulSoup
+
+    from speakub.core.parsed_chapter import ChapterTextIndex
+    from speakub.ui.widgets.content_widget import ViewportContent
+
+    print("=== CFI Offset Index Benchmark ===\n")
+    unit = "<div><p>這是一段中文內容 with <b>bold <i>nested</i></b> words.</p></div>"
+    html = "<html><body>%s</body></html>" % (unit * (chapter_bytes // len(unit)))
+    soup = BeautifulSoup(html, "html.parser")
+    body = soup.find("body")
+
+    start_time = time.perf_counter()
+    legacy_total = sum(
+        len(el.text.strip()) + 1
+        for el in body.descendants
+        if hasattr(el, "text") and el.text and el.text.strip()
+    )
+    legacy_ms = (time.perf_counter() - start_time) * 1000
+    start_time = time.perf_counter()
+    index = ChapterTextIndex(soup)
+    index_ms = (time.perf_counter() - start_time) * 1000
+    assert index.total_chars == legacy_total
+    print(f"  Index build ({len(html) / 1024 / 1024:.1f} MB): el.text walk "
+          f"{legacy_ms:7.1f} ms, linear pass {index_ms:7.1f} ms")
+
+    lines = ContentRenderer().render_chapter(html)
+    viewport = ViewportContent(lines, 25)
+    targets = [i * (len(lines) - 1) // saves for i in range(saves)]
+
+    start_time = time.perf_counter()
+    for line_num in targets:
+        position = sum(len(line) + 1 for line in lines[:line_num])
+        scanned = 0
+        for length in index.lengths:
+            if scanned <= position < scanned + length:
+                break
+            scanned += length + 1
+    scan_us = (time.perf_counter() - start_time) / saves * 1e6
+
+    start_time = time.perf_counter()
+    for line_num in targets:
+        index.locate(viewport.char_offset_of_line(line_num))
+    bisect_us = (time.perf_counter() - start_time) / saves * 1e6
+    print(f"  Line-to-node per save ({len(lines)} lines, {len(index.nodes)} nodes): "
+          f"scan {scan_us:9.1f} us, bisect {bisect_us:5.1f} us")
+    print()
+
+
+def benchmark_cfi_index(paragraphs: int = 5000, lookups: int = 200):
+    """Benchmark CFI generation and resolution with and without the node index."""
+    from bs4 import BeautifulSoup
+
+    from speakub.core.cfi import CFIGenerator, CFIIndex, CFIResolver
+
+    print("=== CFI Node Index Benchmark ===\n")
+    html = "<html><body><div>%s</div></body></html>" % "".join(
+        f"<p>Paragraph <b>{i}</b> text.</p>" for i in range(paragraphs)
+    )
+    soup = BeautifulSoup(html, "html.parser")
+    nodes = soup.find_all("b")
+    targets = [nodes[i * (len(nodes) - 1) // lookups].string for i in range(lookups)]
+
+    start_time = time.perf_counter()
+    index = CFIIndex(soup)
+    build_ms = (time.perf_counter() - start_time) * 1000
+    print(f"  Index build ({paragraphs} paragraphs): {build_ms:.1f} ms")
+
+    for name, node_index in (("tree walk", None), ("index", index)):
+        start_time = time.perf_counter()
+        cfis = [CFIGenerator.generate_cfi(0, node, 1, node_index) for node in targets]
+        generate_us = (time.perf_counter() - start_time) / lookups * 1e6
+        start_time = time.perf_counter()
+        for cfi in cfis:
+            CFIResolver.resolve_cfi(soup, cfi, index=node_index)
+        resolve_us = (time.perf_counter() - start_time) / lookups * 1e6
+        print(f"  {name:9s}: generate {generate_us:8.1f} us, "
+              f"resolve {resolve_us:8.1f} us")
+    print()
+
+
+def benchmark_cfi_engine(count: int = 5000):
+    """Benchmark CFI tokenizing, parsing, comparison and sorting."""
+    import random
+    from functools import cmp_to_key
+
+    from speakub.core.cfi import CFI, _parse_cached, _sort_key_cached, _tokenize_cached
+
+    print("=== CFI Engine Benchmark ===\n")
+    rng = random.Random(7)
+    cfis = [
+        f"epubcfi(/6/{rng.randrange(2, 400, 2)}!/4/{rng.randrange(2, 200, 2)}"
+        f"/{rng.randrange(1, 9, 2)}:{rng.randrange(500)})"
+        for _ in range(count)
+    ]
+    inners = [CFI.unwrap(cfi) for cfi in cfis]
+
+    def timed(func) -> float:
+        start_time = time.perf_counter()
+        func()
+        return (time.perf_counter() - start_time) * 1000
+
+    def part_compare(a, b) -> int:
+        # Part-by-part comparison of freshly parsed CFIs, as before sort_key()
+        a, b = CFI.parse(a), CFI.parse(b)
+        for parts_a, parts_b in zip(a, b):
+            for part_a, part_b in zip(parts_a, parts_b):
+                if part_a.index != part_b.index:
+                    return 1 if part_a.index > part_b.index else -1
+            if len(parts_a) != len(parts_b):
+                return 1 if len(parts_a) > len(parts_b) else -1
+            offset_a, offset_b = parts_a[-1].offset or 0, parts_b[-1].offset or 0
+            if offset_a != offset_b:
+                return 1 if offset_a > offset_b else -1
+        return (len(a) > len(b)) - (len(a) < len(b))
+
+    chars_ms = timed(lambda: [CFI._tokenize_chars(s) for s in inners])
+    fast_ms = timed(lambda: [CFI._tokenize_fast(s) for s in inners])
+    print(f"  Tokenize {count}: state machine {chars_ms:7.1f} ms, "
+          f"regex {fast_ms:7.1f} ms")
+
+    _tokenize_cached.cache_clear()
+    _parse_cached.cache_clear()
+    cold_ms = timed(lambda: [CFI.parse(cfi) for cfi in cfis])
+    warm_ms = timed(lambda: [CFI.parse(cfi) for cfi in cfis])
+    print(f"  Parse {count}: cold {cold_ms:7.1f} ms, memoized {warm_ms:7.1f} ms")
+
+    pairs = list(zip(cfis, reversed(cfis)))
+    _sort_key_cached.cache_clear()
+    reparse_ms = timed(lambda: [part_compare(a, b) for a, b in pairs])
+    key_ms = timed(lambda: [CFI.compare(a, b) for a, b in pairs])
+    print(f"  Compare {count} pairs: re-parsing {reparse_ms:7.1f} ms, "
+          f"keys {key_ms:7.1f} ms")
+
+    _sort_key_cached.cache_clear()
+    legacy_sort_ms = timed(lambda: sorted(cfis, key=cmp_to_key(part_compare)))
+    _sort_key_cached.cache_clear()
+    key_sort_ms = timed(lambda: CFI.sort(cfis))
+    print(f"  Sort {count}: comparator {legacy_sort_ms:7.1f} ms, "
+          f"sort_key {key_sort_ms:7.1f} ms")
+    print()
+
+
+def benchmark_progress_store(library_sizes=(10, 1000, 10000), saves: int = 50):
+    """Benchmark progress saves against the size of the library."""
+    import json
+    from datetime import datetime
+    from pathlib import Path
+
+    from speakub.core.progress_store import ProgressStore
+
+    print("=== Progress Store Benchmark ===\n")
+
+    def entry(i: int) -> dict:
+        return {
+            "src": f"OEBPS/chapter{i % 40}.xhtml",
+            "cfi": f"epubcfi(/6/{2 * (i % 40) + 2}!/4/{2 * (i % 90) + 2}/1:0)",
+            "timestamp": datetime.now().isoformat(),
+            "epub_path": f"/home/user/books/book{i}.epub",
+        }
+
+    for books in library_sizes:
+        library = {f"/home/user/books/book{i}.epub": entry(i) for i in range(books)}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Whole-file JSON rewrite, as ProgressTracker did before the store
+            json_file = os.path.join(temp_dir, "progress.json")
+            with open(json_file, "w", encoding="utf-8") as f:
+                json.dump(library, f, indent=2, ensure_ascii=False)
+            start_time = time.perf_counter()
+            for i in range(saves):
+                with open(json_file, "r", encoding="utf-8") as f:
+                    all_progress = json.load(f)
+                all_progress["/home/user/books/book0.epub"] = entry(i)
+                with open(json_file, "w", encoding="utf-8") as f:
+                    json.dump(all_progress, f, indent=2, ensure_ascii=False)
+            json_ms = (time.perf_counter() - start_time) / saves * 1000
+
+            store = ProgressStore(
+                os.path.join(temp_dir, "progress.db"), legacy_json=Path(json_file)
+            )
+            try:
+                start_time = time.perf_counter()
+                for i in range(saves):
+                    store.put("/home/user/books/book0.epub", entry(i))
+                store_ms = (time.perf_counter() - start_time) / saves * 1000
+            finally:
+                store.close()
+
+        print(f"  {books:6d} books: JSON rewrite {json_ms:8.3f} ms/save, "
+              f"SQLite row {store_ms:6.3f} ms/save")
+    print()
+
+
+def benchmark_progress_writer(saves: int = 2000):
+    """Benchmark the caller-side cost of saving progress."""
+    from pathlib import Path
+    from unittest.mock import patch
+
+    from speakub.core.progress_tracker import ProgressTracker
+    from speakub.core.progress_writer import ProgressWriter
+
+    print("=== Progress Writer Benchmark ===\n")
+    with tempfile.TemporaryDirectory() as temp_dir, patch.object(
+        Path, "home", classmethod(lambda cls: Path(temp_dir))
+    ):
+        tracker = ProgressTracker(os.path.join(temp_dir, "book.epub"))
+
+        def caller_latency(save) -> list:
+            times = []
+            for i in range(saves):
+                start_time = time.perf_counter()
+                save("c1.xhtml", f"epubcfi(/6/2!/4/{2 * (i % 500) + 2}/1:0)")
+                times.append((time.perf_counter() - start_time) * 1e6)
+            return sorted(times)
+
+        direct = caller_latency(tracker.save_progress)
+        writer = ProgressWriter(max_queued=saves)
+        queued = caller_latency(lambda src, cfi: writer.submit(tracker, src, cfi))
+        start_time = time.perf_counter()
+        writer.close()
+        drain_ms = (time.perf_counter() - start_time) * 1000
+        stats = writer.get_stats()
+        tracker.close()
+
+    for name, times in (("direct save", direct), ("writer submit", queued)):
+        p99 = times[int(len(times) * 0.99)]
+        print(f"  {name:13s}: median {statistics.median(times):7.1f} us, "
+              f"p99 {p99:7.1f} us")
+    print(f"  {saves} submits: {stats['writes']} writes, "
+          f"{stats['coalesced']} coalesced, drained in {drain_ms:.1f} ms")
+    print()
+
+
 def run_all_benchmarks():
     """Run all performance benchmarks."""
     print("SpeakUB Performance Benchmarks")
@@ -161,6 +1120,29 @@ def run_all_benchmarks():
         benchmark_cache_performance()
         benchmark_memory_usage()
         benchmark_content_renderer()
+        benchmark_chapter_reads()
+        benchmark_lazy_item_loading()
+        benchmark_href_resolution()
+        benchmark_open_validation()
+        benchmark_mmap_reads()
+        benchmark_dump_pipeline()
+        benchmark_incremental_toc()
+        benchmark_package_parsing()
+        benchmark_render_cache()
+        benchmark_line_wrapping()
+        benchmark_reflow()
+        benchmark_chapter_load_parses()
+        benchmark_chapter_navigation()
+        benchmark_render_spans()
+        benchmark_stream_renderer()
+        benchmark_book_stats()
+        benchmark_width_cache()
+        benchmark_incremental_render()
+        benchmark_cfi_offsets()
+        benchmark_cfi_index()
+        benchmark_cfi_engine()
+        benchmark_progress_store()
+        benchmark_progress_writer()
 
         print("All benchmarks completed successfully!")
 
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Tests for render pipeline spans and their PerformanceMonitor histograms.
+"""
+
+import json
+import os
+import tempfile
+from unittest.mock import MagicMock
+
+import pytest
+
+from speakub.core.content_renderer import ContentRenderer
+from speakub.core.render_cache import RenderCache
+from speakub.ui.widgets.content_widget import ViewportContent
+from speakub.utils import profiling
+from speakub.utils.performance_monitor import PerformanceMonitor
+from speakub.utils.profiling import SpanRecorder, percentile, span
+
+CHAPTER_HTML = (
+    "<html><body><h1>標題</h1>"
+    + "<p>中文段落 with text.</p>" * 50
+    + "</body></html>"
+)
+
+
+@pytest.fixture
+def recorder():
+    """A fresh recorder, with profiling restored to its previous state after."""
+    previous = profiling.get_span_recorder()
+    was_enabled = profiling.is_profiling_enabled()
+    fresh = SpanRecorder()
+    yield fresh
+    profiling.enable_profiling(previous)
+    if not was_enabled:
+        profiling.disable_profiling()
+
+
+class TestSpans:
+    """Test span recording."""
+
+    def test_percentile_nearest_rank(self):
+        """Percentiles use the nearest-rank definition."""
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 95) == 95
+        assert percentile(values, 99) == 99
+        assert percentile([7.0], 99) == 7.0
+        assert percentile([], 50) == 0.0
+
+    def test_disabled_spans_record_nothing(self, recorder):
+        """While profiling is off, span() is a shared no-op."""
+        profiling.enable_profiling(recorder)
+        profiling.disable_profiling()
+        assert span("a") is span("b")
+        with span("a"):
+            pass
+        assert recorder.get_stats() == {}
+
+    def test_render_pipeline_stages(self, recorder):
+        """Rendering and building a viewport record their stages."""
+        profiling.enable_profiling(recorder)
+        renderer = ContentRenderer(render_cache=RenderCache(max_bytes=0))
+        ViewportContent(renderer.render_chapter(CHAPTER_HTML, 60), 10)
+        renderer.render_chapter(CHAPTER_HTML, 40)
+        stats = recorder.get_stats()
+        assert stats["html2text"]["count"] == 1
+        assert stats["measure"]["count"] == 1
+        assert stats["wrap"]["count"] == 2
+        assert stats["viewport"]["count"] == 1
+        wrap = stats["wrap"]
+        assert 0 <= wrap["p50_ms"] <= wrap["p95_ms"] <= wrap["p99_ms"] <= wrap["max_ms"]
+
+    def test_samples_are_bounded(self):
+        """Only the most recent samples are kept, counts stay exact."""
+        bounded = SpanRecorder(max_samples=10)
+        for i in range(100):
+            bounded.record("stage", float(i))
+        stats = bounded.get_stats()["stage"]
+        assert stats["count"] == 100
+        assert stats["p50_ms"] >= 90
+        assert stats["total_ms"] == sum(range(100))
+
+
+class TestPerformanceMonitorHistograms:
+    """Test render timings in PerformanceMonitor."""
+
+    def test_spans_feed_render_time_series(self, recorder):
+        """Monitoring enables spans and fills render_time_ms."""
+        profiling.enable_profiling(recorder)
+        profiling.disable_profiling()
+        monitor = PerformanceMonitor(MagicMock(viewport_content=None, tts_engine=None))
+        monitor.monitor_interval = 3600
+        monitor.start_monitoring()
+        try:
+            assert profiling.is_profiling_enabled()
+            with span("wrap"):
+                pass
+        finally:
+            monitor.stop_monitoring()
+        assert not profiling.is_profiling_enabled()
+
+        assert [value[0] for _, value in monitor.metrics_history["render_time_ms"]] == [
+            "wrap"
+        ]
+        assert monitor.get_render_histograms()["wrap"]["count"] == 1
+        assert monitor.get_metrics_summary()["render_stages"]["wrap"]["count"] == 1
+
+    def test_dump_benchmark(self, recorder):
+        """Histograms are written to the benchmark file as JSON."""
+        profiling.enable_profiling(recorder)
+        recorder.record("html2text", 12.5)
+        monitor = PerformanceMonitor(MagicMock(viewport_content=None, tts_engine=None))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_file = os.path.join(temp_dir, "bench", "out.json")
+            assert monitor.dump_benchmark(output_file) == output_file
+            with open(output_file, encoding="utf-8") as f:
+                report = json.load(f)
+        stage = report["render_stages"]["html2text"]
+        assert stage["p50_ms"] == stage["p99_ms"] == 12.5
+        assert "memory_rss_mb" in report["metrics"]
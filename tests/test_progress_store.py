@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite progress store.
+"""
+
+import json
+import os
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from speakub.core.progress_store import ProgressStore
+from speakub.core.progress_tracker import ProgressTracker
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    """A temporary home directory for the progress files."""
+    monkeypatch.setattr(Path, "home", classmethod(lambda cls: tmp_path))
+    return tmp_path
+
+
+def tracker_for(home: Path, name: str) -> ProgressTracker:
+    """A tracker for a book in the home directory."""
+    return ProgressTracker(os.path.join(home, name))
+
+
+class TestProgressStore:
+    """Test rows, transactions and the database setup."""
+
+    def test_wal_mode(self, tmp_path):
+        """The database is opened in WAL mode."""
+        store = ProgressStore(tmp_path / "progress.db")
+        try:
+            mode = store._conn.execute("PRAGMA journal_mode").fetchone()[0]
+        finally:
+            store.close()
+        assert mode == "wal"
+
+    def test_failed_batch_writes_nothing(self, tmp_path):
+        """put_many() is all or nothing."""
+        store = ProgressStore(tmp_path / "progress.db")
+        try:
+            with pytest.raises(TypeError):
+                store.put_many({"a": {"cfi": "x"}, "b": {"cfi": object()}})
+            assert len(store) == 0
+            store.put("a", {"cfi": "x"})
+            assert store.get("a") == {"cfi": "x"}
+        finally:
+            store.close()
+
+    def test_rows_survive_reopen(self, tmp_path):
+        """A second connection sees the committed rows."""
+        path = tmp_path / "progress.db"
+        first = ProgressStore(path)
+        first.put("a", {"cfi": "x", "timestamp": "2024-01-01T00:00:00"})
+        second = ProgressStore(path)
+        try:
+            assert second.get("a")["cfi"] == "x"
+        finally:
+            first.close()
+            second.close()
+
+
+class TestProgressTracker:
+    """Test ProgressTracker over the store."""
+
+    def test_save_touches_only_this_book(self, home):
+        """Saving one book keeps the others and replaces its own row."""
+        first = tracker_for(home, "a.epub")
+        second = tracker_for(home, "b.epub")
+        assert first.load_progress() is None
+        assert first.save_progress("c1.xhtml", "epubcfi(/6/2!/4/2/1:0)")
+        assert second.save_progress("c9.xhtml", "epubcfi(/6/18!/4/2/1:5)")
+        assert first.save_progress("c2.xhtml", "epubcfi(/6/4!/4/2/1:0)", {"x": 1})
+
+        progress = first.load_progress()
+        assert progress["src"] == "c2.xhtml" and progress["x"] == 1
+        assert progress["epub_path"] == first.epub_path
+        assert second.load_progress()["src"] == "c9.xhtml"
+        assert len(first.get_all_progress()) == 2
+        assert not home.joinpath(".speakub_progress.json").exists()
+
+        assert first.clear_progress()
+        assert first.load_progress() is None
+        assert second.load_progress() is not None
+        assert first.clear_all_progress()
+        assert second.get_all_progress() == {}
+
+    def test_json_file_is_migrated_once(self, home):
+        """Progress from the JSON file is imported when the database is created."""
+        legacy_path = str(Path(home, "old.epub").resolve())
+        legacy = {legacy_path: {"src": "c3.xhtml", "cfi": "epubcfi(/6/6)"}}
+        json_file = home / ".speakub_progress.json"
+        json_file.write_text(json.dumps(legacy), encoding="utf-8")
+
+        tracker = tracker_for(home, "old.epub")
+        assert tracker.load_progress() == legacy[legacy_path]
+        tracker.clear_progress()
+        tracker.close()
+
+        # The JSON file is kept but not imported again
+        assert json_file.exists()
+        assert tracker_for(home, "old.epub").load_progress() is None
+
+    def test_stats_in_database(self, home):
+        """Book statistics are rows of the database, matched by fingerprint."""
+        tracker = tracker_for(home, "a.epub")
+        fingerprint = {"size": 10, "mtime": 1.5, "sha256": "ab"}
+        assert tracker.save_book_stats(fingerprint, {"version": 2, "chapters": []})
+        assert tracker.load_book_stats(fingerprint) == {"version": 2, "chapters": []}
+        assert tracker.load_book_stats({**fingerprint, "size": 11}) is None
+        assert tracker_for(home, "b.epub").load_book_stats(fingerprint) is None
+
+    def test_export_import(self, home, tmp_path):
+        """export_progress() and import_progress() keep their JSON format."""
+        tracker = tracker_for(home, "a.epub")
+        tracker.save_progress("c1.xhtml", "epubcfi(/6/2)")
+        exported = tmp_path / "export.json"
+        assert tracker.export_progress(str(exported))
+        data = json.loads(exported.read_text(encoding="utf-8"))
+        assert data[tracker.epub_path]["src"] == "c1.xhtml"
+
+        data[tracker.epub_path]["src"] = "c7.xhtml"
+        data["/elsewhere/b.epub"] = {"src": "x.xhtml", "cfi": "epubcfi(/6/4)"}
+        exported.write_text(json.dumps(data), encoding="utf-8")
+        assert tracker.import_progress(str(exported))
+        assert tracker.load_progress()["src"] == "c7.xhtml"
+        assert len(tracker.get_all_progress()) == 2
+
+        exported.write_text("[1, 2]", encoding="utf-8")
+        assert not tracker.import_progress(str(exported))
+
+    def test_unusable_database(self, home):
+        """A database that cannot be opened fails saves without raising."""
+        (home / ".speakub_progress.db").write_bytes(b"not a database" * 100)
+        tracker = tracker_for(home, "a.epub")
+        assert tracker.load_progress() is None
+        assert not tracker.save_progress("c1.xhtml", "epubcfi(/6/2)")
+        assert tracker.get_all_progress() == {}
+
+    def test_reading_statistics(self, home):
+        """get_reading_statistics() reports the most recently read book."""
+        tracker_for(home, "a.epub").save_progress("c1.xhtml", "epubcfi(/6/2)")
+        last = tracker_for(home, "b.epub")
+        last.save_progress("c2.xhtml", "epubcfi(/6/4)")
+        stats = last.get_reading_statistics()
+        assert stats["total_books"] == 2
+        assert stats["books_with_progress"] == 2
+        assert stats["last_read"]["epub_path"] == last.epub_path
+        with sqlite3.connect(str(home / ".speakub_progress.db")) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM progress").fetchone()[0] == 2
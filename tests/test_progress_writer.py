@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Tests for the background progress writer.
+"""
+
+import asyncio
+import os
+import queue
+import signal
+import subprocess
+import sys
+import textwrap
+import threading
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from speakub.core.progress_tracker import ProgressTracker
+from speakub.core.progress_writer import ProgressWriter
+from speakub.ui.progress import ProgressManager
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    """A temporary home directory for the progress database."""
+    monkeypatch.setattr(Path, "home", classmethod(lambda cls: tmp_path))
+    return tmp_path
+
+
+class BlockingTracker:
+    """A tracker whose saves wait until released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.saved = []
+
+    def save_progress(self, chapter_src, cfi, additional_data=None):
+        self.release.wait(5)
+        self.saved.append(cfi)
+        return True
+
+
+class TestProgressWriter:
+    """Test queueing, coalescing and flushing."""
+
+    def test_newest_position_wins(self, home):
+        """Positions queued during a write are coalesced per book."""
+        tracker = ProgressTracker(os.path.join(home, "a.epub"))
+        other = ProgressTracker(os.path.join(home, "b.epub"))
+        writer = ProgressWriter()
+        for i in range(50):
+            assert writer.submit(tracker, "c1.xhtml", f"epubcfi(/6/2!/4/2/1:{i})")
+        writer.submit(other, "c3.xhtml", "epubcfi(/6/6)")
+        assert writer.close()
+
+        assert tracker.load_progress()["cfi"] == "epubcfi(/6/2!/4/2/1:49)"
+        assert other.load_progress()["src"] == "c3.xhtml"
+        stats = writer.get_stats()
+        assert stats["writes"] + stats["coalesced"] == 51
+        assert stats["failures"] == 0
+
+    def test_submit_never_blocks(self):
+        """A slow write fills the queue instead of stalling the caller."""
+        tracker = BlockingTracker()
+        writer = ProgressWriter(max_queued=4)
+        writer.submit(tracker, "c1.xhtml", "first")
+        while not writer._queue.empty():
+            pass
+        for i in range(4):
+            assert writer.submit(tracker, "c1.xhtml", f"p{i}")
+        for i in range(4, 6):
+            with pytest.raises(queue.Full):
+                writer.submit(tracker, "c1.xhtml", f"p{i}")
+        assert writer.get_stats()["rejected"] == 2
+
+        tracker.release.set()
+        assert writer.close()
+        assert tracker.saved == ["first", "p3"]
+        assert not writer.submit(tracker, "c1.xhtml", "late")
+
+    def test_survives_kill(self, tmp_path):
+        """Written positions survive a SIGKILL right after the write."""
+        script = textwrap.dedent(
+            f"""
+            import os, signal, sys
+            sys.path.insert(0, {str(Path(__file__).resolve().parents[1])!r})
+            from speakub.core.progress_tracker import ProgressTracker
+            from speakub.core.progress_writer import ProgressWriter
+            writer = ProgressWriter()
+            tracker = ProgressTracker(os.path.join(os.environ["HOME"], "a.epub"))
+            writer.submit(tracker, "c4.xhtml", "epubcfi(/6/8!/4/2/1:7)")
+            writer.flush()
+            os.kill(os.getpid(), signal.SIGKILL)
+            """
+        )
+        env = {**os.environ, "HOME": str(tmp_path)}
+        result = subprocess.run([sys.executable, "-c", script], env=env)
+        assert result.returncode == -signal.SIGKILL
+
+        with pytest.MonkeyPatch.context() as patch:
+            patch.setattr(Path, "home", classmethod(lambda cls: tmp_path))
+            tracker = ProgressTracker(os.path.join(tmp_path, "a.epub"))
+            assert tracker.load_progress()["cfi"] == "epubcfi(/6/8!/4/2/1:7)"
+
+
+class TestDebouncedSave:
+    """Test ProgressManager.save_progress() over the writer."""
+
+    def make_manager(self):
+        """A ProgressManager over a mocked app with a fixed position."""
+        app = MagicMock()
+        app.current_chapter = {"src": "c1.xhtml"}
+        manager = ProgressManager(app, None)
+        manager.get_cfi_from_line = MagicMock(return_value="epubcfi(/6/2!/4:0)")
+        return manager
+
+    def test_one_write_per_window(self):
+        """Many requests in one window give one write, without I/O on the loop."""
+        manager = self.make_manager()
+        manager._progress_save_delay = 0.01
+
+        async def scroll():
+            for _ in range(100):
+                manager.save_progress()
+            timer = manager._progress_save_timer
+            for _ in range(100):
+                manager.save_progress()
+                assert manager._progress_save_timer is timer
+            await timer
+
+        asyncio.run(scroll())
+        assert manager._progress_writer.flush()
+        manager.app.progress_tracker.save_progress.assert_called_once_with(
+            "c1.xhtml", "epubcfi(/6/2!/4:0)", None
+        )
+
+    def test_cleanup_writes_pending_position(self):
+        """Exiting inside a window still writes the last position."""
+        manager = self.make_manager()
+
+        async def scroll_and_exit():
+            manager.save_progress()
+            manager.cleanup()
+
+        asyncio.run(scroll_and_exit())
+        manager.app.progress_tracker.save_progress.assert_called_once()
+        assert not manager._pending_progress_save
+
+    def test_rejected_position_is_retried(self):
+        """A position the full queue rejects is submitted again a window later."""
+        manager = self.make_manager()
+        manager._progress_save_delay = 0.01
+        submit = manager._progress_writer.submit
+        calls = []
+
+        def full_once(*args):
+            calls.append(args)
+            if len(calls) == 1:
+                raise queue.Full
+            return submit(*args)
+
+        manager._progress_writer.submit = MagicMock(side_effect=full_once)
+
+        async def scroll():
+            manager.save_progress()
+            await manager._progress_save_timer
+
+        asyncio.run(scroll())
+        assert manager._progress_writer.submit.call_count == 2
+        assert not manager._pending_progress_save
+        assert manager._progress_writer.close()
+        manager.app.progress_tracker.save_progress.assert_called_once()
+
+    def test_cleanup_without_chapter(self):
+        """Exiting after the chapter was cleared does not raise."""
+        manager = self.make_manager()
+
+        async def scroll_and_exit():
+            manager.save_progress()
+            manager.app.current_chapter = None
+            manager.cleanup()
+
+        asyncio.run(scroll_and_exit())
+        manager.app.progress_tracker.save_progress.assert_not_called()
+
+    def test_unreadable_position_is_dropped(self):
+        """A position that cannot be read ends the save instead of polling."""
+        manager = self.make_manager()
+        manager._progress_save_delay = 0.01
+        manager.get_cfi_from_line.side_effect = RuntimeError("no index")
+
+        async def scroll():
+            manager.save_progress()
+            await asyncio.wait_for(manager._progress_save_timer, timeout=1)
+
+        asyncio.run(scroll())
+        assert not manager._pending_progress_save
+        manager.app.progress_tracker.save_progress.assert_not_called()
+        assert manager._progress_writer.close()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the rendered chapter cache.
+"""
+
+import os
+import tempfile
+from unittest.mock import patch
+
+import pytest
+
+from speakub.core.content_renderer import ContentRenderer
+from speakub.core.render_cache import RenderCache
+
+CHAPTER_HTML = (
+    "<html><body><h1>Chapter</h1>"
+    + "".join(
+        f"<p>Paragraph {i} 的內容，包含一些中文字元與 English words.</p>"
+        for i in range(40)
+    )
+    + "</body></html>"
+)
+
+
+class TestRenderCache:
+    """Test the memory and disk tiers of the render cache."""
+
+    @pytest.fixture
+    def cache_dir(self):
+        """Provide an isolated disk tier directory."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            yield temp_dir
+
+    def test_memory_hit_returns_copy(self):
+        """Cached lines come back equal but cannot be mutated in place."""
+        cache = RenderCache()
+        key = cache.make_key(CHAPTER_HTML, 60)
+        cache.put(key, ["a", "b"])
+
+        lines = cache.get(key)
+        assert lines == ["a", "b"]
+        lines.append("c")
+        assert cache.get(key) == ["a", "b"]
+        assert cache.get_stats()["memory_hits"] == 2
+
+    def test_key_depends_on_content_and_width(self):
+        """Different widths or content never share an entry."""
+        cache = RenderCache()
+        cache.put(cache.make_key(CHAPTER_HTML, 60), ["narrow"])
+
+        assert cache.get(cache.make_key(CHAPTER_HTML, 80)) is None
+        assert cache.get(cache.make_key(CHAPTER_HTML + " ", 60)) is None
+        assert cache.get(cache.make_key(CHAPTER_HTML, 60)) == ["narrow"]
+
+    def test_byte_budget_evicts(self):
+        """The memory tier stays within its byte budget."""
+        cache = RenderCache(max_bytes=4096)
+        for i in range(20):
+            cache.put(("digest", 20 + i), [f"line {n}" for n in range(20)])
+
+        stats = cache.get_stats()
+        assert stats["bytes"] <= 4096
+        assert stats["evictions"] > 0
+
+    def test_disk_tier_survives_new_instance(self, cache_dir):
+        """A fresh cache (e.g. after a restart) reads entries from disk."""
+        lines = ["第一行", "", "second line"]
+        key = RenderCache.make_key(CHAPTER_HTML, 70)
+        RenderCache(disk_cache=True, cache_dir=cache_dir).put(key, lines)
+
+        reopened = RenderCache(disk_cache=True, cache_dir=cache_dir)
+        assert reopened.get(key) == lines
+        assert reopened.get(key) == lines
+
+        stats = reopened.get_stats()
+        assert stats["disk_hits"] == 1
+        assert stats["memory_hits"] == 1
+        assert stats["hit_rate"] == 1.0
+
+    def test_corrupt_disk_entry_is_discarded(self, cache_dir):
+        """Unreadable entries count as misses and are removed."""
+        cache = RenderCache(disk_cache=True, cache_dir=cache_dir)
+        key = cache.make_key(CHAPTER_HTML, 70)
+        cache.put(key, ["line"])
+        entry_path = cache._entry_path(key)
+        with open(entry_path, "wb") as f:
+            f.write(b"not zlib data")
+
+        reopened = RenderCache(disk_cache=True, cache_dir=cache_dir)
+        assert reopened.get(key) is None
+        assert not os.path.exists(entry_path)
+
+    def test_disk_tier_is_pruned(self, cache_dir):
+        """Least recently used files are removed once over budget."""
+        cache = RenderCache(
+            max_bytes=0, disk_cache=True, cache_dir=cache_dir, max_disk_bytes=2048
+        )
+        for i in range(30):
+            cache.put((f"{i:040x}", 80), [f"{i} {n} " * 8 for n in range(10)])
+
+        total = sum(size for _, size, _ in cache._scan_disk())
+        assert total <= 2048
+        assert cache.get((f"{29:040x}", 80)) is not None
+
+    def test_clear_disk(self, cache_dir):
+        """clear(disk=True) removes persisted entries as well."""
+        cache = RenderCache(disk_cache=True, cache_dir=cache_dir)
+        key = cache.make_key(CHAPTER_HTML, 70)
+        cache.put(key, ["line"])
+        cache.clear(disk=True)
+        assert cache.get(key) is None
+
+
+class TestContentRendererCache:
+    """Test that ContentRenderer serves repeated renders from the cache."""
+
+    def test_cached_render_matches_uncached(self):
+        """A cache hit returns exactly what rendering produced."""
+        renderer = ContentRenderer(content_width=60)
+        first = renderer.render_chapter(CHAPTER_HTML)
+
+        with patch.object(
+            renderer, "_render_uncached", side_effect=AssertionError("re-rendered")
+        ):
+            assert renderer.render_chapter(CHAPTER_HTML) == first
+
+        fresh = ContentRenderer(
+            content_width=60, render_cache=RenderCache(max_bytes=0)
+        )
+        assert fresh.render_chapter(CHAPTER_HTML) == first
+
+    def test_width_flip_hits_cache(self):
+        """Switching between two widths renders each width only once."""
+        renderer = ContentRenderer()
+        with patch.object(
+            renderer, "_render_uncached", wraps=renderer._render_uncached
+        ) as render:
+            for width in (60, 100, 60, 100, 60):
+                renderer.render_chapter(CHAPTER_HTML, width=width)
+        assert render.call_count == 2
+
+        stats = renderer.get_cache_stats()
+        assert stats["render_cache"]["memory_hits"] == 3
+        assert stats["render_hit_rate"] == pytest.approx(3 / 5)
+
+    def test_disabled_cache_always_renders(self):
+        """A zero budget without a disk tier caches nothing."""
+        renderer = ContentRenderer(render_cache=RenderCache(max_bytes=0))
+        with patch.object(
+            renderer, "_render_uncached", wraps=renderer._render_uncached
+        ) as render:
+            renderer.render_chapter(CHAPTER_HTML)
+            renderer.render_chapter(CHAPTER_HTML)
+        assert render.call_count == 2
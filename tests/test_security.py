@@ -232,6 +232,69 @@ class TestEPUBSecurity:
                 os.unlink(epub_path)
 
 
+class TestStreamingGuard:
+    """Test read-time limits and cached validation verdicts."""
+
+    @pytest.fixture
+    def epub_path(self):
+        """Create a valid EPUB with one small and one large chapter."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            epub_path = os.path.join(temp_dir, "guard.epub")
+            with zipfile.ZipFile(epub_path, "w", zipfile.ZIP_DEFLATED) as zf:
+                zf.writestr("META-INF/container.xml",
+                            """<?xml version="1.0"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+    <rootfiles>
+        <rootfile full-path="content.opf" media-type="application/oebps-package+xml"/>
+    </rootfiles>
+</container>""")
+                zf.writestr("content.opf",
+                            """<?xml version="1.0"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="3.0">
+    <metadata xmlns:dc="http://purl.org/dc/elements/1.1/">
+        <dc:title>Test</dc:title>
+    </metadata>
+    <manifest>
+        <item id="small" href="small.xhtml" media-type="application/xhtml+xml"/>
+        <item id="large" href="large.xhtml" media-type="application/xhtml+xml"/>
+    </manifest>
+    <spine>
+        <itemref idref="small"/>
+        <itemref idref="large"/>
+    </spine>
+</package>""")
+                zf.writestr("small.xhtml", "<html><body>Small</body></html>")
+                zf.writestr("large.xhtml", os.urandom(256 * 1024))
+            yield epub_path
+
+    def test_oversized_entry_rejected_at_read_time(self, epub_path):
+        """Test that a large entry is caught when read, not at open."""
+        parser = EPUBParser(epub_path, max_entry_bytes=64 * 1024)
+        with parser:
+            assert "Small" in parser.read_chapter("small.xhtml")
+            with pytest.raises(SecurityError, match="Zip entry too large"):
+                parser.read_chapter("large.xhtml")
+            with pytest.raises(SecurityError, match="Zip entry too large"):
+                parser.read_resource("large.xhtml")
+
+    def test_guard_disabled_by_default(self, epub_path):
+        """Test that without a per-entry limit large entries are readable."""
+        with EPUBParser(epub_path) as parser:
+            parser.read_chapter("large.xhtml")
+
+    def test_validation_verdict_is_cached(self, epub_path):
+        """Test that reopening an unchanged file skips the validation pass."""
+        with EPUBParser(epub_path) as parser:
+            first_open_cached = parser.get_statistics()["security_verdict_cached"]
+
+        with patch(
+            "speakub.core.epub_parser.validate_archive", side_effect=AssertionError
+        ):
+            with EPUBParser(epub_path) as parser:
+                assert parser.get_statistics()["security_verdict_cached"] is True
+        assert first_open_cached is False
+
+
 class TestMemoryLimit:
     """Test memory usage limits."""
 
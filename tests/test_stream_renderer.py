@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming fallback renderer.
+"""
+
+from unittest.mock import patch
+
+from speakub.core.content_renderer import ContentRenderer
+from speakub.core.render_cache import RenderCache
+from speakub.core.stream_renderer import (
+    StreamingTextRenderer,
+    iter_stream_lines,
+    render_stream_lines,
+)
+from speakub.utils.config import get_render_config
+
+CHAPTER_HTML = (
+    "<html><head><title>Ignored</title><style>p {}</style></head><body>"
+    "<h1>第一章 &amp; Title</h1>"
+    "<p>First   paragraph with <b>bold</b>\n and <em>emphasis</em>.</p>"
+    "<p>Line one<br/>line two</p>"
+    "<ul><li>one</li><li>two<ul><li>nested</li></ul></li></ul>"
+    "<pre>code\n    indented</pre>"
+    "<p>Picture <img src='a.png' alt='Alt'/> and <img src='b.png'/></p>"
+    "<script>alert('</p>')</script><div>Last block</div>"
+    "</body></html>"
+)
+
+
+def uncached_renderer(**kwargs) -> ContentRenderer:
+    """A renderer that renders every call from scratch."""
+    return ContentRenderer(render_cache=RenderCache(max_bytes=0), **kwargs)
+
+
+class TestStreamingTextRenderer:
+    """Test the block structure of streamed output."""
+
+    def test_block_structure(self):
+        """Headings, paragraphs, lists and preformatted text stay separate."""
+        assert render_stream_lines(CHAPTER_HTML) == [
+            "# 第一章 & Title",
+            "",
+            "First paragraph with **bold** and *emphasis*.",
+            "",
+            "Line one",
+            "line two",
+            "",
+            "* one",
+            "",
+            "* two",
+            "",
+            "  * nested",
+            "",
+            "code",
+            "    indented",
+            "",
+            'Picture [Image: Alt src="a.png"] and [Image src="b.png"]',
+            "",
+            "Last block",
+        ]
+
+    def test_lines_are_emitted_incrementally(self):
+        """Lines of closed blocks are available before the input ends."""
+        html = "".join(f"<p>Paragraph {i}</p>" for i in range(100))
+        renderer = StreamingTextRenderer()
+        lines = renderer.feed_chunks(html, chunk_chars=64)
+        assert next(lines) == "Paragraph 0"
+        assert len(renderer.rawdata) < len(html)
+        assert list(iter_stream_lines(html, 64)) == list(iter_stream_lines(html))
+
+    def test_unclosed_markup(self):
+        """Text of unterminated blocks is flushed at the end."""
+        assert render_stream_lines("<div><span>open <b>text") == ["open **text"]
+
+
+class TestRendererSelection:
+    """Test when ContentRenderer uses the streaming renderer."""
+
+    def test_size_threshold_skips_html2text(self):
+        """Chapters over the threshold never reach html2text."""
+        renderer = uncached_renderer(stream_threshold_bytes=100)
+        with patch.object(
+            renderer, "_run_html2text", side_effect=AssertionError("html2text used")
+        ):
+            lines = renderer.render_chapter(CHAPTER_HTML, 80)
+        assert lines[0] == "# 第一章 & Title"
+        assert "Last block" in lines
+
+    def test_timeout_falls_back(self):
+        """html2text is abandoned once its time budget is spent."""
+        html = "<p>" + "slow paragraph " * 10000 + "</p><p>end</p>"
+        renderer = uncached_renderer(html2text_timeout=0.0)
+        lines = renderer.render_chapter(html, 80)
+        assert lines[-1] == "end"
+        # The abandoned parser is replaced, so the next chapter renders normally
+        renderer.html2text_timeout = None
+        assert renderer.render_chapter("<p>next</p>", 80) == ["next"]
+
+    def test_fallback_output_is_not_cached(self, tmp_path):
+        """Text from a timed-out html2text never reaches the render cache."""
+        html = "<blockquote><p>quoted</p></blockquote><ol><li>first</li></ol>"
+
+        def renderer(timeout):
+            cache = RenderCache(disk_cache=True, cache_dir=str(tmp_path))
+            return ContentRenderer(render_cache=cache, html2text_timeout=timeout)
+
+        degraded = renderer(0.0).render_chapter(html, 80)
+        failing = renderer(None)
+        with patch.object(failing, "_run_html2text", side_effect=ValueError("boom")):
+            failing.render_chapter(html, 80)
+        assert not any(tmp_path.iterdir())
+        full = renderer(None).render_chapter(html, 80)
+        assert full != degraded and "> quoted" in full
+        assert renderer(0.0).render_chapter(html, 80) == full
+
+    def test_chunked_html2text_matches_handle(self):
+        """Feeding html2text in timed chunks gives the same output."""
+        html = CHAPTER_HTML * 400
+        timed = uncached_renderer(html2text_timeout=60.0, stream_threshold_bytes=None)
+        plain = uncached_renderer(html2text_timeout=None, stream_threshold_bytes=None)
+        assert timed.render_chapter(html, 60) == plain.render_chapter(html, 60)
+
+    def test_errors_keep_paragraphs(self):
+        """An html2text failure no longer collapses the chapter into one line."""
+        renderer = uncached_renderer()
+        with patch.object(renderer, "_run_html2text", side_effect=ValueError("boom")):
+            lines = renderer.render_chapter(CHAPTER_HTML, 80)
+        assert "Last block" in lines
+        assert lines.count("") >= 5
+
+    def test_render_config(self):
+        """Limits come from the render config section; 0 disables them."""
+        assert get_render_config({}) == {
+            "stream_threshold_bytes": 2 * 1024 * 1024,
+            "html2text_timeout": 3.0,
+        }
+        assert get_render_config(
+            {"render": {"stream_threshold_mb": 0, "html2text_timeout": None}}
+        ) == {"stream_threshold_bytes": None, "html2text_timeout": None}
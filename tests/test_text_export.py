@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the headless --dump text export.
+"""
+
+import io
+import os
+import tempfile
+
+import pytest
+from epub_builder import write_epub
+
+from speakub.cli import main
+from speakub.core import text_export
+from speakub.core.text_export import dump_book, get_export_order
+
+CHAPTERS = 6
+
+
+def write_book(epub_path: str) -> None:
+    """Write an EPUB whose spine order differs from its file order."""
+    write_epub(
+        epub_path,
+        {
+            f"c{i}.xhtml": f"<html><body><h1>Chapter {i}</h1>"
+            f"<p>{'這是第' + str(i) + '章的內容。' * 20}</p></body></html>"
+            for i in range(CHAPTERS)
+        },
+        title="Dump Test",
+        opf_dir="OEBPS",
+        spine=[3, 0, 5, 1, 4, 2],
+    )
+
+
+@pytest.fixture
+def epub_path():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "dump.epub")
+        write_book(path)
+        yield path
+
+
+class TestTextExport:
+    """Test the dump pipeline."""
+
+    def test_export_order_follows_spine(self, epub_path):
+        """Test that chapters are exported in spine order."""
+        order = get_export_order(epub_path)
+        assert [os.path.basename(src) for src in order] == [
+            "c3.xhtml", "c0.xhtml", "c5.xhtml", "c1.xhtml", "c4.xhtml", "c2.xhtml"
+        ]
+
+    def test_in_process_dump(self, epub_path):
+        """Test a single-job dump writes every chapter in spine order."""
+        out = io.StringIO()
+        assert dump_book(epub_path, out, cols=40, jobs=1) == CHAPTERS
+        text = out.getvalue()
+        positions = [text.index(f"# Chapter {i}") for i in (3, 0, 5, 1, 4, 2)]
+        assert positions == sorted(positions)
+        assert all(
+            text_export.ContentRenderer(40)._get_display_width(line) <= 40
+            for line in text.splitlines()
+        )
+
+    def test_process_pool_matches_in_process(self, epub_path):
+        """Test that parallel output matches with a window smaller than the book."""
+        serial = io.StringIO()
+        dump_book(epub_path, serial, cols=40, jobs=1)
+        parallel = io.StringIO()
+        assert dump_book(epub_path, parallel, cols=40, jobs=2, window=2) == CHAPTERS
+        assert parallel.getvalue() == serial.getvalue()
+
+    def test_cli_dump_to_file(self, epub_path):
+        """Test --dump --output writes the file and exits successfully."""
+        output = epub_path + ".txt"
+        with pytest.raises(SystemExit) as exc_info:
+            main([epub_path, "--dump", "--cols", "50", "--jobs", "1",
+                  "--output", output])
+        assert exc_info.value.code == 0
+        with open(output, encoding="utf-8") as f:
+            assert "# Chapter 3" in f.read()
+
+    def test_cli_dump_uses_reader_limits(self, epub_path, monkeypatch):
+        """Test --dump reads with the entry limit and mmap setting of the reader."""
+        config = {"max_entry_bytes": 1 << 20, "use_mmap": True}
+        monkeypatch.setattr(
+            "speakub.utils.config.get_epub_config", lambda: config
+        )
+        calls = []
+        monkeypatch.setattr(
+            text_export, "dump_book", lambda *args, **kwargs: calls.append(kwargs)
+        )
+        with pytest.raises(SystemExit) as exc_info:
+            main([epub_path, "--dump", "--jobs", "1", "--output", epub_path + ".txt"])
+        assert exc_info.value.code == 0
+        assert calls[0]["max_entry_bytes"] == 1 << 20
+        assert calls[0]["use_mmap"] is True
+
+    def test_workers_read_with_limits(self, epub_path):
+        """Test that worker parsers get the entry limit and mmap setting."""
+        text_export._init_worker(epub_path, 40, 1 << 20, True)
+        try:
+            assert text_export._worker_parser.max_entry_bytes == 1 << 20
+            assert text_export._worker_parser.use_mmap
+        finally:
+            text_export._worker_parser.close()
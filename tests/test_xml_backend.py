@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Differential tests for the lxml package-document backend.
+
+Every fixture book is parsed twice, once with lxml and once with lxml
+disabled (BeautifulSoup/ElementTree), and the results must be identical.
+"""
+
+import os
+import tempfile
+import zipfile
+from contextlib import ExitStack
+from unittest.mock import patch
+
+import pytest
+
+from speakub.core.epub import xml_backend
+from speakub.core.epub_parser import EPUBParser
+
+pytestmark = pytest.mark.skipif(
+    not xml_backend.HAS_LXML, reason="lxml not installed")
+
+CONTAINER = """<?xml version="1.0"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+    <rootfiles>
+        <rootfile full-path="OEBPS/content.opf"
+                  media-type="application/oebps-package+xml"/>
+    </rootfiles>
+</container>"""
+
+CHAPTERS = 6
+
+
+def _opf(title="<dc:title>Fixture Book</dc:title>", nav=True, ncx=True,
+         package_open=None, extra_items=""):
+    """Build an OPF for CHAPTERS chapters with optional nav/ncx items."""
+    items = "".join(
+        f'<item id="c{i}" href="Text/c{i}.xhtml" media-type="application/xhtml+xml"/>'
+        for i in range(CHAPTERS)
+    )
+    if nav:
+        items += ('<item id="nav" href="nav.xhtml" '
+                  'media-type="application/xhtml+xml" properties="nav"/>')
+    if ncx:
+        items += ('<item id="ncx" href="toc.ncx" '
+                  'media-type="application/x-dtbncx+xml"/>')
+    spine = "".join(f'<itemref idref="c{i}"/>' for i in range(CHAPTERS))
+    package_open = package_open or (
+        '<package xmlns="http://www.idpf.org/2007/opf" version="3.0">')
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+{package_open}
+  <metadata xmlns:dc="http://purl.org/dc/elements/1.1/">{title}</metadata>
+  <manifest>{items}{extra_items}</manifest>
+  <spine toc="ncx">{spine}<itemref idref="missing"/></spine>
+</package>"""
+
+
+def _nav(items, epub_ns='xmlns:epub="http://www.idpf.org/2007/ops"',
+         nav_attr='epub:type="toc"', doctype=""):
+    """Build a nav document around the given <li> markup."""
+    return f"""<?xml version="1.0" encoding="UTF-8"?>{doctype}
+<html xmlns="http://www.w3.org/1999/xhtml" {epub_ns}>
+<body>
+  <nav epub:type="landmarks"><ol><li><a href="Text/c0.xhtml">Cover</a></li></ol></nav>
+  <nav {nav_attr}><h1>Contents</h1><ol>{items}</ol></nav>
+</body></html>"""
+
+
+def _nav_point(i, title, children=""):
+    return (f'<navPoint id="n{i}" playOrder="{i}"><navLabel><text>{title}</text>'
+            f'</navLabel><content src="Text/c{i}.xhtml#s{i}"/>{children}</navPoint>')
+
+
+def _ncx(points, doctype=""):
+    return f"""<?xml version="1.0" encoding="UTF-8"?>{doctype}
+<ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" version="2005-1">
+  <head><meta name="dtb:uid" content="x"/></head>
+  <docTitle><text>Fixture</text></docTitle>
+  <navMap>{points}</navMap>
+</ncx>"""
+
+
+FLAT_LIS = "".join(
+    f'<li><a href="Text/c{i}.xhtml">Chapter {i}</a></li>' for i in range(CHAPTERS))
+NESTED_NCX = _ncx(
+    _nav_point(0, "Preface")
+    + _nav_point(1, "Part One", _nav_point(2, "One") + _nav_point(3, "Two"))
+    + _nav_point(4, "Volume 2")
+    + _nav_point(5, "  Chapter\n   Five ")
+)
+NCX_DOCTYPE = ('\n<!DOCTYPE ncx PUBLIC "-//NISO//DTD ncx 2005-1//EN" '
+               '"http://www.daisy.org/z3986/2005/ncx-2005-1.dtd">')
+
+# name -> (opf, nav, ncx)
+CORPUS = {
+    "nav-flat-with-ncx": (_opf(), _nav(FLAT_LIS), NESTED_NCX),
+    "nav-flat-only": (_opf(ncx=False), _nav(FLAT_LIS), None),
+    "nav-groups": (
+        _opf(),
+        _nav(
+            '<li><span>Part <em>One</em></span><ol>'
+            '<li><a href="Text/c1.xhtml">One</a></li>'
+            '<li><a href="Text/c2.xhtml#frag">Two <!-- note --> more</a></li>'
+            '</ol></li>'
+            '<li><a href="Text/c3.xhtml">【Interlude】</a></li>'
+            '<li><a href="Text/c4.xhtml">第二卷</a></li>'
+            '<li><a>No link</a></li>'
+            '<li><a href="Text/c5.xhtml"><span>Span in link</span></a></li>'
+        ),
+        NESTED_NCX,
+    ),
+    "nav-prefixed-package": (
+        _opf(package_open=(
+            '<opf:package xmlns:opf="http://www.idpf.org/2007/opf" '
+            'xmlns="http://www.idpf.org/2007/opf" version="3.0">'
+        )).replace("</package>", "</opf:package>"),
+        _nav(FLAT_LIS),
+        None,
+    ),
+    "nav-other-epub-prefix": (
+        _opf(),
+        _nav(FLAT_LIS, epub_ns='xmlns:ops="http://www.idpf.org/2007/ops"',
+             nav_attr='ops:type="toc"').replace(
+            '<nav epub:type="landmarks">', '<nav ops:type="landmarks">'),
+        NESTED_NCX,
+    ),
+    "nav-entities": (
+        _opf(title="<dc:title>Fish &amp; Chips</dc:title>"),
+        _nav(FLAT_LIS.replace("Chapter 1", "Chapter&nbsp;1")),
+        None,
+    ),
+    "ncx-nested": (_opf(nav=False), None, NESTED_NCX),
+    "ncx-doctype-and-comments": (
+        _opf(nav=False),
+        None,
+        _ncx(
+            "<!-- generated -->" + _nav_point(0, "A")
+            + _nav_point(1, "B <!-- x --> b", _nav_point(2, "C")),
+            doctype=NCX_DOCTYPE,
+        ),
+    ),
+    "ncx-malformed": (
+        _opf(nav=False),
+        None,
+        NESTED_NCX.replace("Volume 2", "Volume&nbsp;2"),
+    ),
+    "ncx-volumes": (
+        _opf(nav=False),
+        None,
+        _ncx("".join(
+            _nav_point(i, f"第{i}卷" if i % 3 == 0 else f"Chapter {i}")
+            for i in range(CHAPTERS)
+        )),
+    ),
+    "title-markup": (
+        _opf(title="<dc:title>\n  The <!-- c --><b>Bold</b> Title  </dc:title>"),
+        None,
+        None,
+    ),
+    "title-missing": (_opf(title="", nav=False, ncx=False), None, None),
+    "title-default-namespace": (
+        _opf(title='<title xmlns="http://purl.org/dc/elements/1.1/">Hidden</title>'),
+        None,
+        None,
+    ),
+    "manifest-oddities": (
+        _opf(extra_items=(
+            '<item href="Text/noid.xhtml" media-type="application/xhtml+xml"/>'
+            '<item id="css" href="Styles/a.css" media-type="text/css"/>'
+        )),
+        _nav(FLAT_LIS),
+        None,
+    ),
+}
+
+
+def _build_book(path, opf, nav, ncx):
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("mimetype", "application/epub+zip")
+        zf.writestr("META-INF/container.xml", CONTAINER)
+        zf.writestr("OEBPS/content.opf", opf)
+        if nav is not None:
+            zf.writestr("OEBPS/nav.xhtml", nav)
+        if ncx is not None:
+            zf.writestr("OEBPS/toc.ncx", ncx)
+        for i in range(CHAPTERS):
+            zf.writestr(f"OEBPS/Text/c{i}.xhtml",
+                        f"<html><body><p>Chapter {i}</p></body></html>")
+
+
+def _parse(epub_path, use_lxml):
+    """Parse a book with lxml enabled or disabled everywhere."""
+    modules = [
+        "speakub.core.epub.xml_backend",
+        "speakub.core.epub.opf_parser",
+        "speakub.core.epub.toc_parser",
+        "speakub.core.epub_parser",
+    ]
+    with ExitStack() as stack:
+        if not use_lxml:
+            for module in modules:
+                stack.enter_context(patch(f"{module}.HAS_LXML", False))
+        with EPUBParser(epub_path) as parser:
+            toc = parser.parse_toc()
+            return toc, parser._opf_cache, parser.get_statistics()
+
+
+@pytest.fixture(scope="module")
+def corpus_dir():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for name, (opf, nav, ncx) in CORPUS.items():
+            _build_book(os.path.join(temp_dir, f"{name}.epub"), opf, nav, ncx)
+        yield temp_dir
+
+
+class TestLxmlBackend:
+    """Test that the lxml backend matches the BeautifulSoup parsers."""
+
+    @pytest.mark.parametrize("name", sorted(CORPUS))
+    def test_results_identical(self, corpus_dir, name):
+        """Test TOC and OPF results for one fixture book."""
+        epub_path = os.path.join(corpus_dir, f"{name}.epub")
+        fast_toc, fast_opf, fast_stats = _parse(epub_path, use_lxml=True)
+        slow_toc, slow_opf, slow_stats = _parse(epub_path, use_lxml=False)
+
+        assert fast_stats["xml_backend"] == "lxml"
+        assert slow_stats["xml_backend"] == "bs4"
+        assert fast_toc == slow_toc
+        assert fast_opf == slow_opf
+
+    def test_corpus_exercises_every_source(self, corpus_dir):
+        """Test that the fixtures cover nav, ncx and spine TOCs."""
+        sources = {
+            _parse(os.path.join(corpus_dir, f"{name}.epub"), True)[0]["toc_source"]
+            for name in CORPUS
+        }
+        assert {"nav.xhtml", "toc.ncx", "spine"} <= sources
+
+    def test_parse_times_reported(self, corpus_dir):
+        """Test that per-stage parse times are in the statistics."""
+        _, _, stats = _parse(
+            os.path.join(corpus_dir, "nav-flat-with-ncx.epub"), True)
+        times = stats["parse_times_ms"]
+        assert {"container", "opf", "nav", "ncx"} <= set(times)
+        assert all(value >= 0 for value in times.values())
+
+    def test_prefixed_attribute_lookup(self):
+        """Test that epub:type only matches a declared epub prefix."""
+        root = xml_backend.parse_xml(
+            '<r xmlns:epub="http://www.idpf.org/2007/ops">'
+            '<nav epub:type="toc"/><nav type="toc"/></r>'
+        )
+        navs = list(xml_backend.iter_named(root, "nav"))
+        assert xml_backend.get_prefixed_attr(navs[0], "epub:type") == "toc"
+        assert xml_backend.get_prefixed_attr(navs[1], "epub:type") is None